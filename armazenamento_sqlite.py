@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+
+
+# Armazenamento do banco em SQLite.
+#
+# Implementa a interface Armazenamento de desafio_1_sistema_bancario com tabelas
+# indexadas para clientes, contas, transações, usos dos limites diários e chaves de idempotência. Cada transação
+# vira um INSERT (e um UPDATE do saldo) em vez de regravar arquivos inteiros, e o
+# extrato de uma conta é lido pelo índice (conta, id) em vez de varrer a memória.
+#
+# Uso:
+#   python armazenamento_sqlite.py migrar banco.db   # Copia os dados dos arquivos JSON para o SQLite.
+#   python desafio_1_sistema_bancario.py --sqlite banco.db
+
+import argparse  # Para ler os argumentos da linha de comando.
+import queue  # Fila thread-safe usada como pool de conexões.
+import sqlite3  # Banco de dados SQLite (biblioteca padrão).
+import sys  # Para o código de saída do programa.
+from contextlib import contextmanager  # Para criar os gerenciadores de contexto do pool.
+
+import desafio_1_sistema_bancario as banco
+
+
+# Estrutura do banco de dados. Os índices atendem às consultas mais frequentes:
+# contas de um cliente, extrato de uma conta, usos e chaves vencidos. Os usos dos limites
+# seguem o formato compacto de transacoes_diarias.json: o momento de cada transação e de
+# cada saque, por conta; a tabela transacoes_diarias (quantidade por dia) é do formato
+# antigo e só é lida para migrar bancos de dados anteriores.
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS clientes (
+    cpf TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    data_nascimento TEXT,
+    endereco TEXT
+);
+CREATE TABLE IF NOT EXISTS contas (
+    numero TEXT PRIMARY KEY,
+    agencia TEXT NOT NULL,
+    saldo REAL NOT NULL DEFAULT 0,
+    cliente_cpf TEXT NOT NULL REFERENCES clientes(cpf)
+);
+CREATE INDEX IF NOT EXISTS idx_contas_cliente ON contas(cliente_cpf);
+CREATE TABLE IF NOT EXISTS transacoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conta TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    valor REAL NOT NULL,
+    data TEXT NOT NULL,
+    cpf TEXT,
+    dia TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transacoes_conta ON transacoes(conta, id);
+CREATE INDEX IF NOT EXISTS idx_transacoes_dia ON transacoes(dia);
+CREATE TABLE IF NOT EXISTS transacoes_diarias (
+    conta TEXT NOT NULL,
+    dia TEXT NOT NULL,
+    quantidade INTEGER NOT NULL,
+    PRIMARY KEY (conta, dia)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS usos_limites (
+    contador TEXT NOT NULL,
+    conta TEXT NOT NULL,
+    momento INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_usos_limites_momento ON usos_limites(momento);
+CREATE TABLE IF NOT EXISTS idempotencia (
+    chave TEXT PRIMARY KEY,
+    momento INTEGER NOT NULL,
+    impressao TEXT NOT NULL,
+    motivo TEXT  -- Motivo da recusa (NULL: transação aceita).
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_idempotencia_momento ON idempotencia(momento);
+"""
+
+
+# --------------------------- POOL DE CONEXÕES ---------------------------
+
+class PoolConexoes:
+    """Pool pequeno de conexões SQLite, reaproveitadas entre as operações (e entre threads)."""
+    def __init__(self, caminho, tamanho=4):
+        """Abre 'tamanho' conexões com o arquivo informado, em modo WAL."""
+        self.caminho = str(caminho)
+        self._livres = queue.Queue(maxsize=tamanho)  # Conexões disponíveis para uso.
+        self._todas = []  # Todas as conexões abertas (para fechar no final).
+        for _ in range(tamanho):
+            con = self._nova_conexao()
+            self._todas.append(con)
+            self._livres.put(con)
+
+    def _nova_conexao(self):
+        """Abre e configura uma conexão."""
+        # isolation_level=None: as transações são controladas explicitamente com BEGIN/COMMIT.
+        con = sqlite3.connect(self.caminho, check_same_thread=False, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")  # Leitores não bloqueiam o escritor.
+        con.execute("PRAGMA synchronous=FULL")  # O COMMIT só retorna depois de gravado em disco.
+        con.execute("PRAGMA foreign_keys=ON")
+        con.execute("PRAGMA busy_timeout=5000")  # Espera até 5 s se outra conexão estiver escrevendo.
+        return con
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool durante o bloco 'with'."""
+        con = self._livres.get()
+        try:
+            yield con
+        finally:
+            self._livres.put(con)
+
+    @contextmanager
+    def transacao(self):
+        """Empresta uma conexão e executa o bloco 'with' dentro de uma transação (COMMIT ou ROLLBACK)."""
+        with self.conexao() as con:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                yield con
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+
+    def fechar(self):
+        """Fecha todas as conexões do pool."""
+        for con in self._todas:
+            con.close()
+        self._todas = []
+
+
+# --------------------------- ARMAZENAMENTO ---------------------------
+
+def dia_da_data(data):
+    """Converte 'dd/mm/aaaa HH:MM:SS' em 'aaaa-mm-dd' (ou None se a data estiver em outro formato)."""
+    try:
+        d, m, a = data[:10].split("/")
+        return f"{a}-{m}-{d}"
+    except (TypeError, ValueError):
+        return None
+
+
+CONTADORES_LIMITES = ("transacoes", "saques")  # Contadores de usos guardados em usos_limites.
+
+
+def usos_dos_limites(limites):
+    """Converte os contadores no formato compacto (Bank.dados_limites) em tuplas (contador, conta, momento)."""
+    for contador in CONTADORES_LIMITES:
+        for conta, momentos in limites.get(contador, {}).items():
+            for momento in momentos:
+                yield contador, conta, momento
+
+
+def usos_do_registro(registro):
+    """Usos dos limites de um registro gravado, como tuplas (contador, conta, momento) (ver banco.usos_do_registro)."""
+    momento = banco.data_para_epoca(registro["data"])
+    for contador, quantidade in zip(CONTADORES_LIMITES, banco.usos_do_registro(registro)):
+        for _ in range(quantidade):
+            yield contador, registro["conta"], momento
+
+
+class ArmazenamentoSQLite(banco.Armazenamento):
+    """Persistência em um arquivo SQLite (modo WAL), com pool de conexões."""
+    def __init__(self, caminho, tamanho_pool=4):
+        """Abre (ou cria) o banco de dados no caminho informado."""
+        self.pool = PoolConexoes(caminho, tamanho_pool)
+        with self.pool.conexao() as con:
+            con.executescript(ESQUEMA)
+        self._migrar_contadores_legados()
+        self._migrar_idempotencia()
+
+    def carregar(self):
+        """Lê as tabelas e devolve os dados no mesmo formato dos arquivos JSON."""
+        with self.pool.conexao() as con:
+            contas_por_cpf = {}
+            contas = []
+            for numero, agencia, saldo, cpf in con.execute("SELECT numero, agencia, saldo, cliente_cpf FROM contas ORDER BY rowid"):
+                contas.append({"numero": numero, "agencia": agencia, "saldo": saldo, "cliente_cpf": cpf})
+                contas_por_cpf.setdefault(cpf, []).append(numero)
+            clientes = [
+                {"endereco": endereco, "contas": contas_por_cpf.get(cpf, []), "nome": nome, "cpf": cpf, "data_nascimento": nascimento}
+                for cpf, nome, nascimento, endereco in con.execute("SELECT cpf, nome, data_nascimento, endereco FROM clientes ORDER BY rowid")
+            ]
+            # Só as transações de contas inexistentes: o histórico de cada conta é lido quando for pedido.
+            extratos = [
+                {"tipo": tipo, "valor": valor, "data": data, "cpf": cpf, "conta": conta}
+                for tipo, valor, data, cpf, conta in con.execute(
+                    "SELECT tipo, valor, data, cpf, conta FROM transacoes WHERE conta NOT IN (SELECT numero FROM contas) ORDER BY id"
+                )
+            ]
+            limites = {"formato": banco.FORMATO_LIMITES, **{contador: {} for contador in CONTADORES_LIMITES}}
+            for contador, conta, momento in con.execute("SELECT contador, conta, momento FROM usos_limites ORDER BY momento"):
+                limites.setdefault(contador, {}).setdefault(conta, []).append(momento)
+            idempotencia = [list(linha) for linha in con.execute("SELECT chave, momento, impressao, motivo FROM idempotencia")]
+        # Cada transação já é gravada no banco de dados no momento em que acontece: não há journal a reaplicar.
+        return {
+            "clientes": clientes,
+            "contas": contas,
+            "extratos": extratos,
+            "historico_sob_demanda": True,
+            "transacoes_diarias": limites,
+            "idempotencia": idempotencia,
+            "journal": [],
+        }
+
+    def _migrar_contadores_legados(self):
+        """Converte as quantidades por dia da tabela antiga transacoes_diarias em usos_limites (uma vez só)."""
+        with self.pool.transacao() as con:
+            legados = {f"{conta}_{dia}": quantidade for conta, dia, quantidade in con.execute("SELECT conta, dia, quantidade FROM transacoes_diarias")}
+            if not legados:
+                return
+            con.executemany("INSERT INTO usos_limites (contador, conta, momento) VALUES (?, ?, ?)",
+                            list(usos_dos_limites(banco.migrar_limites(legados))))
+            con.execute("DELETE FROM transacoes_diarias")
+
+    def _migrar_idempotencia(self):
+        """Acrescenta a coluna motivo à tabela idempotencia de um banco de dados criado antes dela."""
+        with self.pool.conexao() as con:
+            colunas = [linha[1] for linha in con.execute("PRAGMA table_info(idempotencia)")]
+            if "motivo" not in colunas:
+                con.execute("ALTER TABLE idempotencia ADD COLUMN motivo TEXT")
+
+    def carregar_historico(self, numero_conta):
+        """Lê as transações de uma conta pelo índice (conta, id)."""
+        with self.pool.conexao() as con:
+            return [
+                {"tipo": tipo, "valor": valor, "data": data, "cpf": cpf, "conta": conta}
+                for tipo, valor, data, cpf, conta in con.execute(
+                    "SELECT tipo, valor, data, cpf, conta FROM transacoes WHERE conta = ? ORDER BY id", (numero_conta,)
+                )
+            ]
+
+    def marca_historico(self, numero_conta):
+        """Quantidade e maior id das transações da conta (pelo índice (conta, id))."""
+        with self.pool.conexao() as con:
+            return list(con.execute("SELECT COUNT(*), MAX(id) FROM transacoes WHERE conta = ?", (numero_conta,)).fetchone())
+
+    def salvar_tudo(self, bank):
+        """Substitui todo o conteúdo das tabelas pelo estado atual do banco (uma única transação)."""
+        # Os históricos ainda não lidos são buscados antes de apagar as tabelas.
+        historicos = [c.historico.to_list() for c in bank.contas] + [bank.extratos]
+        with self.pool.transacao() as con:
+            con.execute("DELETE FROM transacoes")
+            con.execute("DELETE FROM usos_limites")
+            con.execute("DELETE FROM idempotencia")
+            con.execute("DELETE FROM contas")
+            con.execute("DELETE FROM clientes")
+            con.executemany(
+                "INSERT INTO clientes (cpf, nome, data_nascimento, endereco) VALUES (?, ?, ?, ?)",
+                [(c.cpf, c.nome, c.data_nascimento, c.endereco) for c in bank.clientes],
+            )
+            con.executemany(
+                "INSERT INTO contas (numero, agencia, saldo, cliente_cpf) VALUES (?, ?, ?, ?)",
+                [(c.numero, c.agencia, c.saldo, c.cliente.cpf) for c in bank.contas],
+            )
+            for transacoes in historicos:
+                con.executemany(
+                    "INSERT INTO transacoes (conta, tipo, valor, data, cpf, dia) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(t.get("conta"), t.get("tipo"), t.get("valor"), t.get("data"), t.get("cpf"), dia_da_data(t.get("data"))) for t in transacoes],
+                )
+            limites = bank.dados_limites()
+            con.executemany("INSERT INTO usos_limites (contador, conta, momento) VALUES (?, ?, ?)", list(usos_dos_limites(limites)))
+            con.executemany("INSERT INTO idempotencia (chave, momento, impressao, motivo) VALUES (?, ?, ?, ?)",
+                            [(entrada + [None])[:4] for entrada in limites["idempotencia"]])
+
+    def registrar_transacoes(self, bank, registros):
+        """Insere as transações, atualiza os saldos, os usos dos limites diários e as chaves de idempotência (uma única transação).
+
+        Os registros de recusa (evento 'recusa') só gravam a chave de idempotência, com o motivo,
+        e os de usos (evento 'usos') só os usos dos limites.
+        """
+        transacoes = [r for r in registros if r.get("evento") is None]
+        with self.pool.transacao() as con:
+            con.executemany(
+                "INSERT INTO transacoes (conta, tipo, valor, data, cpf, dia) VALUES (?, ?, ?, ?, ?, ?)",
+                [(r["conta"], r["tipo"], r["valor"], r["data"], r["cpf"], r["dia"]) for r in transacoes],
+            )
+            usos = [uso for r in registros for uso in usos_do_registro(r)]
+            if usos:
+                con.executemany("INSERT INTO usos_limites (contador, conta, momento) VALUES (?, ?, ?)", usos)
+                # Os usos que saíram da janela (mesmo na de 24 horas) não contam mais em nenhum limite.
+                con.execute("DELETE FROM usos_limites WHERE momento < ?", (max(uso[2] for uso in usos) - 86400,))
+            chaves = [(r["idempotencia"][0], banco.data_para_epoca(r["data"]), r["idempotencia"][1], r.get("motivo"))
+                      for r in registros if r.get("idempotencia")]
+            if chaves:
+                con.executemany("INSERT OR REPLACE INTO idempotencia (chave, momento, impressao, motivo) VALUES (?, ?, ?, ?)", chaves)
+                con.execute("DELETE FROM idempotencia WHERE momento < ?", (chaves[-1][1] - bank.idempotencia.validade,))
+            numeros = {r["conta"] for r in transacoes}
+            con.executemany(
+                "UPDATE contas SET saldo = ? WHERE numero = ?",
+                [(bank.buscar_conta(n).saldo, n) for n in numeros if bank.buscar_conta(n)],
+            )
+
+    def salvar_cliente(self, bank, cliente):
+        """Grava apenas a linha do cliente."""
+        with self.pool.transacao() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO clientes (cpf, nome, data_nascimento, endereco) VALUES (?, ?, ?, ?)",
+                (cliente.cpf, cliente.nome, cliente.data_nascimento, cliente.endereco),
+            )
+
+    def salvar_conta(self, bank, conta):
+        """Grava apenas a linha da conta."""
+        with self.pool.transacao() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO contas (numero, agencia, saldo, cliente_cpf) VALUES (?, ?, ?, ?)",
+                (conta.numero, conta.agencia, conta.saldo, conta.cliente.cpf),
+            )
+
+    def consultar_extrato(self, bank, numero_conta):
+        """Lê as transações de uma conta direto do banco de dados, sem passar pelo histórico em memória."""
+        return self.carregar_historico(numero_conta)
+
+    def descricao(self):
+        """Caminho do arquivo SQLite."""
+        return f"banco de dados SQLite {self.pool.caminho}"
+
+    def fechar(self):
+        """Fecha as conexões do pool."""
+        self.pool.fechar()
+
+
+# --------------------------- LINHA DE COMANDO ---------------------------
+
+def migrar(caminho_db, diretorio_json=None):
+    """Copia os dados dos arquivos JSON (incluindo o journal) para um banco SQLite."""
+    bank = banco.Bank(banco.ArmazenamentoJSON(diretorio_json))
+    destino = ArmazenamentoSQLite(caminho_db)
+    try:
+        destino.salvar_tudo(bank)
+    finally:
+        destino.fechar()
+        bank.fechar()
+    print(f"\n> {len(bank.clientes)} clientes e {len(bank.contas)} contas migrados para {caminho_db}.")
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando do armazenamento SQLite."""
+    parser = argparse.ArgumentParser(description="Ferramentas do armazenamento SQLite do banco.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_migrar = sub.add_parser("migrar", help="Copia os dados dos arquivos JSON para o SQLite.")
+    p_migrar.add_argument("banco_de_dados", help="Caminho do arquivo SQLite de destino.")
+    p_migrar.add_argument("--diretorio-json", help="Pasta dos arquivos JSON (padrão: pasta do script).")
+    args = parser.parse_args(argv)
+
+    if args.comando == "migrar":
+        migrar(args.banco_de_dados, args.diretorio_json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+
+
+# Banco particionado em vários processos.
+#
+# Um Bank é um único objeto na memória de um único processo, e o número de cada conta
+# nova vinha da quantidade de contas (o que não serve para mais de um processo). Aqui o
+# banco é dividido em N partições, cada uma um Bank em um processo próprio, com os seus
+# próprios arquivos (pasta particao_00, particao_01...). O cliente mora na partição do
+# seu CPF e cada conta na partição do seu número (banco.particao_do_cliente e
+# banco.particao_da_conta); o roteador (BancoParticionado) envia cada operação à
+# partição dona, e um lote de operações é dividido por partição e aplicado em paralelo.
+#
+# Cada partição só gera números de conta do seu resto pelo total de partições
+# (Bank.proximo_numero_conta), então não há número repetido entre partições. A quantidade
+# de partições fica gravada em particoes.json (de forma atômica, como os arquivos do
+# snapshot) e não pode mudar sem dividir os dados de novo; um particoes.json ilegível é
+# um erro, e não uma pasta ainda não dividida.
+#
+# Transferências só são aceitas entre contas da mesma partição.
+#
+# Uso:
+#   python banco_particionado.py dividir --destino dados_particionados --particoes 4
+#   python banco_particionado.py processar operacoes.jsonl --pasta dados_particionados --saida resultados.jsonl
+
+import argparse  # Para ler os argumentos da linha de comando.
+import json  # Para gravar os resultados das operações.
+import sys  # Para a saída padrão e o código de saída do programa.
+import time  # Para medir a vazão do processamento.
+from concurrent.futures import ProcessPoolExecutor  # Um processo (de um só trabalhador) por partição.
+from functools import partial  # Para descrever o armazenamento que cada processo deve abrir.
+from itertools import islice  # Para dividir o fluxo de operações em lotes.
+from pathlib import Path  # Para lidar com os caminhos dos arquivos.
+
+import desafio_1_sistema_bancario as banco
+import processamento_lote as lote
+
+
+ARQ_PARTICOES = "particoes.json"  # Arquivo com a quantidade de partições, na pasta dos dados particionados.
+TAMANHO_LOTE_PADRAO = 10000  # Operações lidas antes de cada distribuição entre as partições.
+
+MOTIVO_TRANSFERENCIA_ENTRE_PARTICOES = "transferencia_entre_particoes"
+
+_bank_processo = None  # Bank da partição aberto por cada processo (ver _iniciar_particao).
+
+
+# --------------------------- ARMAZENAMENTO DAS PARTIÇÕES ---------------------------
+
+def armazenamento_da_particao(diretorio, indice):
+    """Armazenamento JSON da partição 'indice' (subpasta particao_NN de 'diretorio')."""
+    pasta = Path(diretorio) / f"particao_{indice:02d}"
+    pasta.mkdir(parents=True, exist_ok=True)
+    return banco.ArmazenamentoJSON(pasta)
+
+
+def conferir_total_particoes(diretorio, total_particoes):
+    """Grava a quantidade de partições da pasta, ou confere se é a mesma já gravada (ValueError se não for)."""
+    gravado = total_particoes_gravado(diretorio)
+    if gravado is not None:
+        if gravado != total_particoes:
+            raise ValueError(f"{diretorio} foi dividido em {gravado} partições, não em {total_particoes}")
+        return
+    Path(diretorio).mkdir(parents=True, exist_ok=True)
+    banco.gravar_snapshot(Path(diretorio) / ARQ_PARTICOES, {"total": total_particoes})
+
+
+def total_particoes_gravado(diretorio):
+    """Quantidade de partições gravada em particoes.json (None se a pasta não foi dividida).
+
+    Levanta banco.ArquivoCorrompido se o arquivo existir mas não puder ser lido: tratar a
+    pasta como não dividida faria as contas irem para as partições erradas.
+    """
+    arquivo = Path(diretorio) / ARQ_PARTICOES
+    if not arquivo.exists():
+        return None
+    dados = banco.ler_snapshot(arquivo)
+    total = dados.get("total") if isinstance(dados, dict) else None
+    if not isinstance(total, int) or total < 1:
+        raise banco.ArquivoCorrompido(f"{arquivo}: quantidade de partições inválida ({dados!r})")
+    return total
+
+
+# --------------------------- OPERAÇÕES NA PARTIÇÃO ---------------------------
+# Funções executadas dentro do processo da partição, com o Bank dele. Recebem e devolvem
+# apenas dados simples, que podem ir e voltar entre processos.
+
+def _iniciar_particao(fabrica_particao, indice, total_particoes, durabilidade):
+    """Abre, no processo da partição, o Bank sobre o armazenamento da partição."""
+    global _bank_processo
+    banco.EXIBIR_MENSAGENS = False
+    _bank_processo = banco.Bank(fabrica_particao(indice), durabilidade, particao=indice, total_particoes=total_particoes)
+
+
+def _cadastrar_cliente(bank, nome, cpf, data_nascimento, endereco):
+    """Cadastra o cliente. Retorna False se o CPF já existir."""
+    return bank.cadastrar_cliente(nome, cpf, data_nascimento, endereco) is not None
+
+
+def _abrir_conta(bank, cpf):
+    """Abre uma conta para o cliente. Retorna o número da conta (None se o cliente não existir)."""
+    cliente = bank.buscar_cliente(cpf)
+    return bank.abrir_conta(cliente).numero if cliente else None
+
+
+def _aplicar_lote(bank, operacoes):
+    """Aplica as operações (dicionários do processamento em lote) e persiste uma vez. Retorna [(ok, motivo), ...]."""
+    resultados = [lote.aplicar_operacao(bank, operacao) for operacao in operacoes]
+    bank.persistir_pendentes()
+    return resultados
+
+
+def _saldo(bank, numero):
+    """Saldo da conta (None se ela não existir)."""
+    conta = bank.buscar_conta(numero)
+    return conta.saldo if conta else None
+
+
+def _extrato(bank, numero, filtros):
+    """Página do extrato da conta (Bank.consultar_extrato), ou None se ela não existir."""
+    if bank.buscar_conta(numero) is None:
+        return None
+    return bank.consultar_extrato(numero, **filtros)
+
+
+def _contas_do_cliente(bank, cpf):
+    """Números e saldos das contas do cliente nesta partição."""
+    return [(conta.numero, conta.saldo) for conta in bank.contas_por_cpf.get(cpf, [])]
+
+
+def _buscar_clientes(bank, texto, limite):
+    """Clientes da partição encontrados pela busca (Bank.buscar_clientes): ([(nome, cpf, endereço), ...], completa)."""
+    clientes, completa = bank.buscar_clientes(texto, limite)
+    return [(cliente.nome, cliente.cpf, cliente.endereco) for cliente in clientes], completa
+
+
+def _resumo(bank):
+    """Quantidade de clientes e de contas e soma dos saldos (centavos) da partição."""
+    return len(bank.clientes), len(bank.contas), sum(conta.saldo_centavos for conta in bank.contas)
+
+
+def _fechar(bank):
+    """Persiste o que estiver pendente e libera o armazenamento da partição."""
+    bank.fechar()
+
+
+def _executar_na_particao(funcao, *args):
+    """Tarefa enviada ao processo da partição: chama a função com o Bank dele."""
+    return funcao(_bank_processo, *args)
+
+
+# --------------------------- ROTEADOR ---------------------------
+
+class BancoParticionado:
+    """Roteador do banco particionado: envia cada operação ao processo da partição dona.
+
+    Cada partição é um ProcessPoolExecutor de um só processo, então as operações de uma
+    partição são aplicadas uma de cada vez, na ordem de chegada, e as de partições
+    diferentes andam em paralelo (um núcleo por partição).
+    """
+    def __init__(self, fabrica_particao, total_particoes, durabilidade=banco.DURABILIDADE_SINCRONA):
+        """Inicia um processo por partição; 'fabrica_particao(indice)' abre o armazenamento de cada uma.
+
+        A fábrica precisa poder ser enviada a outro processo (por exemplo,
+        partial(armazenamento_da_particao, pasta)).
+        """
+        if total_particoes < 1:
+            raise ValueError("o banco particionado precisa de pelo menos uma partição")
+        self.total_particoes = total_particoes
+        self.particoes = [
+            ProcessPoolExecutor(1, initializer=_iniciar_particao, initargs=(fabrica_particao, indice, total_particoes, durabilidade))
+            for indice in range(total_particoes)
+        ]
+
+    def _enviar(self, indice, funcao, *args):
+        """Envia a função à partição 'indice' e retorna o Future do resultado."""
+        return self.particoes[indice].submit(_executar_na_particao, funcao, *args)
+
+    def _chamar(self, indice, funcao, *args):
+        """Executa a função na partição 'indice' e espera o resultado."""
+        return self._enviar(indice, funcao, *args).result()
+
+    def _em_todas(self, funcao, *args):
+        """Executa a função em todas as partições ao mesmo tempo. Retorna os resultados na ordem das partições."""
+        futuros = [self._enviar(indice, funcao, *args) for indice in range(self.total_particoes)]
+        return [futuro.result() for futuro in futuros]
+
+    def particao_da_conta(self, numero):
+        """Índice da partição dona da conta."""
+        return banco.particao_da_conta(numero, self.total_particoes)
+
+    def particao_do_cliente(self, cpf):
+        """Índice da partição do cliente."""
+        return banco.particao_do_cliente(cpf, self.total_particoes)
+
+    # ------------------ CADASTROS ------------------
+    def cadastrar_cliente(self, nome, cpf, data_nascimento, endereco):
+        """Cadastra o cliente na partição do seu CPF. Retorna False se o CPF já existir."""
+        return self._chamar(self.particao_do_cliente(cpf), _cadastrar_cliente, nome, cpf, data_nascimento, endereco)
+
+    def abrir_conta(self, cpf):
+        """Abre uma conta para o cliente, na partição do seu CPF. Retorna o número (None se o cliente não existir)."""
+        return self._chamar(self.particao_do_cliente(cpf), _abrir_conta, cpf)
+
+    # ------------------ TRANSAÇÕES ------------------
+    def _motivo_antes_de_enviar(self, operacao):
+        """Motivo de recusa que o roteador já conhece (transferência entre partições), ou None."""
+        if lote.e_transferencia(operacao) and operacao.get("destino") is not None:
+            origem = self.particao_da_conta(str(operacao.get("conta", "")).strip())
+            if origem != self.particao_da_conta(str(operacao["destino"]).strip()):
+                return MOTIVO_TRANSFERENCIA_ENTRE_PARTICOES
+        return None
+
+    def executar(self, operacao):
+        """Aplica uma operação (cpf, conta, tipo, valor e, nas transferências, destino). Retorna (ok, motivo)."""
+        return self.executar_lote([operacao])[0]
+
+    def executar_lote(self, operacoes):
+        """Aplica um lote de operações, dividido por partição e em paralelo. Retorna [(ok, motivo), ...] na ordem.
+
+        Dentro de cada partição as operações seguem a ordem do lote, e cada partição persiste
+        a sua parte uma única vez.
+        """
+        resultados = [None] * len(operacoes)
+        por_particao = {}  # Índice da partição -> (posições no lote, operações).
+        for posicao, operacao in enumerate(operacoes):
+            motivo = self._motivo_antes_de_enviar(operacao)
+            if motivo:
+                resultados[posicao] = (False, motivo)
+                continue
+            posicoes, enviadas = por_particao.setdefault(self.particao_da_conta(str(operacao.get("conta", "")).strip()), ([], []))
+            posicoes.append(posicao)
+            enviadas.append(operacao)
+
+        futuros = [(posicoes, self._enviar(indice, _aplicar_lote, enviadas)) for indice, (posicoes, enviadas) in por_particao.items()]
+        for posicoes, futuro in futuros:
+            for posicao, resultado in zip(posicoes, futuro.result()):
+                resultados[posicao] = resultado
+        return resultados
+
+    # ------------------ CONSULTAS ------------------
+    def saldo(self, numero):
+        """Saldo da conta (None se ela não existir)."""
+        return self._chamar(self.particao_da_conta(numero), _saldo, numero)
+
+    def consultar_extrato(self, numero, **filtros):
+        """Página do extrato da conta (ver Bank.consultar_extrato), ou None se ela não existir."""
+        return self._chamar(self.particao_da_conta(numero), _extrato, numero, filtros)
+
+    def contas_do_cliente(self, cpf):
+        """Números e saldos das contas do cliente (as contas de dados divididos podem estar em qualquer partição)."""
+        return sorted(conta for contas in self._em_todas(_contas_do_cliente, cpf) for conta in contas)
+
+    def buscar_clientes(self, texto, limite=banco.LIMITE_BUSCA):
+        """Busca os clientes em todas as partições (ver Bank.buscar_clientes). Retorna ([(nome, cpf, endereço), ...], completa).
+
+        Um cliente de dados divididos pode estar em mais de uma partição: aparece uma vez só.
+        """
+        encontrados, completa = {}, True
+        for clientes, completa_particao in self._em_todas(_buscar_clientes, texto, limite):
+            completa = completa and completa_particao
+            for cliente in clientes:
+                encontrados.setdefault(cliente[1], cliente)
+        clientes = sorted(encontrados.values(), key=lambda c: (banco.normalizar_busca(c[0]), c[1]))
+        return clientes[:limite], completa and len(clientes) <= limite
+
+    def resumo(self):
+        """Clientes, contas e soma dos saldos (em reais) de cada partição."""
+        return [
+            {"particao": indice, "clientes": clientes, "contas": contas, "saldo_total": centavos / 100}
+            for indice, (clientes, contas, centavos) in enumerate(self._em_todas(_resumo))
+        ]
+
+    def fechar(self):
+        """Persiste o que estiver pendente em cada partição e encerra os processos."""
+        try:
+            self._em_todas(_fechar)
+        finally:
+            for particao in self.particoes:
+                particao.shutdown()
+
+
+# --------------------------- DIVISÃO DOS DADOS ---------------------------
+
+def dividir_dados(bank, fabrica_particao, total_particoes):
+    """Copia os dados de um Bank comum para as partições (que devem estar vazias). Retorna o resumo por partição.
+
+    Cada conta vai para a partição do seu número, com histórico, saldo e contadores. O
+    cliente vai para a partição do seu CPF e para as partições das suas contas, pois a
+    partição que aplica as operações de uma conta confere o CPF do titular.
+    """
+    limites = bank.dados_limites()
+    resumo = []
+    for indice in range(total_particoes):
+        particao = banco.Bank(fabrica_particao(indice), particao=indice, total_particoes=total_particoes)
+        try:
+            if particao.clientes or particao.contas:
+                raise ValueError(f"a partição {indice} já tem dados")
+            contas = [c for c in bank.contas if banco.particao_da_conta(c.numero, total_particoes) == indice]
+            cpfs = {c.cliente.cpf for c in contas}
+            for cliente in bank.clientes:
+                if cliente.cpf in cpfs or banco.particao_do_cliente(cliente.cpf, total_particoes) == indice:
+                    particao._restaurar_cliente(cliente.to_dict())
+            for conta in contas:
+                nova = particao._restaurar_conta(conta.to_dict())
+                for registro in conta.historico:
+                    nova.historico.adicionar_registro(registro)
+            particao._restaurar_limites(limites)  # Só os contadores das contas desta partição são mantidos.
+            particao.alterados.update(("clientes", "contas", "transacoes_diarias"))
+            particao.save_all()
+            resumo.append({"particao": indice, "clientes": len(particao.clientes), "contas": len(particao.contas)})
+        finally:
+            particao.fechar()
+    return resumo
+
+
+# --------------------------- LINHA DE COMANDO ---------------------------
+
+def processar_arquivo(roteador, operacoes, saida, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    """Aplica um fluxo de operações pelo roteador, lote a lote, gravando um resultado JSONL por operação.
+
+    Retorna (aceitas, recusadas por motivo).
+    """
+    aceitas = 0
+    motivos = {}
+    itens = enumerate(operacoes, start=1)
+    while True:
+        bloco = list(islice(itens, tamanho_lote))
+        if not bloco:
+            break
+        for (indice, operacao), (ok, motivo) in zip(bloco, roteador.executar_lote([operacao for _indice, operacao in bloco])):
+            saida.write(json.dumps(lote.montar_resultado(indice, operacao, ok, motivo), ensure_ascii=False) + "\n")
+            if ok:
+                aceitas += 1
+            else:
+                motivos[motivo] = motivos.get(motivo, 0) + 1
+    return aceitas, motivos
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando do banco particionado."""
+    parser = argparse.ArgumentParser(description="Banco dividido em partições, uma por processo.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    dividir = comandos.add_parser("dividir", help="Copia os dados de um banco comum (JSON) para as partições.")
+    dividir.add_argument("--destino", required=True, help="Pasta onde criar as partições.")
+    dividir.add_argument("--particoes", type=int, required=True, help="Quantidade de partições.")
+    dividir.add_argument("--diretorio", help="Pasta dos dados de origem (padrão: pasta do script).")
+
+    processar = comandos.add_parser("processar", help="Aplica um arquivo de operações (JSONL ou CSV) nas partições.")
+    processar.add_argument("arquivo", help="Arquivo de operações, no formato do processamento_lote.py.")
+    processar.add_argument("--pasta", required=True, help="Pasta das partições.")
+    processar.add_argument("--particoes", type=int, help="Quantidade de partições (padrão: a gravada na pasta).")
+    processar.add_argument("--formato", choices=["jsonl", "csv"], help="Formato do arquivo (padrão: pela extensão).")
+    processar.add_argument("--saida", help="Arquivo JSONL onde gravar o resultado de cada operação (padrão: saída padrão).")
+    processar.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE_PADRAO, help="Operações por distribuição entre as partições.")
+    args = parser.parse_args(argv)
+
+    banco.EXIBIR_MENSAGENS = False
+    if args.comando == "dividir":
+        if args.particoes < 1:
+            parser.error("--particoes precisa ser pelo menos 1")
+        try:
+            conferir_total_particoes(args.destino, args.particoes)
+        except ValueError as e:
+            parser.error(str(e))
+        bank = banco.Bank(banco.ArmazenamentoJSON(args.diretorio))
+        try:
+            resumo = dividir_dados(bank, partial(armazenamento_da_particao, args.destino), args.particoes)
+        except ValueError as e:
+            print(f"\n> {e}", file=sys.stderr)
+            return 1
+        finally:
+            bank.fechar()
+        for r in resumo:
+            print(f"> Partição {r['particao']}: {r['clientes']} clientes, {r['contas']} contas")
+        return 0
+
+    try:
+        total = args.particoes or total_particoes_gravado(args.pasta)
+        if not total:
+            parser.error(f"{args.pasta} não tem {ARQ_PARTICOES}: informe --particoes")
+        conferir_total_particoes(args.pasta, total)
+    except ValueError as e:
+        parser.error(str(e))
+
+    roteador = BancoParticionado(partial(armazenamento_da_particao, args.pasta), total)
+    saida = open(args.saida, "w", encoding="utf-8") if args.saida else sys.stdout
+    inicio = time.perf_counter()
+    try:
+        aceitas, motivos = processar_arquivo(roteador, lote.ler_operacoes(args.arquivo, args.formato), saida, args.tamanho_lote)
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+        roteador.fechar()
+    duracao = time.perf_counter() - inicio
+
+    # O resumo vai para stderr para não se misturar com os resultados na saída padrão.
+    recusadas = sum(motivos.values())
+    print(f"\n> {aceitas} operações aceitas, {recusadas} recusadas, em {total} partições "
+          f"({(aceitas + recusadas) / duracao if duracao else 0:.0f} operações/s).", file=sys.stderr)
+    for motivo, quantidade in sorted(motivos.items()):
+        print(f"> {motivo}: {quantidade}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+
+# Benchmark do sistema bancário.
+#
+# Gera dados sintéticos (clientes.json, contas.json, extratos.json e
+# transacoes_diarias.json, no mesmo formato gravado pelo Bank) em várias escalas e
+# mede os caminhos mais usados: carga (load_all), snapshot (save_all), transações
+# (registrar_transacao), login por CPF, extrato (Historico.mostrar) e exportação do
+# extrato em TXT. O resultado é um JSON, para comparar versões entre si.
+# Roda sem rede e só com a biblioteca padrão; os dados ficam em uma pasta temporária.
+#
+# Uso:
+#   python benchmark.py                         # Escalas 1k e 100k, resultado na saída padrão.
+#   python benchmark.py --escalas 1k,100k,10m --saida resultado.json
+#   python benchmark.py --escalas 1k --pasta dados_benchmark   # Mantém os dados gerados.
+
+import argparse  # Para ler os argumentos da linha de comando.
+import contextlib  # Para descartar o que o Bank imprime durante as medições.
+import json  # Para gravar os dados sintéticos e o resultado.
+import os  # Para o tamanho dos arquivos gerados.
+import platform  # Para registrar a máquina e a versão do Python no resultado.
+import random  # Para sortear os dados sintéticos (com semente fixa).
+import subprocess  # Para registrar o commit do git medido, se houver.
+import sys  # Para o código de saída do programa.
+import tempfile  # Para a pasta temporária dos dados.
+import time  # Para cronometrar as operações.
+from datetime import date, datetime, timedelta  # Para as datas das transações sintéticas.
+from pathlib import Path  # Para lidar com os caminhos dos arquivos.
+
+import desafio_1_sistema_bancario as banco
+
+
+# Escalas disponíveis: quantidade total de transações no extrato.
+ESCALAS = {"1k": 1_000, "100k": 100_000, "10m": 10_000_000}
+TRANSACOES_POR_CONTA = 100  # Cada conta recebe este número de transações (a última pode receber menos).
+DIAS_DE_HISTORICO = 30  # As transações de cada conta se espalham pelos últimos dias.
+
+
+# --------------------------- DADOS SINTÉTICOS ---------------------------
+
+class EscritorListaJSON:
+    """Grava uma lista JSON item a item, no mesmo formato de salvar_json (indent=4), sem montar a lista em memória."""
+    def __init__(self, caminho):
+        """Abre o arquivo e escreve o início da lista."""
+        self.arquivo = open(caminho, "w", encoding="utf-8")
+        self.vazia = True
+
+    def escrever(self, item):
+        """Acrescenta um item à lista."""
+        texto = "    " + json.dumps(item, indent=4, ensure_ascii=False).replace("\n", "\n    ")
+        self.arquivo.write(("[\n" if self.vazia else ",\n") + texto)
+        self.vazia = False
+
+    def fechar(self):
+        """Escreve o fim da lista e fecha o arquivo."""
+        self.arquivo.write("[]" if self.vazia else "\n]")
+        self.arquivo.close()
+
+
+def gerar_dados(pasta, transacoes, transacoes_por_conta=TRANSACOES_POR_CONTA, semente=42):
+    """Gera os quatro arquivos JSON com 'transacoes' transações no total. Retorna (clientes, contas).
+
+    Cada cliente tem uma conta; o saldo de cada conta é a soma das suas transações.
+    """
+    pasta = Path(pasta)
+    sorteio = random.Random(semente)
+    # O histórico termina antes de hoje, para não ocupar o limite de transações diárias de hoje.
+    inicio = datetime.combine(date.today(), datetime.min.time()) - timedelta(days=DIAS_DE_HISTORICO)
+    intervalo = DIAS_DE_HISTORICO * 86400 // transacoes_por_conta  # Segundos entre duas transações (mais um sorteio).
+    contas = -(-transacoes // transacoes_por_conta)  # Divisão arredondada para cima.
+
+    clientes_json = EscritorListaJSON(pasta / banco.ARQ_CLIENTES.name)
+    contas_json = EscritorListaJSON(pasta / banco.ARQ_CONTAS.name)
+    extratos_json = EscritorListaJSON(pasta / banco.ARQ_EXTRATOS.name)
+    with open(pasta / banco.ARQ_TRANSACOES_DIARIAS.name, "w", encoding="utf-8") as diarias:
+        diarias.write("{")
+        primeira_diaria = True
+        restantes = transacoes
+        for i in range(contas):
+            cpf = str(10 ** 10 + i)
+            numero = str(i + 1).zfill(4)
+            quantidade = min(transacoes_por_conta, restantes)
+            restantes -= quantidade
+
+            saldo = 0
+            por_dia = {}
+            for k in range(quantidade):
+                momento = inicio + timedelta(seconds=k * intervalo + sorteio.randrange(intervalo))
+                valor = float(sorteio.randint(1, 500))
+                tipo = "Saque" if saldo >= valor and sorteio.random() < 0.4 else "Deposito"
+                saldo += -valor if tipo == "Saque" else valor
+                extratos_json.escrever({"tipo": tipo, "valor": valor, "data": momento.strftime(banco.FORMATO_DATA), "cpf": cpf, "conta": numero})
+                dia = momento.strftime("%Y-%m-%d")
+                por_dia[dia] = por_dia.get(dia, 0) + 1
+
+            clientes_json.escrever({"endereco": f"Rua Sintética, {i} - Centro - Cidade/UF", "contas": [numero],
+                                    "nome": f"Cliente {i}", "cpf": cpf, "data_nascimento": "01/01/1990"})
+            contas_json.escrever({"numero": numero, "agencia": "0001", "saldo": saldo, "cliente_cpf": cpf})
+            for dia, quantidade_dia in por_dia.items():
+                diarias.write(("\n" if primeira_diaria else ",\n") + f'    "{numero}_{dia}": {quantidade_dia}')
+                primeira_diaria = False
+        diarias.write("}" if primeira_diaria else "\n}")
+    for escritor in (clientes_json, contas_json, extratos_json):
+        escritor.fechar()
+    return contas, contas
+
+
+# --------------------------- MEDIÇÕES ---------------------------
+
+def cronometrar(operacao, funcao, repeticoes=1):
+    """Executa 'funcao' 'repeticoes' vezes e retorna as estatísticas de tempo (em segundos)."""
+    tempos = []
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+    ordenados = sorted(tempos)
+    return {
+        "operacao": operacao,
+        "repeticoes": repeticoes,
+        "total_s": sum(tempos),
+        "media_s": sum(tempos) / repeticoes,
+        "mediana_s": ordenados[repeticoes // 2],
+        "p95_s": ordenados[min(repeticoes - 1, int(repeticoes * 0.95))],
+        "max_s": ordenados[-1],
+    }
+
+
+def medir_escala(nome, transacoes, pasta, repeticoes=200, semente=42):
+    """Gera os dados de uma escala e mede cada operação. Retorna o dicionário da escala."""
+    sorteio = random.Random(semente)
+    resultados = []
+
+    inicio = time.perf_counter()
+    clientes, contas = gerar_dados(pasta, transacoes, semente=semente)
+    geracao_s = time.perf_counter() - inicio
+    bytes_extratos = (Path(pasta) / banco.ARQ_EXTRATOS.name).stat().st_size
+
+    # Carga dos arquivos no formato antigo (sem índice: o extrato é lido inteiro).
+    bancos = []
+    resultados.append(cronometrar("load_all_sem_indice", lambda: bancos.append(banco.Bank(banco.ArmazenamentoJSON(pasta)))))
+    bank = bancos.pop()
+
+    # Snapshot completo (todos os arquivos marcados como alterados).
+    bank.alterados.update(("clientes", "contas", "transacoes_diarias"))
+    resultados.append(cronometrar("save_all", bank.save_all))
+    bank.fechar()
+
+    # Carga com o índice criado pelo snapshot (históricos sob demanda).
+    resultados.append(cronometrar("load_all", lambda: bancos.append(banco.Bank(banco.ArmazenamentoJSON(pasta)))))
+    bank = bancos.pop()
+
+    # Login por CPF, como em identificar_usuario (sem terminal).
+    cpfs = [str(10 ** 10 + sorteio.randrange(clientes)) for _ in range(repeticoes)]
+    def login():
+        cpf = cpfs.pop()
+        bank.usuario_logado = bank.buscar_cliente(cpf)
+        bank.conta_logada = bank.primeira_conta_do_cliente(cpf)
+    resultados.append(cronometrar("login", login, repeticoes))
+
+    # Depósitos pelo menu (registrar_transacao), espalhados pelas contas para não passar do limite diário.
+    numeros = [str(k % contas + 1).zfill(4) for k in range(min(repeticoes, contas * bank.LIMITE_TRANSACOES_DIARIAS_POR_CONTA))]
+    sorteio.shuffle(numeros)
+    def depositar():
+        bank.conta_logada = bank.buscar_conta(numeros.pop())
+        bank.usuario_logado = bank.conta_logada.cliente
+        bank.registrar_transacao("Deposito", 10.0)
+    resultados.append(cronometrar("registrar_transacao", depositar, len(numeros)))
+
+    # Snapshot depois das transações (só o que mudou é regravado).
+    resultados.append(cronometrar("save_all_incremental", bank.save_all))
+
+    # Extrato de uma conta: a primeira vez inclui a leitura do histórico do disco.
+    conta = bank.buscar_conta(str(sorteio.randrange(contas) + 1).zfill(4))
+    bank.conta_logada, bank.usuario_logado = conta, conta.cliente
+    resultados.append(cronometrar("historico_mostrar_primeira_vez", conta.historico.mostrar))
+    resultados.append(cronometrar("historico_mostrar", conta.historico.mostrar, min(repeticoes, 50)))
+
+    with tempfile.TemporaryDirectory() as pasta_txt:
+        resultados.append(cronometrar("exportar_extrato_txt", lambda: bank.exportar_extrato_txt(pasta_txt), min(repeticoes, 20)))
+    bank.fechar()
+
+    return {
+        "escala": nome,
+        "transacoes": transacoes,
+        "clientes": clientes,
+        "contas": contas,
+        "bytes_extratos": bytes_extratos,
+        "geracao_s": geracao_s,
+        "resultados": resultados,
+    }
+
+
+def commit_atual():
+    """Commit do git da pasta do script (None se não for um repositório git)."""
+    try:
+        saida = subprocess.run(["git", "rev-parse", "HEAD"], cwd=banco.BASE_DIR, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return saida.stdout.strip() or None
+
+
+# --------------------------- LINHA DE COMANDO ---------------------------
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando do benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark de carga, snapshot, login e transações do sistema bancário.")
+    parser.add_argument("--escalas", default="1k,100k", help=f"Escalas separadas por vírgula ({', '.join(ESCALAS)}; padrão: 1k,100k).")
+    parser.add_argument("--saida", help="Arquivo JSON onde gravar o resultado (padrão: saída padrão).")
+    parser.add_argument("--pasta", help="Pasta onde gerar os dados (padrão: pasta temporária, apagada no final).")
+    parser.add_argument("--repeticoes", type=int, default=200, help="Repetições das operações curtas (padrão: 200).")
+    parser.add_argument("--semente", type=int, default=42, help="Semente dos dados sintéticos (padrão: 42).")
+    args = parser.parse_args(argv)
+
+    escalas = [e.strip().lower() for e in args.escalas.split(",") if e.strip()]
+    invalidas = [e for e in escalas if e not in ESCALAS]
+    if invalidas:
+        parser.error(f"escala desconhecida: {', '.join(invalidas)}")
+
+    banco.EXIBIR_MENSAGENS = False
+    resultado = {
+        "benchmark": "sistema_bancario",
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "escalas": [],
+    }
+    for nome in escalas:
+        print(f"> Escala {nome}: gerando {ESCALAS[nome]} transações...", file=sys.stderr)
+        if args.pasta:
+            pasta = Path(args.pasta) / nome
+            pasta.mkdir(parents=True, exist_ok=True)
+            medicao = medir_escala(nome, ESCALAS[nome], pasta, args.repeticoes, args.semente)
+        else:
+            with tempfile.TemporaryDirectory() as pasta:
+                medicao = medir_escala(nome, ESCALAS[nome], pasta, args.repeticoes, args.semente)
+        resultado["escalas"].append(medicao)
+        for r in medicao["resultados"]:
+            print(f"  {r['operacao']:<32} média {r['media_s'] * 1000:10.3f} ms  p95 {r['p95_s'] * 1000:10.3f} ms", file=sys.stderr)
+
+    texto = json.dumps(resultado, indent=4, ensure_ascii=False)
+    if args.saida:
+        Path(args.saida).write_text(texto + "\n", encoding="utf-8")
+    else:
+        print(texto)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
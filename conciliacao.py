@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+
+# Conciliação dos saldos com os históricos.
+#
+# O saldo de cada conta (contas.json) é gravado separado das suas transações
+# (extratos.json), e nada garantia que os dois continuassem de acordo. Este script
+# recalcula o saldo de cada conta a partir do histórico (depósitos menos saques) e
+# aponta as divergências, as transações órfãs (de contas inexistentes) e os clientes
+# sem conta. As contas são verificadas em paralelo por um pool de processos, cada um
+# com o seu próprio Bank aberto sobre os mesmos dados (só para leitura).
+#
+# A verificação é incremental: o checkpoint guarda, para cada conta, uma marca do
+# histórico gravado (Armazenamento.marca_historico) e do saldo; na execução seguinte
+# só as contas cuja marca mudou são verificadas de novo. Sem snapshot (arquivos JSON sem
+# o índice dos extratos, livro-razão ainda não criado) não há marca, e essas contas são
+# verificadas em toda execução; o relatório informa quantas ('sem_marca'). O checkpoint é
+# gravado como os arquivos do snapshot (gravar_snapshot, com checksum e de forma atômica).
+#
+# Uso:
+#   python conciliacao.py                         # Incremental, com o checkpoint na pasta dos dados.
+#   python conciliacao.py --completa --processos 8 --saida relatorio.json
+#   python conciliacao.py --sqlite banco.db --checkpoint conciliacao_sqlite.json
+
+import argparse  # Para ler os argumentos da linha de comando.
+import os  # Para a quantidade de processadores da máquina.
+import sys  # Para a saída de erros e o código de saída do programa.
+import time  # Para medir a duração da conciliação.
+from concurrent.futures import ProcessPoolExecutor  # Para verificar os grupos de contas em paralelo.
+from datetime import datetime  # Para a data do checkpoint.
+from functools import partial  # Para passar os parâmetros fixos às tarefas do pool.
+from pathlib import Path  # Para lidar com os caminhos dos arquivos.
+
+import desafio_1_sistema_bancario as banco
+from exportacao_extratos import fabrica_da_linha_de_comando
+
+
+ARQ_CHECKPOINT = banco.BASE_DIR / "conciliacao_checkpoint.json"
+TAMANHO_GRUPO_PADRAO = 1000  # Contas verificadas por tarefa do pool.
+
+_bank_processo = None  # Bank aberto por cada processo do pool (ver _iniciar_processo).
+
+
+# --------------------------- VERIFICAÇÃO ---------------------------
+
+def marca_conta(bank, conta):
+    """Marca do estado da conta: histórico gravado, transações fora do snapshot e saldo.
+
+    A marca não depende de o histórico já ter sido buscado, então a mesma conta tem a mesma
+    marca em outro processo ou depois de verificada. Se o armazenamento não souber dizer se
+    o histórico gravado mudou (arquivos JSON ainda sem snapshot com o índice dos extratos,
+    livro-razão ainda não criado), o primeiro elemento é None e a conta é sempre verificada.
+    """
+    return [bank.armazenamento.marca_historico(conta.numero), conta.historico.linhas_novas(), conta.saldo_centavos]
+
+
+def verificar_grupo(bank, numeros, liberar_historicos=False):
+    """Recalcula o saldo das contas pelo histórico. Retorna [(número, saldo, saldo pelo histórico), ...] em centavos.
+
+    Com 'liberar_historicos', o histórico de cada conta sai da memória depois de verificado
+    (usado pelos processos do pool, cujo Bank só serve para a verificação).
+    """
+    resultado = []
+    for numero in numeros:
+        conta = bank.buscar_conta(numero)
+        if conta is None:
+            continue
+        conta.historico.carregar()  # Fora da trava da conta: a carga usa a trava de estado, que vem antes.
+        with conta.trava:
+            resultado.append((numero, conta.saldo_centavos, conta.historico.variacao_total()))
+        if liberar_historicos:
+            conta.historico = banco.Historico()
+    return resultado
+
+
+def _iniciar_processo(fabrica_armazenamento):
+    """Abre, em cada processo do pool, um Bank sobre o armazenamento descrito pela fábrica."""
+    global _bank_processo
+    banco.EXIBIR_MENSAGENS = False
+    _bank_processo = banco.Bank(fabrica_armazenamento())
+
+
+def _verificar_grupo_no_processo(numeros):
+    """Tarefa do pool: verifica um grupo de contas com o Bank do processo."""
+    return verificar_grupo(_bank_processo, numeros, liberar_historicos=True)
+
+
+def ler_checkpoint(checkpoint):
+    """Contas do checkpoint da execução anterior ({número: {"marca": ..., "saldo_historico": ...}}), ou {} se não houver.
+
+    Um checkpoint corrompido só custa uma conciliação completa: é ignorado com um aviso na
+    saída de erros, em vez de passar por um checkpoint vazio sem ninguém saber.
+    """
+    try:
+        dados = banco.ler_snapshot(Path(checkpoint))
+    except banco.ArquivoCorrompido as e:
+        print(f"> Checkpoint ignorado, todas as contas serão verificadas: {e}", file=sys.stderr)
+        return {}
+    contas = dados.get("contas") if isinstance(dados, dict) else None
+    return contas if isinstance(contas, dict) else {}
+
+
+def conciliar(bank, processos=1, fabrica_armazenamento=None, checkpoint=None, completa=False,
+              tamanho_grupo=TAMANHO_GRUPO_PADRAO):
+    """Concilia os saldos com os históricos e retorna o relatório (dicionário).
+
+    'checkpoint' é o arquivo com o resultado da execução anterior: as contas cuja marca não
+    mudou reaproveitam o saldo calculado nele (a menos que 'completa' seja verdadeiro), e o
+    arquivo é regravado no final. Com 'processos' > 1, 'fabrica_armazenamento' abre o
+    armazenamento em cada processo do pool (ver exportacao_extratos.exportar_extratos).
+    """
+    if processos > 1 and fabrica_armazenamento is None:
+        raise ValueError("a conciliação com vários processos precisa de 'fabrica_armazenamento'")
+    inicio = time.perf_counter()
+    anteriores = {} if completa or checkpoint is None else ler_checkpoint(checkpoint)
+
+    marcas = {}
+    calculados = {}  # Número da conta -> saldo pelo histórico (centavos), das contas que não mudaram.
+    pendentes = []  # Números das contas a verificar.
+    for conta in bank.contas:
+        marca = marcas[conta.numero] = marca_conta(bank, conta)
+        salvo = anteriores.get(conta.numero)
+        if marca[0] is not None and isinstance(salvo, dict) and salvo.get("marca") == marca:
+            calculados[conta.numero] = salvo["saldo_historico"]
+        else:
+            pendentes.append(conta.numero)
+    reaproveitadas = len(calculados)
+    sem_marca = sum(1 for marca in marcas.values() if marca[0] is None)
+
+    grupos = [pendentes[i:i + tamanho_grupo] for i in range(0, len(pendentes), tamanho_grupo)]
+    if processos > 1 and grupos:
+        bank.persistir_pendentes()  # Os processos leem o que está gravado.
+        with ProcessPoolExecutor(processos, initializer=_iniciar_processo, initargs=(fabrica_armazenamento,)) as pool:
+            resultados = pool.map(_verificar_grupo_no_processo, grupos)
+            for grupo in resultados:
+                for numero, _saldo, calculado in grupo:
+                    calculados[numero] = calculado
+    else:
+        for grupo in grupos:
+            for numero, _saldo, calculado in verificar_grupo(bank, grupo):
+                calculados[numero] = calculado
+
+    divergencias = []
+    for conta in bank.contas:
+        calculado = calculados.get(conta.numero)
+        if calculado is not None and calculado != conta.saldo_centavos:
+            divergencias.append({
+                "conta": conta.numero,
+                "cpf": conta.cliente.cpf,
+                "saldo": conta.saldo_centavos / 100,
+                "saldo_historico": calculado / 100,
+                "diferenca": (conta.saldo_centavos - calculado) / 100,
+            })
+
+    orfas = {}
+    for t in bank.extratos:  # Transações cuja conta não existe.
+        chave = banco.ArmazenamentoJSON._chave_conta(t.get("conta"))
+        orfas[chave] = orfas.get(chave, 0) + 1
+
+    if checkpoint is not None:
+        banco.gravar_snapshot(Path(checkpoint), {
+            "data": datetime.now().strftime(banco.FORMATO_DATA),
+            "contas": {numero: {"marca": marcas[numero], "saldo_historico": calculados[numero]} for numero in calculados},
+        })
+
+    return {
+        "contas": len(bank.contas),
+        "verificadas": len(calculados) - reaproveitadas,
+        "reaproveitadas": reaproveitadas,
+        "sem_marca": sem_marca,
+        "divergencias": divergencias,
+        "transacoes_orfas": [{"conta": conta, "transacoes": quantidade} for conta, quantidade in orfas.items()],
+        "clientes_sem_conta": [c.cpf for c in bank.clientes if not bank.contas_por_cpf.get(c.cpf)],
+        "duracao_s": time.perf_counter() - inicio,
+    }
+
+
+# --------------------------- LINHA DE COMANDO ---------------------------
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando da conciliação."""
+    parser = argparse.ArgumentParser(description="Confere os saldos das contas com os seus históricos.")
+    parser.add_argument("--completa", action="store_true", help="Verifica todas as contas, ignorando o checkpoint.")
+    parser.add_argument("--checkpoint", help=f"Arquivo do checkpoint (padrão: {ARQ_CHECKPOINT.name} na pasta dos dados).")
+    parser.add_argument("--saida", help="Arquivo JSON onde gravar o relatório completo.")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1, help="Processos do pool (padrão: um por processador).")
+    parser.add_argument("--tamanho-grupo", type=int, default=TAMANHO_GRUPO_PADRAO, help=f"Contas por tarefa do pool (padrão: {TAMANHO_GRUPO_PADRAO}).")
+    parser.add_argument("--diretorio", help="Pasta dos arquivos de dados (padrão: pasta do script).")
+    parser.add_argument("--sqlite", help="Lê os dados do arquivo SQLite informado.")
+    parser.add_argument("--razao", action="store_true", help="Lê os históricos do livro-razão binário.")
+    args = parser.parse_args(argv)
+
+    checkpoint = Path(args.checkpoint) if args.checkpoint else Path(args.diretorio or banco.BASE_DIR) / ARQ_CHECKPOINT.name
+    banco.EXIBIR_MENSAGENS = False
+    fabrica = fabrica_da_linha_de_comando(args)
+    bank = banco.Bank(fabrica())
+    try:
+        relatorio = conciliar(bank, max(1, args.processos), fabrica, checkpoint, args.completa, args.tamanho_grupo)
+    finally:
+        bank.fechar()
+
+    if args.saida:
+        banco.salvar_json(Path(args.saida), relatorio)
+    print(f"\n> {relatorio['contas']} contas: {relatorio['verificadas']} verificadas, {relatorio['reaproveitadas']} sem alteração "
+          f"desde o checkpoint ({relatorio['duracao_s']:.1f} s).")
+    if relatorio["sem_marca"]:
+        print(f"> {relatorio['sem_marca']} contas sem snapshot do histórico: verificadas em toda execução até o próximo snapshot.",
+              file=sys.stderr)
+    for d in relatorio["divergencias"]:
+        print(f"> Conta {d['conta']}: saldo R$ {d['saldo']:.2f}, histórico R$ {d['saldo_historico']:.2f} (diferença R$ {d['diferenca']:.2f})")
+    for o in relatorio["transacoes_orfas"]:
+        print(f"> {o['transacoes']} transações da conta inexistente {o['conta']}")
+    for cpf in relatorio["clientes_sem_conta"]:
+        print(f"> Cliente {cpf} sem conta")
+    problemas = relatorio["divergencias"] or relatorio["transacoes_orfas"] or relatorio["clientes_sem_conta"]
+    if not problemas:
+        print("> Saldos e históricos conferem.")
+    return 1 if problemas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
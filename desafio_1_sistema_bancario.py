@@ -2,11 +2,27 @@
 
 
 # Importa os módulos necessários para o funcionamento do sistema.
+import argparse  # Para ler as opções da linha de comando (por exemplo, --sqlite).
+import gzip  # Compressão opcional dos arquivos de snapshot.
 import json  # Para trabalhar com arquivos JSON (salvar e carregar dados).
+import lzma  # Compressão opcional (mais forte e mais lenta) dos arquivos de snapshot.
+import os  # Para forçar a gravação em disco (fsync) do journal e a troca atômica dos arquivos de snapshot.
+import re  # Para separar as palavras nos textos da busca de clientes.
 import sys  # Fornece acesso a variáveis e funções do sistema, como os argumentos da linha de comando.
+import threading  # Para as travas (locks) que protegem contas e persistência entre threads.
+import time  # Para a janela de tempo da gravação em grupo.
+import unicodedata  # Para ignorar os acentos na busca de clientes.
+import zlib  # CRC32: partição dos números de conta e CPFs fora do padrão e checksum dos arquivos de snapshot.
+from collections import OrderedDict, deque  # Fila das transações pendentes e caches (páginas da listagem, chaves de idempotência).
+from contextlib import contextmanager, nullcontext  # Para usar as travas com o comando 'with'.
+from functools import partial, wraps  # Para a carga sob demanda dos históricos e para as métricas.
 from pathlib import Path  # Oferece uma maneira orientada a objetos de lidar com caminhos de arquivos.
-from datetime import datetime, date  # Para trabalhar com datas e horas.
+from datetime import datetime, date, timedelta  # Para trabalhar com datas e horas.
 from abc import ABC, abstractmethod  # Para criar classes abstratas (modelos para outras classes).
+from array import array  # Vetores compactos de números, usados no histórico de transações.
+from bisect import bisect_left, bisect_right, insort  # Busca binária nas datas (consultas por período e limites).
+from collections.abc import Sequence  # Base da visão somente leitura do histórico.
+from decimal import Decimal, ROUND_HALF_UP  # Para converter reais em centavos sem erro de arredondamento.
 
 
 # --------------------------- UTIL ---------------------------
@@ -34,13 +50,428 @@ ARQ_CLIENTES = BASE_DIR / "clientes.json"
 ARQ_CONTAS = BASE_DIR / "contas.json"
 ARQ_EXTRATOS = BASE_DIR / "extratos.json"
 ARQ_TRANSACOES_DIARIAS = BASE_DIR / "transacoes_diarias.json"
+# Journal append-only de transações e metadados do último snapshot completo.
+ARQ_JOURNAL = BASE_DIR / "journal_transacoes.jsonl"
+ARQ_SNAPSHOT_META = BASE_DIR / "snapshot_meta.json"
+
+# Índice das posições do histórico de cada conta dentro de extratos.json (carga sob demanda).
+ARQ_INDICE_EXTRATOS = BASE_DIR / "extratos_indice.json"
+
+# Pasta onde exportar_extrato_txt grava os extratos quando nenhuma pasta é informada.
+PASTA_EXTRATOS = Path(r"C:\Users\ronaldo.santos\Downloads")
+TAMANHO_BUFFER_EXPORTACAO = 1 << 20  # Buffer (em bytes) dos arquivos de extrato exportados.
+
+# Se False, as mensagens das operações (saque, depósito, falhas) não são impressas.
+# Usado pelo processamento em lote, onde não há usuário olhando o terminal.
+EXIBIR_MENSAGENS = True
+
+# Motivos de recusa de uma transação (usados no processamento em lote e nos relatórios).
+MOTIVO_VALOR_INVALIDO = "valor_invalido"
+MOTIVO_SALDO_INSUFICIENTE = "saldo_insuficiente"
+MOTIVO_LIMITE_POR_SAQUE = "limite_por_saque"
+MOTIVO_LIMITE_SAQUES_DIARIOS = "limite_saques_diarios"
+MOTIVO_LIMITE_TRANSACOES_DIARIAS = "limite_transacoes_diarias"
+MOTIVO_TIPO_INVALIDO = "tipo_invalido"
+MOTIVO_MESMA_CONTA = "mesma_conta"
+MOTIVO_CONTA_INEXISTENTE = "conta_inexistente"
+MOTIVO_CHAVE_IDEMPOTENCIA_REUTILIZADA = "chave_idempotencia_reutilizada"  # Mesma chave de uma transação diferente.
+
+# Níveis de durabilidade de uma transação (ver Bank.executar_transacao).
+DURABILIDADE_SINCRONA = "sincrona"  # Grava em disco antes de retornar.
+DURABILIDADE_AGRUPADA = "agrupada"  # Espera a próxima gravação em grupo antes de retornar (também grava antes de retornar).
+DURABILIDADE_ASSINCRONA = "assincrona"  # Retorna na hora; o gravador em grupo grava dentro da janela.
+DURABILIDADE_ADIADA = "adiada"  # Fica pendente até alguém chamar persistir_pendentes (processamento em lote).
+DURABILIDADES = (DURABILIDADE_SINCRONA, DURABILIDADE_AGRUPADA, DURABILIDADE_ASSINCRONA, DURABILIDADE_ADIADA)
+
+
+def exibir(mensagem):
+    """Imprime uma mensagem de operação, a menos que as mensagens estejam desativadas."""
+    if EXIBIR_MENSAGENS:
+        print(mensagem)
+
+
+# --------------------------- DINHEIRO E DATAS ---------------------------
+# Valores são guardados em centavos inteiros (sem erro de arredondamento de float) e
+# datas em segundos desde 01/01/1970, contados no horário local, sem fuso. As conversões
+# abaixo transformam esses números de volta no formato dos arquivos JSON, sem perda.
+
+FORMATO_DATA = "%d/%m/%Y %H:%M:%S"  # Formato das datas gravadas no histórico.
+EPOCA_ZERO = datetime(1970, 1, 1)  # Referência das datas em segundos.
+
+
+def para_centavos(valor):
+    """Converte um valor em reais (int, float ou texto) para centavos inteiros, arredondando meio centavo para cima."""
+    return int((Decimal(str(valor)) * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def data_para_epoca(texto):
+    """Converte 'dd/mm/aaaa HH:MM:SS' em segundos desde 01/01/1970 (ValueError se o texto estiver em outro formato)."""
+    if len(texto) != 19 or texto[2] != "/" or texto[5] != "/" or texto[10] != " " or texto[13] != ":" or texto[16] != ":":
+        raise ValueError(f"data fora do formato {FORMATO_DATA}: {texto!r}")
+    momento = datetime(int(texto[6:10]), int(texto[3:5]), int(texto[0:2]), int(texto[11:13]), int(texto[14:16]), int(texto[17:19]))
+    return (momento - EPOCA_ZERO) // timedelta(seconds=1)
+
+
+def epoca_agora():
+    """Data e hora atuais em segundos desde 01/01/1970 (horário local, sem fuso)."""
+    return (datetime.now() - EPOCA_ZERO) // timedelta(seconds=1)
+
+
+def epoca_para_data(segundos):
+    """Converte segundos desde 01/01/1970 de volta para 'dd/mm/aaaa HH:MM:SS'."""
+    return (EPOCA_ZERO + timedelta(seconds=segundos)).strftime(FORMATO_DATA)
+
+
+def momento_para_epoca(momento):
+    """Converte datetime, date ou texto ('dd/mm/aaaa' ou 'dd/mm/aaaa HH:MM:SS') em segundos desde 01/01/1970."""
+    if isinstance(momento, datetime):
+        return (momento - EPOCA_ZERO) // timedelta(seconds=1)
+    if isinstance(momento, date):
+        return (momento - EPOCA_ZERO.date()).days * 86400
+    texto = str(momento).strip()
+    if len(texto) == 10:
+        texto += " 00:00:00"  # Só a data: início do dia.
+    return data_para_epoca(texto)
+
+
+class TabelaTextos:
+    """Tabela de textos internados: cada texto distinto (CPF, número de conta, tipo) ganha um código inteiro."""
+    def __init__(self, textos=()):
+        """Inicializa a tabela, opcionalmente com alguns textos já cadastrados."""
+        self._codigos = {}  # Texto -> código.
+        self._textos = []  # Código -> texto.
+        self._trava = threading.Lock()
+        for texto in textos:
+            self.codigo(texto)
+
+    def codigo(self, texto):
+        """Retorna o código do texto, cadastrando-o se for novo."""
+        codigo = self._codigos.get(texto)
+        if codigo is None:
+            with self._trava:
+                codigo = self._codigos.get(texto)
+                if codigo is None:
+                    codigo = len(self._textos)
+                    self._textos.append(texto)
+                    self._codigos[texto] = codigo
+        return codigo
+
+    def texto(self, codigo):
+        """Retorna o texto correspondente a um código."""
+        return self._textos[codigo]
+
+
+# Tipos das duas pontas de uma transferência no histórico (a conta de origem e a de destino).
+TIPO_TRANSFERENCIA_ENVIADA = "TransferenciaEnviada"
+TIPO_TRANSFERENCIA_RECEBIDA = "TransferenciaRecebida"
+# Efeito de cada tipo de transação no saldo: +1 crédito, -1 débito.
+SINAL_TIPO = {"Deposito": 1, "Saque": -1, TIPO_TRANSFERENCIA_ENVIADA: -1, TIPO_TRANSFERENCIA_RECEBIDA: 1}
+
+
+def usos_do_registro(registro):
+    """(transações, saques) que um registro gravado conta nos limites diários.
+
+    Uma transação conta uma vez, e um débito também como saque. Os registros da compensação
+    (Bank.liquidar_transferencias) trazem os usos de todas as transferências em "usos", e os
+    de recusa não contam nada.
+    """
+    if registro.get("usos") is not None:
+        transacoes, saques = registro["usos"]
+        return int(transacoes), int(saques)
+    if registro.get("evento") is not None:
+        return 0, 0
+    return 1, int(SINAL_TIPO.get(registro.get("tipo"), 1) < 0)
 
-# Imprime os caminhos dos arquivos de dados para informar ao usuário onde eles serão salvos.
-print(f"\n> Arquivos JSON serão lidos/salvos em: {BASE_DIR}")
-print(f"> {ARQ_CLIENTES}")
-print(f"> {ARQ_CONTAS}")
-print(f"> {ARQ_EXTRATOS}")
-print(f"> {ARQ_TRANSACOES_DIARIAS}\n")
+
+TIPOS_INTERNADOS = TabelaTextos(SINAL_TIPO)  # Códigos dos tipos de transação.
+TEXTOS_INTERNADOS = TabelaTextos()  # Códigos dos CPFs e números de conta do histórico.
+TIPO_VETOR_CODIGOS = "i"  # Typecode das colunas de códigos do histórico: 4 bytes em todas as plataformas ("l" tem 8 no Linux e 4 no Windows).
+
+
+class TravaLeituraEscrita:
+    """Trava que admite vários usuários compartilhados ao mesmo tempo ou um único usuário exclusivo.
+
+    As transações usam o modo compartilhado (contas diferentes andam em paralelo) e os snapshots
+    e cadastros usam o modo exclusivo. Quem espera pelo modo exclusivo tem preferência.
+    A thread que está no modo exclusivo também pode entrar no modo compartilhado.
+    """
+    def __init__(self):
+        """Inicializa a trava livre."""
+        self._condicao = threading.Condition()
+        self._compartilhados = 0  # Quantidade de blocos compartilhados em andamento.
+        self._exclusivo = False  # Se há um bloco exclusivo em andamento.
+        self._dono_exclusivo = None  # Identificador da thread que está no modo exclusivo.
+        self._exclusivos_esperando = 0  # Quantidade de threads esperando pelo modo exclusivo.
+
+    @contextmanager
+    def compartilhada(self):
+        """Bloco 'with' em modo compartilhado."""
+        if self._dono_exclusivo == threading.get_ident():
+            yield  # Quem já tem o modo exclusivo não precisa esperar por ninguém.
+            return
+        with self._condicao:
+            while self._exclusivo or self._exclusivos_esperando:
+                self._condicao.wait()
+            self._compartilhados += 1
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._compartilhados -= 1
+                if not self._compartilhados:
+                    self._condicao.notify_all()
+
+    @contextmanager
+    def exclusiva(self):
+        """Bloco 'with' em modo exclusivo (espera todos os blocos compartilhados terminarem)."""
+        with self._condicao:
+            self._exclusivos_esperando += 1
+            while self._exclusivo or self._compartilhados:
+                self._condicao.wait()
+            self._exclusivos_esperando -= 1
+            self._exclusivo = True
+            self._dono_exclusivo = threading.get_ident()
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._exclusivo = False
+                self._dono_exclusivo = None
+                self._condicao.notify_all()
+
+
+# --------------------------- LIMITES DIÁRIOS ---------------------------
+# Contadores de transações e saques por conta dentro de uma janela de tempo: o dia do
+# calendário (o padrão) ou as últimas 24 horas. Cada conta guarda só os momentos (em
+# segundos desde 01/01/1970) dos usos que ainda estão na janela; os mais antigos são
+# descartados na própria verificação, então memória e arquivo não crescem com o tempo.
+
+JANELA_DIARIA = "diaria"  # Conta os usos desde a meia-noite.
+JANELA_24H = "24h"  # Conta os usos das últimas 24 horas.
+JANELAS_LIMITE = (JANELA_DIARIA, JANELA_24H)
+FORMATO_LIMITES = 2  # Versão do formato compacto de transacoes_diarias.json.
+
+
+def inicio_janela(janela, agora):
+    """Primeiro segundo que ainda conta na janela, a partir do momento 'agora'."""
+    if janela == JANELA_24H:
+        return agora - 86399
+    return agora - agora % 86400  # Meia-noite (as épocas já estão no horário local).
+
+
+class ContadorJanela:
+    """Usos de uma conta dentro da janela, com verificação e registro em O(1)."""
+    __slots__ = ("limite", "janela", "momentos")
+
+    def __init__(self, limite, janela=JANELA_DIARIA, momentos=()):
+        """Inicializa o contador, opcionalmente com os momentos de usos anteriores."""
+        if janela not in JANELAS_LIMITE:
+            raise ValueError(f"janela de limite inválida: {janela!r}")
+        self.limite = limite  # Quantidade máxima de usos na janela.
+        self.janela = janela  # JANELA_DIARIA ou JANELA_24H.
+        self.momentos = deque(sorted(int(m) for m in momentos))  # Momentos dos usos, do mais antigo ao mais novo.
+
+    def quantidade(self, agora=None):
+        """Quantidade de usos na janela (descarta os que já saíram dela)."""
+        agora = epoca_agora() if agora is None else agora
+        inicio = inicio_janela(self.janela, agora)
+        momentos = self.momentos
+        while momentos and momentos[0] < inicio:
+            momentos.popleft()
+        return len(momentos)
+
+    def esgotado(self, agora=None):
+        """True se o limite da janela já foi atingido."""
+        return self.quantidade(agora) >= self.limite
+
+    def registrar(self, momento=None):
+        """Conta um uso no momento informado (padrão: agora)."""
+        momento = epoca_agora() if momento is None else int(momento)
+        if self.momentos and momento < self.momentos[-1]:
+            insort(self.momentos, momento)  # Reaplicação fora de ordem (journal, migração).
+        else:
+            self.momentos.append(momento)
+
+    def to_list(self, agora=None):
+        """Momentos dos usos que ainda estão na janela."""
+        self.quantidade(agora)
+        return list(self.momentos)
+
+
+class ControleLimites:
+    """Um ContadorJanela por conta, criado no primeiro uso e descartado quando a janela esvazia."""
+    def __init__(self, limite, janela=JANELA_DIARIA):
+        """Inicializa o controle sem nenhum uso registrado."""
+        if janela not in JANELAS_LIMITE:
+            raise ValueError(f"janela de limite inválida: {janela!r}")
+        self.limite = limite
+        self.janela = janela
+        self.contadores = {}  # Número da conta -> ContadorJanela.
+
+    def contador(self, numero):
+        """Contador da conta (criado se ainda não existir)."""
+        contador = self.contadores.get(numero)
+        if contador is None:
+            contador = self.contadores.setdefault(numero, ContadorJanela(self.limite, self.janela))
+        return contador
+
+    def quantidade(self, numero, agora=None):
+        """Quantidade de usos da conta na janela."""
+        contador = self.contadores.get(numero)
+        return contador.quantidade(agora) if contador else 0
+
+    def esgotado(self, numero, agora=None):
+        """True se a conta já atingiu o limite da janela."""
+        contador = self.contadores.get(numero)
+        return contador is not None and contador.esgotado(agora)
+
+    def registrar(self, numero, momento=None):
+        """Conta um uso da conta."""
+        self.contador(numero).registrar(momento)
+
+    def limpar_expirados(self, agora=None):
+        """Descarta os contadores das contas sem nenhum uso na janela."""
+        agora = epoca_agora() if agora is None else agora
+        for numero in [n for n, c in self.contadores.items() if not c.quantidade(agora)]:
+            del self.contadores[numero]
+
+    def to_dict(self, agora=None):
+        """Número da conta -> momentos dos usos na janela (só as contas com algum uso)."""
+        self.limpar_expirados(agora)
+        return {numero: list(contador.momentos) for numero, contador in self.contadores.items()}
+
+
+def contadores_legados(dados):
+    """Converte os formatos antigos de transacoes_diarias.json em tuplas (conta, dia, quantidade).
+
+    Aceita os dois formatos encontrados nos arquivos: {"0002_2025-10-03": 3} e {"0001": {"2025-10-03": 2}}.
+    """
+    for chave, valor in (dados or {}).items():
+        if isinstance(valor, dict):
+            for dia, quantidade in valor.items():
+                yield chave, dia, quantidade
+        elif isinstance(valor, int) and "_" in chave:
+            conta, dia = chave.rsplit("_", 1)
+            yield conta, dia, valor
+
+
+def migrar_limites(dados, agora=None):
+    """Converte transacoes_diarias.json (formato compacto ou um dos antigos) para o formato compacto.
+
+    Nos formatos antigos só há a quantidade por dia: os usos são contados no fim do dia
+    (ou agora, se o dia for hoje), o que nunca libera um limite antes da hora.
+    """
+    if isinstance(dados, dict) and dados.get("formato") == FORMATO_LIMITES:
+        return dados
+    agora = epoca_agora() if agora is None else agora
+    transacoes = {}
+    for conta, dia, quantidade in contadores_legados(dados):
+        try:
+            fim_do_dia = momento_para_epoca(date.fromisoformat(dia)) + 86399
+        except (TypeError, ValueError):
+            continue  # Dia em formato desconhecido.
+        transacoes.setdefault(conta, []).extend([min(agora, fim_do_dia)] * quantidade)
+    return {"formato": FORMATO_LIMITES, "transacoes": transacoes, "saques": {}}
+
+
+# --------------------------- CHAVES DE IDEMPOTÊNCIA ---------------------------
+# Um terminal que não recebeu a resposta repete a transação com a mesma chave de
+# idempotência. O Bank guarda a chave de cada transação, aceita ou recusada, com uma
+# impressão do pedido (conta, tipo e valor) e o resultado: a repetição devolve o resultado
+# original em O(1), sem aplicar, contar no limite diário nem gravar de novo, mesmo que o
+# saldo ou os limites tenham mudado desde então. A chave é reservada no cache antes de a
+# transação ser aplicada, então dois pedidos com a mesma chave nunca são aplicados os
+# dois, mesmo em contas diferentes: o segundo espera o resultado do primeiro. As chaves
+# valem por VALIDADE_IDEMPOTENCIA e no máximo CAPACIDADE_IDEMPOTENCIA ficam guardadas (as
+# mais antigas saem primeiro). Vão no journal, junto com a transação (ou em um registro
+# de recusa), e no snapshot dos contadores diários, então sobrevivem a um reinício.
+
+CAPACIDADE_IDEMPOTENCIA = 100_000  # Máximo de chaves guardadas.
+VALIDADE_IDEMPOTENCIA = 86400  # Segundos durante os quais uma repetição é reconhecida.
+
+
+def impressao_transacao(*partes):
+    """Impressão de um pedido ('0001|Deposito|15000'): a mesma chave com outra impressão é outro pedido."""
+    partes = list(partes)
+    try:
+        partes[-1] = para_centavos(partes[-1])  # O valor, em centavos: 150, 150.0 e "150.00" são o mesmo pedido.
+    except (ValueError, ArithmeticError):
+        pass
+    return "|".join(str(p) for p in partes)
+
+
+class CacheIdempotencia:
+    """Chaves das transações, com o resultado, validade e quantidade máxima (descarte das mais antigas em O(1))."""
+    def __init__(self, capacidade=CAPACIDADE_IDEMPOTENCIA, validade=VALIDADE_IDEMPOTENCIA):
+        """Inicializa o cache vazio."""
+        self.capacidade = capacidade
+        self.validade = validade
+        self.entradas = OrderedDict()  # Chave -> (momento, impressão, marca, resultado), da mais antiga para a mais nova.
+        self._trava = threading.Lock()
+        self._concluida = threading.Condition(self._trava)  # Avisa quem espera uma chave reservada.
+
+    def reservar(self, chave, impressao, agora=None):
+        """Reserva a chave para um pedido novo (retorna None) ou devolve (impressão, marca, resultado) de quem já a usou.
+
+        A verificação e a reserva acontecem sob a trava do cache, então só um pedido fica com a
+        chave. Se ela estiver reservada por um pedido da mesma impressão ainda em andamento,
+        espera o resultado dele (com outra impressão, devolve na hora, com resultado None).
+        A marca é a da fila de gravação (0: já gravada).
+        """
+        agora = epoca_agora() if agora is None else agora
+        with self._concluida:
+            while True:
+                entrada = self.entradas.get(chave)
+                if entrada is None or entrada[0] < agora - self.validade:
+                    self.entradas[chave] = (agora, impressao, 0, None)
+                    self.entradas.move_to_end(chave)
+                    self._descartar(agora)
+                    return None
+                if entrada[3] is not None or entrada[1] != impressao:
+                    return entrada[1], entrada[2], entrada[3]
+                self._concluida.wait()
+
+    def cancelar(self, chave):
+        """Libera a reserva de um pedido que não chegou a um resultado (erro inesperado): a chave pode ser usada de novo."""
+        with self._concluida:
+            entrada = self.entradas.get(chave)
+            if entrada is not None and entrada[3] is None:
+                del self.entradas[chave]
+            self._concluida.notify_all()
+
+    def guardar(self, chave, impressao, momento=None, marca=0, resultado=(True, None)):
+        """Guarda a chave com o resultado do pedido (avisando quem o esperava) e descarta as vencidas e as excedentes."""
+        momento = epoca_agora() if momento is None else int(momento)
+        with self._concluida:
+            self.entradas[chave] = (momento, impressao, marca, tuple(resultado))
+            self.entradas.move_to_end(chave)
+            self._descartar(momento)
+            self._concluida.notify_all()
+
+    def _descartar(self, agora):
+        """Tira do início as chaves vencidas e as excedentes (o início é a mais antiga)."""
+        entradas = self.entradas
+        limite = agora - self.validade
+        while entradas and (len(entradas) > self.capacidade or next(iter(entradas.values()))[0] < limite):
+            entradas.popitem(last=False)
+
+    def restaurar(self, entradas, agora=None):
+        """Recoloca as chaves gravadas ([chave, momento, impressão] ou, das recusadas, [..., motivo]), em qualquer ordem."""
+        for chave, momento, impressao, *motivo in sorted(entradas or (), key=lambda e: e[1]):
+            self.guardar(chave, impressao, momento, resultado=(False, motivo[0]) if motivo and motivo[0] else (True, None))
+        with self._trava:
+            self._descartar(epoca_agora() if agora is None else agora)
+
+    def to_list(self, agora=None):
+        """Chaves ainda válidas e já concluídas, como [chave, momento, impressão] (mais o motivo, se recusada), da mais antiga para a mais nova."""
+        with self._trava:
+            self._descartar(epoca_agora() if agora is None else agora)
+            return [[chave, momento, impressao] + ([] if resultado[0] else [resultado[1]])
+                    for chave, (momento, impressao, _marca, resultado) in self.entradas.items() if resultado is not None]
+
+    def __len__(self):
+        """Quantidade de chaves guardadas."""
+        return len(self.entradas)
 
 
 # --------------------------- UML CLASSES ---------------------------
@@ -82,20 +513,356 @@ class PessoaFisica(Cliente):
 
 
 class Historico:
-    """Classe para armazenar o histórico de transações de uma conta."""
+    """Classe para armazenar o histórico de transações de uma conta.
+
+    As transações ficam em colunas (vetores 'array'): tipo, valor em centavos, data em
+    segundos, CPF e conta como códigos internados. Cada transação ocupa 25 bytes nas colunas
+    (1 + 8 + 8 + 4 + 4, iguais em todas as plataformas), mais 8 do acumulado depois da primeira
+    consulta e 16 do índice por data se chegar uma data fora de ordem, em vez de um dicionário
+    com float e textos. Os registros que não cabem nesse formato sem perda (data em outro
+    formato, campos extras...) são guardados como vieram.
+
+    As transações já gravadas podem ser buscadas só quando forem pedidas pela primeira vez
+    (ver adiar_carga); até lá, as colunas guardam apenas as transações novas.
+    """
+    CAMPOS = ("tipo", "valor", "data", "cpf", "conta")  # Campos de uma transação no formato JSON.
+    COLUNAS = ("_tipos", "_centavos", "_cpfs", "_contas", "_epocas")  # Vetores de uma linha (a data por último).
+
     def __init__(self):
         """Inicializa um objeto Historico."""
-        self.transacoes = []  # Uma lista para armazenar as transações.
-
-    def adicionar_transacao(self, transacao, cpf_usuario=None, numero_conta=None):
-        """Adiciona uma nova transação ao histórico."""
-        self.transacoes.append({
-            "tipo": transacao.__class__.__name__,  # O tipo da transação (Saque, Deposito).
-            "valor": transacao.valor,  # O valor da transação.
-            "data": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),  # A data e hora da transação.
-            "cpf": cpf_usuario,  # O CPF do cliente que realizou a transação.
-            "conta": numero_conta  # O número da conta onde a transação foi realizada.
-        })
+        self._tipos = array("B")  # Código do tipo (TIPOS_INTERNADOS).
+        self._centavos = array("q")  # Valor em centavos.
+        self._cpfs = array(TIPO_VETOR_CODIGOS)  # Código do CPF (TEXTOS_INTERNADOS).
+        self._contas = array(TIPO_VETOR_CODIGOS)  # Código do número da conta (TEXTOS_INTERNADOS).
+        self._epocas = array("q")  # Data em segundos desde 01/01/1970 (preenchida por último).
+        self._originais = {}  # Índice -> dicionário original, para registros fora do formato compacto.
+        self._carregador = None  # Função que devolve as transações já gravadas, enquanto não foram buscadas.
+        self._trava_carga = None  # Função que devolve o contexto a usar durante a busca (trava do Bank).
+        self._trava = threading.RLock()  # Protege as colunas enquanto as transações gravadas são juntadas.
+        self.linhas_no_arquivo = 0  # Quantas das primeiras linhas em memória já estão no trecho da conta no snapshot.
+        self._limpar_indice_temporal()
+
+    # ------------------ CARGA SOB DEMANDA ------------------
+    def adiar_carga(self, carregador, trava=None):
+        """Faz o histórico buscar as transações já gravadas só quando forem pedidas pela primeira vez.
+
+        'carregador' é chamado sem argumentos e devolve os registros no formato dos arquivos JSON
+        (ou um Historico já montado); 'trava' (opcional) devolve um gerenciador de contexto usado durante a busca.
+        """
+        self._trava_carga = trava
+        self._carregador = carregador
+
+    @property
+    def carregado(self):
+        """Indica se as transações já gravadas estão em memória."""
+        return self._carregador is None
+
+    def carregar(self):
+        """Busca as transações já gravadas (se ainda não foram buscadas) e as coloca antes das novas."""
+        if self._carregador is None:
+            return
+        with (self._trava_carga() if self._trava_carga else nullcontext()), self._trava:
+            if self._carregador is None:
+                return  # Outra thread buscou enquanto esta esperava.
+            gravadas = self._carregador()
+            if not isinstance(gravadas, Historico):
+                registros, gravadas = gravadas, Historico()
+                for registro in registros:
+                    gravadas.adicionar_registro(registro)
+            deslocamento = len(gravadas._epocas)
+            for coluna in self.COLUNAS:
+                vetor = getattr(gravadas, coluna)
+                vetor.extend(getattr(self, coluna))
+                setattr(self, coluna, vetor)
+            gravadas._originais.update((indice + deslocamento, r) for indice, r in self._originais.items())
+            self._originais = gravadas._originais
+            self._limpar_indice_temporal()
+            self.linhas_no_arquivo = deslocamento  # As transações buscadas são exatamente o trecho do snapshot.
+            self._carregador = None
+
+    def registros_novos(self):
+        """Transações em memória que ainda não estão no snapshot, sem buscar as já gravadas.
+
+        O snapshot copia o trecho antigo da conta (quando há um) e acrescenta só estas.
+        """
+        with self._trava:
+            return [self._registro(i) for i in range(self.linhas_no_arquivo, len(self._epocas))]
+
+    def linhas_novas(self):
+        """Quantidade de transações que ainda não estão no snapshot, sem buscar as já gravadas.
+
+        Não depende de o histórico já ter sido buscado (ao contrário de len(self._epocas)).
+        """
+        with self._trava:
+            return len(self._epocas) - self.linhas_no_arquivo
+
+    def marcar_gravado(self):
+        """Registra que todas as transações estão no snapshot que acabou de ser gravado."""
+        with self._trava:
+            if self._carregador is None:
+                self.linhas_no_arquivo = len(self._epocas)
+                return
+            # Histórico ainda não buscado: as transações novas agora estão no arquivo, então saem da memória.
+            for coluna in self.COLUNAS:
+                setattr(self, coluna, array(getattr(self, coluna).typecode))
+            self._originais = {}
+            self._limpar_indice_temporal()
+
+    # ------------------ TRANSAÇÕES ------------------
+    def adicionar_transacao(self, transacao, cpf_usuario=None, numero_conta=None, tipo=None):
+        """Adiciona uma nova transação ao histórico e retorna o registro criado."""
+        tipo = tipo or transacao.__class__.__name__  # O tipo da transação (Saque, Deposito ou uma ponta de transferência).
+        centavos = para_centavos(transacao.valor)  # O valor da transação.
+        epoca = epoca_agora()  # A data e hora da transação.
+        self._anexar(
+            TIPOS_INTERNADOS.codigo(tipo),
+            centavos,
+            epoca,
+            TEXTOS_INTERNADOS.codigo(cpf_usuario),  # O CPF do cliente que realizou a transação.
+            TEXTOS_INTERNADOS.codigo(numero_conta),  # O número da conta onde a transação foi realizada.
+        )
+        # Monta o registro aqui mesmo, sem ler as colunas (que obrigaria a buscar as transações gravadas).
+        return {"tipo": tipo, "valor": centavos / 100, "data": epoca_para_data(epoca), "cpf": cpf_usuario, "conta": numero_conta}
+
+    def adicionar_registro(self, registro):
+        """Adiciona uma transação no formato dos arquivos JSON (dicionário)."""
+        try:
+            if set(registro) != set(self.CAMPOS):
+                raise ValueError("campos diferentes do formato padrão")
+            valor = registro["valor"]
+            if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+                raise ValueError("valor não numérico")
+            centavos = para_centavos(valor)
+            if centavos / 100 != valor:
+                raise ValueError("valor com mais de duas casas decimais")
+            epoca = data_para_epoca(registro["data"])
+            tipo = TIPOS_INTERNADOS.codigo(registro["tipo"])
+            cpf = TEXTOS_INTERNADOS.codigo(registro["cpf"])
+            conta = TEXTOS_INTERNADOS.codigo(registro["conta"])
+        except (TypeError, ValueError, ArithmeticError, OverflowError):
+            # Não cabe no formato compacto sem perda: guarda o dicionário original.
+            self._anexar_original(registro)
+            return
+        self._anexar(tipo, centavos, epoca, cpf, conta)
+
+    def adicionar_compacto(self, tipo, centavos, epoca, cpf, conta):
+        """Adiciona uma transação já convertida (valor em centavos, data em segundos), sem passar pelo formato JSON."""
+        self._anexar(TIPOS_INTERNADOS.codigo(tipo), centavos, epoca, TEXTOS_INTERNADOS.codigo(cpf), TEXTOS_INTERNADOS.codigo(conta))
+
+    def _anexar_original(self, registro):
+        """Guarda um registro fora do formato compacto; tipo, valor e data vão para as colunas se der para converter.
+
+        As colunas só servem às consultas (filtros e saldo); o registro devolvido é sempre o original.
+        """
+        tipo = registro.get("tipo")
+        tipo = TIPOS_INTERNADOS.codigo(tipo if isinstance(tipo, str) else "")
+        try:
+            centavos = para_centavos(registro.get("valor"))
+        except (TypeError, ValueError, ArithmeticError):
+            centavos = 0
+        try:
+            epoca = data_para_epoca(registro.get("data"))
+        except (TypeError, ValueError, OverflowError):
+            epoca = 0
+        with self._trava:
+            self._originais[len(self._epocas)] = dict(registro)
+            self._anexar(tipo, centavos, epoca, 0, 0)
+
+    def _anexar(self, tipo, centavos, epoca, cpf, conta):
+        """Acrescenta uma linha às colunas (a data por último, pois ela define o tamanho)."""
+        with self._trava:
+            self._tipos.append(tipo)
+            self._centavos.append(centavos)
+            self._cpfs.append(cpf)
+            self._contas.append(conta)
+            self._epocas.append(epoca)
+
+    # ------------------ CONSULTAS ------------------
+    def _limpar_indice_temporal(self):
+        """Descarta o índice por data (ele é remontado na próxima consulta)."""
+        self._ordem = None  # Posições das transações em ordem de data (None: a ordem de inserção já é a ordem de data).
+        self._epocas_ordenadas = None  # Datas na ordem de '_ordem' (só existe junto com ela).
+        self._acumulado = array("q")  # Soma dos valores com sinal (depósito +, saque -) até cada posição, em ordem de data.
+
+    def _variacao(self, indice):
+        """Efeito da transação de posição 'indice' no saldo, em centavos."""
+        return SINAL_TIPO.get(TIPOS_INTERNADOS.texto(self._tipos[indice]), 0) * self._centavos[indice]
+
+    def _atualizar_indice_temporal(self):
+        """Estende o índice por data com as transações novas (chamado com a trava do histórico).
+
+        No caso comum as transações chegam em ordem de data e a própria coluna de datas serve
+        de índice, então só o acumulado cresce. Se aparecer uma data fora de ordem, o histórico
+        ganha um vetor com as posições ordenadas, que também passa a ser estendido aos poucos.
+        """
+        total = len(self._epocas)
+        for indice in range(len(self._acumulado), total):
+            epoca = self._epocas[indice]
+            if self._ordem is None:
+                if indice and epoca < self._epocas[indice - 1]:
+                    return self._reordenar(total)
+            elif epoca < self._epocas_ordenadas[-1]:
+                return self._reordenar(total)
+            else:
+                self._ordem.append(indice)
+                self._epocas_ordenadas.append(epoca)
+            anterior = self._acumulado[-1] if self._acumulado else 0
+            self._acumulado.append(anterior + self._variacao(indice))
+
+    def _reordenar(self, total):
+        """Monta o índice por data do zero, ordenando as posições pela data (empates na ordem de inserção)."""
+        self._ordem = array("q", sorted(range(total), key=self._epocas.__getitem__))
+        self._epocas_ordenadas = array("q", (self._epocas[i] for i in self._ordem))
+        self._acumulado = array("q")
+        soma = 0
+        for indice in self._ordem:
+            soma += self._variacao(indice)
+            self._acumulado.append(soma)
+
+    def consultar(self, inicio=None, fim=None, tipos=None, valor_minimo=None, valor_maximo=None,
+                  limite=50, cursor=None, decrescente=False, saldo_final_centavos=None):
+        """Consulta as transações em ordem de data, com filtros e paginação.
+
+        'inicio' (inclusive) e 'fim' (exclusivo) aceitam datetime, date ou texto no formato do
+        histórico; 'tipos' é uma lista de nomes (saque, depósito); os valores são em reais.
+        O período é localizado por busca binária no índice por data, sem percorrer o histórico.
+        Retorna {"transacoes": [...], "proximo_cursor": texto ou None}; o cursor é passado na
+        chamada seguinte para obter a próxima página. Com 'saldo_final_centavos' (saldo atual da
+        conta), cada transação traz também o campo "saldo" com o saldo logo depois dela.
+        """
+        codigos = None
+        if tipos is not None:
+            codigos = set()
+            for nome in tipos:
+                classe = TIPOS_TRANSACAO.get(str(nome).lower())
+                if classe is None:
+                    raise ValueError(f"tipo de transação inválido: {nome!r}")
+                codigos.add(TIPOS_INTERNADOS.codigo(classe.__name__))
+        minimo = None if valor_minimo is None else para_centavos(valor_minimo)
+        maximo = None if valor_maximo is None else para_centavos(valor_maximo)
+
+        self.carregar()
+        with self._trava:
+            self._atualizar_indice_temporal()
+            total = len(self._acumulado)
+            ordem = self._ordem
+            epocas = self._epocas if ordem is None else self._epocas_ordenadas
+            indice_da_posicao = (lambda posicao: posicao) if ordem is None else ordem.__getitem__
+
+            # Faixa de posições do período (busca binária nas datas ordenadas).
+            baixo = 0 if inicio is None else bisect_left(epocas, momento_para_epoca(inicio), 0, total)
+            alto = total if fim is None else bisect_left(epocas, momento_para_epoca(fim), 0, total)
+
+            # O cursor é "data:posição de inserção" da última transação entregue.
+            if cursor:
+                try:
+                    epoca_cursor, indice_cursor = (int(parte) for parte in str(cursor).split(":"))
+                except ValueError:
+                    raise ValueError(f"cursor inválido: {cursor!r}") from None
+                if decrescente:
+                    posicao = bisect_right(epocas, epoca_cursor, 0, total)
+                    while posicao > 0 and epocas[posicao - 1] == epoca_cursor and indice_da_posicao(posicao - 1) >= indice_cursor:
+                        posicao -= 1
+                    alto = min(alto, posicao)
+                else:
+                    posicao = bisect_left(epocas, epoca_cursor, 0, total)
+                    while posicao < total and epocas[posicao] == epoca_cursor and indice_da_posicao(posicao) <= indice_cursor:
+                        posicao += 1
+                    baixo = max(baixo, posicao)
+
+            resultado = []
+            proximo_cursor = ultimo_cursor = None
+            posicoes = range(alto - 1, baixo - 1, -1) if decrescente else range(baixo, alto)
+            for posicao in posicoes:
+                indice = indice_da_posicao(posicao)
+                if codigos is not None and self._tipos[indice] not in codigos:
+                    continue
+                centavos = self._centavos[indice]
+                if (minimo is not None and centavos < minimo) or (maximo is not None and centavos > maximo):
+                    continue
+                if limite is not None and len(resultado) >= limite:
+                    proximo_cursor = ultimo_cursor  # Há mais transações: a próxima página começa depois da última entregue.
+                    break
+                transacao = self._registro(indice)
+                if saldo_final_centavos is not None:
+                    # Saldo depois da transação = saldo atual - o que entrou/saiu depois dela.
+                    transacao["saldo"] = (saldo_final_centavos - (self._acumulado[total - 1] - self._acumulado[posicao])) / 100
+                resultado.append(transacao)
+                ultimo_cursor = f"{epocas[posicao]}:{indice}"
+        return {"transacoes": resultado, "proximo_cursor": proximo_cursor}
+
+    def resumo_periodo(self, inicio, fim, saldo_final_centavos):
+        """Saldos de abertura e de fechamento e totais das transações entre 'inicio' e 'fim' (exclusivo).
+
+        Depósitos e transferências recebidas contam como depósitos; saques e transferências
+        enviadas, como saques (ver SINAL_TIPO). 'saldo_final_centavos' é o saldo atual da
+        conta. O período é localizado por busca binária, como em consultar; valores em centavos.
+        """
+        inicio, fim = momento_para_epoca(inicio), momento_para_epoca(fim)
+        self.carregar()
+        with self._trava:
+            self._atualizar_indice_temporal()
+            total = len(self._acumulado)
+            ordem = self._ordem
+            epocas = self._epocas if ordem is None else self._epocas_ordenadas
+            baixo = bisect_left(epocas, inicio, 0, total)
+            alto = bisect_left(epocas, fim, 0, total)
+            acumulado_final = self._acumulado[total - 1] if total else 0
+            resumo = {
+                "saldo_abertura": saldo_final_centavos - (acumulado_final - (self._acumulado[baixo - 1] if baixo else 0)),
+                "saldo_fechamento": saldo_final_centavos - (acumulado_final - (self._acumulado[alto - 1] if alto else 0)),
+                "depositos": 0, "valor_depositos": 0, "saques": 0, "valor_saques": 0,
+            }
+            for posicao in range(baixo, alto):
+                variacao = self._variacao(posicao if ordem is None else ordem[posicao])
+                if variacao > 0:
+                    resumo["depositos"] += 1
+                    resumo["valor_depositos"] += variacao
+                elif variacao < 0:
+                    resumo["saques"] += 1
+                    resumo["valor_saques"] -= variacao
+        return resumo
+
+    def __len__(self):
+        """Quantidade de transações no histórico."""
+        self.carregar()
+        return len(self._epocas)
+
+    def variacao_total(self):
+        """Efeito de todas as transações no saldo (depósitos menos saques), em centavos."""
+        self.carregar()
+        with self._trava:
+            self._atualizar_indice_temporal()
+            return self._acumulado[-1] if self._acumulado else 0
+
+    def __iter__(self):
+        """Percorre as transações no formato dos arquivos JSON, montando uma por vez (gerador)."""
+        self.carregar()
+        for indice in range(len(self._epocas)):
+            yield self._registro(indice)
+
+    def registro(self, indice):
+        """Retorna a transação de posição 'indice' no formato dos arquivos JSON."""
+        self.carregar()
+        return self._registro(indice)
+
+    def _registro(self, indice):
+        """Monta a transação de posição 'indice' a partir das colunas em memória."""
+        original = self._originais.get(indice)
+        if original is not None:
+            return dict(original)
+        return {
+            "tipo": TIPOS_INTERNADOS.texto(self._tipos[indice]),
+            "valor": self._centavos[indice] / 100,
+            "data": epoca_para_data(self._epocas[indice]),
+            "cpf": TEXTOS_INTERNADOS.texto(self._cpfs[indice]),
+            "conta": TEXTOS_INTERNADOS.texto(self._contas[indice]),
+        }
+
+    @property
+    def transacoes(self):
+        """Visão somente leitura das transações, como uma lista de dicionários."""
+        return VisaoHistorico(self)
 
     def mostrar(self, cpf=None, conta_num=None):
         """Exibe o histórico de transações, com filtros opcionais por CPF e número da conta."""
@@ -105,38 +872,103 @@ class Historico:
 
     def to_list(self):
         """Retorna a lista de transações."""
-        return self.transacoes[:]
+        self.carregar()
+        return [self._registro(i) for i in range(len(self._epocas))]
+
+
+class VisaoHistorico(Sequence):
+    """Sequência somente leitura sobre um Historico, que monta cada transação como dicionário quando pedida."""
+    def __init__(self, historico):
+        """Inicializa a visão sobre o histórico informado."""
+        self._historico = historico
+
+    def __len__(self):
+        """Quantidade de transações."""
+        return len(self._historico)
+
+    def __getitem__(self, indice):
+        """Transação (ou lista de transações, para fatias) na posição informada."""
+        if isinstance(indice, slice):
+            return [self._historico.registro(i) for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("índice fora do histórico")
+        return self._historico.registro(indice)
 
 
 class Conta:
     """Classe base para representar uma conta bancária."""
     def __init__(self, numero, cliente):
         """Inicializa um objeto Conta."""
-        self.saldo = 0  # O saldo inicial da conta é zero.
+        self.ao_mudar_saldo = None  # Função chamada com (conta, saldo anterior) quando o saldo muda (ListagemContas).
+        self._saldo_centavos = 0  # O saldo inicial da conta é zero (guardado em centavos).
         self.numero = numero  # O número da conta.
         self.agencia = "0001"  # A agência é fixa.
         self.cliente = cliente  # O cliente associado a esta conta.
         self.historico = Historico()  # Um objeto para registrar o histórico de transações.
+        self.motivo_falha = None  # Motivo da última operação recusada (uma das constantes MOTIVO_*).
+        self.ultima_transacao = None  # Registro (formato JSON) da última transação aceita.
+        self.trava = threading.RLock()  # Trava da conta: serializa as operações sobre o saldo.
 
-    def sacar(self, valor):
-        """Realiza um saque na conta."""
-        if valor > self.saldo:
-            print("\n> Operação falhou! Você não tem saldo suficiente.")
-            return False
-        elif valor <= 0:
-            print("\n> Operação falhou! O valor informado é inválido (deve ser positivo).")
-            return False
-        self.saldo -= valor
-        print(f"\n> Saque de R$ {valor:.2f} realizado com sucesso!")
+    @property
+    def saldo_centavos(self):
+        """Saldo da conta em centavos."""
+        return self._saldo_centavos
+
+    @saldo_centavos.setter
+    def saldo_centavos(self, centavos):
+        """Define o saldo em centavos e avisa quem acompanha as mudanças (índices da listagem de contas)."""
+        anterior = self._saldo_centavos
+        self._saldo_centavos = centavos
+        if self.ao_mudar_saldo is not None and centavos != anterior:
+            self.ao_mudar_saldo(self, anterior)
+
+    @property
+    def saldo(self):
+        """Saldo da conta em reais."""
+        return self._saldo_centavos / 100
+
+    @saldo.setter
+    def saldo(self, valor):
+        """Define o saldo a partir de um valor em reais."""
+        self.saldo_centavos = para_centavos(valor)
+
+    def recusar(self, motivo, mensagem):
+        """Registra o motivo da recusa, exibe a mensagem e retorna False."""
+        self.motivo_falha = motivo
+        exibir(mensagem)
+        return False
+
+    def sacar(self, valor, descricao="Saque"):
+        """Realiza um saque na conta (verificação e débito atômicos sob a trava da conta).
+
+        'descricao' só muda a mensagem de sucesso (usada também no débito de uma transferência).
+        """
+        try:
+            centavos = para_centavos(valor)
+        except (ValueError, ArithmeticError):
+            return self.recusar(MOTIVO_VALOR_INVALIDO, "\n> Operação falhou! O valor informado é inválido.")
+        with self.trava:
+            if centavos > self.saldo_centavos:
+                return self.recusar(MOTIVO_SALDO_INSUFICIENTE, "\n> Operação falhou! Você não tem saldo suficiente.")
+            elif centavos <= 0:
+                return self.recusar(MOTIVO_VALOR_INVALIDO, "\n> Operação falhou! O valor informado é inválido (deve ser positivo).")
+            self.saldo_centavos -= centavos
+        exibir(f"\n> {descricao} de R$ {valor:.2f} realizado com sucesso!")
         return True
 
-    def depositar(self, valor):
-        """Realiza um depósito na conta."""
-        if valor <= 0:
-            print("\n> Operação falhou! O valor informado é inválido (deve ser positivo).")
-            return False
-        self.saldo += valor
-        print(f"\n> Depósito de R$ {valor:.2f} realizado com sucesso!")
+    def depositar(self, valor, descricao="Depósito"):
+        """Realiza um depósito na conta ('descricao' só muda a mensagem de sucesso)."""
+        try:
+            centavos = para_centavos(valor)
+        except (ValueError, ArithmeticError):
+            return self.recusar(MOTIVO_VALOR_INVALIDO, "\n> Operação falhou! O valor informado é inválido.")
+        with self.trava:
+            if centavos <= 0:
+                return self.recusar(MOTIVO_VALOR_INVALIDO, "\n> Operação falhou! O valor informado é inválido (deve ser positivo).")
+            self.saldo_centavos += centavos
+        exibir(f"\n> {descricao} de R$ {valor:.2f} realizado com sucesso!")
         return True
 
     def registrar_transacao(self, transacao, cpf_usuario=None, empresa_conta_numero=None):
@@ -144,7 +976,7 @@ class Conta:
         # O registro efetivo (persistência e contagem de transações diárias)
         if transacao.registrar(self):
             # Adiciona ao histórico da conta.
-            self.historico.adicionar_transacao(transacao, cpf_usuario, self.numero)
+            self.ultima_transacao = self.historico.adicionar_transacao(transacao, cpf_usuario, self.numero)
             return True
         return False
 
@@ -155,30 +987,27 @@ class Conta:
 
 class ContaCorrente(Conta):
     """Classe para representar uma conta corrente, herdando de Conta."""
-    def __init__(self, numero, cliente, limite=500, limite_saques=3):
+    def __init__(self, numero, cliente, limite=500, limite_saques=3, janela=JANELA_DIARIA):
         """Inicializa um objeto ContaCorrente."""
         super().__init__(numero, cliente)  # Chama o construtor da classe pai (Conta).
         self.limite = limite  # O limite de valor por saque.
-        self.limite_saques = limite_saques  # O limite de quantidade de saques por dia.
-        self.saques_realizados = {}  # Um dicionário para controlar os saques diários.
+        self.limite_saques = limite_saques  # O limite de quantidade de saques por dia (ou por 24 horas).
+        self.saques_realizados = ContadorJanela(limite_saques, janela)  # Saques feitos na janela atual.
 
-    def sacar(self, valor):
+    def sacar(self, valor, descricao="Saque"):
         """Realiza um saque na conta corrente, com validações de limite e quantidade."""
-        hoje = date.today().isoformat()  # Obtém a data de hoje no formato 'YYYY-MM-DD'.
-        self.saques_realizados.setdefault(hoje, 0)  # Garante que a data de hoje exista no dicionário.
-
-        if self.saques_realizados[hoje] >= self.limite_saques:
-            print(f"\n> Operação falhou! Número máximo de {self.limite_saques} saques diários foi excedido para esta conta.")
-            return False
-        elif valor > self.limite:
-            print(f"\n> Operação falhou! O valor do saque excede o limite de R$ {self.limite:.2f} por saque.")
+        agora = epoca_agora()
+        with self.trava:  # A contagem de saques e o débito acontecem sem outra thread no meio.
+            if self.saques_realizados.esgotado(agora):
+                return self.recusar(MOTIVO_LIMITE_SAQUES_DIARIOS, f"\n> Operação falhou! Número máximo de {self.limite_saques} saques diários foi excedido para esta conta.")
+            elif valor > self.limite:
+                return self.recusar(MOTIVO_LIMITE_POR_SAQUE, f"\n> Operação falhou! O valor do saque excede o limite de R$ {self.limite:.2f} por saque.")
+
+            if super().sacar(valor, descricao):  # Chama o método sacar da classe pai (Conta).
+                self.saques_realizados.registrar(agora)  # Conta o saque na janela.
+                return True
             return False
 
-        if super().sacar(valor):  # Chama o método sacar da classe pai (Conta).
-            self.saques_realizados[hoje] += 1  # Incrementa o contador de saques diários.
-            return True
-        return False
-
 
 class Transacao(ABC):
     """Classe abstrata (interface) para definir o contrato de uma transação."""
@@ -226,81 +1055,1162 @@ class Deposito(Transacao):
         return conta.depositar(self.valor)
 
 
+class Transferencia(Transacao):
+    """Classe para representar uma transferência da conta em que é registrada para a conta de destino.
+
+    O débito passa pelas mesmas regras de um saque (saldo, limite por saque e quantidade de
+    saques). Quem registra deve estar com as travas das duas contas (ver Bank.transferir).
+    """
+    def __init__(self, valor, destino):
+        """Inicializa um objeto Transferencia."""
+        self._valor = valor
+        self.destino = destino  # Conta que recebe o valor.
+
+    @property
+    def valor(self):
+        """Retorna o valor da transferência."""
+        return self._valor
+
+    def registrar(self, conta):
+        """Debita a conta de origem e credita a de destino."""
+        if not conta.sacar(self.valor, "Débito de transferência"):
+            return False
+        return self.destino.depositar(self.valor, "Crédito de transferência")
+
+
+# Tipos de transação aceitos por nome (menu interativo, lote e journal).
+TIPOS_TRANSACAO = {"saque": Saque, "deposito": Deposito, "depósito": Deposito}
+
+
+# --------------------------- JOURNAL ---------------------------
+# Registro append-only das transações aceitas. Cada saque/depósito vira uma linha
+# no arquivo, gravada com fsync, e os snapshots completos (save_all) só são feitos
+# de tempos em tempos. Assim o custo de cada transação não cresce com o histórico.
+
+class JournalTransacoes:
+    """Journal append-only (uma linha JSON por transação) com número de sequência."""
+    def __init__(self, arquivo: Path):
+        """Inicializa o journal apontando para o arquivo informado."""
+        self.arquivo = arquivo  # Caminho do arquivo .jsonl do journal.
+        self.seq = 0  # Número de sequência do último registro gravado ou lido.
+        self._arquivo_aberto = None  # Arquivo mantido aberto em modo append.
+
+    def registrar(self, registro):
+        """Acrescenta um registro ao final do journal e força a gravação em disco (fsync)."""
+        return self.registrar_varios([registro])
+
+    def registrar_varios(self, registros):
+        """Acrescenta vários registros de uma vez, com um único fsync no final."""
+        if self._arquivo_aberto is None:
+            self._arquivo_aberto = open(self.arquivo, "a", encoding="utf-8")
+        linhas = []
+        for registro in registros:
+            self.seq += 1
+            linhas.append(json.dumps(dict(registro, seq=self.seq), ensure_ascii=False) + "\n")
+        self._arquivo_aberto.write("".join(linhas))
+        self._arquivo_aberto.flush()
+        os.fsync(self._arquivo_aberto.fileno())  # Só retorna depois dos registros estarem no disco.
+        return self.seq
+
+    def ler(self, apos_seq=0):
+        """Percorre os registros com seq maior que 'apos_seq', na ordem em que foram gravados."""
+        try:
+            with open(self.arquivo, "r", encoding="utf-8") as f:
+                for linha in f:
+                    linha = linha.strip()
+                    if not linha:
+                        continue
+                    try:
+                        registro = json.loads(linha)
+                    except json.JSONDecodeError:
+                        # Última linha incompleta (queda durante a escrita): ignora o restante.
+                        break
+                    seq = registro.get("seq", 0)
+                    self.seq = max(self.seq, seq)
+                    if seq > apos_seq:
+                        yield registro
+        except FileNotFoundError:
+            return
+
+    def truncar(self):
+        """Esvazia o journal (chamado depois que um snapshot completo foi gravado)."""
+        self.fechar()
+        with open(self.arquivo, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+    def fechar(self):
+        """Fecha o arquivo do journal, se estiver aberto."""
+        if self._arquivo_aberto is not None:
+            self._arquivo_aberto.close()
+            self._arquivo_aberto = None
+
+
+# --------------------------- ARMAZENAMENTO ---------------------------
+# Meios de persistência do banco. O Bank conversa apenas com a interface
+# Armazenamento; os arquivos JSON são uma implementação, o SQLite
+# (armazenamento_sqlite.py) é outra e o livro-razão binário (razao_binario.py) mais uma.
+
+class Armazenamento(ABC):
+    """Classe abstrata (interface) para os meios de persistência do banco."""
+    @abstractmethod
+    def carregar(self):
+        """Retorna um dicionário com 'clientes', 'contas', 'extratos', 'transacoes_diarias' e 'journal'.
+
+        'idempotencia' (opcional) traz as chaves de idempotência, se o armazenamento não as
+        guardar junto com os contadores de 'transacoes_diarias'.
+
+        Os quatro primeiros seguem o formato dos arquivos JSON; 'journal' são as transações
+        gravadas depois do último snapshot, que o Bank reaplica em memória. Se o dicionário
+        tiver 'historico_sob_demanda' verdadeiro, 'extratos' traz apenas as transações de
+        contas inexistentes e o histórico de cada conta é lido por carregar_historico
+        quando for pedido pela primeira vez.
+        """
+        pass
+
+    def carregar_historico(self, numero_conta):
+        """Retorna as transações já gravadas de uma conta (usado na carga sob demanda dos históricos)."""
+        return []
+
+    @abstractmethod
+    def salvar_tudo(self, bank):
+        """Grava o estado completo do banco (snapshot)."""
+        pass
+
+    @abstractmethod
+    def registrar_transacoes(self, bank, registros):
+        """Persiste transações que já foram aplicadas em memória."""
+        pass
+
+    def salvar_cliente(self, bank, cliente):
+        """Persiste um cliente novo ou alterado (por padrão, grava o snapshot completo)."""
+        self.salvar_tudo(bank)
+
+    def salvar_conta(self, bank, conta):
+        """Persiste uma conta nova ou alterada (por padrão, grava o snapshot completo)."""
+        self.salvar_tudo(bank)
+
+    def snapshot_pendente(self):
+        """Indica se o Bank deve gravar um snapshot completo agora (por padrão, nunca)."""
+        return False
+
+    def marca_historico(self, numero_conta):
+        """Valor que muda quando o histórico gravado da conta muda, obtido sem lê-lo (None: desconhecido).
+
+        Usado pela conciliação incremental para saber quais contas verificar de novo.
+        """
+        return None
+
+    def consultar_extrato(self, bank, numero_conta):
+        """Retorna as transações de uma conta (por padrão, a partir do histórico em memória)."""
+        conta = bank.buscar_conta(numero_conta)
+        return conta.historico.to_list() if conta else []
+
+    def descricao(self):
+        """Texto que informa ao usuário onde os dados são lidos e gravados."""
+        return self.__class__.__name__
+
+    def fechar(self):
+        """Libera arquivos ou conexões abertas."""
+        pass
+
+
+class ArmazenamentoJSON(Armazenamento):
+    """Persistência em arquivos JSON, com journal append-only e snapshots periódicos.
+
+    O snapshot grava extratos.json agrupado por conta, junto com um índice da posição (em
+    bytes) e do CRC32 do trecho de cada conta no arquivo. Com o índice, a inicialização lê
+    apenas clientes, contas e contadores, e o histórico de cada conta só é lido (e conferido)
+    quando for pedido. Os demais arquivos do snapshot são gravados por gravar_snapshot, com
+    a 'compressao' escolhida; extratos.json nunca é comprimido, para ser lido por trechos.
+
+    Um snapshot é uma geração: os arquivos novos são gravados primeiro ao lado dos atuais
+    (com o sufixo .g<geração>) e o snapshot só passa a valer quando snapshot_meta.json é
+    trocado, com a geração, o seq do journal que ela cobre e a lista dos arquivos. Só então
+    os arquivos entram no lugar dos atuais e o journal é esvaziado. Uma queda antes da troca
+    do meta deixa o snapshot anterior e o journal inteiros; uma queda depois é concluída na
+    próxima carga (concluir_snapshot), e os registros já cobertos pelo seq são ignorados.
+    """
+    def __init__(self, diretorio=None, journal=True, intervalo_snapshot=1000, compressao=None):
+        """Inicializa o armazenamento no diretório informado (padrão: pasta do script)."""
+        if compressao not in COMPRESSOES:
+            raise ValueError(f"compressão inválida: {compressao!r} (use gzip ou lzma)")
+        diretorio = Path(diretorio) if diretorio else BASE_DIR
+        self.diretorio = diretorio
+        self.arq_clientes = diretorio / ARQ_CLIENTES.name
+        self.arq_contas = diretorio / ARQ_CONTAS.name
+        self.arq_extratos = diretorio / ARQ_EXTRATOS.name
+        self.arq_indice_extratos = diretorio / ARQ_INDICE_EXTRATOS.name
+        self.arq_transacoes_diarias = diretorio / ARQ_TRANSACOES_DIARIAS.name
+        self.arq_snapshot_meta = diretorio / ARQ_SNAPSHOT_META.name
+        self.usar_journal = journal  # Se False, cada transação grava o snapshot completo (comportamento antigo).
+        self.intervalo_snapshot = intervalo_snapshot  # Transações no journal antes de um novo snapshot.
+        self.journal = JournalTransacoes(diretorio / ARQ_JOURNAL.name)
+        self.transacoes_desde_snapshot = 0  # Transações gravadas no journal desde o último snapshot.
+        self.indice_extratos = None  # Conta -> [início, fim, crc32] do seu trecho em extratos.json (None: sem índice).
+        self.compressao = compressao  # Compressão dos arquivos do snapshot (None, "gzip" ou "lzma").
+        self.geracao = None  # Geração do snapshot atual (None enquanto snapshot_meta.json não foi lido).
+        self.somente_leitura = False  # Se True (réplica), a carga não conclui snapshots pela metade: levanta SnapshotEmInstalacao.
+        self._extratos_lidos = None  # Só com somente_leitura: extratos.json aberto na carga, de onde vêm os trechos sob demanda.
+        self._trava_extratos = threading.Lock()  # Serializa as leituras de trechos em _extratos_lidos.
+
+    def arquivos_snapshot(self):
+        """Arquivos substituídos por um snapshot (todos menos snapshot_meta.json, que é o ponto de confirmação)."""
+        return [self.arq_clientes, self.arq_contas, self.arq_extratos, self.arq_indice_extratos, self.arq_transacoes_diarias]
+
+    @staticmethod
+    def _arquivo_da_geracao(arquivo, geracao):
+        """Caminho em que o arquivo de uma geração é gravado antes de entrar no lugar do atual."""
+        return arquivo.with_name(f"{arquivo.name}.g{geracao}")
+
+    def concluir_snapshot(self):
+        """Lê snapshot_meta.json e põe no lugar os arquivos da geração confirmada que ainda não foram trocados. Retorna o meta.
+
+        Em modo somente leitura, levanta SnapshotEmInstalacao se houver arquivos a trocar.
+        """
+        meta = ler_snapshot(self.arq_snapshot_meta)
+        if not isinstance(meta, dict):
+            meta = {}
+        self.geracao = meta.get("geracao", 0)
+        arquivos = [self.diretorio / nome for nome in meta.get("arquivos", [])]
+        pendentes = [a for a in arquivos if self._arquivo_da_geracao(a, self.geracao).exists()]
+        if pendentes and self.somente_leitura:
+            raise SnapshotEmInstalacao(f"snapshot {self.geracao} ainda sendo instalado em {self.diretorio}")
+        self._instalar(pendentes, self.geracao)
+        return meta
+
+    def _instalar(self, arquivos, geracao):
+        """Troca cada arquivo pelo da geração (os.replace) e grava a pasta em disco."""
+        if not arquivos:
+            return
+        self._antes_de_instalar()
+        for arquivo in arquivos:
+            try:
+                os.replace(self._arquivo_da_geracao(arquivo, geracao), arquivo)
+            except FileNotFoundError:
+                pass  # Já trocado por outro processo que carregou os mesmos dados.
+        _sincronizar_pasta(self.diretorio)
+
+    def _antes_de_instalar(self):
+        """Chamado antes de trocar os arquivos de um snapshot (nada a fazer nos arquivos JSON)."""
+        pass
+
+    def _descartar_geracoes(self):
+        """Apaga os arquivos de gerações que nunca foram confirmadas (queda antes da troca do meta)."""
+        for arquivo in self.arquivos_snapshot():
+            for sobra in arquivo.parent.glob(f"{arquivo.name}.g*"):
+                sobra.unlink(missing_ok=True)
+
+    def carregar(self):
+        """Lê os arquivos JSON e prepara a leitura do journal posterior ao snapshot.
+
+        Se um snapshot for confirmado durante a leitura (snapshot_meta.json mudou), a leitura é
+        repetida, para não juntar arquivos de gerações diferentes.
+        """
+        for _tentativa in range(TENTATIVAS_LEITURA_SNAPSHOT):
+            antes = _estado_do_arquivo(self.arq_snapshot_meta)
+            dados = self._carregar_geracao()
+            if _estado_do_arquivo(self.arq_snapshot_meta) == antes:
+                return dados
+        raise SnapshotEmInstalacao(f"os snapshots de {self.diretorio} mudaram durante {TENTATIVAS_LEITURA_SNAPSHOT} leituras seguidas")
+
+    def _carregar_geracao(self):
+        """Uma leitura do snapshot atual (ver carregar)."""
+        meta = self.concluir_snapshot()
+        seq_snapshot = meta.get("seq", 0)
+        self.journal.seq = seq_snapshot
+        self.transacoes_desde_snapshot = 0
+        clientes = ler_snapshot(self.arq_clientes)
+        contas = ler_snapshot(self.arq_contas)
+
+        self.indice_extratos = self._ler_indice_extratos()
+        if self.indice_extratos is None:
+            # Sem índice válido (arquivo antigo ou alterado fora do sistema): lê o extrato inteiro.
+            extratos = ler_snapshot(self.arq_extratos)
+        else:
+            # Lê agora só os trechos de contas que o Bank não vai reconstruir (mesma regra de load_all).
+            cpfs = {c.get("cpf") for c in clientes}
+            numeros = {c.get("numero") for c in contas if c.get("cliente_cpf") in cpfs}
+            extratos = [t for chave in self.indice_extratos if chave not in numeros for t in self.carregar_historico(chave)]
+
+        return {
+            "clientes": clientes,
+            "contas": contas,
+            "extratos": extratos,
+            "historico_sob_demanda": self.indice_extratos is not None,
+            "transacoes_diarias": ler_snapshot(self.arq_transacoes_diarias) or {},
+            "journal": self._reaplicar_journal(seq_snapshot),
+        }
+
+    def _reaplicar_journal(self, seq_snapshot):
+        """Percorre o journal a partir do snapshot, contando as transações ainda fora dele."""
+        for registro in self.journal.ler(seq_snapshot):
+            self.transacoes_desde_snapshot += 1
+            yield registro
+
+    def _ler_indice_extratos(self):
+        """Lê o índice de extratos.json, se ele for do arquivo atual (mesmo tamanho e data de alteração)."""
+        try:
+            indice = ler_snapshot(self.arq_indice_extratos)
+        except ArquivoCorrompido:
+            return None  # O índice é refeito no próximo snapshot; até lá o extrato é lido inteiro.
+        self._fechar_extratos_lidos()
+        try:
+            if self.somente_leitura:
+                # O arquivo fica aberto: as leituras sob demanda continuam nesta geração mesmo
+                # depois que o processo principal instalar outra no lugar dele.
+                self._extratos_lidos = open(self.arq_extratos, "rb")
+                estado = os.fstat(self._extratos_lidos.fileno())
+            else:
+                estado = self.arq_extratos.stat()
+        except OSError:
+            return None
+        if not isinstance(indice, dict) or indice.get("tamanho") != estado.st_size or indice.get("mtime_ns") != estado.st_mtime_ns:
+            self._fechar_extratos_lidos()
+            return None
+        return indice.get("contas", {})
+
+    def _fechar_extratos_lidos(self):
+        """Fecha o extratos.json mantido aberto pela carga somente leitura."""
+        if self._extratos_lidos is not None:
+            self._extratos_lidos.close()
+            self._extratos_lidos = None
+
+    @staticmethod
+    def _chave_conta(numero):
+        """Chave de uma conta no índice (o número da conta, ou o JSON dele se não for texto)."""
+        return numero if isinstance(numero, str) else json.dumps(numero)
+
+    def carregar_historico(self, numero_conta):
+        """Lê de extratos.json apenas o trecho da conta informada, pela posição guardada no índice, e confere o CRC32."""
+        faixa = (self.indice_extratos or {}).get(self._chave_conta(numero_conta))
+        if not faixa:
+            return []
+        trecho = self._ler_trecho(faixa)
+        try:
+            return json.loads(b"[" + trecho + b"]")
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise ArquivoCorrompido(f"{self.arq_extratos}: trecho da conta {numero_conta} inválido ({e})") from None
+
+    def _ler_trecho(self, faixa, arquivo=None):
+        """Bytes do trecho [início, fim] de extratos.json, conferidos com o CRC32 do índice (índices antigos não têm)."""
+        inicio, fim = faixa[0], faixa[1]
+        if arquivo is None and self._extratos_lidos is not None:
+            with self._trava_extratos:
+                self._extratos_lidos.seek(inicio)
+                trecho = self._extratos_lidos.read(fim - inicio)
+        elif arquivo is None:
+            with open(self.arq_extratos, "rb") as f:
+                f.seek(inicio)
+                trecho = f.read(fim - inicio)
+        else:
+            arquivo.seek(inicio)
+            trecho = arquivo.read(fim - inicio)
+        if len(faixa) > 2 and zlib.crc32(trecho) != faixa[2]:
+            raise ArquivoCorrompido(f"{self.arq_extratos}: checksum do trecho [{inicio}, {fim}] não confere")
+        return trecho
+
+    def marca_historico(self, numero_conta):
+        """Tamanho em bytes do trecho da conta em extratos.json (None sem índice válido)."""
+        if self.indice_extratos is None:
+            return None
+        faixa = self.indice_extratos.get(self._chave_conta(numero_conta))
+        return faixa[1] - faixa[0] if faixa else 0
+
+    def salvar_tudo(self, bank):
+        """Salva um snapshot completo (clientes, contas, extratos, etc.) e esvazia o journal.
+
+        Só os arquivos com alterações desde o último snapshot (bank.alterados) são regravados, e
+        no extrato só as transações novas de cada conta são convertidas para JSON. Os arquivos
+        são gravados como uma nova geração e confirmados juntos pela troca de snapshot_meta.json
+        (ver a documentação da classe); um erro de gravação sobe antes da confirmação, com o
+        snapshot anterior e o journal intactos.
+        """
+        if self.geracao is None:
+            self.concluir_snapshot()  # Armazenamento gravado sem ter sido carregado: termina a instalação anterior.
+        self._descartar_geracoes()
+        geracao = self.geracao + 1
+        gravados = []  # Arquivos da nova geração, já gravados ao lado dos atuais.
+
+        def preparado(arquivo):
+            """Caminho da nova geração do arquivo (que passa a fazer parte do snapshot)."""
+            gravados.append(arquivo)
+            return self._arquivo_da_geracao(arquivo, geracao)
+
+        # Salva os dados dos clientes.
+        if "clientes" in bank.alterados or not self.arq_clientes.exists():
+            clientes_data = [c.to_dict() for c in bank.clientes]
+            gravar_snapshot(preparado(self.arq_clientes), clientes_data, self.compressao)
+
+        # Salva os dados das contas.
+        if "contas" in bank.alterados or not self.arq_contas.exists():
+            contas_data = [c.to_dict() for c in bank.contas]
+            gravar_snapshot(preparado(self.arq_contas), contas_data, self.compressao)
+
+        # Salva o extrato geral (os históricos de todas as contas, agrupados por conta) e o seu índice.
+        indice = self._salvar_extratos(bank, preparado)
+
+        # Salva o controle de transações diárias.
+        if "transacoes_diarias" in bank.alterados or not self.arq_transacoes_diarias.exists():
+            gravar_snapshot(preparado(self.arq_transacoes_diarias), bank.dados_limites(), self.compressao)
+
+        # Ponto de confirmação: o meta diz qual geração vale e até qual registro do journal ela contempla.
+        meta = {"seq": self.journal.seq, "geracao": geracao, "arquivos": [arquivo.name for arquivo in gravados]}
+        gravar_snapshot(self.arq_snapshot_meta, meta, self.compressao)
+        self.geracao = geracao
+        self._instalar(gravados, geracao)
+        self._extratos_instalados(bank, indice)
+        self.journal.truncar()
+        self.transacoes_desde_snapshot = 0
+
+    def _salvar_extratos(self, bank, preparado):
+        """Grava extratos.json com as transações agrupadas por conta e o índice com o trecho de cada conta.
+
+        O arquivo é uma lista JSON com uma transação compacta por linha. As transações que já
+        estavam no snapshot anterior não são convertidas de novo: o trecho da conta é copiado
+        do arquivo anterior (conferido pelo CRC32) e só as transações novas são acrescentadas
+        depois dele. Os dois arquivos vão para os caminhos da nova geração ('preparado'); retorna
+        o índice, que passa a valer quando eles forem instalados (_extratos_instalados).
+        """
+        grupos = {}  # Chave da conta -> [trecho no arquivo anterior, registros novos].
+        for conta in bank.contas:
+            historico = conta.historico
+            faixa = None
+            if not historico.carregado or historico.linhas_no_arquivo:
+                faixa = (self.indice_extratos or {}).get(self._chave_conta(conta.numero))
+            # Sem trecho anterior para copiar, a conta é gravada inteira.
+            grupos[self._chave_conta(conta.numero)] = [faixa, historico.registros_novos() if faixa else historico.to_list()]
+        for t in bank.extratos:  # Transações de contas inexistentes são mantidas como vieram.
+            grupos.setdefault(self._chave_conta(t.get("conta")), [None, []])[1].append(t)
+
+        indice = {}
+        temporario = preparado(self.arq_extratos)
+        anterior = open(self.arq_extratos, "rb") if self.indice_extratos else None
+        try:
+            with open(temporario, "wb") as f:
+                f.write(b"[")
+                posicao = 1
+                for chave, (faixa, registros) in grupos.items():
+                    pedacos = []
+                    if faixa:
+                        pedacos.append(self._ler_trecho(faixa, anterior))
+                    for r in registros:
+                        pedacos.append(json.dumps(r, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+                    if not pedacos:
+                        continue
+                    trecho = b",\n".join(pedacos)
+                    separador = b",\n" if indice else b"\n"
+                    f.write(separador + trecho)
+                    posicao += len(separador)
+                    indice[chave] = [posicao, posicao + len(trecho), zlib.crc32(trecho)]
+                    posicao += len(trecho)
+                f.write(b"\n]" if indice else b"]")
+                f.flush()
+                os.fsync(f.fileno())
+        finally:
+            if anterior is not None:
+                anterior.close()
+
+        estado = temporario.stat()  # os.replace mantém o tamanho e a data de alteração, conferidos na carga.
+        gravar_snapshot(preparado(self.arq_indice_extratos), {"tamanho": estado.st_size, "mtime_ns": estado.st_mtime_ns, "contas": indice}, self.compressao)
+        return indice
+
+    def _extratos_instalados(self, bank, indice):
+        """Passa a ler os históricos do extrato instalado e marca as transações de todas as contas como gravadas."""
+        self.indice_extratos = indice
+        for conta in bank.contas:
+            conta.historico.marcar_gravado()
+
+    def salvar_cliente(self, bank, cliente):
+        """Registra o cliente novo no journal (clientes.json é regravado no próximo snapshot)."""
+        if not self.usar_journal:
+            return self.salvar_tudo(bank)
+        self.registrar_transacoes(bank, [dict(cliente.to_dict(), evento="cliente")])
+
+    def salvar_conta(self, bank, conta):
+        """Registra a conta nova no journal (contas.json é regravado no próximo snapshot)."""
+        if not self.usar_journal:
+            return self.salvar_tudo(bank)
+        self.registrar_transacoes(bank, [dict(conta.to_dict(), evento="conta")])
+
+    def registrar_transacoes(self, bank, registros):
+        """Grava as transações no journal (um único fsync)."""
+        if not self.usar_journal:
+            return  # Sem journal, o Bank grava um snapshot completo (ver snapshot_pendente).
+        self.journal.registrar_varios(registros)
+        self.transacoes_desde_snapshot += len(registros)
+
+    def snapshot_pendente(self):
+        """Pede um snapshot a cada 'intervalo_snapshot' transações (ou sempre, sem journal)."""
+        return not self.usar_journal or self.transacoes_desde_snapshot >= self.intervalo_snapshot
+
+    def descricao(self):
+        """Lista os arquivos de dados usados."""
+        arquivos = [self.arq_clientes, self.arq_contas, self.arq_extratos, self.arq_transacoes_diarias, self.journal.arquivo]
+        return f"arquivos JSON em {self.diretorio}\n" + "\n".join(f"> {arquivo}" for arquivo in arquivos)
+
+    def fechar(self):
+        """Fecha o arquivo do journal (e o extratos.json aberto pela carga somente leitura)."""
+        self.journal.fechar()
+        self._fechar_extratos_lidos()
+
+
+# --------------------------- GRAVAÇÃO EM GRUPO ---------------------------
+# Em vez de cada transação pagar o seu próprio fsync, uma thread junta as transações
+# que chegam enquanto a fila cresce (no máximo por uma janela curta ou até um número
+# máximo de operações) e grava todas de uma vez (group commit).
+
+class GravadorAgrupado:
+    """Thread que persiste as transações pendentes do Bank em grupos."""
+    def __init__(self, bank, janela_ms=5, max_operacoes=256):
+        """Inicializa o gravador (a thread só começa em iniciar)."""
+        self.bank = bank
+        self.janela = janela_ms / 1000  # Tempo máximo que o grupo pode crescer antes de ser gravado, em segundos.
+        self.max_operacoes = max_operacoes  # Grava antes do fim da janela se o grupo chegar a este tamanho.
+        self.erro = None  # Exceção da última gravação que falhou (None se a última deu certo).
+        self._condicao = threading.Condition()
+        self._parar = False
+        self._thread = threading.Thread(target=self._executar, name="gravador-agrupado", daemon=True)
+
+    def iniciar(self):
+        """Inicia a thread do gravador."""
+        self._thread.start()
+        return self
+
+    def avisar(self):
+        """Acorda o gravador (há transação nova na fila ou uma gravação terminou)."""
+        with self._condicao:
+            self._condicao.notify_all()
+
+    def aguardar(self, marca):
+        """Espera até a transação de número 'marca' estar gravada (levanta a exceção se a gravação falhar)."""
+        with self._condicao:
+            self._condicao.notify_all()
+            while self.bank.total_gravadas < marca:
+                if self.erro is not None:
+                    raise self.erro
+                self._condicao.wait()
+
+    def _executar(self):
+        """Laço da thread: espera a primeira transação, deixa o grupo crescer enquanto chegam outras e grava."""
+        while True:
+            with self._condicao:
+                while not self._parar and not self.bank.transacoes_pendentes:
+                    self._condicao.wait()
+                if self._parar and not self.bank.transacoes_pendentes:
+                    return
+            # O grupo só cresce enquanto chegam transações novas: a cada volta o gravador cede a vez
+            # às threads prontas e grava assim que a fila para de crescer. Uma transação sozinha é
+            # gravada na hora; as que chegam durante um fsync formam o grupo seguinte.
+            prazo = time.monotonic() + self.janela
+            vistas = 0
+            while not self._parar:
+                pendentes = len(self.bank.transacoes_pendentes)
+                if pendentes == vistas or pendentes >= self.max_operacoes or time.monotonic() >= prazo:
+                    break
+                vistas = pendentes
+                time.sleep(0)
+            try:
+                self.bank.persistir_pendentes()
+                self.erro = None
+            except Exception as e:  # Disco cheio, permissão...: as transações voltam para a fila.
+                self.erro = e
+                print(f"Erro na gravação em grupo: {e}", file=sys.stderr)
+                time.sleep(self.janela)
+            self.avisar()
+
+    def parar(self):
+        """Grava o que estiver pendente e encerra a thread."""
+        with self._condicao:
+            self._parar = True
+            self._condicao.notify_all()
+        self._thread.join()
+
+
+# --------------------------- LISTAGEM DE CONTAS ---------------------------
+# Listagem paginada das contas, ordenada por número, nome do cliente ou saldo. Os índices
+# ordenados são montados na primeira listagem e depois mantidos a cada mudança de saldo
+# e a cada conta nova; as páginas já montadas ficam em cache até uma conta delas mudar.
+
+ORDENS_LISTAGEM = ("numero", "nome", "saldo")  # Ordens aceitas por Bank.pagina_contas.
+
+
+class ListaOrdenada:
+    """Lista sempre ordenada, dividida em blocos: inserir e remover custam O(raiz de n), não O(n)."""
+    TAMANHO_BLOCO = 1000  # Tamanho dos blocos ao montar a lista (um bloco é dividido ao passar do dobro).
+
+    def __init__(self, itens=()):
+        """Monta a lista com os itens informados (ordenados aqui)."""
+        itens = sorted(itens)
+        t = self.TAMANHO_BLOCO
+        self._blocos = [itens[i:i + t] for i in range(0, len(itens), t)]
+        self._maximos = [bloco[-1] for bloco in self._blocos]  # Último item de cada bloco (busca do bloco).
+        self._tamanho = len(itens)
+
+    def __len__(self):
+        """Quantidade de itens."""
+        return self._tamanho
+
+    def adicionar(self, item):
+        """Insere o item na posição ordenada."""
+        self._tamanho += 1
+        if not self._blocos:
+            self._blocos.append([item])
+            self._maximos.append(item)
+            return
+        i = min(bisect_left(self._maximos, item), len(self._blocos) - 1)
+        bloco = self._blocos[i]
+        insort(bloco, item)
+        self._maximos[i] = bloco[-1]
+        if len(bloco) > 2 * self.TAMANHO_BLOCO:
+            metade = len(bloco) // 2
+            self._blocos[i:i + 1] = [bloco[:metade], bloco[metade:]]
+            self._maximos[i:i + 1] = [bloco[metade - 1], bloco[-1]]
+
+    def remover(self, item):
+        """Remove o item (ValueError se ele não estiver na lista)."""
+        i = bisect_left(self._maximos, item)
+        bloco = self._blocos[i] if i < len(self._blocos) else []
+        j = bisect_left(bloco, item)
+        if j == len(bloco) or bloco[j] != item:
+            raise ValueError(f"{item!r} não está na lista")
+        del bloco[j]
+        self._tamanho -= 1
+        if bloco:
+            self._maximos[i] = bloco[-1]
+        else:
+            del self._blocos[i]
+            del self._maximos[i]
+
+    def fatia(self, inicio, fim):
+        """Itens das posições inicio..fim-1, em ordem crescente."""
+        itens = []
+        for bloco in self._blocos:
+            if fim <= 0:
+                break
+            if inicio < len(bloco):
+                itens.extend(bloco[max(inicio, 0):fim])
+            inicio -= len(bloco)
+            fim -= len(bloco)
+        return itens
+
+    def posicao(self, item):
+        """Quantidade de itens menores que 'item' (a posição em que ele entraria)."""
+        i = bisect_left(self._maximos, item)
+        antes = sum(len(bloco) for bloco in self._blocos[:i])
+        return antes + (bisect_left(self._blocos[i], item) if i < len(self._blocos) else 0)
+
+    def a_partir(self, item):
+        """Itera, em ordem crescente, os itens maiores ou iguais a 'item' (sem copiar a lista)."""
+        i = bisect_left(self._maximos, item)
+        if i == len(self._blocos):
+            return
+        bloco = self._blocos[i]
+        for j in range(bisect_left(bloco, item), len(bloco)):
+            yield bloco[j]
+        for bloco in self._blocos[i + 1:]:
+            yield from bloco
+
+
+class ListagemContas:
+    """Índices ordenados das contas (por número, nome e saldo) e cache das páginas já montadas.
+
+    Cada página em cache guarda a primeira e a última chave que mostra. Quando o saldo de
+    uma conta muda, só as páginas cujas chaves cruzam o caminho da conta (do saldo antigo
+    ao novo, ou a própria conta nas outras ordens) são descartadas; as demais continuam
+    com os mesmos itens. Uma conta nova muda o total e descarta todo o cache.
+    """
+    TAMANHO_CACHE = 256  # Páginas guardadas (as menos usadas saem primeiro).
+
+    def __init__(self):
+        """Inicializa a listagem sem índices (eles são montados na primeira página pedida)."""
+        self._contas = {}  # Número -> conta, de todas as contas adicionadas.
+        self._indices = None  # Ordem -> ListaOrdenada das chaves, ou None enquanto não montados.
+        self._cache = OrderedDict()  # (ordem, decrescente, página, tamanho) -> (primeira chave, última chave, página).
+        self._trava = threading.RLock()
+
+    @staticmethod
+    def chave(ordem, conta, saldo_centavos=None):
+        """Chave da conta no índice da ordem informada (o número desempata e identifica a conta)."""
+        numero = str(conta.numero)
+        if ordem == "saldo":
+            return (conta.saldo_centavos if saldo_centavos is None else saldo_centavos, len(numero), numero)
+        if ordem == "nome":
+            return (conta.cliente.nome.casefold(), len(numero), numero)
+        return (len(numero), numero)  # Números mais longos depois: "10000" vem depois de "9999".
+
+    def adicionar(self, conta):
+        """Inclui uma conta nova nos índices (se já estiverem montados) e descarta o cache."""
+        with self._trava:
+            self._contas[str(conta.numero)] = conta
+            if self._indices is not None:
+                for ordem, indice in self._indices.items():
+                    indice.adicionar(self.chave(ordem, conta))
+            self._cache.clear()
+
+    def saldo_alterado(self, conta, anterior):
+        """Move a conta no índice por saldo e descarta as páginas em cache afetadas (ver Conta.saldo_centavos)."""
+        with self._trava:
+            if self._indices is None:
+                return
+            antiga, nova = self.chave("saldo", conta, anterior), self.chave("saldo", conta)
+            try:
+                self._indices["saldo"].remover(antiga)
+            except ValueError:
+                return  # Conta que não está na listagem (por exemplo, de antes de zerar os dados).
+            self._indices["saldo"].adicionar(nova)
+            faixas = {"saldo": (min(antiga, nova), max(antiga, nova)),
+                      "numero": (self.chave("numero", conta),) * 2,
+                      "nome": (self.chave("nome", conta),) * 2}
+            for chave_cache, (primeira, ultima, _pagina) in list(self._cache.items()):
+                menor, maior = faixas[chave_cache[0]]
+                if primeira is not None and not (ultima < menor or primeira > maior):
+                    del self._cache[chave_cache]
+
+    def _montar_indices(self):
+        """Monta os índices ordenados de todas as contas (chamado com a trava, na primeira página)."""
+        contas = list(self._contas.values())
+        self._indices = {ordem: ListaOrdenada(self.chave(ordem, c) for c in contas) for ordem in ORDENS_LISTAGEM}
+
+    def pagina(self, ordem="numero", pagina=1, tamanho=20, decrescente=False):
+        """Página da listagem: {"contas": [...], "pagina", "total_paginas", "total"} (cada conta como dicionário).
+
+        Páginas começam em 1; uma página além da última volta sem contas.
+        """
+        if ordem not in ORDENS_LISTAGEM:
+            raise ValueError(f"ordem inválida: {ordem!r} (use {', '.join(ORDENS_LISTAGEM)})")
+        if pagina < 1 or tamanho < 1:
+            raise ValueError("a página e o tamanho da página precisam ser positivos")
+        chave_cache = (ordem, bool(decrescente), pagina, tamanho)
+        with self._trava:
+            em_cache = self._cache.get(chave_cache)
+            if em_cache is not None:
+                self._cache.move_to_end(chave_cache)
+                return em_cache[2]
+            if self._indices is None:
+                self._montar_indices()
+            indice = self._indices[ordem]
+            total = len(indice)
+            inicio = (pagina - 1) * tamanho
+            if decrescente:
+                chaves = indice.fatia(max(total - inicio - tamanho, 0), max(total - inicio, 0))[::-1]
+            else:
+                chaves = indice.fatia(inicio, inicio + tamanho)
+            contas = [self._contas[chave[-1]] for chave in chaves]
+            resultado = {
+                "contas": [{"numero": c.numero, "cliente": c.cliente.nome, "cpf": c.cliente.cpf, "saldo": c.saldo} for c in contas],
+                "pagina": pagina,
+                "total_paginas": (total + tamanho - 1) // tamanho,
+                "total": total,
+            }
+            primeira, ultima = (min(chaves[0], chaves[-1]), max(chaves[0], chaves[-1])) if chaves else (None, None)
+            self._cache[chave_cache] = (primeira, ultima, resultado)
+            if len(self._cache) > self.TAMANHO_CACHE:
+                self._cache.popitem(last=False)
+            return resultado
+
+
+# --------------------------- BUSCA DE CLIENTES ---------------------------
+# Busca de clientes pelo começo das palavras do nome, do CPF ou do endereço, sem
+# diferenciar maiúsculas, minúsculas nem acentos. Cada palavra dos campos entra em um
+# índice ordenado de termos, atualizado a cada cliente novo; uma busca só percorre a
+# faixa do índice com o prefixo pedido, e nunca mais que LIMITE_VARREDURA_BUSCA termos.
+
+CAMPOS_BUSCA = ("nome", "cpf", "endereco")  # Campos de PessoaFisica indexados pela busca.
+LIMITE_BUSCA = 20  # Clientes devolvidos por busca (padrão).
+LIMITE_VARREDURA_BUSCA = 5000  # Termos do índice lidos por busca, no máximo (limita o tempo de uma busca muito genérica).
+FIM_PREFIXO = chr(0x10FFFF)  # Maior caractere: prefixo + FIM_PREFIXO vem depois de todo termo com o prefixo.
+
+
+def normalizar_busca(texto):
+    """Texto sem acentos e em minúsculas ("São José" -> "sao jose"), usado nos dois lados da comparação."""
+    decomposto = unicodedata.normalize("NFKD", str(texto))
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def termos_busca(texto):
+    """Palavras normalizadas do texto; pontos, traços e barras entre dígitos são ignorados ("123.456.789-09" -> "12345678909")."""
+    return re.findall(r"\w+", re.sub(r"(?<=\d)[./-](?=\d)", "", normalizar_busca(texto)))
+
+
+class IndiceBuscaClientes:
+    """Índice de prefixos dos clientes: os pares (termo, CPF) de todos eles em uma ListaOrdenada.
+
+    Um texto com várias palavras percorre só a faixa da palavra com menos termos no índice
+    (o tamanho de cada faixa sai de duas buscas binárias) e confere as demais nos termos do
+    próprio cliente: um cliente aparece quando cada palavra do texto é o começo de algum
+    termo dos campos pedidos.
+    """
+
+    def __init__(self):
+        """Inicializa o índice vazio."""
+        self._termos = ListaOrdenada()  # Pares (termo, CPF), ordenados pelo termo.
+        self._campos = {}  # CPF -> {campo: conjunto de termos}, para conferir as palavras de cada cliente.
+        self._clientes = {}  # CPF -> cliente indexado.
+        self._trava = threading.RLock()
+
+    def __len__(self):
+        """Quantidade de clientes indexados."""
+        return len(self._clientes)
+
+    def adicionar(self, cliente):
+        """Indexa o cliente (um CPF já indexado é reindexado com os dados atuais)."""
+        with self._trava:
+            self.remover(cliente.cpf)
+            campos = {campo: frozenset(termos_busca(getattr(cliente, campo, ""))) for campo in CAMPOS_BUSCA}
+            self._campos[cliente.cpf] = campos
+            self._clientes[cliente.cpf] = cliente
+            for termo in frozenset().union(*campos.values()):
+                self._termos.adicionar((termo, cliente.cpf))
+
+    def remover(self, cpf):
+        """Tira o cliente do índice (nada acontece se o CPF não estiver indexado)."""
+        with self._trava:
+            campos = self._campos.pop(cpf, None)
+            if campos is None:
+                return
+            del self._clientes[cpf]
+            for termo in frozenset().union(*campos.values()):
+                self._termos.remover((termo, cpf))
+
+    def _tamanho_faixa(self, prefixo):
+        """Quantidade de termos do índice que começam pelo prefixo."""
+        return self._termos.posicao((prefixo + FIM_PREFIXO,)) - self._termos.posicao((prefixo,))
+
+    def buscar(self, texto, limite=LIMITE_BUSCA, campos=CAMPOS_BUSCA):
+        """Clientes em que cada palavra do texto começa algum termo dos campos informados. Retorna (clientes, completa).
+
+        Os clientes vêm na ordem do termo encontrado para a palavra guia. 'completa' é
+        False quando a busca parou antes do fim da faixa (no 'limite' de clientes ou no de
+        termos lidos): pode haver mais clientes, e um texto mais específico os encontra.
+        """
+        invalidos = [campo for campo in campos if campo not in CAMPOS_BUSCA]
+        if invalidos:
+            raise ValueError(f"campo de busca inválido: {invalidos[0]!r} (use {', '.join(CAMPOS_BUSCA)})")
+        palavras = set(termos_busca(texto))
+        if not palavras or limite < 1:
+            return [], True
+        encontrados, vistos = [], set()
+        with self._trava:
+            guia = min(palavras, key=self._tamanho_faixa)
+            for lidos, (termo, cpf) in enumerate(self._termos.a_partir((guia,))):
+                if not termo.startswith(guia):
+                    return encontrados, True
+                if lidos == LIMITE_VARREDURA_BUSCA:
+                    return encontrados, False
+                if cpf in vistos:
+                    continue
+                vistos.add(cpf)
+                termos = frozenset().union(*(self._campos[cpf][campo] for campo in campos))
+                if all(any(t.startswith(p) for t in termos) for p in palavras):
+                    if len(encontrados) == limite:
+                        return encontrados, False
+                    encontrados.append(self._clientes[cpf])
+        return encontrados, True
+
+
 # --------------------------- SISTEMA (Bank) ---------------------------
 class Bank:
     """Classe principal que orquestra todo o sistema bancário."""
     LIMITE_TRANSACOES_DIARIAS_POR_CONTA = 10  # Limite de transações diárias por conta.
+    JANELA_LIMITES = JANELA_DIARIA  # Janela dos limites de transações e saques (JANELA_DIARIA ou JANELA_24H).
 
-    def __init__(self):
-        """Inicializa o objeto Bank, carregando todos os dados dos arquivos JSON."""
+    def __init__(self, armazenamento=None, durabilidade=DURABILIDADE_SINCRONA, janela_gravacao_ms=5, operacoes_por_grupo=256,
+                 particao=0, total_particoes=1):
+        """Inicializa o objeto Bank, carregando todos os dados do armazenamento (padrão: arquivos JSON).
+
+        'durabilidade' é o nível usado pelas transações que não informam um; 'janela_gravacao_ms' e
+        'operacoes_por_grupo' configuram o gravador em grupo (níveis agrupada e assíncrona).
+        'particao' e 'total_particoes' são usados quando o Bank é uma das partições do banco
+        particionado (banco_particionado.py): as contas novas só recebem números da partição.
+        """
         self.clientes = []  # Lista de objetos PessoaFisica.
         self.contas = []  # Lista de objetos ContaCorrente.
-        self.extratos = []  # Lista de todas as transações (histórico global).
-        self.transacoes_diarias_por_conta = {}  # Dicionário para controlar as transações diárias.
+        self.extratos = []  # Transações cuja conta não existe (as demais ficam no histórico de cada conta).
+        self.transacoes_diarias_por_conta = ControleLimites(self.LIMITE_TRANSACOES_DIARIAS_POR_CONTA, self.JANELA_LIMITES)  # Transações de cada conta na janela.
+        self._usos_vencidos_na_carga = 0  # Usos vencidos descartados na carga que ainda estão no arquivo (ver encerrar_dia).
+        self.idempotencia = CacheIdempotencia()  # Chaves de idempotência das transações aceitas.
         self.saldos = {}  # Dicionário para armazenar os saldos das contas.
-        self.saques_realizados = {}  # Dicionário para controlar os saques realizados.
+        self.clientes_por_cpf = {}  # Índice CPF -> PessoaFisica.
+        self.contas_por_numero = {}  # Índice número da conta -> ContaCorrente.
+        self.contas_por_cpf = {}  # Índice CPF -> lista de ContaCorrente do cliente.
+        self.maior_numero_conta = 0  # Maior número de conta (numérico) já usado, base do próximo número.
+        self.listagem = ListagemContas()  # Índices ordenados e páginas da listagem de contas.
+        self.busca = IndiceBuscaClientes()  # Índice de prefixos do nome, CPF e endereço dos clientes.
+        self.particao = particao  # Partição deste Bank no banco particionado (0 se não for particionado).
+        self.total_particoes = total_particoes
         self.usuario_logado = None  # O cliente atualmente logado no sistema.
         self.conta_logada = None  # A conta atualmente selecionada pelo cliente.
-        self.load_all()  # Carrega todos os dados dos arquivos JSON.
-
-    # ------------------ I/O JSON ------------------
+        self.transacoes_pendentes = deque()  # Transações aceitas em memória que ainda não foram persistidas.
+        self.total_aceitas = 0  # Transações já colocadas na fila de pendentes (numeração usada pelo gravador em grupo).
+        self.total_gravadas = 0  # Das transações aceitas, quantas (as primeiras) já estão persistidas.
+        self.alterados = set()  # O que mudou desde o último snapshot: "clientes", "contas", "transacoes_diarias".
+        self.durabilidade = durabilidade  # Nível de durabilidade padrão das transações (DURABILIDADE_*).
+        self.janela_gravacao_ms = janela_gravacao_ms
+        self.operacoes_por_grupo = operacoes_por_grupo
+        self._gravador = None  # GravadorAgrupado, criado na primeira transação agrupada ou assíncrona.
+        self.armazenamento = armazenamento or ArmazenamentoJSON()  # Meio de persistência (JSON, SQLite...).
+        # Travas para o uso por várias threads. Ordem de aquisição: persistência -> estado -> conta.
+        self.trava_estado = TravaLeituraEscrita()  # Compartilhada nas transações, exclusiva em snapshots e cadastros.
+        self.trava_persistencia = threading.RLock()  # Uma gravação no armazenamento por vez.
+        self.trava_fila = threading.Lock()  # Mantém a fila de pendentes na mesma ordem da numeração.
+        self.load_all()  # Carrega todos os dados do armazenamento.
+
+    # ------------------ PERSISTÊNCIA ------------------
     def save_all(self):
-        """Salva todos os dados do sistema (clientes, contas, extratos, etc.) em arquivos JSON."""
-        # Salva os dados dos clientes.
-        clientes_data = [c.to_dict() for c in self.clientes]
-        salvar_json(ARQ_CLIENTES, clientes_data)
-
-        # Salva os dados das contas.
-        contas_data = [c.to_dict() for c in self.contas]
-        salvar_json(ARQ_CONTAS, contas_data)
-
-        # Salva o extrato geral (juntando os históricos de todas as contas).
-        extrato_geral = []
-        for c in self.contas:
-            extrato_geral.extend(c.historico.to_list())
-        salvar_json(ARQ_EXTRATOS, extrato_geral)
-
-        # Salva o controle de transações diárias.
-        salvar_json(ARQ_TRANSACOES_DIARIAS, self.transacoes_diarias_por_conta)
+        """Salva um snapshot completo (clientes, contas, extratos, etc.) no armazenamento."""
+        with self.trava_persistencia, self.trava_estado.exclusiva():
+            self.armazenamento.salvar_tudo(self)
+            # As transações pendentes já estão no snapshot, então não precisam mais ser gravadas.
+            with self.trava_fila:
+                self.transacoes_pendentes.clear()
+                self.total_gravadas = self.total_aceitas
+            self.alterados.clear()
+        if self._gravador is not None:
+            self._gravador.avisar()
 
     def load_all(self):
-        """Carrega todos os dados dos arquivos JSON e reconstrói os objetos em memória."""
-        # Carrega os dados brutos dos arquivos JSON.
-        clientes_raw = carregar_json(ARQ_CLIENTES)
-        contas_raw = carregar_json(ARQ_CONTAS)
-        extratos_raw = carregar_json(ARQ_EXTRATOS)
-        transacoes_diarias_raw = carregar_json(ARQ_TRANSACOES_DIARIAS)
+        """Carrega os dados do armazenamento e reconstrói os objetos em memória.
+
+        Se o armazenamento permitir, os históricos não são lidos aqui: cada conta busca o seu
+        na primeira vez em que ele for pedido (extrato, exportação, snapshot).
+        """
+        # Carrega os dados brutos do armazenamento.
+        dados = self.armazenamento.carregar()
+        clientes_raw = dados["clientes"]
+        contas_raw = dados["contas"]
+        extratos_raw = dados["extratos"]
+        transacoes_diarias_raw = dados["transacoes_diarias"]
+        sob_demanda = dados.get("historico_sob_demanda", False)
 
         # Reconstrói os objetos de cliente.
-        cpf_para_cliente = {}
         for cr in clientes_raw:
-            c = PessoaFisica(cr.get("nome", ""), cr.get("cpf", ""), cr.get("data_nascimento", ""), cr.get("endereco", ""))
-            self.clientes.append(c)
-            cpf_para_cliente[c.cpf] = c
+            self._restaurar_cliente(cr)
 
         # Reconstrói os objetos de conta.
         for cr in contas_raw:
-            cpf = cr.get("cliente_cpf")
-            cliente = cpf_para_cliente.get(cpf)
-            numero = cr.get("numero")
-            if cliente:
-                conta = ContaCorrente(numero, cliente)
-                conta.saldo = cr.get("saldo", 0)
-                cliente.adicionar_conta(conta)
-                self.contas.append(conta)
-                self.saldos[numero] = conta.saldo
-                self.saques_realizados[numero] = conta.saques_realizados
+            self._restaurar_conta(cr, sob_demanda)
 
         # Popula os históricos das contas com as transações carregadas.
         for t in extratos_raw:
             conta_num = t.get("conta")
-            conta = next((c for c in self.contas if c.numero == conta_num), None)
+            conta = self.contas_por_numero.get(conta_num)
+            if conta:
+                conta.historico.adicionar_registro(t)
+            else:
+                self.extratos.append(t)
+
+        # Carrega os contadores de transações e saques (convertendo os formatos antigos).
+        self._restaurar_limites(transacoes_diarias_raw, dados.get("idempotencia"))
+
+        # Reaplica as transações do journal posteriores ao último snapshot.
+        reaplicados = 0
+        for registro in dados["journal"]:
+            self.aplicar_registro_journal(registro)
+            reaplicados += 1
+
+        # O que acabou de ser lido já está gravado; o que veio do journal ainda não está no snapshot.
+        self.alterados = {"clientes", "contas", "transacoes_diarias"} if reaplicados else set()
+
+    def _restaurar_cliente(self, dados):
+        """Reconstrói um cliente a partir do seu dicionário (arquivo ou journal)."""
+        cliente = PessoaFisica(dados.get("nome", ""), dados.get("cpf", ""), dados.get("data_nascimento", ""), dados.get("endereco", ""))
+        self.adicionar_cliente(cliente)
+        return cliente
+
+    def _restaurar_conta(self, dados, sob_demanda=False):
+        """Reconstrói uma conta a partir do seu dicionário (ignorada se o cliente não existir)."""
+        cliente = self.buscar_cliente(dados.get("cliente_cpf"))
+        if not cliente:
+            return None
+        numero = dados.get("numero")
+        conta = ContaCorrente(numero, cliente, janela=self.JANELA_LIMITES)
+        conta.saldo = dados.get("saldo", 0)
+        if sob_demanda:
+            conta.historico.adiar_carga(partial(self.armazenamento.carregar_historico, numero), self.trava_estado.compartilhada)
+        self.adicionar_conta(conta)
+        self.saldos[numero] = conta.saldo
+        return conta
+
+    def _restaurar_limites(self, dados, idempotencia=None):
+        """Reconstrói os contadores de transações e saques a partir de transacoes_diarias.json.
+
+        As chaves de idempotência vêm de 'idempotencia' (armazenamentos que as guardam à parte,
+        como o SQLite) ou, se não for informado, de dentro dos próprios contadores.
+        """
+        dados = migrar_limites(dados)
+        self.transacoes_diarias_por_conta = ControleLimites(self.LIMITE_TRANSACOES_DIARIAS_POR_CONTA, self.JANELA_LIMITES)
+        for numero, momentos in dados.get("transacoes", {}).items():
+            if numero in self.contas_por_numero:
+                self.transacoes_diarias_por_conta.contadores[numero] = ContadorJanela(self.LIMITE_TRANSACOES_DIARIAS_POR_CONTA, self.JANELA_LIMITES, momentos)
+        for numero, momentos in dados.get("saques", {}).items():
+            conta = self.contas_por_numero.get(numero)
             if conta:
-                conta.historico.transacoes.append(t)
-            self.extratos.append(t)
+                conta.saques_realizados = ContadorJanela(conta.limite_saques, self.JANELA_LIMITES, momentos)
+        self.transacoes_diarias_por_conta.limpar_expirados()
+        self.idempotencia = CacheIdempotencia()
+        self.idempotencia.restaurar(dados.get("idempotencia") if idempotencia is None else idempotencia)
+        gravados = sum(len(m) for chave in ("transacoes", "saques") for m in dados.get(chave, {}).values())
+        self._usos_vencidos_na_carga = gravados - self._usos_nos_contadores()  # Ainda no arquivo até o próximo snapshot (ver encerrar_dia).
+
+    def _usos_nos_contadores(self):
+        """Quantidade de usos de transações e saques guardados nos contadores (na janela ou ainda não descartados)."""
+        return (sum(len(c.momentos) for c in self.transacoes_diarias_por_conta.contadores.values())
+                + sum(len(c.saques_realizados.momentos) for c in self.contas))
+
+    def dados_limites(self):
+        """Contadores de transações e saques (e as chaves de idempotência) no formato compacto de transacoes_diarias.json (só o que ainda vale)."""
+        agora = epoca_agora()
+        saques = {}
+        for conta in self.contas:
+            momentos = conta.saques_realizados.to_list(agora)
+            if momentos:
+                saques[conta.numero] = momentos
+        return {
+            "formato": FORMATO_LIMITES,
+            "janela": self.JANELA_LIMITES,
+            "transacoes": self.transacoes_diarias_por_conta.to_dict(agora),
+            "saques": saques,
+            "idempotencia": self.idempotencia.to_list(agora),
+        }
+
+    def encerrar_dia(self, agora=None):
+        """Vira os contadores diários: descarta os usos de transações e saques que já saíram da janela.
+
+        Os contadores já descartam os usos vencidos quando são consultados, mas os das contas
+        paradas ficariam para sempre em memória e em transacoes_diarias.json. Retorna
+        quantos usos foram descartados, contando os vencidos já descartados na carga (com
+        algum, os contadores entram no próximo snapshot).
+        """
+        agora = epoca_agora() if agora is None else agora
+        with self.trava_estado.exclusiva():
+            antes = self._usos_nos_contadores()
+            self.transacoes_diarias_por_conta.limpar_expirados(agora)
+            for conta in self.contas:
+                conta.saques_realizados.quantidade(agora)
+            descartados = antes - self._usos_nos_contadores() + self._usos_vencidos_na_carga
+            self._usos_vencidos_na_carga = 0
+            if descartados:
+                self.alterados.add("transacoes_diarias")
+        return descartados
+
+    def aplicar_registro_journal(self, registro):
+        """Reaplica em memória um registro lido do journal: cliente ou conta nova, ou uma transação."""
+        evento = registro.get("evento")
+        if evento == "cliente":
+            if not self.buscar_cliente(registro.get("cpf")):
+                self._restaurar_cliente(registro)
+            return
+        if evento == "conta":
+            if not self.buscar_conta(registro.get("numero")):
+                self._restaurar_conta(registro)
+            return
+        if evento == "recusa":  # Transação recusada com chave de idempotência: só a chave e o motivo.
+            chave, impressao = registro["idempotencia"]
+            self.idempotencia.guardar(chave, impressao, data_para_epoca(registro["data"]), resultado=(False, registro.get("motivo")))
+            return
+        if evento == "usos":  # Compensação que se anulou na conta: só os usos dos limites.
+            conta = self.contas_por_numero.get(registro.get("conta"))
+            if conta:
+                self._registrar_usos(conta, registro, data_para_epoca(registro["data"]))
+            return
+
+        # Transação: saldo, histórico e contadores diários.
+        conta_num = registro.get("conta")
+        conta = self.contas_por_numero.get(conta_num)
+        if not conta:
+            return
+        centavos = para_centavos(registro.get("valor", 0))
+        try:
+            momento = data_para_epoca(registro.get("data") or "")
+        except ValueError:
+            momento = momento_para_epoca(date.fromisoformat(registro["dia"])) + 86399  # Sem a hora: fim do dia.
+        conta.saldo_centavos += SINAL_TIPO.get(registro.get("tipo"), 1) * centavos
+        self.saldos[conta_num] = conta.saldo
+        conta.historico.adicionar_registro({k: registro.get(k) for k in Historico.CAMPOS})
+        self._registrar_usos(conta, registro, momento)
+        if registro.get("idempotencia"):
+            chave, impressao = registro["idempotencia"]
+            self.idempotencia.guardar(chave, impressao, momento)
+
+    def _registrar_usos(self, conta, registro, momento):
+        """Conta nos limites diários os usos de um registro do journal (ver usos_do_registro)."""
+        transacoes, saques = usos_do_registro(registro)
+        for _ in range(transacoes):
+            self.transacoes_diarias_por_conta.registrar(conta.numero, momento)
+        if hasattr(conta, "saques_realizados"):
+            for _ in range(saques):
+                conta.saques_realizados.registrar(momento)
+
+    def persistir_pendentes(self):
+        """Persiste de uma só vez todas as transações pendentes no armazenamento.
+
+        Quando retorna, toda transação aceita antes da chamada já está gravada: se outra thread
+        estiver gravando, esta espera a trava de persistência e encontra a fila vazia.
+        Não deve ser chamada com a trava de estado em uso (ver executar_transacao).
+        """
+        with self.trava_persistencia:
+            self._gravar_pendentes()
+            if self.armazenamento.snapshot_pendente():
+                self.save_all()
+
+    def _gravar_pendentes(self):
+        """Esvazia a fila de pendentes no armazenamento (chamado com a trava de persistência)."""
+        with self.trava_fila:
+            pendentes = list(self.transacoes_pendentes)
+            self.transacoes_pendentes.clear()
+            marca = self.total_aceitas
+        if pendentes:
+            try:
+                self.armazenamento.registrar_transacoes(self, pendentes)
+            except BaseException:
+                # Nada foi confirmado: as transações voltam para o início da fila, na mesma ordem.
+                with self.trava_fila:
+                    self.transacoes_pendentes.extendleft(reversed(pendentes))
+                raise
+        self.total_gravadas = marca
+        if self._gravador is not None:
+            self._gravador.avisar()
+
+    def _enfileirar(self, *registros):
+        """Coloca registros de transações aceitas (ou de recusas com chave) na fila de pendentes e retorna o número do último (marca).
+
+        Os registros entram juntos na fila, então são gravados no mesmo grupo (as duas pontas
+        de uma transferência nunca ficam uma no disco e a outra não).
+        """
+        with self.trava_fila:
+            self.transacoes_pendentes.extend(registros)
+            self.total_aceitas += len(registros)
+            return self.total_aceitas
 
-        # Carrega o controle de transações diárias.
-        self.transacoes_diarias_por_conta = transacoes_diarias_raw or {}
+    @property
+    def gravador(self):
+        """Gravador em grupo (criado e iniciado no primeiro uso)."""
+        if self._gravador is None:
+            with self.trava_fila:
+                if self._gravador is None:
+                    self._gravador = GravadorAgrupado(self, self.janela_gravacao_ms, self.operacoes_por_grupo).iniciar()
+        return self._gravador
+
+    def salvar_cliente(self, cliente):
+        """Persiste um cliente novo, depois de gravar as transações pendentes."""
+        with self.trava_persistencia, self.trava_estado.exclusiva():
+            self._gravar_pendentes()
+            self.armazenamento.salvar_cliente(self, cliente)
+
+    def salvar_conta(self, conta):
+        """Persiste uma conta nova, depois de gravar as transações pendentes."""
+        with self.trava_persistencia, self.trava_estado.exclusiva():
+            self._gravar_pendentes()
+            self.armazenamento.salvar_conta(self, conta)
+
+    def fechar(self):
+        """Persiste o que estiver pendente, encerra o gravador em grupo e libera o armazenamento."""
+        if self._gravador is not None:
+            self._gravador.parar()
+            self._gravador = None
+        self.persistir_pendentes()
+        self.armazenamento.fechar()
 
     # ------------------ VALIDAÇÃO ------------------
     @staticmethod
@@ -308,6 +2218,53 @@ class Bank:
         """Valida se um CPF é uma string de 11 dígitos numéricos."""
         return isinstance(cpf, str) and cpf.isdigit() and len(cpf) == 11
 
+    # ------------------ ÍNDICES ------------------
+    def adicionar_cliente(self, cliente):
+        """Adiciona um cliente à lista, ao índice por CPF e ao índice da busca."""
+        self.alterados.add("clientes")
+        self.clientes.append(cliente)
+        self.clientes_por_cpf[cliente.cpf] = cliente
+        self.contas_por_cpf.setdefault(cliente.cpf, [])
+        self.busca.adicionar(cliente)
+
+    def adicionar_conta(self, conta):
+        """Adiciona uma conta à lista, ao seu cliente e aos índices por número e por CPF."""
+        self.alterados.update(("clientes", "contas"))  # O cliente também guarda a lista de contas.
+        self.contas.append(conta)
+        conta.cliente.adicionar_conta(conta)
+        self.contas_por_numero[conta.numero] = conta
+        self.contas_por_cpf.setdefault(conta.cliente.cpf, []).append(conta)
+        self.listagem.adicionar(conta)
+        conta.ao_mudar_saldo = self.listagem.saldo_alterado
+        if str(conta.numero).isdigit():
+            self.maior_numero_conta = max(self.maior_numero_conta, int(conta.numero))
+
+    def limpar_indices(self):
+        """Esvazia todos os índices (usado ao zerar os dados)."""
+        self.clientes_por_cpf = {}
+        self.contas_por_numero = {}
+        self.contas_por_cpf = {}
+        self.maior_numero_conta = 0
+        self.listagem = ListagemContas()
+        self.busca = IndiceBuscaClientes()
+
+    def buscar_cliente(self, cpf):
+        """Retorna o cliente com o CPF informado, ou None (busca O(1) pelo índice)."""
+        return self.clientes_por_cpf.get(cpf)
+
+    def buscar_clientes(self, texto, limite=LIMITE_BUSCA, campos=CAMPOS_BUSCA):
+        """Clientes pelo começo das palavras do nome, do CPF ou do endereço (ver IndiceBuscaClientes.buscar)."""
+        return self.busca.buscar(texto, limite, campos)
+
+    def buscar_conta(self, numero):
+        """Retorna a conta com o número informado, ou None (busca O(1) pelo índice)."""
+        return self.contas_por_numero.get(numero)
+
+    def primeira_conta_do_cliente(self, cpf):
+        """Retorna a primeira conta do cliente com o CPF informado, ou None."""
+        contas = self.contas_por_cpf.get(cpf)
+        return contas[0] if contas else None
+
     # ------------------ CRUD CLIENTE/CONTA ------------------
     def criar_cliente(self, cpf=None):
         """Cria um novo cliente no sistema."""
@@ -317,7 +2274,7 @@ class Bank:
             print("CPF inválido! Digite apenas números e com 11 dígitos.")
             cpf = input("Digite o CPF do cliente (apenas números): ")
 
-        if any(c.cpf == cpf for c in self.clientes):
+        if self.buscar_cliente(cpf):
             print(f"\n> Cliente com CPF {cpf} já cadastrado.")
             return cpf
 
@@ -325,12 +2282,20 @@ class Bank:
         data_nascimento = input("Digite a data de nascimento (dd/mm/aaaa): ")
         endereco = input("Digite o endereço (logradouro, número - bairro - cidade/estado): ")
 
-        cliente = PessoaFisica(nome, cpf, data_nascimento, endereco)
-        self.clientes.append(cliente)
-        self.save_all()  # Salva os dados após a criação do cliente.
+        self.cadastrar_cliente(nome, cpf, data_nascimento, endereco)
         print(f"\n> Cliente '{nome}' criado com sucesso!")
         return cpf
 
+    def cadastrar_cliente(self, nome, cpf, data_nascimento, endereco):
+        """Cadastra e persiste um cliente sem interação com o terminal. Retorna o cliente (ou None se o CPF já existir)."""
+        cliente = PessoaFisica(nome, cpf, data_nascimento, endereco)
+        with self.trava_estado.exclusiva():
+            if self.buscar_cliente(cpf):
+                return None
+            self.adicionar_cliente(cliente)
+        self.salvar_cliente(cliente)  # Salva os dados após a criação do cliente.
+        return cliente
+
     def criar_conta(self, cpf=None):
         """Cria uma nova conta para um cliente existente."""
         if not cpf:
@@ -339,17 +2304,11 @@ class Bank:
             print("CPF inválido! Digite apenas números e com 11 dígitos.")
             cpf = input("Digite o CPF do cliente para vincular a conta (apenas números): ")
 
-        cliente_existente = next((c for c in self.clientes if c.cpf == cpf), None)
+        cliente_existente = self.buscar_cliente(cpf)
 
         if cliente_existente:
-            numero_conta = str(len(self.contas) + 1).zfill(4)  # Gera um novo número de conta.
-            conta = ContaCorrente(numero_conta, cliente_existente)
-            self.contas.append(conta)
-            cliente_existente.adicionar_conta(conta)
-            self.saldos[numero_conta] = 0
-            self.saques_realizados[numero_conta] = 0
-            self.save_all()  # Salva os dados após a criação da conta.
-            print(f"\n> Conta '{numero_conta}' criada com sucesso para '{cliente_existente.nome}'.")
+            conta = self.abrir_conta(cliente_existente)
+            print(f"\n> Conta '{conta.numero}' criada com sucesso para '{cliente_existente.nome}'.")
         else:
             print("\n> Cliente não encontrado. Por favor, crie o cliente antes de criar uma conta.")
             confirmar_criar_cliente = input("Deseja criar um novo cliente agora? (s/n): ").lower()
@@ -358,17 +2317,75 @@ class Bank:
                 if novo_cpf:
                     self.criar_conta(novo_cpf)
 
-    def listar_contas(self):
-        """Lista todas as contas cadastradas no sistema."""
+    def abrir_conta(self, cliente):
+        """Cria e persiste uma nova conta corrente para o cliente, sem interação com o terminal."""
+        with self.trava_estado.exclusiva():
+            numero_conta = self.proximo_numero_conta()
+            conta = ContaCorrente(numero_conta, cliente, janela=self.JANELA_LIMITES)
+            self.adicionar_conta(conta)
+            self.saldos[numero_conta] = 0
+        self.salvar_conta(conta)  # Salva os dados após a criação da conta.
+        return conta
+
+    def proximo_numero_conta(self):
+        """Número da próxima conta: o menor acima do maior já usado que pertence à partição deste Bank.
+
+        Cada partição só usa os números cujo resto por total_particoes é o seu índice (ver
+        particao_da_conta), então partições diferentes nunca geram o mesmo número. Chamado
+        com a trava de estado exclusiva.
+        """
+        numero = self.maior_numero_conta + 1
+        numero += (self.particao - numero) % self.total_particoes
+        return str(numero).zfill(4)
+
+    def pagina_contas(self, ordem="numero", pagina=1, tamanho=20, decrescente=False):
+        """Página da listagem de contas, ordenada por "numero", "nome" ou "saldo" (ver ListagemContas.pagina)."""
+        return self.listagem.pagina(ordem, pagina, tamanho, decrescente)
+
+    def listar_contas(self, ordem="numero", tamanho=20, decrescente=False):
+        """Lista as contas cadastradas, uma página por vez, com navegação entre as páginas e as ordens."""
         if not self.contas:
             print("\n> Nenhuma conta cadastrada no momento.")
             return
 
-        print("\n================ LISTA DE CONTAS ================")
-        for conta in self.contas:
-            print(f"Conta: {conta.numero} \n| Cliente: {conta.cliente.nome} \n| CPF: {conta.cliente.cpf} \n| Saldo: R$ {conta.saldo:.2f}")
-            print()
+        pagina = 1
+        while True:
+            dados = self.pagina_contas(ordem, pagina, tamanho, decrescente)
+            print(f"\n================ LISTA DE CONTAS (por {ordem}{', decrescente' if decrescente else ''}) ================")
+            for conta in dados["contas"]:
+                print(f"Conta: {conta['numero']} \n| Cliente: {conta['cliente']} \n| CPF: {conta['cpf']} \n| Saldo: R$ {conta['saldo']:.2f}")
+                print()
+            print(f"Página {pagina} de {dados['total_paginas']} ({dados['total']} contas)")
+            print("=================================================")
+            opcao = input("[p] Próxima  [a] Anterior  [n] Por número  [c] Por cliente  [s] Por saldo  [i] Inverter  [x] Voltar => ").strip().lower()
+            if opcao == "p" and pagina < dados["total_paginas"]:
+                pagina += 1
+            elif opcao == "a" and pagina > 1:
+                pagina -= 1
+            elif opcao in ("n", "c", "s"):
+                ordem, pagina = {"n": "numero", "c": "nome", "s": "saldo"}[opcao], 1
+            elif opcao == "i":
+                decrescente, pagina = not decrescente, 1
+            elif opcao in ("x", ""):
+                return
+
+    def mostrar_busca_clientes(self, texto=None):
+        """Mostra os clientes encontrados pela busca (pede o texto se não for informado). Retorna True se algum foi encontrado."""
+        if texto is None:
+            texto = input("\nDigite parte do nome, do CPF ou do endereço do cliente: ")
+        if not texto.strip():
+            return False
+        clientes, completa = self.buscar_clientes(texto)
+        if not clientes:
+            print(f"\n> Nenhum cliente encontrado para '{texto}'.")
+            return False
+        print(f"\n================ CLIENTES ENCONTRADOS ('{texto}') ================")
+        for cliente in clientes:
+            print(f"CPF: {cliente.cpf} | {cliente.nome} | {cliente.endereco}")
+        if not completa:
+            print("(há mais clientes com este começo; digite mais letras para refinar a busca)")
         print("=================================================")
+        return True
 
     # ------------------ LOGIN / IDENTIFICAÇÃO ------------------
     def identificar_usuario(self):
@@ -377,12 +2394,13 @@ class Bank:
         self.conta_logada = None
 
         while self.usuario_logado is None:
-            cpf_digitado = input("\nInforme seu CPF (apenas números) para acessar: ")
+            cpf_digitado = input("\nInforme seu CPF (apenas números) para acessar, ou parte do nome para buscar: ")
             while not self.validar_cpf(cpf_digitado):
-                print("CPF inválido! Digite apenas números e com 11 dígitos.")
+                if not self.mostrar_busca_clientes(cpf_digitado):
+                    print("CPF inválido! Digite apenas números e com 11 dígitos.")
                 cpf_digitado = input("Informe seu CPF (apenas números) para acessar: ")
 
-            usuario_encontrado = next((c for c in self.clientes if c.cpf == cpf_digitado), None)
+            usuario_encontrado = self.buscar_cliente(cpf_digitado)
 
             if not usuario_encontrado:
                 print("\n> Usuário não encontrado. É necessário cadastrá-lo.")
@@ -391,7 +2409,7 @@ class Bank:
                     novo_cpf = self.criar_cliente(cpf_digitado)
                     if novo_cpf:
                         self.criar_conta(novo_cpf)
-                        usuario_encontrado = next((c for c in self.clientes if c.cpf == novo_cpf), None)
+                        usuario_encontrado = self.buscar_cliente(novo_cpf)
                         if usuario_encontrado:
                             self.usuario_logado = usuario_encontrado
                             self.conta_logada = usuario_encontrado.contas[-1] if usuario_encontrado.contas else None
@@ -406,7 +2424,7 @@ class Bank:
                 else:
                     print("\n> Operação cancelada. Por favor, tente novamente com um CPF válido ou cadastre-se.")
             else:
-                conta_do_usuario = next((c for c in self.contas if c.cliente.cpf == cpf_digitado), None)
+                conta_do_usuario = self.primeira_conta_do_cliente(cpf_digitado)
                 if conta_do_usuario:
                     self.usuario_logado = usuario_encontrado
                     self.conta_logada = conta_do_usuario
@@ -416,7 +2434,7 @@ class Bank:
                     confirmar_criar_conta = input("Deseja criar uma nova conta agora? (s/n): ").lower()
                     if confirmar_criar_conta == 's':
                         self.criar_conta(cpf_digitado)
-                        conta_do_usuario = next((c for c in self.contas if c.cliente.cpf == cpf_digitado), None)
+                        conta_do_usuario = self.primeira_conta_do_cliente(cpf_digitado)
                         if conta_do_usuario:
                             self.usuario_logado = usuario_encontrado
                             self.conta_logada = conta_do_usuario
@@ -434,32 +2452,281 @@ class Bank:
             print("\n> Nenhuma conta ou usuário logado.")
             return False
 
-        numero_conta = self.conta_logada.numero
-        hoje_str = datetime.now().strftime("%Y-%m-%d")
+        ok, _motivo = self.executar_transacao(self.conta_logada, self.usuario_logado.cpf, tipo, valor)
+        return ok
+
+    def registrar_transferencia(self, numero_destino, valor):
+        """Transfere um valor da conta do usuário logado para a conta de número informado."""
+        if not self.conta_logada or not self.usuario_logado:
+            print("\n> Nenhuma conta ou usuário logado.")
+            return False
 
-        # Controle de limite de transações diárias.
-        key = f"{numero_conta}_{hoje_str}"
-        self.transacoes_diarias_por_conta.setdefault(key, 0)
-        if self.transacoes_diarias_por_conta[key] >= self.LIMITE_TRANSACOES_DIARIAS_POR_CONTA:
-            print(f"\n> Operação falhou! Limite de {self.LIMITE_TRANSACOES_DIARIAS_POR_CONTA} transações diárias excedido para esta conta.")
+        destino = self.buscar_conta(numero_destino)
+        if destino is None:
+            print("\n> Operação falhou! Conta de destino não encontrada.")
             return False
+        ok, _motivo = self.transferir(self.conta_logada, destino, self.usuario_logado.cpf, valor)
+        return ok
+
+    def executar_transacao(self, conta, cpf_usuario, tipo, valor, durabilidade=None, chave_idempotencia=None):
+        """Aplica um saque ou depósito em uma conta qualquer, com todas as regras de limite.
+
+        Retorna (True, None) se a transação foi aceita ou (False, motivo) se foi recusada.
+        'durabilidade' (uma das constantes DURABILIDADE_*, padrão: a do Bank) define quando a
+        transação aceita é gravada: antes de retornar (sincrona), no próximo grupo, esperando
+        por ele (agrupada) ou sem esperar (assincrona), ou só em persistir_pendentes() (adiada).
+        Pode ser chamada por várias threads: contas diferentes são processadas em paralelo e as
+        operações sobre uma mesma conta são serializadas pela trava da conta.
+        Com 'chave_idempotencia', a repetição de uma transação com a mesma chave devolve o
+        resultado original, aceita ou recusada, sem aplicá-la de novo (ver CacheIdempotencia).
+        """
+        durabilidade = self._durabilidade(durabilidade)
 
         # Cria o objeto da transação (Saque ou Deposito).
-        transacao = None
-        if tipo == "Saque":
-            transacao = Saque(valor)
-        elif tipo == "Depósito":
-            transacao = Deposito(valor)
-        else:
-            print("\n> Tipo de transação inválido.")
-            return False
+        classe_transacao = TIPOS_TRANSACAO.get(str(tipo).lower())
+        if classe_transacao is None:
+            exibir("\n> Tipo de transação inválido.")
+            return False, MOTIVO_TIPO_INVALIDO
+        transacao = classe_transacao(valor)
 
-        # Registra a transação na conta.
-        if self.conta_logada.registrar_transacao(transacao, self.usuario_logado.cpf):
-            self.transacoes_diarias_por_conta[key] += 1
-            self.save_all()  # Salva os dados após cada transação.
-            return True
-        return False
+        numero_conta = conta.numero
+        agora = epoca_agora()
+        hoje_str = (EPOCA_ZERO + timedelta(seconds=agora)).date().isoformat()  # 'aaaa-mm-dd', gravado no journal.
+
+        impressao = impressao_transacao(numero_conta, classe_transacao.__name__, valor) if chave_idempotencia is not None else None
+        repetida = self._reservar_chave(chave_idempotencia, impressao, agora)
+        if repetida:
+            return self._responder_repeticao(repetida, durabilidade)
+
+        try:
+            with self.trava_estado.compartilhada(), conta.trava:
+                # Controle de limite de transações diárias (verificação e incremento sob a mesma trava).
+                conta.motivo_falha = None
+                if self.transacoes_diarias_por_conta.esgotado(numero_conta, agora):
+                    exibir(f"\n> Operação falhou! Limite de {self.LIMITE_TRANSACOES_DIARIAS_POR_CONTA} transações diárias excedido para esta conta.")
+                    motivo = MOTIVO_LIMITE_TRANSACOES_DIARIAS
+                elif not conta.registrar_transacao(transacao, cpf_usuario):  # Registra a transação na conta.
+                    motivo = conta.motivo_falha
+                else:
+                    motivo = None
+                    self.transacoes_diarias_por_conta.registrar(numero_conta, agora)
+                    self.saldos[numero_conta] = conta.saldo
+                registros = [dict(conta.ultima_transacao, dia=hoje_str)] if motivo is None else []
+                marca = self._registrar_resultado(registros, motivo, numero_conta, agora, hoje_str, chave_idempotencia, impressao)
+        except BaseException:
+            self._cancelar_chave(chave_idempotencia)
+            raise
+
+        # Persiste a transação (journal com fsync; snapshot completo só periodicamente).
+        if marca:
+            self._persistir(marca, durabilidade)
+        return motivo is None, motivo
+
+    def transferir(self, origem, destino, cpf_usuario, valor, durabilidade=None, chave_idempotencia=None):
+        """Transfere 'valor' da conta de origem para a de destino, de forma atômica.
+
+        O débito segue as regras de um saque (ContaCorrente.sacar) e as duas contas contam
+        uma transação no limite diário. As travas das contas são tomadas sempre na ordem do
+        número da conta, então transferências cruzadas (A->B e B->A) não travam uma à outra.
+        As duas pontas entram juntas na fila de gravação. Retorna (True, None) ou (False, motivo).
+        'chave_idempotencia' funciona como em executar_transacao.
+        """
+        durabilidade = self._durabilidade(durabilidade)
+        if origem is destino:
+            exibir("\n> Operação falhou! A conta de destino é a mesma da origem.")
+            return False, MOTIVO_MESMA_CONTA
+        transacao = Transferencia(valor, destino)
+        agora = epoca_agora()
+        hoje_str = (EPOCA_ZERO + timedelta(seconds=agora)).date().isoformat()
+
+        impressao = impressao_transacao(origem.numero, destino.numero, valor) if chave_idempotencia is not None else None
+        repetida = self._reservar_chave(chave_idempotencia, impressao, agora)
+        if repetida:
+            return self._responder_repeticao(repetida, durabilidade)
+
+        primeira, segunda = sorted((origem, destino), key=lambda c: str(c.numero))
+        try:
+            with self.trava_estado.compartilhada(), primeira.trava, segunda.trava:
+                origem.motivo_falha = None
+                esgotada = next((c for c in (origem, destino) if self.transacoes_diarias_por_conta.esgotado(c.numero, agora)), None)
+                if esgotada is not None:
+                    exibir(f"\n> Operação falhou! Limite de {self.LIMITE_TRANSACOES_DIARIAS_POR_CONTA} transações diárias excedido para a conta {esgotada.numero}.")
+                    motivo = MOTIVO_LIMITE_TRANSACOES_DIARIAS
+                elif not transacao.registrar(origem):
+                    motivo = origem.motivo_falha
+                else:
+                    motivo = None
+
+                registros = []
+                if motivo is None:
+                    for conta, tipo in ((origem, TIPO_TRANSFERENCIA_ENVIADA), (destino, TIPO_TRANSFERENCIA_RECEBIDA)):
+                        conta.ultima_transacao = conta.historico.adicionar_transacao(transacao, cpf_usuario, conta.numero, tipo)
+                        self.transacoes_diarias_por_conta.registrar(conta.numero, agora)
+                        self.saldos[conta.numero] = conta.saldo
+                        registros.append(dict(conta.ultima_transacao, dia=hoje_str))
+                # A chave vai só na ponta de origem.
+                marca = self._registrar_resultado(registros, motivo, origem.numero, agora, hoje_str, chave_idempotencia, impressao)
+        except BaseException:
+            self._cancelar_chave(chave_idempotencia)
+            raise
+
+        if marca:
+            self._persistir(marca, durabilidade)
+        return motivo is None, motivo
+
+    def liquidar_transferencias(self, transferencias, cpf_usuario=None, durabilidade=None):
+        """Liquida um lote de transferências pela posição líquida de cada conta (compensação).
+
+        'transferencias' é uma lista de (número da conta de origem, número da de destino, valor).
+        Cada transferência é conferida na ordem, contra os saldos já compensados: contas
+        existentes e diferentes, valor positivo e até o limite por saque da origem, saldo
+        suficiente e limites diários disponíveis. As aceitas são somadas por conta, e cada conta
+        com resultado diferente de zero recebe uma única alteração de saldo e um único registro
+        (TransferenciaEnviada ou TransferenciaRecebida com o valor líquido), em vez de um por
+        transferência; o registro leva 'cpf_usuario' ou, se não for informado, o CPF do
+        titular da conta. Retorna uma lista de (ok, motivo), na ordem das transferências.
+        Cada transferência aceita conta nos limites como se fosse aplicada sozinha (uma
+        transação para cada ponta e um saque para a origem), já durante a conferência do lote:
+        o registro líquido leva esses usos em "usos", e uma conta cujo resultado se anula
+        grava só os usos (evento "usos").
+        """
+        durabilidade = self._durabilidade(durabilidade)
+        resultados = []
+        agora = epoca_agora()
+        hoje_str = (EPOCA_ZERO + timedelta(seconds=agora)).date().isoformat()
+
+        with self.trava_estado.exclusiva():  # Nenhuma outra transação muda os saldos durante a compensação.
+            saldos = {}  # Número da conta -> saldo compensado até aqui (centavos).
+            liquido = {}  # Número da conta -> soma das transferências aceitas (centavos).
+            usos = {}  # Número da conta -> [transações, saques] das transferências aceitas no lote.
+            limite_transacoes = self.transacoes_diarias_por_conta.limite
+            for numero_origem, numero_destino, valor in transferencias:
+                origem, destino = self.buscar_conta(numero_origem), self.buscar_conta(numero_destino)
+                try:
+                    centavos = para_centavos(valor)
+                except (ValueError, ArithmeticError):
+                    centavos = 0
+                if origem is None or destino is None:
+                    motivo = MOTIVO_CONTA_INEXISTENTE
+                elif origem is destino:
+                    motivo = MOTIVO_MESMA_CONTA
+                elif centavos <= 0:
+                    motivo = MOTIVO_VALOR_INVALIDO
+                elif centavos > para_centavos(getattr(origem, "limite", valor)):
+                    motivo = MOTIVO_LIMITE_POR_SAQUE
+                elif centavos > saldos.get(origem.numero, origem.saldo_centavos):
+                    motivo = MOTIVO_SALDO_INSUFICIENTE
+                elif (hasattr(origem, "saques_realizados")
+                      and origem.saques_realizados.quantidade(agora) + usos.get(origem.numero, (0, 0))[1] >= origem.saques_realizados.limite):
+                    motivo = MOTIVO_LIMITE_SAQUES_DIARIOS
+                elif any(self.transacoes_diarias_por_conta.quantidade(c.numero, agora) + usos.get(c.numero, (0, 0))[0] >= limite_transacoes
+                         for c in (origem, destino)):
+                    motivo = MOTIVO_LIMITE_TRANSACOES_DIARIAS
+                else:
+                    motivo = None
+                    for conta, sinal in ((origem, -1), (destino, 1)):
+                        saldos[conta.numero] = saldos.get(conta.numero, conta.saldo_centavos) + sinal * centavos
+                        liquido[conta.numero] = liquido.get(conta.numero, 0) + sinal * centavos
+                        usos_conta = usos.setdefault(conta.numero, [0, 0])
+                        usos_conta[0] += 1
+                        usos_conta[1] += sinal < 0
+                resultados.append((motivo is None, motivo))
+
+            registros = []
+            for numero, centavos in liquido.items():
+                conta = self.buscar_conta(numero)
+                transacoes, saques = usos[numero]
+                with conta.trava:
+                    conta.saldo_centavos += centavos
+                    if hasattr(conta, "saques_realizados"):
+                        for _ in range(saques):  # Cada débito aceito conta como um saque.
+                            conta.saques_realizados.registrar(agora)
+                    if centavos:
+                        tipo = TIPO_TRANSFERENCIA_ENVIADA if centavos < 0 else TIPO_TRANSFERENCIA_RECEBIDA
+                        conta.ultima_transacao = conta.historico.adicionar_transacao(
+                            Transferencia(abs(centavos) / 100, None), cpf_usuario or conta.cliente.cpf, numero, tipo)
+                for _ in range(transacoes):
+                    self.transacoes_diarias_por_conta.registrar(numero, agora)
+                self.saldos[numero] = conta.saldo
+                if centavos:
+                    registros.append(dict(conta.ultima_transacao, dia=hoje_str, usos=[transacoes, saques]))
+                else:  # Entradas e saídas se anularam: nenhum lançamento, só os usos dos limites.
+                    registros.append({"evento": "usos", "conta": numero, "data": epoca_para_data(agora), "dia": hoje_str, "usos": [transacoes, saques]})
+            if registros:
+                marca = self._enfileirar(*registros)
+                self.alterados.update(("contas", "transacoes_diarias"))
+
+        if registros:
+            self._persistir(marca, durabilidade)
+        return resultados
+
+    def _reservar_chave(self, chave, impressao, agora):
+        """((ok, motivo), marca) se a chave já foi usada, ou None se ela é nova (e fica reservada) ou não há chave.
+
+        Chamada antes de tomar qualquer trava: quem reserva a chave precisa concluí-la
+        (_registrar_resultado) ou liberá-la (_cancelar_chave).
+        """
+        if chave is None:
+            return None
+        guardada = self.idempotencia.reservar(chave, impressao, agora)
+        if guardada is None:
+            return None
+        impressao_original, marca, resultado = guardada
+        if impressao_original != impressao:
+            exibir("\n> Operação falhou! A chave de idempotência já foi usada em outra transação.")
+            return (False, MOTIVO_CHAVE_IDEMPOTENCIA_REUTILIZADA), 0
+        return resultado, marca
+
+    def _responder_repeticao(self, repetida, durabilidade):
+        """Resultado de uma repetição, fora das travas.
+
+        A repetição não é aplicada nem gravada de novo: só espera, conforme a durabilidade
+        pedida, a gravação da transação original (ainda na fila se ela foi assíncrona).
+        """
+        resultado, marca = repetida
+        if marca > self.total_gravadas:
+            self._persistir(marca, durabilidade)
+        return resultado
+
+    def _registrar_resultado(self, registros, motivo, numero_conta, agora, hoje_str, chave, impressao):
+        """Enfileira os registros de uma transação e conclui a sua chave de idempotência. Retorna a marca (0: nada a gravar).
+
+        Chamada sob as travas da transação. A chave vai no primeiro registro; uma transação
+        recusada com chave grava um registro de recusa, para que a repetição devolva a mesma
+        recusa mesmo depois de um reinício.
+        """
+        if chave is not None:
+            if motivo is not None:
+                registros = [{"evento": "recusa", "conta": numero_conta, "data": epoca_para_data(agora), "dia": hoje_str, "motivo": motivo}]
+            registros[0]["idempotencia"] = [chave, impressao]
+        if not registros:
+            return 0
+        marca = self._enfileirar(*registros)
+        self.alterados.update(("contas", "transacoes_diarias") if motivo is None else ("transacoes_diarias",))
+        if chave is not None:
+            self.idempotencia.guardar(chave, impressao, agora, marca, (motivo is None, motivo))
+        return marca
+
+    def _cancelar_chave(self, chave):
+        """Libera a chave reservada por uma transação interrompida por um erro inesperado."""
+        if chave is not None:
+            self.idempotencia.cancelar(chave)
+
+    def _durabilidade(self, durabilidade):
+        """Nível de durabilidade a usar (padrão: o do Bank), validado."""
+        durabilidade = durabilidade or self.durabilidade
+        if durabilidade not in DURABILIDADES:
+            raise ValueError(f"nível de durabilidade inválido: {durabilidade!r}")
+        return durabilidade
+
+    def _persistir(self, marca, durabilidade):
+        """Persiste as transações aceitas até 'marca' conforme o nível de durabilidade."""
+        if durabilidade == DURABILIDADE_SINCRONA:
+            self.persistir_pendentes()
+        elif durabilidade == DURABILIDADE_AGRUPADA:
+            self.gravador.aguardar(marca)
+        elif durabilidade == DURABILIDADE_ASSINCRONA:
+            self.gravador.avisar()
 
     def mostrar_extrato(self):
         """Mostra o extrato da conta do usuário logado."""
@@ -474,15 +2741,28 @@ class Bank:
         print(f"\nSaldo atual: R$ {self.conta_logada.saldo:.2f}")
         print("=======================================================")
 
+    def consultar_extrato(self, numero_conta, **filtros):
+        """Consulta paginada do extrato de uma conta, com o saldo depois de cada transação.
+
+        Aceita os filtros de Historico.consultar (período, tipos, valores, limite, cursor...).
+        Retorna None se a conta não existir.
+        """
+        conta = self.buscar_conta(numero_conta)
+        if conta is None:
+            return None
+        conta.historico.carregar()  # Fora da trava da conta: a carga usa a trava de estado, que vem antes.
+        with conta.trava:  # Saldo e histórico lidos no mesmo instante.
+            return conta.historico.consultar(saldo_final_centavos=conta.saldo_centavos, **filtros)
+
     #-------------------IMPRIMIR EXTRATO EM TXT----------------------------
-    def exportar_extrato_txt(self):
-        #Exporta o extrato bancário para um arquivo TXT na pasta Downloads do usuário.
+    def exportar_extrato_txt(self, pasta=None):
+        #Exporta o extrato bancário para um arquivo TXT na pasta de exportação (PASTA_EXTRATOS) ou na pasta informada.
         if not self.conta_logada or not self.usuario_logado:
             print("\n> Nenhuma conta ou usuário logado.")
             return
 
-        # Caminho fixo para Downloads (Windows)
-        caminho_downloads = Path(r"C:\Users\ronaldo.santos\Downloads")
+        # Pasta de exportação configurável (PASTA_EXTRATOS), se nenhuma pasta for informada
+        caminho_downloads = Path(pasta) if pasta else PASTA_EXTRATOS
         caminho_downloads.mkdir(parents=True, exist_ok=True)
 
         # Nome do arquivo com data/hora para não sobrescrever
@@ -490,37 +2770,28 @@ class Bank:
         caminho_arquivo = caminho_downloads / nome_arquivo
 
         try:
-            with open(caminho_arquivo, "w", encoding="utf-8") as f:
-                f.write("=" * 50 + "\n")
-                f.write(f"\t|Extrato da Conta {self.conta_logada.numero}\n")
-                f.write(f"\t|Cliente: {self.usuario_logado.nome} \n\t|CPF: {self.usuario_logado.cpf}\n")
-                f.write("-" * 50 + "\n")
-
-                # Escreve todas as transações no arquivo
-                for t in self.conta_logada.historico.transacoes:
-                    f.write(f"{t['data']} - {t['tipo']}: R$ {t['valor']:.2f}\n")
-
-                f.write("-" * 50 + "\n")
-                f.write(f"Saldo atual: R$ {self.conta_logada.saldo:.2f}\n")
-                f.write(f"Data e Hora da Impressão: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-                f.write(f"=" * 50)
+            # As linhas são geradas uma a uma e gravadas em blocos grandes (escrita com buffer).
+            with open(caminho_arquivo, "w", encoding="utf-8", buffering=TAMANHO_BUFFER_EXPORTACAO) as f:
+                f.writelines(linhas_extrato_txt(self.conta_logada, self.usuario_logado))
 
             print(f"\n> Extrato exportado com sucesso para: {caminho_arquivo}")
 
         except Exception as e:
             print(f"\n> Erro ao exportar extrato: {e}")
 
-
     def zerar_dados(self):
         """Apaga todos os dados do sistema (clientes, contas, etc.)."""
         confirmar = input("\n> ATENÇÃO: Esta ação apagará TODOS os dados (clientes, contas, extratos). Deseja continuar? (s/n): ").lower()
         if confirmar == 's':
-            self.clientes = []
-            self.contas = []
-            self.extratos = []
-            self.transacoes_diarias_por_conta = {}
-            self.saldos = {}
-            self.saques_realizados = {}
+            with self.trava_estado.exclusiva():
+                self.clientes = []
+                self.contas = []
+                self.extratos = []
+                self.transacoes_diarias_por_conta = ControleLimites(self.LIMITE_TRANSACOES_DIARIAS_POR_CONTA, self.JANELA_LIMITES)
+                self.idempotencia = CacheIdempotencia()
+                self.saldos = {}
+                self.limpar_indices()
+                self.alterados.update(("clientes", "contas", "transacoes_diarias"))
             self.usuario_logado = None
             self.conta_logada = None
             self.save_all()  # Salva o estado vazio dos dados.
@@ -538,10 +2809,12 @@ Por gentileza, informe uma das opções abaixo:
 
 [d] Depositar
 [s] Sacar
+[t] Transferir
 [e] Extrato
 [ee] Exportar Extrato em TXT
 [n] Nova Conta
 [lc] Listar Contas
+[b] Buscar Cliente
 [u] Novo Usuário
 [trocar] Trocar de Usuário
 [z] Zerar Dados
@@ -556,6 +2829,8 @@ Por gentileza, informe uma das opções abaixo:
       Seja bem-vindo ao banco RONALDO!
 ===========================================
 """)
+        # Informa ao usuário onde os dados são lidos e salvos.
+        print(f"> Dados lidos/salvos em: {self.armazenamento.descricao()}\n")
 
         # Pede o login do usuário uma vez ao iniciar o sistema.
         self.identificar_usuario()
@@ -589,6 +2864,15 @@ Por gentileza, informe uma das opções abaixo:
                 # As validações de saque (limite, etc.) são feitas dentro de ContaCorrente.sacar.
                 self.registrar_transacao("Saque", valor)
 
+            elif opcao == "t":
+                numero_destino = input(f"\n{self.usuario_logado.nome}, informe o número da conta de destino: ").strip()
+                try:
+                    valor = float(input(f"{self.usuario_logado.nome}, informe o valor da transferência: "))
+                except ValueError:
+                    print("\n> Valor inválido.")
+                    continue
+                self.registrar_transferencia(numero_destino, valor)
+
             elif opcao == "e":
                 self.mostrar_extrato()
              
@@ -601,6 +2885,9 @@ Por gentileza, informe uma das opções abaixo:
             elif opcao == "lc":
                 self.listar_contas()
 
+            elif opcao == "b":
+                self.mostrar_busca_clientes()
+
             elif opcao == "u":
                 self.criar_cliente()
 
@@ -618,39 +2905,480 @@ Volte sempre! O banco RONALDO agradece
 por ter você como cliente!
 =========================================
 """)
+                self.fechar()
                 break
 
             else:
                 print("\n> Operação inválida, por favor selecione uma opção válida do menu.")
 
 
+# --------------------------- PARTIÇÕES ---------------------------
+# No banco particionado (banco_particionado.py), cada partição é um Bank em um processo.
+# O cliente mora na partição do seu CPF e cada conta na partição do seu número, então o
+# roteador acha a dona de qualquer operação sem consultar ninguém.
+
+def particao_da_conta(numero, total_particoes):
+    """Índice da partição dona da conta de número informado."""
+    numero = str(numero)
+    if numero.isdigit():
+        return int(numero) % total_particoes
+    return zlib.crc32(numero.encode("utf-8")) % total_particoes  # Números fora do padrão (dados antigos).
+
+
+def particao_do_cliente(cpf, total_particoes):
+    """Índice da partição onde o cliente de CPF informado é cadastrado e abre as suas contas."""
+    cpf = str(cpf)
+    if cpf.isdigit():
+        return int(cpf) % total_particoes
+    return zlib.crc32(cpf.encode("utf-8")) % total_particoes
+
+
+# --------------------------- EXTRATO EM ARQUIVO ---------------------------
+# Linhas dos extratos exportados, geradas uma a uma (a exportação de muitas contas,
+# em exportacao_extratos.py, usa as mesmas funções).
+
+def linhas_extrato_txt(conta, cliente=None, impressao=None):
+    """Linhas do extrato de uma conta no formato TXT (gerador; o histórico não é copiado para uma lista)."""
+    cliente = cliente or conta.cliente
+    impressao = impressao or datetime.now()
+    yield "=" * 50 + "\n"
+    yield f"\t|Extrato da Conta {conta.numero}\n"
+    yield f"\t|Cliente: {cliente.nome} \n\t|CPF: {cliente.cpf}\n"
+    yield "-" * 50 + "\n"
+    for t in conta.historico:
+        yield f"{t['data']} - {t['tipo']}: R$ {t['valor']:.2f}\n"
+    yield "-" * 50 + "\n"
+    yield f"Saldo atual: R$ {conta.saldo:.2f}\n"
+    yield f"Data e Hora da Impressão: {impressao.strftime('%d/%m/%Y %H:%M:%S')}\n"
+    yield "=" * 50
+
+
+def linhas_extrato_csv(conta):
+    """Linhas do extrato de uma conta em CSV (cabeçalho data,tipo,valor,cpf,conta)."""
+    yield "data,tipo,valor,cpf,conta\n"
+    for t in conta.historico:
+        yield f"{t.get('data', '')},{t.get('tipo', '')},{t.get('valor', '')},{t.get('cpf') or ''},{t.get('conta', '')}\n"
+
+
+def linhas_extrato_jsonl(conta):
+    """Linhas do extrato de uma conta em JSONL (uma transação por linha, no formato dos arquivos JSON)."""
+    for t in conta.historico:
+        yield json.dumps(t, ensure_ascii=False) + "\n"
+
+
+# Formato de exportação -> (extensão do arquivo, função que gera as linhas a partir da conta).
+FORMATOS_EXTRATO = {
+    "txt": ("txt", linhas_extrato_txt),
+    "csv": ("csv", linhas_extrato_csv),
+    "jsonl": ("jsonl", linhas_extrato_jsonl),
+}
+
+
 # --------------------------- JSON HELPERS ---------------------------
 # Funções auxiliares para salvar e carregar dados em formato JSON.
 
 def salvar_json(arquivo: Path, dados):
-    """Salva um dicionário ou lista em um arquivo JSON."""
-    try:
-        with open(arquivo, "w", encoding="utf-8") as f:
-            json.dump(dados, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        print(f"Erro ao salvar {arquivo}: {e}")
+    """Salva um dicionário ou lista em um arquivo JSON (erros de gravação sobem para quem chamou)."""
+    with open(arquivo, "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=4, ensure_ascii=False)
 
 
 def carregar_json(arquivo: Path):
-    """Carrega dados de um arquivo JSON."""
+    """Carrega dados de um arquivo JSON. Retorna [] se ele não existir e levanta ArquivoCorrompido se o JSON for inválido."""
     try:
         with open(arquivo, "r", encoding="utf-8") as f:
             return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        # Se o arquivo não existir ou estiver em um formato JSON inválido, retorna uma lista vazia.
+    except FileNotFoundError:
         return []
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        # Um arquivo ilegível não é um arquivo vazio: devolver [] faria quem chamou começar do zero.
+        raise ArquivoCorrompido(f"{arquivo}: JSON inválido ({e})") from None
+
+
+# --------------------------- ARQUIVOS DE SNAPSHOT ---------------------------
+# Clientes, contas, contadores e metadados do snapshot são gravados em JSON compacto,
+# dentro de um envelope {"dados": ..., "crc32": "..."} com o CRC32 dos bytes de "dados".
+# O arquivo continua sendo JSON válido, mas um arquivo truncado ou alterado é detectado
+# na leitura (ArquivoCorrompido) em vez de virar um banco vazio. A gravação vai para um
+# temporário na mesma pasta, com fsync, que só então substitui o arquivo (os.replace):
+# uma queda no meio deixa o arquivo anterior intacto. Opcionalmente o arquivo é
+# comprimido com gzip ou lzma; a leitura reconhece a compressão pelos primeiros bytes,
+# então os nomes dos arquivos não mudam e os arquivos antigos (JSON indentado, sem
+# envelope) continuam sendo lidos.
+
+COMPRESSOES = (None, "gzip", "lzma")  # Compressões aceitas por gravar_snapshot.
+NIVEL_GZIP = 6  # Nível do gzip (o padrão do módulo, 9, é bem mais lento e quase não reduz mais).
+TAMANHO_BLOCO_SNAPSHOT = 1 << 16  # Caracteres acumulados antes de cada escrita no arquivo.
+INICIO_ENVELOPE = b'{"dados":'
+TAMANHO_FIM_ENVELOPE = len(b',"crc32":"00000000"}')
+MAGICOS_COMPRESSAO = ((b"\x1f\x8b", gzip.decompress), (b"\xfd7zXZ\x00", lzma.decompress))  # Início do arquivo -> descompressão.
+TENTATIVAS_LEITURA_SNAPSHOT = 5  # Leituras do snapshot antes de desistir, se ele for trocado durante cada uma.
+
+
+class ArquivoCorrompido(ValueError):
+    """Arquivo de snapshot truncado ou alterado (checksum, compressão ou JSON inválidos)."""
+
+
+class SnapshotEmInstalacao(ValueError):
+    """Snapshot confirmado mas ainda não instalado (ou trocado durante a leitura): os arquivos podem ser de gerações diferentes."""
+
+
+def _pedacos_json(dados):
+    """Texto JSON compacto de 'dados' em pedaços: um por item da lista (ou do dicionário) de primeiro nível."""
+    compacto = partial(json.dumps, ensure_ascii=False, separators=(",", ":"))
+    if isinstance(dados, list):
+        yield "["
+        for posicao, item in enumerate(dados):
+            yield ("," if posicao else "") + compacto(item)
+        yield "]"
+    elif isinstance(dados, dict):
+        yield "{"
+        for posicao, (chave, valor) in enumerate(dados.items()):
+            yield ("," if posicao else "") + compacto(str(chave)) + ":" + compacto(valor)
+        yield "}"
+    else:
+        yield compacto(dados)
+
+
+def _sincronizar_pasta(pasta):
+    """Grava em disco a entrada de diretório trocada por os.replace (sem efeito onde não há suporte, como no Windows)."""
+    try:
+        descritor = os.open(pasta, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descritor)
+    except OSError:
+        pass
+    finally:
+        os.close(descritor)
+
+
+def _estado_do_arquivo(arquivo):
+    """Identidade, tamanho e data de alteração do arquivo (None se ele não existir): muda a cada os.replace."""
+    try:
+        info = os.stat(arquivo)
+    except OSError:
+        return None
+    return info.st_ino, info.st_size, info.st_mtime_ns
+
+
+def gravar_snapshot(arquivo: Path, dados, compressao=None):
+    """Grava 'dados' em JSON compacto com CRC32, de forma atômica, e opcionalmente comprimido ("gzip" ou "lzma")."""
+    if compressao not in COMPRESSOES:
+        raise ValueError(f"compressão inválida: {compressao!r} (use gzip ou lzma)")
+    arquivo = Path(arquivo)
+    temporario = arquivo.with_name(arquivo.name + ".tmp")
+    crc = 0
+    with open(temporario, "wb") as bruto:
+        if compressao == "gzip":
+            saida = gzip.GzipFile(fileobj=bruto, mode="wb", compresslevel=NIVEL_GZIP, mtime=0)
+        elif compressao == "lzma":
+            saida = lzma.LZMAFile(bruto, "wb")
+        else:
+            saida = bruto
+        try:
+            saida.write(INICIO_ENVELOPE)
+            pedacos, acumulado = [], 0
+            for pedaco in _pedacos_json(dados):
+                pedacos.append(pedaco)
+                acumulado += len(pedaco)
+                if acumulado >= TAMANHO_BLOCO_SNAPSHOT:
+                    bloco = "".join(pedacos).encode("utf-8")
+                    crc = zlib.crc32(bloco, crc)
+                    saida.write(bloco)
+                    pedacos, acumulado = [], 0
+            bloco = "".join(pedacos).encode("utf-8")
+            crc = zlib.crc32(bloco, crc)
+            saida.write(bloco)
+            saida.write(b',"crc32":"%08x"}' % crc)
+        finally:
+            if saida is not bruto:
+                saida.close()  # Termina o fluxo comprimido (o arquivo em si é fechado pelo 'with').
+        bruto.flush()
+        os.fsync(bruto.fileno())
+    os.replace(temporario, arquivo)
+    _sincronizar_pasta(arquivo.parent)
+
+
+def ler_snapshot(arquivo: Path):
+    """Lê um arquivo de gravar_snapshot (ou um JSON antigo), conferindo o checksum. Retorna [] se ele não existir.
+
+    Levanta ArquivoCorrompido se o arquivo estiver truncado, com checksum diferente ou com
+    JSON inválido, em vez de devolver dados vazios.
+    """
+    try:
+        with open(arquivo, "rb") as f:
+            conteudo = f.read()
+    except FileNotFoundError:
+        return []
+    for magico, descomprimir in MAGICOS_COMPRESSAO:
+        if conteudo.startswith(magico):
+            try:
+                conteudo = descomprimir(conteudo)
+            except (OSError, EOFError, zlib.error, lzma.LZMAError) as e:
+                raise ArquivoCorrompido(f"{arquivo}: compressão inválida ({e})") from None
+            break
+    if conteudo.startswith(INICIO_ENVELOPE):
+        fim = conteudo[-TAMANHO_FIM_ENVELOPE:]
+        if len(conteudo) < len(INICIO_ENVELOPE) + TAMANHO_FIM_ENVELOPE or not (fim.startswith(b',"crc32":"') and fim.endswith(b'"}')):
+            raise ArquivoCorrompido(f"{arquivo}: arquivo incompleto (sem o checksum no final)")
+        conteudo = conteudo[len(INICIO_ENVELOPE):-TAMANHO_FIM_ENVELOPE]
+        if f"{zlib.crc32(conteudo):08x}".encode() != fim[10:18]:
+            raise ArquivoCorrompido(f"{arquivo}: checksum não confere")
+    try:
+        return json.loads(conteudo)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ArquivoCorrompido(f"{arquivo}: JSON inválido ({e})") from None
+
+
+# --------------------------- MÉTRICAS ---------------------------
+# Instrumentação opcional dos caminhos mais usados: histogramas de latência, contadores
+# de operações e de recusas por motivo e bytes gravados. Desativada, não custa nada: os
+# métodos medidos só são trocados por versões cronometradas em ativar_metricas().
+
+# Limites superiores (em segundos) das faixas dos histogramas de latência.
+FAIXAS_LATENCIA = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10)
+
+
+class Metricas:
+    """Coleta de métricas em memória (thread-safe)."""
+    def __init__(self):
+        """Inicializa as métricas zeradas."""
+        self._trava = threading.Lock()
+        self.zerar()
+
+    def zerar(self):
+        """Apaga tudo o que foi coletado."""
+        with self._trava:
+            self.latencias = {}  # Operação -> [contagem por faixa (+ uma faixa final sem limite), soma em segundos].
+            self.operacoes = {}  # (tipo da transação, "aceita" ou "recusada") -> quantidade.
+            self.recusas = {}  # Motivo (MOTIVO_*) -> quantidade.
+            self.bytes_gravados = {}  # Nome do arquivo -> bytes gravados.
+
+    def registrar_latencia(self, operacao, segundos):
+        """Soma uma medição ao histograma da operação."""
+        faixa = bisect_left(FAIXAS_LATENCIA, segundos)
+        with self._trava:
+            histograma = self.latencias.get(operacao)
+            if histograma is None:
+                histograma = self.latencias[operacao] = [[0] * (len(FAIXAS_LATENCIA) + 1), 0.0]
+            histograma[0][faixa] += 1
+            histograma[1] += segundos
+
+    def contar_operacao(self, tipo, aceita, motivo=None):
+        """Conta uma transação aceita ou recusada (e o motivo da recusa)."""
+        with self._trava:
+            chave = (tipo, "aceita" if aceita else "recusada")
+            self.operacoes[chave] = self.operacoes.get(chave, 0) + 1
+            if not aceita:
+                self.recusas[motivo] = self.recusas.get(motivo, 0) + 1
+
+    def contar_bytes(self, arquivo, quantidade):
+        """Soma bytes gravados em um arquivo."""
+        with self._trava:
+            self.bytes_gravados[arquivo] = self.bytes_gravados.get(arquivo, 0) + quantidade
+
+    def instantaneo(self):
+        """Cópia das métricas coletadas, como dicionário (API em processo)."""
+        with self._trava:
+            latencias = {
+                operacao: {
+                    "faixas": dict(zip([str(limite) for limite in FAIXAS_LATENCIA] + ["+Inf"], contagens)),
+                    "quantidade": sum(contagens),
+                    "soma_s": soma,
+                }
+                for operacao, (contagens, soma) in self.latencias.items()
+            }
+            operacoes = {}
+            for (tipo, resultado), quantidade in self.operacoes.items():
+                operacoes.setdefault(tipo, {})[resultado] = quantidade
+            return {"latencias": latencias, "operacoes": operacoes, "recusas": dict(self.recusas), "bytes_gravados": dict(self.bytes_gravados)}
+
+    def texto(self):
+        """Métricas no formato de texto do Prometheus."""
+        dados = self.instantaneo()
+        linhas = ["# TYPE banco_latencia_segundos histogram"]
+        for operacao, histograma in sorted(dados["latencias"].items()):
+            acumulado = 0
+            for limite, quantidade in histograma["faixas"].items():
+                acumulado += quantidade
+                linhas.append(f'banco_latencia_segundos_bucket{{operacao="{operacao}",le="{limite}"}} {acumulado}')
+            linhas.append(f'banco_latencia_segundos_sum{{operacao="{operacao}"}} {histograma["soma_s"]}')
+            linhas.append(f'banco_latencia_segundos_count{{operacao="{operacao}"}} {histograma["quantidade"]}')
+        linhas.append("# TYPE banco_transacoes_total counter")
+        for tipo, resultados in sorted(dados["operacoes"].items()):
+            for resultado, quantidade in sorted(resultados.items()):
+                linhas.append(f'banco_transacoes_total{{tipo="{tipo}",resultado="{resultado}"}} {quantidade}')
+        linhas.append("# TYPE banco_recusas_total counter")
+        for motivo, quantidade in sorted(dados["recusas"].items(), key=lambda item: str(item[0])):
+            linhas.append(f'banco_recusas_total{{motivo="{motivo}"}} {quantidade}')
+        linhas.append("# TYPE banco_bytes_gravados_total counter")
+        for arquivo, quantidade in sorted(dados["bytes_gravados"].items()):
+            linhas.append(f'banco_bytes_gravados_total{{arquivo="{arquivo}"}} {quantidade}')
+        return "\n".join(linhas) + "\n"
+
+
+METRICAS = Metricas()  # Métricas do processo.
+
+
+def _tamanho(arquivo):
+    """Tamanho do arquivo em bytes (0 se não existir)."""
+    try:
+        return os.path.getsize(arquivo)
+    except OSError:
+        return 0
+
+
+def _medir_latencia(operacao, funcao):
+    """Versão de 'funcao' que registra a latência de cada chamada."""
+    @wraps(funcao)
+    def medida(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            METRICAS.registrar_latencia(operacao, time.perf_counter() - inicio)
+    return medida
+
+
+def _medir_transacao(funcao):
+    """Versão de Bank.executar_transacao que conta as transações aceitas e recusadas por motivo."""
+    @wraps(funcao)
+    def medida(bank, conta, cpf_usuario, tipo, *args, **kwargs):
+        ok, motivo = resultado = funcao(bank, conta, cpf_usuario, tipo, *args, **kwargs)
+        classe = TIPOS_TRANSACAO.get(str(tipo).lower())
+        METRICAS.contar_operacao(classe.__name__ if classe else str(tipo), ok, motivo)
+        return resultado
+    return medida
+
+
+def _medir_transferencia(funcao):
+    """Versão de Bank.transferir que conta as transferências aceitas e recusadas por motivo."""
+    @wraps(funcao)
+    def medida(*args, **kwargs):
+        ok, motivo = resultado = funcao(*args, **kwargs)
+        METRICAS.contar_operacao(Transferencia.__name__, ok, motivo)
+        return resultado
+    return medida
+
+
+def _medir_liquidacao(funcao):
+    """Versão de Bank.liquidar_transferencias que conta cada transferência do lote, aceita ou recusada por motivo."""
+    @wraps(funcao)
+    def medida(*args, **kwargs):
+        resultados = funcao(*args, **kwargs)
+        for ok, motivo in resultados:
+            METRICAS.contar_operacao(Transferencia.__name__, ok, motivo)
+        return resultados
+    return medida
+
+
+def _nome_sem_geracao(arquivo):
+    """Nome do arquivo sem o sufixo da geração do snapshot (contas.json.g7 -> contas.json)."""
+    nome = Path(arquivo).name
+    base, separador, geracao = nome.rpartition(".g")
+    return base if separador and base and geracao.isdigit() else nome
+
+
+def _medir_gravar_snapshot(funcao):
+    """Versão de gravar_snapshot que registra latência e bytes gravados (por arquivo, somando todas as gerações)."""
+    medida_latencia = _medir_latencia("gravar_snapshot", funcao)
+    @wraps(funcao)
+    def medida(arquivo, dados, compressao=None):
+        medida_latencia(arquivo, dados, compressao)
+        METRICAS.contar_bytes(_nome_sem_geracao(arquivo), _tamanho(arquivo))
+    return medida
+
+
+def _medir_journal(funcao):
+    """Versão de JournalTransacoes.registrar_varios que registra latência e bytes gravados."""
+    medida_latencia = _medir_latencia("journal", funcao)
+    @wraps(funcao)
+    def medida(journal, registros):
+        antes = _tamanho(journal.arquivo)
+        resultado = medida_latencia(journal, registros)
+        METRICAS.contar_bytes(Path(journal.arquivo).name, _tamanho(journal.arquivo) - antes)
+        return resultado
+    return medida
+
+
+def _medir_extratos(funcao):
+    """Versão de ArmazenamentoJSON._salvar_extratos que registra latência e bytes gravados."""
+    medida_latencia = _medir_latencia("salvar_extratos", funcao)
+    @wraps(funcao)
+    def medida(armazenamento, bank, preparado):
+        resultado = medida_latencia(armazenamento, bank, preparado)
+        gravado = armazenamento._arquivo_da_geracao(armazenamento.arq_extratos, armazenamento.geracao + 1)  # Ainda não instalado.
+        METRICAS.contar_bytes(armazenamento.arq_extratos.name, _tamanho(gravado))
+        return resultado
+    return medida
+
+
+def _pontos_medidos():
+    """Lista de (dono, nome do atributo, função que cria a versão medida)."""
+    modulo = sys.modules[__name__]
+    return [
+        (Bank, "registrar_transacao", partial(_medir_latencia, "registrar_transacao")),
+        (Bank, "executar_transacao", lambda f: _medir_latencia("executar_transacao", _medir_transacao(f))),
+        (Bank, "transferir", lambda f: _medir_latencia("transferir", _medir_transferencia(f))),
+        (Bank, "liquidar_transferencias", lambda f: _medir_latencia("liquidar_transferencias", _medir_liquidacao(f))),
+        (Bank, "save_all", partial(_medir_latencia, "save_all")),
+        (Bank, "load_all", partial(_medir_latencia, "load_all")),
+        (ContaCorrente, "sacar", partial(_medir_latencia, "sacar")),
+        (Conta, "depositar", partial(_medir_latencia, "depositar")),
+        (JournalTransacoes, "registrar_varios", _medir_journal),
+        (ArmazenamentoJSON, "_salvar_extratos", _medir_extratos),
+        (modulo, "gravar_snapshot", _medir_gravar_snapshot),
+        (modulo, "ler_snapshot", partial(_medir_latencia, "ler_snapshot")),
+    ]
+
+
+_ORIGINAIS_MEDIDOS = {}  # (dono, nome) -> função original, enquanto as métricas estão ativas.
+
+
+def ativar_metricas():
+    """Troca os métodos medidos pelas versões instrumentadas (as métricas vão para METRICAS)."""
+    for dono, nome, medir in _pontos_medidos():
+        if (dono, nome) not in _ORIGINAIS_MEDIDOS:
+            original = getattr(dono, nome)
+            _ORIGINAIS_MEDIDOS[(dono, nome)] = original
+            setattr(dono, nome, medir(original))
+
+
+def metricas_ativas():
+    """True se as métricas estão sendo coletadas."""
+    return bool(_ORIGINAIS_MEDIDOS)
+
+
+def desativar_metricas():
+    """Volta os métodos medidos às versões originais (as métricas já coletadas são mantidas)."""
+    while _ORIGINAIS_MEDIDOS:
+        (dono, nome), original = _ORIGINAIS_MEDIDOS.popitem()
+        setattr(dono, nome, original)
 
 
 # --------------------------- ENTRYPOINT ---------------------------
 # Ponto de entrada do programa.
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sistema bancário com menu interativo.")
+    parser.add_argument("--sqlite", help="Usa o arquivo SQLite informado em vez dos arquivos JSON.")
+    parser.add_argument("--razao", action="store_true", help="Guarda os históricos no livro-razão binário (extratos.razao).")
+    parser.add_argument("--compressao", choices=("gzip", "lzma"), help="Comprime os arquivos do snapshot (clientes, contas, contadores).")
+    args = parser.parse_args()
+
+    armazenamento = None  # Padrão: arquivos JSON na pasta do script.
+    if args.sqlite:
+        from armazenamento_sqlite import ArmazenamentoSQLite
+        armazenamento = ArmazenamentoSQLite(args.sqlite)
+    elif args.razao:
+        from razao_binario import ArmazenamentoRazao
+        armazenamento = ArmazenamentoRazao(compressao=args.compressao)
+    elif args.compressao:
+        armazenamento = ArmazenamentoJSON(compressao=args.compressao)
+
     # Cria uma instância da classe Bank.
-    bank = Bank()
+    bank = Bank(armazenamento)
     # Inicia a execução do sistema.
     bank.run()
 
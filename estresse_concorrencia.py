@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+
+# Teste de estresse do processamento concorrente de transações.
+#
+# Várias threads disputam poucas contas ao mesmo tempo. Ao final, o script confere
+# que nenhuma atualização de saldo se perdeu, que nenhum saldo ficou negativo, que
+# os limites diários foram respeitados e que o estado gravado em disco (snapshot +
+# journal) é igual ao estado em memória. Os dados ficam em uma pasta temporária.
+#
+# Uso:
+#   python estresse_concorrencia.py
+#   python estresse_concorrencia.py --threads 32 --operacoes 50000 --contas 2
+
+import argparse  # Para ler os argumentos da linha de comando.
+import random  # Para sortear as operações.
+import sys  # Para o intervalo de troca de threads e o código de saída.
+import tempfile  # Para a pasta temporária dos dados.
+import time  # Para ceder o processador a outras threads durante as operações.
+from concurrent.futures import ThreadPoolExecutor  # Para disparar as operações em paralelo.
+
+import desafio_1_sistema_bancario as banco
+
+
+class BankSemLimiteDiario(banco.Bank):
+    """Bank com limite de transações diárias alto, para gerar volume sobre poucas contas."""
+    LIMITE_TRANSACOES_DIARIAS_POR_CONTA = 10 ** 9
+
+
+def criar_contas(bank, quantidade, saldo_inicial, **limites):
+    """Cria 'quantidade' clientes/contas com o saldo inicial informado e grava um snapshot."""
+    for i in range(1, quantidade + 1):
+        cliente = banco.PessoaFisica(f"Cliente {i}", str(i).zfill(11), "01/01/1990", "Rua Teste, 1")
+        bank.adicionar_cliente(cliente)
+        conta = banco.ContaCorrente(str(i).zfill(4), cliente, **limites)
+        conta.saldo = saldo_inicial
+        bank.adicionar_conta(conta)
+    bank.save_all()
+
+
+def disparar(bank, operacoes, threads):
+    """Executa as operações (conta, tipo, valor) em paralelo e retorna a lista de (operação, ok)."""
+    def executar(operacao):
+        conta, tipo, valor = operacao
+        ok, _motivo = bank.executar_transacao(conta, conta.cliente.cpf, tipo, valor)
+        return operacao, ok
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(executar, operacoes))
+
+
+def conferir(falhas, condicao, mensagem):
+    """Acrescenta 'mensagem' à lista de falhas se a condição for falsa."""
+    if not condicao:
+        falhas.append(mensagem)
+
+
+def fase_limites(threads, contas):
+    """Muitas threads tentam estourar os limites diários padrão das mesmas contas."""
+    falhas = []
+    with tempfile.TemporaryDirectory() as pasta:
+        bank = banco.Bank(banco.ArmazenamentoJSON(pasta))
+        criar_contas(bank, contas, 1000)
+        operacoes = [(c, tipo, 100) for c in bank.contas for tipo in ("Saque", "Deposito") * 25]
+        random.shuffle(operacoes)
+        resultados = disparar(bank, operacoes, threads)
+
+        for conta in bank.contas:
+            aceitas = [op for op, ok in resultados if ok and op[0] is conta]
+            saques = sum(1 for _c, tipo, _v in aceitas if tipo == "Saque")
+            depositos = len(aceitas) - saques
+            conferir(falhas, len(aceitas) == bank.LIMITE_TRANSACOES_DIARIAS_POR_CONTA,
+                     f"conta {conta.numero}: {len(aceitas)} transações aceitas (limite {bank.LIMITE_TRANSACOES_DIARIAS_POR_CONTA})")
+            conferir(falhas, saques <= conta.limite_saques,
+                     f"conta {conta.numero}: {saques} saques aceitos (limite {conta.limite_saques})")
+            conferir(falhas, conta.saldo == 1000 + 100 * depositos - 100 * saques,
+                     f"conta {conta.numero}: saldo {conta.saldo} diferente do esperado")
+        bank.fechar()
+    return falhas
+
+
+def fase_volume(threads, contas, quantidade):
+    """Grande volume de saques e depósitos sobre poucas contas, com snapshots no meio."""
+    falhas = []
+    saldo_inicial = 500
+    with tempfile.TemporaryDirectory() as pasta:
+        bank = BankSemLimiteDiario(banco.ArmazenamentoJSON(pasta, intervalo_snapshot=500))
+        criar_contas(bank, contas, saldo_inicial, limite=10 ** 9, limite_saques=10 ** 9)
+        # Valores inteiros para que a soma não dependa da ordem (sem arredondamento de float).
+        operacoes = [(random.choice(bank.contas), random.choice(("Saque", "Deposito")), random.randint(1, 50)) for _ in range(quantidade)]
+        resultados = disparar(bank, operacoes, threads)
+
+        for conta in bank.contas:
+            aceitas = [op for op, ok in resultados if ok and op[0] is conta]
+            esperado = saldo_inicial + sum(v if tipo == "Deposito" else -v for _c, tipo, v in aceitas)
+            conferir(falhas, conta.saldo == esperado, f"conta {conta.numero}: saldo {conta.saldo}, esperado {esperado} (atualização perdida)")
+            conferir(falhas, conta.saldo >= 0, f"conta {conta.numero}: saldo negativo {conta.saldo}")
+            conferir(falhas, len(conta.historico.transacoes) == len(aceitas),
+                     f"conta {conta.numero}: {len(conta.historico.transacoes)} transações no histórico, {len(aceitas)} aceitas")
+        bank.fechar()
+
+        # Recarrega do disco: o snapshot mais o journal devem reproduzir o mesmo estado.
+        recarregado = BankSemLimiteDiario(banco.ArmazenamentoJSON(pasta))
+        for conta in bank.contas:
+            copia = recarregado.buscar_conta(conta.numero)
+            conferir(falhas, copia is not None and copia.saldo == conta.saldo,
+                     f"conta {conta.numero}: saldo em disco {copia.saldo if copia else None}, em memória {conta.saldo}")
+            conferir(falhas, copia is not None and len(copia.historico.transacoes) == len(conta.historico.transacoes),
+                     f"conta {conta.numero}: histórico em disco diferente do histórico em memória")
+        recarregado.fechar()
+    return falhas
+
+
+def main(argv=None):
+    """Executa as duas fases do teste e retorna 0 se tudo conferiu."""
+    parser = argparse.ArgumentParser(description="Teste de estresse do processamento concorrente de transações.")
+    parser.add_argument("--threads", type=int, default=16, help="Quantidade de threads (padrão: 16).")
+    parser.add_argument("--operacoes", type=int, default=20000, help="Operações na fase de volume (padrão: 20000).")
+    parser.add_argument("--contas", type=int, default=3, help="Contas disputadas pelas threads (padrão: 3).")
+    args = parser.parse_args(argv)
+
+    # As mensagens das operações são trocadas por uma pausa de 0 s, que devolve o GIL no meio
+    # de sacar/depositar e força outras threads a entrar nos trechos críticos.
+    banco.exibir = lambda mensagem: time.sleep(0)
+    sys.setswitchinterval(1e-6)  # Troca de thread o mais cedo possível, para provocar disputas.
+
+    falhas = fase_limites(args.threads, args.contas)
+    print(f"> Fase de limites: {'OK' if not falhas else 'FALHOU'}")
+    falhas_volume = fase_volume(args.threads, args.contas, args.operacoes)
+    print(f"> Fase de volume ({args.operacoes} operações, {args.threads} threads): {'OK' if not falhas_volume else 'FALHOU'}")
+
+    for falha in falhas + falhas_volume:
+        print(f"  - {falha}")
+    return 1 if falhas or falhas_volume else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+
+# Exportação em massa de extratos (fechamento do mês).
+#
+# Grava o extrato de todas as contas (ou só das contas informadas) em TXT, CSV e/ou
+# JSONL, um arquivo por conta e formato, em uma pasta configurável. O histórico de
+# cada conta é percorrido por geradores e gravado com buffer grande; as contas são
+# divididas em grupos e os grupos são exportados em paralelo por um pool de processos,
+# cada um com o seu próprio Bank aberto sobre os mesmos arquivos (só para leitura).
+#
+# Uso:
+#   python exportacao_extratos.py --pasta extratos_2025_10
+#   python exportacao_extratos.py --pasta saida --formatos txt,csv,jsonl --processos 8
+#   python exportacao_extratos.py --pasta saida --contas 0001,0002 --sqlite banco.db
+
+import argparse  # Para ler os argumentos da linha de comando.
+import os  # Para a quantidade de processadores da máquina.
+import sys  # Para a saída de erros e o código de saída do programa.
+import time  # Para medir a duração da exportação.
+from concurrent.futures import ProcessPoolExecutor  # Para exportar os grupos de contas em paralelo.
+from datetime import datetime  # Para a data e hora de impressão dos extratos.
+from functools import partial  # Para descrever o armazenamento que cada processo deve abrir.
+from pathlib import Path  # Para lidar com os caminhos dos arquivos.
+
+import desafio_1_sistema_bancario as banco
+
+
+TAMANHO_GRUPO_PADRAO = 1000  # Contas exportadas por tarefa do pool.
+
+_bank_processo = None  # Bank aberto por cada processo do pool (ver _iniciar_processo).
+
+
+# --------------------------- EXPORTAÇÃO ---------------------------
+
+def exportar_conta(conta, pasta, formatos, impressao=None):
+    """Grava o extrato da conta em cada formato pedido. Retorna a quantidade de arquivos gravados."""
+    for formato in formatos:
+        extensao, gerar_linhas = banco.FORMATOS_EXTRATO[formato]
+        linhas = gerar_linhas(conta, impressao=impressao) if formato == "txt" else gerar_linhas(conta)
+        with open(Path(pasta) / f"extrato_conta_{conta.numero}.{extensao}", "w", encoding="utf-8",
+                  newline="", buffering=banco.TAMANHO_BUFFER_EXPORTACAO) as f:
+            f.writelines(linhas)
+    return len(formatos)
+
+
+def exportar_grupo(bank, numeros, pasta, formatos, impressao=None, liberar_historicos=False):
+    """Exporta as contas de um grupo. Retorna (contas exportadas, arquivos gravados, números não encontrados).
+
+    Com 'liberar_historicos', o histórico de cada conta sai da memória depois de exportado
+    (usado pelos processos do pool, cujo Bank só serve para a exportação).
+    """
+    exportadas = arquivos = 0
+    ausentes = []
+    for numero in numeros:
+        conta = bank.buscar_conta(numero)
+        if conta is None:
+            ausentes.append(numero)
+            continue
+        arquivos += exportar_conta(conta, pasta, formatos, impressao)
+        exportadas += 1
+        if liberar_historicos:
+            conta.historico = banco.Historico()
+    return exportadas, arquivos, ausentes
+
+
+def _iniciar_processo(fabrica_armazenamento):
+    """Abre, em cada processo do pool, um Bank sobre o armazenamento descrito pela fábrica."""
+    global _bank_processo
+    banco.EXIBIR_MENSAGENS = False
+    _bank_processo = banco.Bank(fabrica_armazenamento())
+
+
+def _exportar_grupo_no_processo(numeros, pasta, formatos, impressao):
+    """Tarefa do pool: exporta um grupo de contas com o Bank do processo."""
+    return exportar_grupo(_bank_processo, numeros, pasta, formatos, impressao, liberar_historicos=True)
+
+
+def exportar_extratos(bank, pasta, formatos=("txt",), contas=None, processos=1, fabrica_armazenamento=None,
+                      tamanho_grupo=TAMANHO_GRUPO_PADRAO):
+    """Exporta os extratos das contas informadas (padrão: todas) para a pasta. Retorna um resumo.
+
+    Com 'processos' > 1, 'fabrica_armazenamento' (uma função sem argumentos que pode ser
+    enviada a outro processo, como partial(ArmazenamentoJSON, pasta)) abre o armazenamento
+    em cada processo do pool; as transações pendentes do bank são gravadas antes, para que
+    os processos leiam o mesmo estado.
+    """
+    formatos = [f.strip().lower() for f in formatos]
+    invalidos = [f for f in formatos if f not in banco.FORMATOS_EXTRATO]
+    if invalidos:
+        raise ValueError(f"formato de extrato inválido: {', '.join(invalidos)}")
+    if processos > 1 and fabrica_armazenamento is None:
+        raise ValueError("a exportação com vários processos precisa de 'fabrica_armazenamento'")
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    numeros = [c.numero for c in bank.contas] if contas is None else list(contas)
+    impressao = datetime.now()  # Mesma data de impressão em todos os extratos da exportação.
+    grupos = [numeros[i:i + tamanho_grupo] for i in range(0, len(numeros), tamanho_grupo)]
+
+    inicio = time.perf_counter()
+    if processos > 1:
+        bank.persistir_pendentes()
+        with ProcessPoolExecutor(processos, initializer=_iniciar_processo, initargs=(fabrica_armazenamento,)) as pool:
+            resultados = list(pool.map(partial(_exportar_grupo_no_processo, pasta=pasta, formatos=formatos, impressao=impressao), grupos))
+    else:
+        resultados = [exportar_grupo(bank, grupo, pasta, formatos, impressao) for grupo in grupos]
+
+    return {
+        "contas": sum(r[0] for r in resultados),
+        "arquivos": sum(r[1] for r in resultados),
+        "contas_inexistentes": [numero for r in resultados for numero in r[2]],
+        "duracao_s": time.perf_counter() - inicio,
+    }
+
+
+# --------------------------- LINHA DE COMANDO ---------------------------
+
+def fabrica_da_linha_de_comando(args):
+    """Fábrica do armazenamento escolhido na linha de comando (JSON, SQLite ou livro-razão)."""
+    if args.sqlite:
+        from armazenamento_sqlite import ArmazenamentoSQLite
+        return partial(ArmazenamentoSQLite, args.sqlite)
+    if args.razao:
+        from razao_binario import ArmazenamentoRazao
+        return partial(ArmazenamentoRazao, args.diretorio)
+    return partial(banco.ArmazenamentoJSON, args.diretorio)
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando da exportação de extratos."""
+    parser = argparse.ArgumentParser(description="Exporta os extratos de todas as contas (ou das contas informadas).")
+    parser.add_argument("--pasta", required=True, help="Pasta onde gravar os extratos.")
+    parser.add_argument("--formatos", default="txt", help=f"Formatos separados por vírgula ({', '.join(banco.FORMATOS_EXTRATO)}; padrão: txt).")
+    parser.add_argument("--contas", help="Números das contas separados por vírgula (padrão: todas).")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1, help="Processos do pool (padrão: um por processador).")
+    parser.add_argument("--tamanho-grupo", type=int, default=TAMANHO_GRUPO_PADRAO, help=f"Contas por tarefa do pool (padrão: {TAMANHO_GRUPO_PADRAO}).")
+    parser.add_argument("--diretorio", help="Pasta dos arquivos de dados (padrão: pasta do script).")
+    parser.add_argument("--sqlite", help="Lê os dados do arquivo SQLite informado.")
+    parser.add_argument("--razao", action="store_true", help="Lê os históricos do livro-razão binário.")
+    args = parser.parse_args(argv)
+
+    formatos = [f for f in args.formatos.split(",") if f.strip()]
+    contas = [c.strip() for c in args.contas.split(",") if c.strip()] if args.contas else None
+
+    banco.EXIBIR_MENSAGENS = False
+    fabrica = fabrica_da_linha_de_comando(args)
+    bank = banco.Bank(fabrica())
+    try:
+        resumo = exportar_extratos(bank, args.pasta, formatos, contas, max(1, args.processos), fabrica, args.tamanho_grupo)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        bank.fechar()
+
+    print(f"\n> {resumo['contas']} extratos ({resumo['arquivos']} arquivos) gravados em {args.pasta} em {resumo['duracao_s']:.1f} s.")
+    if resumo["contas_inexistentes"]:
+        print(f"> Contas não encontradas: {', '.join(resumo['contas_inexistentes'])}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
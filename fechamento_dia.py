@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+
+# Fechamento do dia.
+#
+# Nada encerrava um dia de movimento: os contadores de transações e saques das contas
+# paradas ficavam para sempre em transacoes_diarias.json, e todo total diário precisava
+# ser recalculado a partir do histórico bruto. Este script vira os contadores diários
+# (Bank.encerrar_dia) e grava, para cada conta, o resumo do dia: saldo de abertura e de
+# fechamento, quantidade e valor dos depósitos e dos saques. As contas são resumidas em
+# paralelo por um pool de processos, cada um com o seu próprio Bank aberto sobre os
+# mesmos dados (só para leitura).
+#
+# Os resumos ficam em um arquivo JSON por dia (resumo_aaaa-mm-dd.json, na pasta de
+# resumos), e extratos e relatórios podem ler os dias já fechados sem percorrer o
+# histórico (ver resumos_da_conta e relatorios.py --resumos).
+#
+# Uso:
+#   python fechamento_dia.py                          # Fecha o dia de hoje.
+#   python fechamento_dia.py --dia 2025-10-03 --processos 8
+#   python fechamento_dia.py --conta 0001 --inicio 2025-10-01 --fim 2025-10-31   # Resumos já gravados da conta.
+
+import argparse  # Para ler os argumentos da linha de comando.
+import json  # Para gravar os arquivos de resumo.
+import os  # Para a quantidade de processadores e a troca atômica do arquivo do dia.
+import sys  # Para a saída de erros e o código de saída do programa.
+import time  # Para medir a duração do fechamento.
+from concurrent.futures import ProcessPoolExecutor  # Para resumir os grupos de contas em paralelo.
+from datetime import date, datetime, timedelta  # Para os dias do fechamento.
+from functools import partial  # Para passar os parâmetros fixos às tarefas do pool.
+from pathlib import Path  # Para lidar com os caminhos dos arquivos.
+
+import desafio_1_sistema_bancario as banco
+from exportacao_extratos import fabrica_da_linha_de_comando
+
+
+PASTA_RESUMOS = banco.BASE_DIR / "resumos_diarios"  # Pasta padrão dos resumos (dentro da pasta dos dados).
+TAMANHO_GRUPO_PADRAO = 1000  # Contas resumidas por tarefa do pool.
+CAMPOS_VALOR = ("saldo_abertura", "saldo_fechamento", "valor_depositos", "valor_saques")  # Campos em centavos no Historico, em reais no arquivo.
+
+_bank_processo = None  # Bank aberto por cada processo do pool (ver _iniciar_processo).
+
+
+# --------------------------- RESUMO DAS CONTAS ---------------------------
+
+def resumir_grupo(bank, numeros, dia, liberar_historicos=False):
+    """Resumo do dia de cada conta do grupo (Historico.resumo_periodo). Retorna {número: resumo}, com valores em reais.
+
+    Com 'liberar_historicos', o histórico de cada conta sai da memória depois de resumido
+    (usado pelos processos do pool, cujo Bank só serve para o fechamento).
+    """
+    inicio, fim = dia, dia + timedelta(days=1)
+    resumos = {}
+    for numero in numeros:
+        conta = bank.buscar_conta(numero)
+        if conta is None:
+            continue
+        conta.historico.carregar()  # Fora da trava da conta: a carga usa a trava de estado, que vem antes.
+        with conta.trava:
+            resumo = conta.historico.resumo_periodo(inicio, fim, conta.saldo_centavos)
+        for campo in CAMPOS_VALOR:
+            resumo[campo] /= 100
+        resumos[numero] = resumo
+        if liberar_historicos:
+            conta.historico = banco.Historico()
+    return resumos
+
+
+def _iniciar_processo(fabrica_armazenamento):
+    """Abre, em cada processo do pool, um Bank sobre o armazenamento descrito pela fábrica."""
+    global _bank_processo
+    banco.EXIBIR_MENSAGENS = False
+    _bank_processo = banco.Bank(fabrica_armazenamento())
+
+
+def _resumir_grupo_no_processo(numeros, dia):
+    """Tarefa do pool: resume um grupo de contas com o Bank do processo."""
+    return resumir_grupo(_bank_processo, numeros, dia, liberar_historicos=True)
+
+
+# --------------------------- ARQUIVOS DE RESUMO ---------------------------
+
+def arquivo_do_dia(pasta, dia):
+    """Caminho do arquivo de resumos do dia ('dia' é date ou 'aaaa-mm-dd')."""
+    return Path(pasta) / f"resumo_{dia if isinstance(dia, str) else dia.isoformat()}.json"
+
+
+def gravar_resumos(pasta, dia, resumos):
+    """Grava o arquivo do dia (em um temporário trocado no final, então quem lê nunca vê um arquivo pela metade)."""
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    destino = arquivo_do_dia(pasta, dia)
+    temporario = destino.with_suffix(".tmp")
+    with open(temporario, "w", encoding="utf-8", buffering=banco.TAMANHO_BUFFER_EXPORTACAO) as f:
+        json.dump({"dia": dia.isoformat(), "gerado_em": datetime.now().strftime(banco.FORMATO_DATA), "contas": resumos},
+                  f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temporario, destino)
+    return destino
+
+
+def carregar_resumos_dia(pasta, dia):
+    """Resumos de todas as contas no dia: {número: resumo}, ou None se o dia não foi fechado.
+
+    Levanta banco.ArquivoCorrompido se o arquivo do dia estiver truncado ou com JSON inválido.
+    """
+    dados = banco.ler_snapshot(arquivo_do_dia(pasta, dia))
+    return dados.get("contas") if isinstance(dados, dict) else None
+
+
+def dias_fechados(pasta):
+    """Dias (date) com arquivo de resumos na pasta, em ordem."""
+    dias = []
+    for arquivo in Path(pasta).glob("resumo_*.json"):
+        try:
+            dias.append(date.fromisoformat(arquivo.stem[len("resumo_"):]))
+        except ValueError:
+            continue
+    return sorted(dias)
+
+
+def resumos_da_conta(pasta, numero, inicio=None, fim=None):
+    """Resumos já gravados da conta nos dias fechados entre 'inicio' e 'fim' (inclusive). Retorna [(dia, resumo), ...]."""
+    resultado = []
+    for dia in dias_fechados(pasta):
+        if (inicio and dia < inicio) or (fim and dia > fim):
+            continue
+        resumo = (carregar_resumos_dia(pasta, dia) or {}).get(numero)
+        if resumo is not None:
+            resultado.append((dia, resumo))
+    return resultado
+
+
+def volumes_dos_resumos(pasta):
+    """Quantidade e volume de depósitos e saques por dia fechado, somados dos resumos (sem ler históricos).
+
+    Mesmas colunas do relatório volumes_diarios de relatorios.py.
+    """
+    linhas = []
+    for dia in dias_fechados(pasta):
+        resumos = (carregar_resumos_dia(pasta, dia) or {}).values()
+        depositos = sum(r["depositos"] for r in resumos)
+        saques = sum(r["saques"] for r in resumos)
+        valor_depositos = sum(banco.para_centavos(r["valor_depositos"]) for r in resumos)
+        valor_saques = sum(banco.para_centavos(r["valor_saques"]) for r in resumos)
+        if depositos or saques:
+            linhas.append([dia.isoformat(), depositos, valor_depositos / 100, saques, valor_saques / 100, (valor_depositos - valor_saques) / 100])
+    return {"colunas": ["dia", "depositos", "valor_depositos", "saques", "valor_saques", "liquido"], "linhas": linhas}
+
+
+# --------------------------- FECHAMENTO ---------------------------
+
+def fechar_dia(bank, dia=None, pasta=PASTA_RESUMOS, processos=1, fabrica_armazenamento=None, tamanho_grupo=TAMANHO_GRUPO_PADRAO):
+    """Fecha o dia (padrão: hoje): vira os contadores diários e grava os resumos de todas as contas. Retorna um resumo.
+
+    Com 'processos' > 1, 'fabrica_armazenamento' abre o armazenamento em cada processo do
+    pool (ver exportacao_extratos.exportar_extratos).
+    """
+    if processos > 1 and fabrica_armazenamento is None:
+        raise ValueError("o fechamento com vários processos precisa de 'fabrica_armazenamento'")
+    dia = dia or date.today()
+    inicio = time.perf_counter()
+
+    descartados = bank.encerrar_dia()
+    numeros = [c.numero for c in bank.contas]
+    grupos = [numeros[i:i + tamanho_grupo] for i in range(0, len(numeros), tamanho_grupo)]
+    resumos = {}
+    if processos > 1 and grupos:
+        bank.persistir_pendentes()  # Os processos leem o que está gravado.
+        with ProcessPoolExecutor(processos, initializer=_iniciar_processo, initargs=(fabrica_armazenamento,)) as pool:
+            for grupo in pool.map(partial(_resumir_grupo_no_processo, dia=dia), grupos):
+                resumos.update(grupo)
+    else:
+        for grupo in grupos:
+            resumos.update(resumir_grupo(bank, grupo, dia))
+    if descartados:
+        bank.save_all()  # Grava os contadores já sem os usos vencidos.
+    arquivo = gravar_resumos(pasta, dia, resumos)
+
+    return {
+        "dia": dia.isoformat(),
+        "contas": len(resumos),
+        "com_movimento": sum(1 for r in resumos.values() if r["depositos"] or r["saques"]),
+        "usos_descartados": descartados,
+        "arquivo": str(arquivo),
+        "duracao_s": time.perf_counter() - inicio,
+    }
+
+
+# --------------------------- LINHA DE COMANDO ---------------------------
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando do fechamento do dia."""
+    parser = argparse.ArgumentParser(description="Fecha o dia: vira os contadores diários e grava o resumo de cada conta.")
+    parser.add_argument("--dia", type=date.fromisoformat, help="Dia a fechar, aaaa-mm-dd (padrão: hoje).")
+    parser.add_argument("--resumos", help=f"Pasta dos resumos (padrão: {PASTA_RESUMOS.name} na pasta dos dados).")
+    parser.add_argument("--conta", help="Só mostra os resumos já gravados da conta informada (não fecha o dia).")
+    parser.add_argument("--inicio", type=date.fromisoformat, help="Com --conta: primeiro dia, aaaa-mm-dd.")
+    parser.add_argument("--fim", type=date.fromisoformat, help="Com --conta: último dia, aaaa-mm-dd.")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1, help="Processos do pool (padrão: um por processador).")
+    parser.add_argument("--tamanho-grupo", type=int, default=TAMANHO_GRUPO_PADRAO, help=f"Contas por tarefa do pool (padrão: {TAMANHO_GRUPO_PADRAO}).")
+    parser.add_argument("--diretorio", help="Pasta dos arquivos de dados (padrão: pasta do script).")
+    parser.add_argument("--sqlite", help="Lê os dados do arquivo SQLite informado.")
+    parser.add_argument("--razao", action="store_true", help="Lê os históricos do livro-razão binário.")
+    args = parser.parse_args(argv)
+
+    pasta = Path(args.resumos) if args.resumos else Path(args.diretorio or banco.BASE_DIR) / PASTA_RESUMOS.name
+    if args.conta:
+        resumos = resumos_da_conta(pasta, args.conta, args.inicio, args.fim)
+        if not resumos:
+            print(f"\n> Nenhum dia fechado com a conta {args.conta} em {pasta}.", file=sys.stderr)
+            return 1
+        for dia, r in resumos:
+            print(f"{dia.strftime('%d/%m/%Y')} | Abertura: R$ {r['saldo_abertura']:.2f} | Depósitos: {r['depositos']} (R$ {r['valor_depositos']:.2f}) "
+                  f"| Saques: {r['saques']} (R$ {r['valor_saques']:.2f}) | Fechamento: R$ {r['saldo_fechamento']:.2f}")
+        return 0
+
+    banco.EXIBIR_MENSAGENS = False
+    fabrica = fabrica_da_linha_de_comando(args)
+    bank = banco.Bank(fabrica())
+    try:
+        resumo = fechar_dia(bank, args.dia, pasta, max(1, args.processos), fabrica, args.tamanho_grupo)
+    finally:
+        bank.fechar()
+
+    print(f"\n> Dia {resumo['dia']} fechado: {resumo['contas']} contas ({resumo['com_movimento']} com movimento), "
+          f"{resumo['usos_descartados']} usos vencidos descartados dos limites, em {resumo['duracao_s']:.1f} s.")
+    print(f"> Resumos gravados em {resumo['arquivo']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+
+
+# Processamento em lote (sem terminal interativo) de saques, depósitos e transferências.
+#
+# Lê um fluxo de operações (cpf, conta, tipo, valor e, nas transferências, destino)
+# de um arquivo JSONL ou CSV, aplica cada uma com as mesmas regras do menu interativo
+# (ContaCorrente.sacar, Conta.depositar, Bank.transferir e o limite de transações
+# diárias do Bank) e persiste uma única vez por lote, em vez de uma vez por operação.
+#
+# Com --compensar, as transferências de cada lote não são aplicadas uma a uma: elas são
+# liquidadas juntas (Bank.liquidar_transferencias), e cada conta recebe um único lançamento
+# com o valor líquido. A liquidação acontece no final do lote ou antes de qualquer outra
+# operação sobre uma conta com transferências pendentes, então cada conta vê as operações
+# na ordem do arquivo e os resultados são os mesmos de sem --compensar.
+#
+# Uma operação pode trazer uma chave de idempotência no campo "chave": reprocessar o mesmo
+# arquivo (depois de uma queda, por exemplo) não aplica de novo as operações com chave que
+# já foram aceitas e devolve a mesma recusa às que foram recusadas. Com --compensar, as transferências com chave são aplicadas uma a uma,
+# fora da compensação, para que cada chave seja gravada junto com a sua transferência.
+#
+# Uso:
+#   python processamento_lote.py operacoes.jsonl
+#   python processamento_lote.py operacoes.csv --saida resultados.jsonl --tamanho-lote 5000
+#   python processamento_lote.py operacoes.jsonl --threads 8
+#   python processamento_lote.py operacoes.jsonl --metricas metricas.txt
+#   python processamento_lote.py transferencias.jsonl --compensar
+
+import argparse  # Para ler os argumentos da linha de comando.
+import csv  # Para ler arquivos de operações no formato CSV.
+import json  # Para ler arquivos JSONL e gravar os resultados.
+import sys  # Para a saída padrão e o código de saída do programa.
+from concurrent.futures import ThreadPoolExecutor  # Para o processamento com várias threads.
+from itertools import islice  # Para dividir o fluxo de operações em lotes.
+from pathlib import Path  # Para lidar com os caminhos dos arquivos.
+
+import desafio_1_sistema_bancario as banco
+
+
+# Motivos de recusa específicos do lote (os demais vêm de desafio_1_sistema_bancario).
+MOTIVO_REGISTRO_INVALIDO = "registro_invalido"
+MOTIVO_CPF_NAO_CONFERE = "cpf_nao_confere"
+
+TAMANHO_LOTE_PADRAO = 10000  # Quantidade de operações aplicadas antes de cada persistência.
+TIPOS_TRANSFERENCIA = ("transferencia", "transferência")  # Grafias aceitas no campo tipo.
+
+
+# --------------------------- LEITURA ---------------------------
+
+def ler_operacoes(caminho, formato=None):
+    """Lê as operações de um arquivo JSONL ou CSV, uma por vez (gerador de dicionários).
+
+    O formato é deduzido pela extensão do arquivo quando não for informado.
+    Linhas JSON inválidas, ou que não são um objeto ([1, 2], "x", 3), viram um dicionário
+    vazio, que será recusado como registro inválido.
+    """
+    caminho = Path(caminho)
+    formato = (formato or caminho.suffix.lstrip(".")).lower()
+    with open(caminho, "r", encoding="utf-8", newline="") as f:
+        if formato == "csv":
+            # O CSV precisa de cabeçalho com as colunas cpf, conta, tipo e valor (e destino, se houver transferências).
+            yield from csv.DictReader(f)
+        else:
+            for linha in f:
+                linha = linha.strip()
+                if not linha:
+                    continue
+                try:
+                    operacao = json.loads(linha)
+                except json.JSONDecodeError:
+                    operacao = {}
+                yield operacao if isinstance(operacao, dict) else {}
+
+
+def converter_valor(valor):
+    """Converte o valor da operação para float (aceita vírgula como separador decimal)."""
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    return float(str(valor).strip().replace(",", "."))
+
+
+# --------------------------- PROCESSAMENTO ---------------------------
+
+def e_transferencia(operacao):
+    """Indica se a operação é uma transferência."""
+    return str(operacao.get("tipo", "")).strip().lower() in TIPOS_TRANSFERENCIA
+
+
+def chave_da_operacao(operacao):
+    """Chave de idempotência da operação (campo "chave"; vazio no CSV conta como sem chave)."""
+    chave = str(operacao.get("chave") or "").strip()
+    return chave or None
+
+
+def contas_da_operacao(operacao):
+    """Números das contas que a operação altera (a conta e, nas transferências, o destino)."""
+    contas = {str(operacao.get("conta", "")).strip()}
+    if e_transferencia(operacao):
+        contas.add(str(operacao.get("destino", "")).strip())
+    return contas
+
+
+def conferir_operacao(bank, operacao):
+    """Confere os campos da operação. Retorna (conta, cpf, valor, None) ou (None, None, None, motivo)."""
+    cpf = str(operacao.get("cpf", "")).strip()
+    numero_conta = str(operacao.get("conta", "")).strip()
+    tipo = str(operacao.get("tipo", "")).strip()
+    if not cpf or not numero_conta or not tipo or operacao.get("valor") is None:
+        return None, None, None, MOTIVO_REGISTRO_INVALIDO
+    if e_transferencia(operacao) and not str(operacao.get("destino", "")).strip():
+        return None, None, None, MOTIVO_REGISTRO_INVALIDO
+
+    try:
+        valor = converter_valor(operacao.get("valor"))
+    except (TypeError, ValueError):
+        return None, None, None, banco.MOTIVO_VALOR_INVALIDO
+
+    conta = bank.buscar_conta(numero_conta)
+    if conta is None:
+        return None, None, None, banco.MOTIVO_CONTA_INEXISTENTE
+    if conta.cliente.cpf != cpf:
+        return None, None, None, MOTIVO_CPF_NAO_CONFERE
+    return conta, cpf, valor, None
+
+
+def aplicar_operacao(bank, operacao):
+    """Aplica uma operação no banco sem persistir. Retorna (ok, motivo)."""
+    conta, cpf, valor, motivo = conferir_operacao(bank, operacao)
+    if motivo:
+        return False, motivo
+
+    if e_transferencia(operacao):
+        destino = bank.buscar_conta(str(operacao["destino"]).strip())
+        if destino is None:
+            return False, banco.MOTIVO_CONTA_INEXISTENTE
+        return bank.transferir(conta, destino, cpf, valor, durabilidade=banco.DURABILIDADE_ADIADA, chave_idempotencia=chave_da_operacao(operacao))
+    return bank.executar_transacao(conta, cpf, str(operacao["tipo"]).strip(), valor, durabilidade=banco.DURABILIDADE_ADIADA,
+                                   chave_idempotencia=chave_da_operacao(operacao))
+
+
+def montar_resultado(indice, operacao, ok, motivo):
+    """Monta o dicionário de resultado de uma operação."""
+    return {
+        "registro": indice,
+        "cpf": operacao.get("cpf"),
+        "conta": operacao.get("conta"),
+        "tipo": operacao.get("tipo"),
+        "valor": operacao.get("valor"),
+        **({"destino": operacao.get("destino")} if "destino" in operacao else {}),
+        **({"chave": operacao.get("chave")} if chave_da_operacao(operacao) else {}),
+        "ok": ok,
+        "motivo": motivo,
+    }
+
+
+def processar_lote(bank, operacoes, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    """Processa um fluxo de operações e gera um resultado por operação.
+
+    As operações aceitas são persistidas a cada 'tamanho_lote' operações (e no final);
+    os resultados de cada lote só são entregues depois que ele foi persistido.
+    """
+    exibir_anterior = banco.EXIBIR_MENSAGENS
+    banco.EXIBIR_MENSAGENS = False  # Não imprime uma mensagem por operação.
+    try:
+        resultados = []
+        for indice, operacao in enumerate(operacoes, start=1):
+            ok, motivo = aplicar_operacao(bank, operacao)
+            resultados.append(montar_resultado(indice, operacao, ok, motivo))
+            if len(resultados) >= tamanho_lote:
+                bank.persistir_pendentes()
+                yield from resultados
+                resultados = []
+        bank.persistir_pendentes()
+        yield from resultados
+    finally:
+        banco.EXIBIR_MENSAGENS = exibir_anterior
+
+
+def processar_compensado(bank, operacoes, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    """Processa um fluxo de operações liquidando as transferências de cada lote por compensação.
+
+    Saques e depósitos são aplicados na ordem, como em processar_lote; as transferências do
+    lote são conferidas e guardadas, e liquidadas juntas por Bank.liquidar_transferencias no
+    final do lote. As transferências com chave de idempotência são aplicadas na ordem, como os
+    saques. Uma operação aplicada na ordem sobre uma conta que tem transferências pendentes
+    (de origem ou de destino) é uma barreira: as pendentes são liquidadas antes dela, para que
+    o resultado de cada operação seja o mesmo da ordem do arquivo. Os resultados continuam na
+    ordem de entrada.
+    """
+    def liquidar(resultados, pendentes):
+        if not pendentes:
+            return
+        transferencias = [(conta.numero, str(operacao["destino"]).strip(), valor) for _posicao, operacao, conta, valor in pendentes]
+        liquidadas = bank.liquidar_transferencias(transferencias, durabilidade=banco.DURABILIDADE_ADIADA)
+        for (posicao, operacao, _conta, _valor), (ok, motivo) in zip(pendentes, liquidadas):
+            resultados[posicao] = montar_resultado(resultados[posicao], operacao, ok, motivo)
+        pendentes.clear()
+        envolvidas.clear()
+
+    exibir_anterior = banco.EXIBIR_MENSAGENS
+    banco.EXIBIR_MENSAGENS = False  # Não imprime uma mensagem por operação.
+    try:
+        resultados = []
+        pendentes = []  # (posição em resultados, operação, conta de origem, valor) das transferências do lote.
+        envolvidas = set()  # Números das contas (origem e destino) das transferências pendentes.
+        for indice, operacao in enumerate(operacoes, start=1):
+            if e_transferencia(operacao) and chave_da_operacao(operacao) is None:
+                conta, _cpf, valor, motivo = conferir_operacao(bank, operacao)
+                if motivo is None:
+                    pendentes.append((len(resultados), operacao, conta, valor))
+                    envolvidas.update((conta.numero, str(operacao["destino"]).strip()))
+                    resultados.append(indice)  # Trocado pelo resultado na liquidação.
+                    continue
+                ok = False
+            else:
+                if envolvidas & contas_da_operacao(operacao):
+                    liquidar(resultados, pendentes)  # Barreira: as pendentes vêm antes no arquivo.
+                ok, motivo = aplicar_operacao(bank, operacao)
+            resultados.append(montar_resultado(indice, operacao, ok, motivo))
+            if len(resultados) >= tamanho_lote:
+                liquidar(resultados, pendentes)
+                bank.persistir_pendentes()
+                yield from resultados
+                resultados = []
+        liquidar(resultados, pendentes)
+        bank.persistir_pendentes()
+        yield from resultados
+    finally:
+        banco.EXIBIR_MENSAGENS = exibir_anterior
+
+
+def processar_concorrente(bank, operacoes, threads=8, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    """Processa um fluxo de operações com várias threads e gera os resultados na ordem de entrada.
+
+    Operações de contas diferentes são aplicadas em paralelo (cada conta tem sua trava). Cada
+    operação aceita só tem seu resultado entregue depois de persistida; as gravações de threads
+    simultâneas são agrupadas pelo Bank em um único fsync.
+    """
+    def executar(item):
+        indice, operacao = item
+        ok, motivo = aplicar_operacao(bank, operacao)
+        if ok:
+            bank.persistir_pendentes()
+        return montar_resultado(indice, operacao, ok, motivo)
+
+    exibir_anterior = banco.EXIBIR_MENSAGENS
+    banco.EXIBIR_MENSAGENS = False  # Não imprime uma mensagem por operação.
+    try:
+        itens = enumerate(operacoes, start=1)
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            while True:
+                lote = list(islice(itens, tamanho_lote))
+                if not lote:
+                    break
+                yield from executor.map(executar, lote)
+    finally:
+        banco.EXIBIR_MENSAGENS = exibir_anterior
+
+
+# --------------------------- LINHA DE COMANDO ---------------------------
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando do processamento em lote."""
+    parser = argparse.ArgumentParser(description="Processa saques, depósitos e transferências em lote a partir de um arquivo JSONL ou CSV.")
+    parser.add_argument("arquivo", help="Arquivo de operações (.jsonl ou .csv) com cpf, conta, tipo, valor e destino.")
+    parser.add_argument("--formato", choices=["jsonl", "csv"], help="Formato do arquivo (padrão: pela extensão).")
+    parser.add_argument("--saida", help="Arquivo JSONL onde gravar o resultado de cada operação (padrão: saída padrão).")
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE_PADRAO, help="Operações por persistência.")
+    parser.add_argument("--threads", type=int, default=1, help="Quantidade de threads (padrão: 1, sequencial).")
+    parser.add_argument("--compensar", action="store_true", help="Liquida as transferências de cada lote pelo valor líquido de cada conta.")
+    parser.add_argument("--metricas", help="Arquivo onde gravar as métricas (latências, recusas, bytes gravados) no final.")
+    args = parser.parse_args(argv)
+    if args.compensar and args.threads > 1:
+        parser.error("--compensar não pode ser usado com --threads")
+
+    if args.metricas:
+        banco.ativar_metricas()
+    bank = banco.Bank()
+    aceitas = recusadas = 0
+    motivos = {}
+
+    saida = open(args.saida, "w", encoding="utf-8") if args.saida else sys.stdout
+    try:
+        operacoes = ler_operacoes(args.arquivo, args.formato)
+        if args.compensar:
+            resultados = processar_compensado(bank, operacoes, args.tamanho_lote)
+        elif args.threads > 1:
+            resultados = processar_concorrente(bank, operacoes, args.threads, args.tamanho_lote)
+        else:
+            resultados = processar_lote(bank, operacoes, args.tamanho_lote)
+        for resultado in resultados:
+            saida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+            if resultado["ok"]:
+                aceitas += 1
+            else:
+                recusadas += 1
+                motivos[resultado["motivo"]] = motivos.get(resultado["motivo"], 0) + 1
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+        bank.fechar()
+        if args.metricas:
+            Path(args.metricas).write_text(banco.METRICAS.texto(), encoding="utf-8")
+
+    # O resumo vai para stderr para não se misturar com os resultados na saída padrão.
+    print(f"\n> Lote processado: {aceitas} operações aceitas, {recusadas} recusadas.", file=sys.stderr)
+    for motivo, quantidade in sorted(motivos.items()):
+        print(f"> {motivo}: {quantidade}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
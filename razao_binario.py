@@ -0,0 +1,520 @@
+# -*- coding: utf-8 -*-
+
+
+# Livro-razão binário dos históricos de transações.
+#
+# Guarda as transações em registros de tamanho fixo (32 bytes: valor em centavos, data em
+# segundos, conta, CPF e tipo), agrupados por conta, com um índice da posição de cada conta
+# no final do próprio arquivo. A leitura é feita por mmap: abrir o arquivo lê só o cabeçalho
+# e o índice, e o histórico de uma conta é montado direto do trecho dela (memoryview), sem
+# converter o arquivo inteiro. ArmazenamentoRazao usa o livro-razão no lugar de extratos.json.
+#
+# Uso:
+#   python razao_binario.py converter    # extratos.json -> extratos.razao
+#   python razao_binario.py exportar     # extratos.razao -> extratos.json
+#   python razao_binario.py verificar    # Confere a consistência do livro-razão.
+#   python desafio_1_sistema_bancario.py --razao
+
+import argparse  # Para ler os argumentos da linha de comando.
+import json  # Para o índice no final do arquivo e a conversão de/para extratos.json.
+import mmap  # Para ler o arquivo sem carregá-lo inteiro na memória.
+import os  # Para gravar em disco (fsync) e trocar o arquivo de forma atômica.
+import struct  # Para o cabeçalho e os registros de tamanho fixo.
+import sys  # Para a ordem dos bytes da máquina e o código de saída do programa.
+from array import array  # Colunas do Historico montadas a partir do arquivo.
+from bisect import bisect_left  # Busca binária nas datas (consultas por período).
+from pathlib import Path  # Para lidar com os caminhos dos arquivos.
+
+import desafio_1_sistema_bancario as banco
+
+
+ARQ_RAZAO = banco.BASE_DIR / "extratos.razao"
+
+# Cabeçalho (64 bytes): assinatura, versão, tamanho do registro, quantidade de registros e
+# posição/tamanho do índice JSON gravado depois dos registros.
+ASSINATURA = b"RAZAO\x00\x00\x01"
+VERSAO = 1
+CABECALHO = struct.Struct("<8sIIQQQ24x")
+# Registro (32 bytes): centavos, data em segundos, código da conta, do CPF e do tipo na tabela de textos.
+REGISTRO = struct.Struct("<qqIII4x")
+TIPO_ORIGINAL = 0xFFFFFFFF  # Tipo dos registros guardados como vieram (no índice, em "originais").
+
+# As colunas são lidas com memoryview.cast, na ordem de bytes da máquina; o arquivo é little-endian.
+LEITURA_DIRETA = sys.byteorder == "little"
+
+
+def codificar(registro, textos):
+    """Converte uma transação no formato JSON em um registro binário (None se não couber sem perda).
+
+    'textos' é a TabelaTextos do arquivo (CPFs, contas e tipos ganham códigos nela).
+    """
+    try:
+        if set(registro) != set(banco.Historico.CAMPOS) or not isinstance(registro["tipo"], str):
+            return None
+        valor = registro["valor"]
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            return None
+        centavos = banco.para_centavos(valor)
+        if centavos / 100 != valor:
+            return None
+        epoca = banco.data_para_epoca(registro["data"])
+        return REGISTRO.pack(centavos, epoca, textos.codigo(registro["conta"]), textos.codigo(registro["cpf"]), textos.codigo(registro["tipo"]))
+    except (TypeError, ValueError, ArithmeticError, OverflowError, struct.error):
+        return None
+
+
+def codificar_original(registro):
+    """Registro que só reserva a posição de uma transação guardada como veio (valor e data se der para converter)."""
+    try:
+        centavos = banco.para_centavos(registro.get("valor"))
+    except (TypeError, ValueError, ArithmeticError):
+        centavos = 0
+    try:
+        epoca = banco.data_para_epoca(registro.get("data"))
+    except (TypeError, ValueError, OverflowError):
+        epoca = 0
+    try:
+        return REGISTRO.pack(centavos, epoca, 0, 0, TIPO_ORIGINAL)
+    except struct.error:
+        return REGISTRO.pack(0, 0, 0, 0, TIPO_ORIGINAL)
+
+
+class VisaoEpocas:
+    """Datas de um trecho do arquivo, lidas uma a uma (para a busca binária sem ler o trecho inteiro)."""
+    def __init__(self, mapa, inicio, quantidade):
+        """Inicializa a visão sobre 'quantidade' registros a partir do registro 'inicio'."""
+        self._mapa = mapa
+        self._inicio = inicio
+        self._quantidade = quantidade
+
+    def __len__(self):
+        """Quantidade de registros do trecho."""
+        return self._quantidade
+
+    def __getitem__(self, indice):
+        """Data (em segundos) do registro de posição 'indice' no trecho."""
+        return struct.unpack_from("<q", self._mapa, CABECALHO.size + (self._inicio + indice) * REGISTRO.size + 8)[0]
+
+
+class LivroRazao:
+    """Arquivo do livro-razão: registros de tamanho fixo agrupados por conta, lidos por mmap.
+
+    O índice (no final do arquivo) guarda a tabela de textos, o trecho de cada conta
+    ([primeiro registro, quantidade, datas em ordem]) e as transações guardadas como vieram.
+    """
+    def __init__(self, arquivo: Path):
+        """Inicializa o livro-razão apontando para o arquivo informado (ele só é lido em abrir)."""
+        self.arquivo = Path(arquivo)
+        self.textos = []  # Código -> texto (CPFs, números de conta e tipos).
+        self.contas = {}  # Chave da conta -> [primeiro registro, quantidade, 1 se as datas estão em ordem].
+        self.originais = {}  # Chave da conta -> {posição no trecho (texto): registro original}.
+        self.quantidade = 0  # Total de registros no arquivo.
+        self._arquivo_aberto = None
+        self._mapa = None
+
+    # ------------------ LEITURA ------------------
+    def abrir(self):
+        """Mapeia o arquivo e lê o cabeçalho e o índice. Retorna False se o arquivo não existir.
+
+        Levanta ValueError se o arquivo não for um livro-razão válido.
+        """
+        self.fechar()
+        try:
+            arquivo_aberto = open(self.arquivo, "rb")
+        except FileNotFoundError:
+            return False
+        try:
+            tamanho = os.fstat(arquivo_aberto.fileno()).st_size
+            if tamanho < CABECALHO.size:
+                raise ValueError(f"{self.arquivo}: arquivo menor que o cabeçalho")
+            mapa = mmap.mmap(arquivo_aberto.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            arquivo_aberto.close()
+            raise
+        try:
+            assinatura, versao, tamanho_registro, quantidade, inicio_indice, tamanho_indice = CABECALHO.unpack_from(mapa, 0)
+            if assinatura != ASSINATURA or versao != VERSAO or tamanho_registro != REGISTRO.size:
+                raise ValueError(f"{self.arquivo}: não é um livro-razão (versão {VERSAO})")
+            if inicio_indice != CABECALHO.size + quantidade * REGISTRO.size or inicio_indice + tamanho_indice != tamanho:
+                raise ValueError(f"{self.arquivo}: tamanho do arquivo não confere com o cabeçalho")
+            try:
+                indice = json.loads(mapa[inicio_indice:inicio_indice + tamanho_indice])
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                raise ValueError(f"{self.arquivo}: índice ilegível") from None
+        except BaseException:
+            mapa.close()
+            arquivo_aberto.close()
+            raise
+        self._arquivo_aberto, self._mapa = arquivo_aberto, mapa
+        self.quantidade = quantidade
+        self.textos = indice.get("textos", [])
+        self.contas = indice.get("contas", {})
+        self.originais = indice.get("originais", {})
+        return True
+
+    @property
+    def aberto(self):
+        """Indica se o arquivo está mapeado."""
+        return self._mapa is not None
+
+    def historico(self, chave):
+        """Monta o Historico de uma conta a partir do seu trecho, coluna por coluna (sem dicionários)."""
+        historico = banco.Historico()
+        faixa = self.contas.get(chave)
+        if not faixa or not faixa[1]:
+            return historico
+        inicio, quantidade = faixa[0], faixa[1]
+        textos = [banco.TEXTOS_INTERNADOS.codigo(t) for t in self.textos] or [0]  # Posições reservadas usam o código 0.
+        tipos = {codigo: banco.TIPOS_INTERNADOS.codigo(t) for codigo, t in enumerate(self.textos) if isinstance(t, str)}
+        tipos[TIPO_ORIGINAL] = banco.TIPOS_INTERNADOS.codigo("")
+        primeiro = CABECALHO.size + inicio * REGISTRO.size
+        ultimo = primeiro + quantidade * REGISTRO.size
+        if LEITURA_DIRETA:
+            with memoryview(self._mapa) as visao:
+                trecho = visao[primeiro:ultimo]
+                inteiros, palavras = trecho.cast("q"), trecho.cast("I")
+                historico._centavos = array("q", inteiros[0::4])
+                historico._contas = array(banco.TIPO_VETOR_CODIGOS, map(textos.__getitem__, palavras[4::8]))
+                historico._cpfs = array(banco.TIPO_VETOR_CODIGOS, map(textos.__getitem__, palavras[5::8]))
+                historico._tipos = array("B", map(tipos.__getitem__, palavras[6::8]))
+                historico._epocas = array("q", inteiros[1::4])
+                inteiros.release()
+                palavras.release()
+                trecho.release()
+        else:
+            for centavos, epoca, conta, cpf, tipo in REGISTRO.iter_unpack(self._mapa[primeiro:ultimo]):
+                historico._anexar(tipos[tipo], centavos, epoca, textos[cpf], textos[conta])
+        for posicao, registro in self.originais.get(chave, {}).items():
+            posicao = int(posicao)
+            tipo = registro.get("tipo")
+            historico._tipos[posicao] = banco.TIPOS_INTERNADOS.codigo(tipo if isinstance(tipo, str) else "")
+            historico._cpfs[posicao] = historico._contas[posicao] = 0
+            historico._originais[posicao] = registro
+        return historico
+
+    def registros(self, chave, inicio=None, fim=None):
+        """Percorre as transações de uma conta no formato JSON, opcionalmente só as do período.
+
+        'inicio' (inclusive) e 'fim' (exclusivo) aceitam os mesmos formatos de Historico.consultar.
+        Se as datas da conta estão em ordem, o período é localizado por busca binária no arquivo.
+        """
+        faixa = self.contas.get(chave)
+        if not faixa:
+            return
+        primeiro, quantidade, ordenada = faixa
+        baixo, alto = 0, quantidade
+        inicio = None if inicio is None else banco.momento_para_epoca(inicio)
+        fim = None if fim is None else banco.momento_para_epoca(fim)
+        if ordenada:
+            datas = VisaoEpocas(self._mapa, primeiro, quantidade)
+            if inicio is not None:
+                baixo = bisect_left(datas, inicio, 0, quantidade)
+            if fim is not None:
+                alto = bisect_left(datas, fim, 0, quantidade)
+        originais = self.originais.get(chave, {})
+        for posicao in range(baixo, alto):
+            centavos, epoca, conta, cpf, tipo = REGISTRO.unpack_from(self._mapa, CABECALHO.size + (primeiro + posicao) * REGISTRO.size)
+            if not ordenada and ((inicio is not None and epoca < inicio) or (fim is not None and epoca >= fim)):
+                continue
+            if tipo == TIPO_ORIGINAL:
+                yield dict(originais[str(posicao)])
+                continue
+            yield {
+                "tipo": self.textos[tipo],
+                "valor": centavos / 100,
+                "data": banco.epoca_para_data(epoca),
+                "cpf": self.textos[cpf],
+                "conta": self.textos[conta],
+            }
+
+    def trecho(self, chave):
+        """Bytes dos registros de uma conta (usado para copiar o trecho para o próximo arquivo)."""
+        primeiro, quantidade, _ordenada = self.contas[chave]
+        inicio = CABECALHO.size + primeiro * REGISTRO.size
+        return self._mapa[inicio:inicio + quantidade * REGISTRO.size]
+
+    def fechar(self):
+        """Desfaz o mapeamento e fecha o arquivo."""
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+        if self._arquivo_aberto is not None:
+            self._arquivo_aberto.close()
+            self._arquivo_aberto = None
+
+    # ------------------ GRAVAÇÃO ------------------
+    def gravar(self, grupos):
+        """Grava um novo arquivo e passa a ler dele.
+
+        'grupos' é um dicionário chave da conta -> (copiar, registros): se 'copiar' for verdadeiro,
+        o trecho da conta no arquivo atual é copiado como está e os registros (formato JSON) são
+        acrescentados depois dele. O arquivo é gravado ao lado e trocado de uma vez (os.replace),
+        com a pasta gravada em disco em seguida, para que a troca sobreviva a uma queda de energia.
+        """
+        temporario = self.arquivo.with_name(self.arquivo.name + ".tmp")
+        self.preparar(grupos, temporario)
+        self.fechar()  # O arquivo antigo não pode continuar mapeado durante a troca (Windows).
+        os.replace(temporario, self.arquivo)
+        banco._sincronizar_pasta(self.arquivo.parent)
+        self.abrir()
+
+    def preparar(self, grupos, destino):
+        """Grava em 'destino' o novo arquivo descrito por 'grupos' (ver gravar), sem trocar o atual."""
+        textos = banco.TabelaTextos(self.textos)  # Os códigos do arquivo atual continuam valendo nos trechos copiados.
+        contas = {}
+        originais = {}
+        with open(destino, "wb") as f:
+            f.write(bytes(CABECALHO.size))
+            total = 0
+            for chave, (copiar, registros) in grupos.items():
+                quantidade = 0
+                ordenada = 1
+                ultima_data = None
+                originais_conta = {}
+                if copiar and chave in self.contas:
+                    f.write(self.trecho(chave))
+                    quantidade, ordenada = self.contas[chave][1], self.contas[chave][2]
+                    originais_conta.update(self.originais.get(chave, {}))
+                    if quantidade:
+                        ultima_data = VisaoEpocas(self._mapa, self.contas[chave][0], quantidade)[quantidade - 1]
+                pedacos = []
+                for registro in registros:
+                    binario = codificar(registro, textos)
+                    if binario is None:
+                        originais_conta[str(quantidade)] = dict(registro)
+                        binario = codificar_original(registro)
+                    epoca = REGISTRO.unpack(binario)[1]
+                    if ultima_data is not None and epoca < ultima_data:
+                        ordenada = 0
+                    ultima_data = epoca
+                    pedacos.append(binario)
+                    quantidade += 1
+                f.write(b"".join(pedacos))
+                if not quantidade:
+                    continue
+                contas[chave] = [total, quantidade, ordenada]
+                if originais_conta:
+                    originais[chave] = originais_conta
+                total += quantidade
+            indice = json.dumps({"textos": textos._textos, "contas": contas, "originais": originais}, ensure_ascii=False).encode("utf-8")
+            f.write(indice)
+            f.seek(0)
+            f.write(CABECALHO.pack(ASSINATURA, VERSAO, REGISTRO.size, total, CABECALHO.size + total * REGISTRO.size, len(indice)))
+            f.flush()
+            os.fsync(f.fileno())
+
+    # ------------------ CONSISTÊNCIA ------------------
+    def verificar(self):
+        """Confere o arquivo aberto e retorna a lista de problemas encontrados (vazia se estiver íntegro).
+
+        Os trechos das contas devem cobrir todos os registros sem sobreposição, os códigos devem
+        existir na tabela de textos, a marca de datas em ordem deve ser verdadeira e cada
+        transação guardada como veio deve ocupar uma posição reservada para ela.
+        """
+        problemas = []
+        fim_anterior = 0
+        for chave, (primeiro, quantidade, ordenada) in sorted(self.contas.items(), key=lambda item: item[1][0]):
+            if primeiro != fim_anterior:
+                problemas.append(f"conta {chave}: trecho começa no registro {primeiro}, esperado {fim_anterior}")
+            fim_anterior = primeiro + quantidade
+            originais = self.originais.get(chave, {})
+            reservadas = 0
+            anterior = None
+            for posicao in range(quantidade):
+                centavos, epoca, conta, cpf, tipo = REGISTRO.unpack_from(self._mapa, CABECALHO.size + (primeiro + posicao) * REGISTRO.size)
+                if ordenada and anterior is not None and epoca < anterior:
+                    problemas.append(f"conta {chave}: registro {posicao} fora de ordem de data")
+                    ordenada = 0
+                anterior = epoca
+                if tipo == TIPO_ORIGINAL:
+                    reservadas += 1
+                    if str(posicao) not in originais:
+                        problemas.append(f"conta {chave}: registro {posicao} sem a transação original")
+                    continue
+                if max(conta, cpf, tipo) >= len(self.textos):
+                    problemas.append(f"conta {chave}: registro {posicao} com código fora da tabela de textos")
+                elif banco.ArmazenamentoJSON._chave_conta(self.textos[conta]) != chave:
+                    problemas.append(f"conta {chave}: registro {posicao} pertence à conta {self.textos[conta]}")
+            if reservadas != len(originais):
+                problemas.append(f"conta {chave}: {len(originais)} transações originais para {reservadas} posições reservadas")
+        if fim_anterior != self.quantidade:
+            problemas.append(f"os trechos das contas cobrem {fim_anterior} de {self.quantidade} registros")
+        return problemas
+
+
+# --------------------------- ARMAZENAMENTO ---------------------------
+
+class ArmazenamentoRazao(banco.ArmazenamentoJSON):
+    """Arquivos JSON com os históricos no livro-razão binário em vez de extratos.json.
+
+    Clientes, contas, contadores diários e o journal continuam nos arquivos JSON. Sem
+    livro-razão (primeiro uso), os históricos são lidos de extratos.json e o livro-razão
+    é criado no primeiro snapshot.
+    """
+    def __init__(self, diretorio=None, journal=True, intervalo_snapshot=1000, compressao=None):
+        """Inicializa o armazenamento no diretório informado (padrão: pasta do script)."""
+        super().__init__(diretorio, journal, intervalo_snapshot, compressao)
+        self.livro = LivroRazao(self.diretorio / ARQ_RAZAO.name)
+
+    def _ler_indice_extratos(self):
+        """Abre o livro-razão; o seu índice faz o papel do índice de extratos.json (None se não existir)."""
+        if not self.livro.abrir():
+            return None
+        return self.livro.contas
+
+    def carregar_historico(self, numero_conta):
+        """Monta o histórico da conta direto do seu trecho no livro-razão."""
+        if not self.livro.aberto:
+            return []
+        return self.livro.historico(self._chave_conta(numero_conta))
+
+    def marca_historico(self, numero_conta):
+        """Quantidade de registros da conta no livro-razão (None se ele ainda não existir)."""
+        if not self.livro.aberto:
+            return None
+        faixa = self.livro.contas.get(self._chave_conta(numero_conta))
+        return faixa[1] if faixa else 0
+
+    def arquivos_snapshot(self):
+        """Arquivos substituídos por um snapshot: os dos arquivos JSON e o livro-razão."""
+        return super().arquivos_snapshot() + [self.livro.arquivo]
+
+    def _salvar_extratos(self, bank, preparado):
+        """Grava a nova geração do livro-razão, copiando os trechos já gravados e acrescentando só as transações novas."""
+        grupos = {}  # Chave da conta -> [copiar o trecho anterior, registros novos].
+        for conta in bank.contas:
+            historico = conta.historico
+            chave = self._chave_conta(conta.numero)
+            copiar = chave in self.livro.contas and (not historico.carregado or historico.linhas_no_arquivo > 0)
+            grupos[chave] = [copiar, historico.registros_novos() if copiar else historico.to_list()]
+        for t in bank.extratos:  # Transações de contas inexistentes são mantidas como vieram.
+            grupos.setdefault(self._chave_conta(t.get("conta")), [False, []])[1].append(t)
+        self.livro.preparar(grupos, preparado(self.livro.arquivo))
+
+    def _antes_de_instalar(self):
+        """Fecha o livro-razão: o arquivo antigo não pode continuar mapeado durante a troca (Windows)."""
+        self.livro.fechar()
+
+    def _extratos_instalados(self, bank, indice):
+        """Reabre o livro-razão instalado e passa a ler os históricos dele."""
+        self.livro.abrir()
+        super()._extratos_instalados(bank, self.livro.contas)
+
+    def descricao(self):
+        """Lista os arquivos de dados usados."""
+        arquivos = [self.arq_clientes, self.arq_contas, self.livro.arquivo, self.arq_transacoes_diarias, self.journal.arquivo]
+        return f"arquivos JSON e livro-razão em {self.diretorio}\n" + "\n".join(f"> {arquivo}" for arquivo in arquivos)
+
+    def fechar(self):
+        """Fecha o journal e o livro-razão."""
+        super().fechar()
+        self.livro.fechar()
+
+
+# --------------------------- CONVERSÃO ---------------------------
+
+def converter_de_json(diretorio=None):
+    """Cria extratos.razao a partir de extratos.json (as transações de cada conta mantêm a ordem)."""
+    diretorio = Path(diretorio) if diretorio else banco.BASE_DIR
+    grupos = {}
+    for registro in banco.ler_snapshot(diretorio / banco.ARQ_EXTRATOS.name):
+        chave = banco.ArmazenamentoJSON._chave_conta(registro.get("conta"))
+        grupos.setdefault(chave, [False, []])[1].append(registro)
+    livro = LivroRazao(diretorio / ARQ_RAZAO.name)
+    try:
+        livro.gravar(grupos)
+        return livro.quantidade
+    finally:
+        livro.fechar()
+
+
+def exportar_para_json(diretorio=None):
+    """Grava extratos.json a partir de extratos.razao, uma conta por vez (sem montar a lista inteira)."""
+    diretorio = Path(diretorio) if diretorio else banco.BASE_DIR
+    livro = LivroRazao(diretorio / ARQ_RAZAO.name)
+    if not livro.abrir():
+        raise FileNotFoundError(livro.arquivo)
+    destino = diretorio / banco.ARQ_EXTRATOS.name
+    temporario = destino.with_name(destino.name + ".tmp")
+    try:
+        with open(temporario, "w", encoding="utf-8") as f:
+            separador = "\n"
+            f.write("[")
+            for chave in livro.contas:
+                for registro in livro.registros(chave):
+                    f.write(separador + json.dumps(registro, ensure_ascii=False, separators=(",", ":")))
+                    separador = ",\n"
+            f.write("\n]" if separador != "\n" else "]")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, destino)  # O índice de extratos.json deixa de valer e é refeito no próximo snapshot.
+        banco._sincronizar_pasta(diretorio)
+        return livro.quantidade
+    finally:
+        livro.fechar()
+
+
+def verificar(diretorio=None, comparar_json=False):
+    """Confere o livro-razão do diretório e retorna a lista de problemas.
+
+    Com 'comparar_json', confere também se as transações são as mesmas de extratos.json.
+    """
+    diretorio = Path(diretorio) if diretorio else banco.BASE_DIR
+    livro = LivroRazao(diretorio / ARQ_RAZAO.name)
+    try:
+        if not livro.abrir():
+            return [f"{livro.arquivo} não existe"]
+    except ValueError as e:
+        return [str(e)]
+    try:
+        problemas = livro.verificar()
+        if comparar_json:
+            por_conta = {}
+            try:
+                registros_json = banco.ler_snapshot(diretorio / banco.ARQ_EXTRATOS.name)
+            except banco.ArquivoCorrompido as e:
+                problemas.append(str(e))
+                registros_json = []
+            for registro in registros_json:
+                por_conta.setdefault(banco.ArmazenamentoJSON._chave_conta(registro.get("conta")), []).append(registro)
+            for chave in sorted(set(por_conta) | set(livro.contas)):
+                if list(livro.registros(chave)) != por_conta.get(chave, []):
+                    problemas.append(f"conta {chave}: transações diferentes de {banco.ARQ_EXTRATOS.name}")
+        return problemas
+    finally:
+        livro.fechar()
+
+
+# --------------------------- LINHA DE COMANDO ---------------------------
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando do livro-razão."""
+    parser = argparse.ArgumentParser(description="Ferramentas do livro-razão binário do banco.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    for nome, ajuda in (
+        ("converter", "Cria extratos.razao a partir de extratos.json."),
+        ("exportar", "Grava extratos.json a partir de extratos.razao."),
+        ("verificar", "Confere a consistência de extratos.razao."),
+    ):
+        p = sub.add_parser(nome, help=ajuda)
+        p.add_argument("--diretorio", help="Pasta dos arquivos de dados (padrão: pasta do script).")
+        if nome == "verificar":
+            p.add_argument("--comparar-json", action="store_true", help="Confere também se as transações são as mesmas de extratos.json.")
+    args = parser.parse_args(argv)
+
+    if args.comando == "converter":
+        print(f"\n> {converter_de_json(args.diretorio)} transações gravadas no livro-razão.")
+    elif args.comando == "exportar":
+        print(f"\n> {exportar_para_json(args.diretorio)} transações gravadas em {banco.ARQ_EXTRATOS.name}.")
+    else:
+        problemas = verificar(args.diretorio, args.comparar_json)
+        for problema in problemas:
+            print(f"> {problema}")
+        if problemas:
+            return 1
+        print("\n> Livro-razão consistente.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
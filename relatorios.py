@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+
+
+# Relatórios analíticos do banco inteiro, calculados com NumPy.
+#
+# Copia as colunas do histórico de todas as contas (tipo, valor em centavos, data em
+# segundos) para vetores NumPy e calcula os relatórios com operações vetorizadas
+# (bincount, unique, reduceat, histogram), sem laços em Python por transação:
+# volumes diários de depósitos e saques, agregados por conta, maiores saldos,
+# utilização do limite de saques e distribuição dos saldos. Cada relatório é uma
+# tabela ({"colunas": [...], "linhas": [[...], ...]}) que pode ser gravada em CSV ou JSON.
+#
+# O NumPy é necessário só para este módulo (pip install numpy).
+#
+# Uso:
+#   python relatorios.py --pasta relatorios_2025_10
+#   python relatorios.py --pasta saida --relatorios maiores_saldos,distribuicao_saldos --top 50 --formato json
+#   python relatorios.py --pasta saida --relatorios volumes_diarios --resumos resumos_diarios   # Dos dias já fechados.
+
+import argparse  # Para ler os argumentos da linha de comando.
+import csv  # Para gravar as tabelas em CSV.
+import json  # Para gravar as tabelas em JSON.
+import sys  # Para a saída de erros e o código de saída do programa.
+from datetime import timedelta  # Para converter o número do dia em data.
+from pathlib import Path  # Para lidar com os caminhos dos arquivos.
+
+try:
+    import numpy as np
+except ImportError:  # O restante do sistema não depende do NumPy.
+    np = None
+
+import desafio_1_sistema_bancario as banco
+
+
+PERCENTIS = (10, 25, 50, 75, 90, 95, 99)  # Percentis do relatório de distribuição dos saldos.
+
+
+def exigir_numpy():
+    """Levanta ImportError com uma mensagem clara se o NumPy não estiver instalado."""
+    if np is None:
+        raise ImportError("os relatórios precisam do NumPy (pip install numpy)")
+
+
+def tabela(colunas, *vetores):
+    """Monta uma tabela a partir de vetores de mesmo tamanho (um por coluna), com valores Python simples."""
+    return {"colunas": list(colunas), "linhas": [list(linha) for linha in zip(*(np.asarray(v).tolist() for v in vetores))]}
+
+
+def dia_para_texto(dia):
+    """Converte o número do dia (dias desde 01/01/1970) em 'aaaa-mm-dd'."""
+    return (banco.EPOCA_ZERO.date() + timedelta(days=int(dia))).isoformat()
+
+
+# --------------------------- DADOS ---------------------------
+
+class DadosAnalise:
+    """Histórico do banco inteiro em vetores NumPy, com uma posição por transação.
+
+    As transações ficam agrupadas por conta, na ordem de bank.contas ('conta' é a posição
+    da conta nessa lista), o que permite as reduções por trecho (reduceat).
+    """
+    def __init__(self, bank):
+        """Copia as colunas dos históricos e os dados das contas do bank."""
+        exigir_numpy()
+        contas = bank.contas
+        self.numeros = [c.numero for c in contas]
+        self.nomes = [c.cliente.nome for c in contas]
+        self.saldos = np.fromiter((c.saldo_centavos for c in contas), np.int64, len(contas))  # Saldo registrado, em centavos.
+        self.limites_saques = np.fromiter((getattr(c, "limite_saques", 0) for c in contas), np.int64, len(contas))
+        self.limites_valor = np.fromiter((banco.para_centavos(getattr(c, "limite", 0)) for c in contas), np.int64, len(contas))
+        # Transferências entram junto: recebidas como depósitos, enviadas como saques (ver Bank.transferir).
+        self.codigos_credito = [banco.TIPOS_INTERNADOS.codigo(t) for t, sinal in banco.SINAL_TIPO.items() if sinal > 0]
+        self.codigos_debito = [banco.TIPOS_INTERNADOS.codigo(t) for t, sinal in banco.SINAL_TIPO.items() if sinal < 0]
+
+        tipos, centavos, epocas, quantidades = [], [], [], []
+        for conta in contas:
+            historico = conta.historico
+            historico.carregar()
+            with historico._trava:
+                # tobytes copia as colunas: o NumPy não fica preso ao buffer dos vetores, que continuam crescendo.
+                quantidade = len(historico._epocas)
+                tipos.append(np.frombuffer(historico._tipos[:quantidade].tobytes(), np.uint8))
+                centavos.append(np.frombuffer(historico._centavos[:quantidade].tobytes(), np.int64))
+                epocas.append(np.frombuffer(historico._epocas[:quantidade].tobytes(), np.int64))
+            quantidades.append(quantidade)
+        self.quantidades = np.asarray(quantidades, np.int64)  # Transações por conta.
+        self.inicios = np.concatenate(([0], np.cumsum(self.quantidades)[:-1])).astype(np.int64) if contas else np.zeros(0, np.int64)
+        self.conta = np.repeat(np.arange(len(contas), dtype=np.int64), self.quantidades)
+        self.tipo = np.concatenate(tipos) if tipos else np.zeros(0, np.uint8)
+        self.centavos = np.concatenate(centavos) if centavos else np.zeros(0, np.int64)
+        self.epoca = np.concatenate(epocas) if epocas else np.zeros(0, np.int64)
+        self.deposito = np.isin(self.tipo, self.codigos_credito)
+        self.saque = np.isin(self.tipo, self.codigos_debito)
+        self.dia = self.epoca // 86400  # Dia do calendário (as épocas já estão no horário local).
+
+    def reduzir_por_conta(self, funcao, valores, vazio):
+        """Aplica 'funcao' (np.minimum, np.maximum...) ao trecho de cada conta; 'vazio' nas contas sem transações."""
+        resultado = np.full(len(self.numeros), vazio, dtype=valores.dtype)
+        com_transacoes = self.quantidades > 0
+        if com_transacoes.any():
+            resultado[com_transacoes] = funcao.reduceat(valores, self.inicios[com_transacoes])
+        return resultado
+
+
+# --------------------------- RELATÓRIOS ---------------------------
+
+def volumes_diarios(dados):
+    """Quantidade e volume de depósitos e saques por dia."""
+    dias, posicao = np.unique(dados.dia, return_inverse=True)
+    total = len(dias)
+    depositos_qtd = np.bincount(posicao[dados.deposito], minlength=total)
+    saques_qtd = np.bincount(posicao[dados.saque], minlength=total)
+    depositos = np.bincount(posicao[dados.deposito], weights=dados.centavos[dados.deposito], minlength=total).round().astype(np.int64)
+    saques = np.bincount(posicao[dados.saque], weights=dados.centavos[dados.saque], minlength=total).round().astype(np.int64)
+    return tabela(
+        ("dia", "depositos", "valor_depositos", "saques", "valor_saques", "liquido"),
+        [dia_para_texto(d) for d in dias], depositos_qtd, depositos / 100, saques_qtd, saques / 100, (depositos - saques) / 100,
+    )
+
+
+def agregados_por_conta(dados):
+    """Totais de cada conta, com o saldo calculado pelo histórico ao lado do saldo registrado."""
+    total = len(dados.numeros)
+    depositos = np.bincount(dados.conta, weights=np.where(dados.deposito, dados.centavos, 0), minlength=total).round().astype(np.int64)
+    saques = np.bincount(dados.conta, weights=np.where(dados.saque, dados.centavos, 0), minlength=total).round().astype(np.int64)
+    primeira = dados.reduzir_por_conta(np.minimum, dados.epoca, 0)
+    ultima = dados.reduzir_por_conta(np.maximum, dados.epoca, 0)
+    tem = dados.quantidades > 0
+    return tabela(
+        ("conta", "cliente", "transacoes", "valor_depositos", "valor_saques", "saldo_historico", "saldo", "primeira", "ultima"),
+        dados.numeros, dados.nomes, dados.quantidades, depositos / 100, saques / 100, (depositos - saques) / 100, dados.saldos / 100,
+        [banco.epoca_para_data(e) if t else "" for e, t in zip(primeira.tolist(), tem.tolist())],
+        [banco.epoca_para_data(e) if t else "" for e, t in zip(ultima.tolist(), tem.tolist())],
+    )
+
+
+def maiores_saldos(dados, n=10):
+    """As 'n' contas de maior saldo, da maior para a menor."""
+    n = min(n, len(dados.saldos))
+    if n <= 0:
+        return tabela(("posicao", "conta", "cliente", "saldo"))
+    escolhidas = np.argpartition(-dados.saldos, n - 1)[:n]
+    escolhidas = escolhidas[np.argsort(-dados.saldos[escolhidas], kind="stable")]
+    return tabela(
+        ("posicao", "conta", "cliente", "saldo"),
+        np.arange(1, n + 1), [dados.numeros[i] for i in escolhidas.tolist()], [dados.nomes[i] for i in escolhidas.tolist()],
+        dados.saldos[escolhidas] / 100,
+    )
+
+
+def utilizacao_limite_saques(dados):
+    """Uso do limite de saques diários e do limite por saque de cada conta que já sacou.
+
+    'utilizacao_maxima' é o maior número de saques em um dia dividido pelo limite diário e
+    'dias_no_limite' conta os dias em que o limite foi atingido; 'utilizacao_valor' é o maior
+    saque dividido pelo limite por saque.
+    """
+    contas_saque = dados.conta[dados.saque]
+    dias_saque = dados.dia[dados.saque]
+    if not len(contas_saque):
+        return tabela(("conta", "limite_saques", "dias_com_saque", "saques_por_dia", "utilizacao_maxima", "dias_no_limite",
+                       "maior_saque", "utilizacao_valor"))
+    # Pares (conta, dia) em um único inteiro; as contas continuam em ordem crescente.
+    base = int(dias_saque.max() - dias_saque.min()) + 1
+    pares, saques_no_dia = np.unique(contas_saque * base + (dias_saque - dias_saque.min()), return_counts=True)
+    conta_do_par = pares // base
+    contas, inicio_pares, dias_com_saque = np.unique(conta_do_par, return_index=True, return_counts=True)
+    limites = dados.limites_saques[contas]
+    maximo_no_dia = np.maximum.reduceat(saques_no_dia, inicio_pares)
+    dias_no_limite = np.add.reduceat((saques_no_dia >= dados.limites_saques[conta_do_par]).astype(np.int64), inicio_pares)
+    # Os saques também estão agrupados por conta: o maior de cada uma sai de uma redução por trecho.
+    _, inicio_saques = np.unique(contas_saque, return_index=True)
+    maior_saque = np.maximum.reduceat(dados.centavos[dados.saque], inicio_saques)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        utilizacao = np.where(limites > 0, maximo_no_dia / limites, 0.0)
+        utilizacao_valor = np.where(dados.limites_valor[contas] > 0, maior_saque / dados.limites_valor[contas], 0.0)
+    return tabela(
+        ("conta", "limite_saques", "dias_com_saque", "saques_por_dia", "utilizacao_maxima", "dias_no_limite",
+         "maior_saque", "utilizacao_valor"),
+        [dados.numeros[i] for i in contas.tolist()], limites, dias_com_saque, (np.bincount(contas_saque)[contas] / dias_com_saque).round(2),
+        utilizacao.round(4), dias_no_limite, maior_saque / 100, utilizacao_valor.round(4),
+    )
+
+
+def distribuicao_saldos(dados, faixas=10):
+    """Quantidade de contas por faixa de saldo (faixas de mesma largura entre o menor e o maior saldo)."""
+    if not len(dados.saldos):
+        return tabela(("de", "ate", "contas"))
+    quantidades, limites = np.histogram(dados.saldos / 100, bins=faixas)
+    return tabela(("de", "ate", "contas"), limites[:-1].round(2), limites[1:].round(2), quantidades)
+
+
+def percentis_saldos(dados, percentis=PERCENTIS):
+    """Percentis dos saldos das contas."""
+    if not len(dados.saldos):
+        return tabela(("percentil", "saldo"))
+    return tabela(("percentil", "saldo"), percentis, np.percentile(dados.saldos / 100, percentis).round(2))
+
+
+# Nome do relatório -> função que o calcula a partir de DadosAnalise.
+RELATORIOS = {
+    "volumes_diarios": volumes_diarios,
+    "agregados_por_conta": agregados_por_conta,
+    "maiores_saldos": maiores_saldos,
+    "utilizacao_limite_saques": utilizacao_limite_saques,
+    "distribuicao_saldos": distribuicao_saldos,
+    "percentis_saldos": percentis_saldos,
+}
+
+
+def gerar_relatorios(bank, nomes=None, top=10, faixas=10, resumos=None):
+    """Calcula os relatórios pedidos (padrão: todos). Retorna nome -> tabela.
+
+    Com 'resumos' (pasta do fechamento_dia.py), volumes_diarios é somado dos resumos dos
+    dias fechados, sem copiar os históricos; os demais continuam vindo de DadosAnalise.
+    """
+    nomes = list(nomes or RELATORIOS)
+    invalidos = [n for n in nomes if n not in RELATORIOS]
+    if invalidos:
+        raise ValueError(f"relatório desconhecido: {', '.join(invalidos)}")
+    tabelas = {}
+    if resumos is not None and "volumes_diarios" in nomes:
+        from fechamento_dia import volumes_dos_resumos
+        tabelas["volumes_diarios"] = volumes_dos_resumos(resumos)
+    restantes = [n for n in nomes if n not in tabelas]
+    if restantes:
+        dados = DadosAnalise(bank)
+        parametros = {"maiores_saldos": {"n": top}, "distribuicao_saldos": {"faixas": faixas}}
+        tabelas.update((nome, RELATORIOS[nome](dados, **parametros.get(nome, {}))) for nome in restantes)
+    return {nome: tabelas[nome] for nome in nomes}
+
+
+# --------------------------- EXPORTAÇÃO ---------------------------
+
+def gravar_tabela(tabela_relatorio, caminho, formato="csv"):
+    """Grava uma tabela em CSV (com cabeçalho) ou JSON (lista de objetos)."""
+    if formato == "json":
+        linhas = [dict(zip(tabela_relatorio["colunas"], linha)) for linha in tabela_relatorio["linhas"]]
+        banco.salvar_json(Path(caminho), linhas)
+        return
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(tabela_relatorio["colunas"])
+        escritor.writerows(tabela_relatorio["linhas"])
+
+
+# --------------------------- LINHA DE COMANDO ---------------------------
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando dos relatórios."""
+    from exportacao_extratos import fabrica_da_linha_de_comando
+
+    parser = argparse.ArgumentParser(description="Relatórios analíticos do banco (NumPy).")
+    parser.add_argument("--pasta", required=True, help="Pasta onde gravar as tabelas.")
+    parser.add_argument("--relatorios", help=f"Relatórios separados por vírgula ({', '.join(RELATORIOS)}; padrão: todos).")
+    parser.add_argument("--formato", choices=("csv", "json"), default="csv", help="Formato das tabelas (padrão: csv).")
+    parser.add_argument("--top", type=int, default=10, help="Contas no relatório de maiores saldos (padrão: 10).")
+    parser.add_argument("--faixas", type=int, default=10, help="Faixas da distribuição dos saldos (padrão: 10).")
+    parser.add_argument("--diretorio", help="Pasta dos arquivos de dados (padrão: pasta do script).")
+    parser.add_argument("--sqlite", help="Lê os dados do arquivo SQLite informado.")
+    parser.add_argument("--razao", action="store_true", help="Lê os históricos do livro-razão binário.")
+    parser.add_argument("--resumos", help="Lê volumes_diarios dos resumos gravados pelo fechamento_dia.py na pasta informada.")
+    args = parser.parse_args(argv)
+
+    try:
+        exigir_numpy()
+    except ImportError as e:
+        print(f"> {e}", file=sys.stderr)
+        return 1
+    nomes = [n.strip() for n in args.relatorios.split(",") if n.strip()] if args.relatorios else None
+
+    banco.EXIBIR_MENSAGENS = False
+    bank = banco.Bank(fabrica_da_linha_de_comando(args)())
+    try:
+        tabelas = gerar_relatorios(bank, nomes, args.top, args.faixas, args.resumos)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        bank.fechar()
+
+    pasta = Path(args.pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    for nome, tabela_relatorio in tabelas.items():
+        caminho = pasta / f"{nome}.{args.formato}"
+        gravar_tabela(tabela_relatorio, caminho, args.formato)
+        print(f"> {nome}: {len(tabela_relatorio['linhas'])} linhas em {caminho}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
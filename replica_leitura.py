@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+
+# Réplica somente leitura que acompanha os dados gravados pelo processo principal.
+#
+# Extratos, listagens e relatórios disputavam o mesmo processo (e as mesmas travas) com
+# as transações. A réplica abre a mesma pasta de dados com o seu próprio Bank e, de
+# tempos em tempos, lê só o final novo do journal (a partir da posição em bytes onde
+# parou) e reaplica as transações nos seus próprios índices. Ela não toma nenhuma trava
+# do processo principal nem grava nada: só lê arquivos.
+#
+# Os históricos são lidos sob demanda, da geração do snapshot que a réplica carregou (o
+# arquivo fica aberto, então continua legível mesmo depois que o processo principal
+# instala outra geração no lugar dele). Quando o processo principal grava um snapshot de
+# outro número de sequência, a réplica recarrega clientes, contas e limites em segundo
+# plano e troca o Bank de uma vez, sem parar de atender as consultas: os históricos já
+# lidos são descartados e voltam a ser lidos, da geração nova, quando forem pedidos. Se o
+# snapshot não mudou o número de sequência, ela só volta ao início do journal e ignora o
+# que já aplicou.
+#
+# O atraso (segundos desde a última vez em que a réplica alcançou o fim do journal) é
+# informado em cada consulta; acima de 'atraso_maximo' a réplica se declara defasada.
+#
+# Uso:
+#   python replica_leitura.py --conta 0001                 # Extrato da conta, lido pela réplica.
+#   python replica_leitura.py --ordem saldo --pagina 2     # Listagem de contas, lida pela réplica.
+#   python replica_leitura.py --diretorio dados --acompanhar 30
+#   python servidor.py --replica --porta 8766              # Servidor só de consultas.
+
+import argparse  # Para ler os argumentos da linha de comando.
+import json  # Para ler os registros do journal.
+import sys  # Para o código de saída do programa.
+import threading  # Para a thread que acompanha o journal.
+import time  # Para o intervalo entre as leituras e o atraso.
+from contextlib import nullcontext  # Para registros sem conta (cadastros).
+
+import desafio_1_sistema_bancario as banco
+from exportacao_extratos import fabrica_da_linha_de_comando
+
+
+INTERVALO_PADRAO = 0.2  # Segundos entre duas leituras do journal.
+ATRASO_MAXIMO_PADRAO = 5.0  # Segundos de atraso a partir dos quais a réplica está defasada.
+TENTATIVAS_RECARGA = 5  # Tentativas de ler um snapshot estável antes de desistir até a próxima leitura.
+
+
+def arquivos_do_snapshot(armazenamento):
+    """Arquivos regravados por um snapshot do armazenamento (para saber se mudaram durante a leitura)."""
+    return [armazenamento.arq_snapshot_meta] + armazenamento.arquivos_snapshot()
+
+
+def estado_dos_arquivos(arquivos):
+    """Identidade, tamanho e data de alteração de cada arquivo (None para os que não existem)."""
+    estado = []
+    for arquivo in arquivos:
+        try:
+            info = arquivo.stat()
+            estado.append((info.st_ino, info.st_size, info.st_mtime_ns))
+        except OSError:
+            estado.append(None)
+    return estado
+
+
+class ReplicaLeitura:
+    """Bank somente leitura mantido em dia pela leitura incremental do journal do processo principal.
+
+    Só funciona com armazenamentos de journal (arquivos JSON e livro-razão). As consultas
+    usam 'bank', que pode ser trocado por um novo Bank depois de uma recarga: quem guarda
+    contas ou clientes deve buscá-los de novo quando 'bank' mudar.
+    """
+    def __init__(self, fabrica_armazenamento=None, intervalo=INTERVALO_PADRAO, atraso_maximo=ATRASO_MAXIMO_PADRAO):
+        """Abre a réplica; 'fabrica_armazenamento' é uma função sem argumentos (padrão: arquivos JSON na pasta do script)."""
+        self.fabrica_armazenamento = fabrica_armazenamento or banco.ArmazenamentoJSON
+        self.intervalo = intervalo
+        self.atraso_maximo = atraso_maximo
+        self.bank = None  # Bank atual da réplica (trocado a cada recarga).
+        self.seq_snapshot = None  # Número de sequência do snapshot de onde 'bank' foi carregado.
+        self._anterior = None  # Bank trocado na última recarga (os arquivos dele são fechados na próxima).
+        self.seq = 0  # Número de sequência do último registro do journal aplicado.
+        self.posicao = 0  # Posição (bytes) do journal até onde os registros já foram lidos.
+        self.estado_meta = None  # Tamanho e data de snapshot_meta.json na última leitura.
+        self.sincronizada_em = 0.0  # Momento (time.monotonic) em que a réplica alcançou o fim do journal pela última vez.
+        self.recargas = 0  # Quantas vezes o Bank foi recarregado de um snapshot.
+        self.aplicados = 0  # Registros do journal aplicados desde a abertura.
+        self._parar = threading.Event()
+        self._thread = None
+        if not self._recarregar():
+            raise RuntimeError("não foi possível ler um snapshot estável dos dados")
+
+    # ------------------ CARGA ------------------
+    def _recarregar(self):
+        """Carrega um Bank novo do snapshot e do journal e o coloca no lugar do atual. Retorna False se não conseguiu.
+
+        A leitura só vale se nenhum arquivo do snapshot mudou enquanto ela acontecia e se a
+        última geração confirmada já estava instalada (senão o processo principal estava
+        gravando outro snapshot e a leitura é repetida).
+        """
+        for _tentativa in range(TENTATIVAS_RECARGA):
+            armazenamento = self.fabrica_armazenamento()
+            if not hasattr(armazenamento, "journal"):
+                raise ValueError(f"a réplica precisa de um armazenamento com journal, não {armazenamento.descricao()}")
+            armazenamento.somente_leitura = True  # Um snapshot pela metade é concluído pelo processo principal, não pela réplica.
+            arquivos = arquivos_do_snapshot(armazenamento)
+            antes = estado_dos_arquivos(arquivos)
+            try:
+                bank = banco.Bank(armazenamento)
+            except banco.SnapshotEmInstalacao:
+                armazenamento.fechar()
+                time.sleep(self.intervalo)
+                continue
+            if estado_dos_arquivos(arquivos) != antes:
+                armazenamento.fechar()
+                time.sleep(self.intervalo)
+                continue
+            # Os históricos ficam sob demanda, lidos dos arquivos desta geração, que continuam
+            # abertos. A réplica nunca grava: nada de bank.fechar(), que poderia gravar um snapshot.
+            meta = banco.ler_snapshot(armazenamento.arq_snapshot_meta)
+            self.seq_snapshot = meta.get("seq", 0) if isinstance(meta, dict) else 0
+            if self._anterior is not None:
+                self._anterior.armazenamento.fechar()  # Consultas que ainda usavam esse Bank já terminaram.
+            self._anterior, self.bank = self.bank, bank
+            self.seq = armazenamento.journal.seq  # carregar leu o journal inteiro até o último registro completo.
+            self.posicao = 0  # Releitura a partir do início; os registros já aplicados são ignorados pelo seq.
+            self.estado_meta = antes[0]
+            self.recargas += 1
+            self.sincronizada_em = time.monotonic()
+            return True
+        return False
+
+    # ------------------ ACOMPANHAMENTO DO JOURNAL ------------------
+    def atualizar(self):
+        """Lê os registros novos do journal e os aplica. Retorna quantos foram aplicados.
+
+        Só linhas completas são lidas; uma linha ainda sendo escrita fica para a próxima vez.
+        """
+        armazenamento = self.bank.armazenamento
+        estado_meta = estado_dos_arquivos([armazenamento.arq_snapshot_meta])[0]
+        if estado_meta != self.estado_meta:
+            # Novo snapshot: o journal foi (ou vai ser) esvaziado. Com outro número de sequência,
+            # a recarga troca os históricos já lidos pelos da geração nova (e traz os registros
+            # que a réplica não viu); senão basta reler o journal do início.
+            meta = banco.ler_snapshot(armazenamento.arq_snapshot_meta)
+            seq_snapshot = meta.get("seq", 0) if isinstance(meta, dict) else 0
+            if seq_snapshot != self.seq_snapshot:
+                self._recarregar()
+                return 0
+            self.estado_meta = estado_meta
+            self.posicao = 0
+
+        registros, posicao = self._ler_final_do_journal(armazenamento.journal.arquivo)
+        if estado_dos_arquivos([armazenamento.arq_snapshot_meta])[0] != self.estado_meta:
+            return 0  # Um snapshot começou durante a leitura: as posições podem não valer mais.
+
+        novos = [r for r in registros if r.get("seq", 0) > self.seq]
+        if novos and novos[0].get("seq") != self.seq + 1:
+            # Falta um pedaço (o journal foi esvaziado e voltou a crescer entre duas leituras).
+            self._recarregar()
+            return 0
+        bank = self.bank
+        with bank.trava_estado.exclusiva():
+            for registro in novos:
+                conta = bank.buscar_conta(registro.get("conta"))
+                with (conta.trava if conta else nullcontext()):
+                    bank.aplicar_registro_journal(registro)
+                self.seq = registro["seq"]
+        self.posicao = posicao
+        self.aplicados += len(novos)
+        self.sincronizada_em = time.monotonic()
+        return len(novos)
+
+    def _ler_final_do_journal(self, arquivo):
+        """Registros das linhas completas a partir de self.posicao. Retorna (registros, nova posição)."""
+        try:
+            with open(arquivo, "rb") as f:
+                f.seek(0, 2)
+                if f.tell() < self.posicao:
+                    self.posicao = 0  # O journal foi esvaziado.
+                f.seek(self.posicao)
+                dados = f.read()
+        except FileNotFoundError:
+            return [], 0
+        fim = dados.rfind(b"\n") + 1  # Depois da última linha completa.
+        registros = []
+        for linha in dados[:fim].splitlines():
+            if linha.strip():
+                try:
+                    registros.append(json.loads(linha))
+                except json.JSONDecodeError:
+                    break
+        return registros, self.posicao + fim
+
+    def iniciar(self):
+        """Começa a acompanhar o journal em uma thread de fundo."""
+        if self._thread is None:
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._acompanhar, name="replica-leitura", daemon=True)
+            self._thread.start()
+
+    def _acompanhar(self):
+        """Laço da thread de fundo: lê o journal a cada 'intervalo' segundos até parar."""
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.atualizar()
+            except (OSError, ValueError) as e:
+                print(f"Erro ao acompanhar o journal: {e}", file=sys.stderr)
+
+    def parar(self):
+        """Para a thread de fundo."""
+        if self._thread is not None:
+            self._parar.set()
+            self._thread.join()
+            self._thread = None
+
+    def fechar(self):
+        """Para a thread de fundo e fecha os arquivos abertos pela réplica."""
+        self.parar()
+        for bank in (self._anterior, self.bank):
+            if bank is not None:
+                bank.armazenamento.fechar()
+
+    # ------------------ ATRASO ------------------
+    def atraso(self):
+        """Segundos desde a última vez em que a réplica alcançou o fim do journal."""
+        return time.monotonic() - self.sincronizada_em
+
+    @property
+    def defasada(self):
+        """Indica se o atraso passou de 'atraso_maximo'."""
+        return self.atraso() > self.atraso_maximo
+
+    def estado(self):
+        """Resumo do estado da réplica (para relatórios e para o servidor)."""
+        return {
+            "seq": self.seq,
+            "atraso_s": round(self.atraso(), 3),
+            "defasada": self.defasada,
+            "recargas": self.recargas,
+            "aplicados": self.aplicados,
+        }
+
+
+# --------------------------- LINHA DE COMANDO ---------------------------
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando da réplica."""
+    parser = argparse.ArgumentParser(description="Consultas somente leitura sobre os dados gravados pelo processo principal.")
+    parser.add_argument("--conta", help="Mostra o extrato da conta informada.")
+    parser.add_argument("--ordem", choices=banco.ORDENS_LISTAGEM, default="numero", help="Ordem da listagem de contas (padrão: numero).")
+    parser.add_argument("--pagina", type=int, default=1, help="Página da listagem de contas (padrão: 1).")
+    parser.add_argument("--tamanho", type=int, default=20, help="Contas por página (padrão: 20).")
+    parser.add_argument("--acompanhar", type=float, help="Acompanha o journal pelos segundos informados, mostrando o estado da réplica.")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_PADRAO, help=f"Segundos entre as leituras do journal (padrão: {INTERVALO_PADRAO}).")
+    parser.add_argument("--diretorio", help="Pasta dos arquivos de dados (padrão: pasta do script).")
+    parser.add_argument("--razao", action="store_true", help="Lê os históricos do livro-razão binário.")
+    args = parser.parse_args(argv)
+    args.sqlite = None  # O SQLite não tem journal para acompanhar.
+
+    banco.EXIBIR_MENSAGENS = False
+    replica = ReplicaLeitura(fabrica_da_linha_de_comando(args), args.intervalo)
+    if args.acompanhar:
+        replica.iniciar()
+        fim = time.monotonic() + args.acompanhar
+        try:
+            while time.monotonic() < fim:
+                time.sleep(min(1.0, max(0.0, fim - time.monotonic())))
+                print(f"> {json.dumps(replica.estado())}")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            replica.parar()
+
+    if args.conta:
+        conta = replica.bank.buscar_conta(args.conta)
+        if conta is None:
+            print(f"\n> Conta {args.conta} não encontrada.", file=sys.stderr)
+            replica.fechar()
+            return 1
+        for linha in banco.linhas_extrato_txt(conta):
+            print(linha, end="")
+    elif not args.acompanhar:
+        dados = replica.bank.pagina_contas(args.ordem, max(1, args.pagina), max(1, args.tamanho))
+        for conta in dados["contas"]:
+            print(f"Conta: {conta['numero']} | Cliente: {conta['cliente']} | CPF: {conta['cpf']} | Saldo: R$ {conta['saldo']:.2f}")
+        print(f"Página {dados['pagina']} de {dados['total_paginas']} ({dados['total']} contas)")
+    print(f"\n> Réplica no registro {replica.seq} do journal (atraso de {replica.atraso():.1f} s).")
+    replica.fechar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+
+
+# Servidor de rede (asyncio) para o sistema bancário.
+#
+# Cada conexão é uma sessão independente, com seu próprio cliente e conta logados,
+# então milhares de terminais (caixas, ATMs) podem usar o mesmo Bank ao mesmo tempo.
+# O protocolo é de linhas: o cliente envia um objeto JSON por linha e recebe uma
+# linha JSON de resposta para cada comando, na mesma ordem.
+#
+# Comandos ("op"):
+#   {"op": "login", "cpf": "12345678901", "conta": "0001"}   ("conta" é opcional)
+#   {"op": "cadastrar", "cpf": "...", "nome": "...", "data_nascimento": "...", "endereco": "..."}
+#   {"op": "criar_conta"}
+#   {"op": "selecionar_conta", "conta": "0002"}
+#   {"op": "deposito", "valor": 100.0}
+#   {"op": "saque", "valor": 50.0}
+#   {"op": "transferencia", "destino": "0002", "valor": 25.0}
+#   {"op": "saldo"}
+#   {"op": "extrato"}   (filtros opcionais: "inicio", "fim", "tipos", "valor_minimo", "valor_maximo",
+#                        "limite", "cursor", "decrescente"; ver Historico.consultar)
+#   {"op": "metricas"}   (só com --metricas: métricas no formato de texto do Prometheus)
+#   {"op": "sair"}
+# Respostas: {"ok": true, ...} ou {"ok": false, "erro": "<motivo>"}. Um campo "id" enviado
+# no comando é devolvido na resposta. Uma linha que não é JSON recebe "json_invalido"; uma
+# linha maior que 64 KiB também, e a conexão é encerrada. Um erro inesperado em um comando (uma falha de
+# gravação, por exemplo) é registrado na saída de erros e respondido com "erro_interno",
+# sem derrubar a conexão. Depósito, saque e transferência aceitam uma chave de
+# idempotência em "chave": o terminal que repete o comando com a mesma chave (depois de
+# um timeout, por exemplo) recebe a resposta original sem que a transação seja aplicada
+# de novo.
+#
+# As operações que gravam em disco rodam em um pool de threads, fora do event loop.
+# Por padrão as transações usam gravação em grupo (durabilidade "agrupada"): a resposta só
+# sai depois que a transação está em disco, mas várias conexões dividem o mesmo fsync.
+#
+# Com --replica, o servidor só atende consultas (login, selecionar_conta, saldo, extrato),
+# lidas de uma réplica que acompanha os arquivos gravados pelo servidor principal
+# (replica_leitura.py). Cada resposta leva o atraso da réplica em "atraso_s", e as
+# consultas são recusadas com "replica_defasada" se o atraso passar de --atraso-maximo.
+#
+# Uso:
+#   python servidor.py --porta 8765
+#   python servidor.py --unix /tmp/banco.sock --sqlite banco.db
+#   python servidor.py --durabilidade sincrona
+#   python servidor.py --metricas
+#   python servidor.py --replica --porta 8766
+
+import argparse  # Para ler os argumentos da linha de comando.
+import asyncio  # Para atender muitas conexões ao mesmo tempo em uma única thread.
+import json  # Para o protocolo de linhas JSON.
+import sys  # Para o código de saída do programa.
+from concurrent.futures import ThreadPoolExecutor  # Threads para as operações que gravam em disco.
+from functools import partial  # Para passar os filtros do extrato à thread.
+
+import desafio_1_sistema_bancario as banco
+
+
+# Erros do protocolo (os motivos de recusa de transações vêm de desafio_1_sistema_bancario).
+ERRO_JSON_INVALIDO = "json_invalido"
+ERRO_COMANDO_INVALIDO = "comando_invalido"
+ERRO_NAO_AUTENTICADO = "nao_autenticado"
+ERRO_CLIENTE_INEXISTENTE = "cliente_inexistente"
+ERRO_CLIENTE_EXISTENTE = "cliente_existente"
+ERRO_CONTA_INEXISTENTE = "conta_inexistente"
+ERRO_CPF_INVALIDO = "cpf_invalido"
+ERRO_FILTRO_INVALIDO = "filtro_invalido"
+ERRO_METRICAS_DESATIVADAS = "metricas_desativadas"
+ERRO_SOMENTE_LEITURA = "somente_leitura"
+ERRO_REPLICA_DEFASADA = "replica_defasada"
+ERRO_INTERNO = "erro_interno"
+
+# Comandos que alteram dados (recusados pelo servidor em modo réplica).
+COMANDOS_ESCRITA = ("cadastrar", "criar_conta", "deposito", "saque", "transferencia")
+
+# Filtros do comando "extrato" repassados a Bank.consultar_extrato.
+FILTROS_EXTRATO = ("inicio", "fim", "tipos", "valor_minimo", "valor_maximo", "limite", "cursor", "decrescente")
+
+
+class Sessao:
+    """Estado de uma conexão: o cliente e a conta logados nela."""
+    def __init__(self):
+        """Inicializa uma sessão sem ninguém logado."""
+        self.cliente = None  # PessoaFisica logada nesta conexão.
+        self.conta = None  # ContaCorrente selecionada nesta conexão.
+        self.bank = None  # Bank de onde vieram cliente e conta (na réplica, o Bank muda a cada recarga).
+
+
+def erro(motivo):
+    """Monta uma resposta de erro."""
+    return {"ok": False, "erro": motivo}
+
+
+def chave_do_comando(comando):
+    """Chave de idempotência do comando (campo "chave"), como texto, ou None."""
+    chave = comando.get("chave")
+    return None if chave is None else str(chave)
+
+
+class ServidorBancario:
+    """Atende as conexões e traduz os comandos do protocolo em chamadas ao Bank."""
+    def __init__(self, bank, threads=32, replica=None):
+        """Inicializa o servidor sobre um Bank já carregado, ou sobre uma ReplicaLeitura (somente consultas)."""
+        self._bank = bank
+        self.replica = replica
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="banco")
+        self.sessoes_ativas = 0  # Quantidade de conexões abertas no momento.
+        self.comandos = {
+            "login": self.cmd_login,
+            "cadastrar": self.cmd_cadastrar,
+            "criar_conta": self.cmd_criar_conta,
+            "selecionar_conta": self.cmd_selecionar_conta,
+            "deposito": self.cmd_deposito,
+            "saque": self.cmd_saque,
+            "transferencia": self.cmd_transferencia,
+            "saldo": self.cmd_saldo,
+            "extrato": self.cmd_extrato,
+            "metricas": self.cmd_metricas,
+            "sair": self.cmd_sair,
+        }
+
+    @property
+    def bank(self):
+        """Bank usado nos comandos (na réplica, o Bank atual dela)."""
+        return self.replica.bank if self.replica is not None else self._bank
+
+    async def em_thread(self, funcao, *args):
+        """Executa uma função bloqueante (que grava em disco) no pool de threads."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, funcao, *args)
+
+    # ------------------ CONEXÃO ------------------
+    async def atender(self, reader, writer):
+        """Atende uma conexão até o cliente enviar 'sair' ou desconectar."""
+        sessao = Sessao()
+        self.sessoes_ativas += 1
+        try:
+            while True:
+                try:
+                    linha = await reader.readline()
+                except ValueError:  # Linha maior que o limite do StreamReader (64 KiB): responde e encerra.
+                    await self._responder(writer, erro(ERRO_JSON_INVALIDO))
+                    break
+                if not linha:
+                    break
+                try:
+                    comando = json.loads(linha)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    comando, resposta = {}, erro(ERRO_JSON_INVALIDO)
+                else:
+                    resposta = await self.executar(sessao, comando)
+                await self._responder(writer, resposta)
+                if isinstance(comando, dict) and comando.get("op") == "sair":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Conexão encerrada pelo outro lado.
+        finally:
+            self.sessoes_ativas -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _responder(self, writer, resposta):
+        """Envia uma resposta (uma linha JSON) e espera o buffer de saída esvaziar."""
+        writer.write((json.dumps(resposta, ensure_ascii=False) + "\n").encode("utf-8"))
+        await writer.drain()
+
+    async def executar(self, sessao, comando):
+        """Executa um comando e devolve a resposta (com o 'id' do comando, se houver)."""
+        if not isinstance(comando, dict) or comando.get("op") not in self.comandos:
+            resposta = erro(ERRO_COMANDO_INVALIDO)
+        else:
+            try:
+                if self.replica is not None:
+                    resposta = await self._executar_na_replica(sessao, comando)
+                else:
+                    resposta = await self.comandos[comando["op"]](sessao, comando)
+            except Exception as e:
+                print(f"Erro no comando {comando['op']!r}: {type(e).__name__}: {e}", file=sys.stderr)
+                resposta = erro(ERRO_INTERNO)
+        if isinstance(comando, dict) and "id" in comando:
+            resposta["id"] = comando["id"]
+        return resposta
+
+    async def _executar_na_replica(self, sessao, comando):
+        """Executa um comando no modo réplica: só consultas, com o atraso da réplica na resposta."""
+        if comando["op"] in COMANDOS_ESCRITA:
+            return erro(ERRO_SOMENTE_LEITURA)
+        if self.replica.defasada and comando["op"] != "sair":
+            resposta = erro(ERRO_REPLICA_DEFASADA)
+        else:
+            bank = self.bank
+            if sessao.bank is not None and sessao.bank is not bank:
+                # A réplica foi recarregada: cliente e conta da sessão são buscados no Bank novo.
+                sessao.cliente = bank.buscar_cliente(sessao.cliente.cpf) if sessao.cliente else None
+                sessao.conta = bank.buscar_conta(sessao.conta.numero) if sessao.conta else None
+            sessao.bank = bank
+            resposta = await self.comandos[comando["op"]](sessao, comando)
+        resposta["atraso_s"] = round(self.replica.atraso(), 3)
+        return resposta
+
+    # ------------------ COMANDOS ------------------
+    async def cmd_login(self, sessao, comando):
+        """Identifica o cliente pelo CPF e seleciona a conta informada (ou a primeira dele)."""
+        cliente = self.bank.buscar_cliente(str(comando.get("cpf", "")))
+        if cliente is None:
+            return erro(ERRO_CLIENTE_INEXISTENTE)
+        numero = comando.get("conta")
+        conta = self.bank.buscar_conta(numero) if numero else self.bank.primeira_conta_do_cliente(cliente.cpf)
+        if numero and (conta is None or conta.cliente is not cliente):
+            return erro(ERRO_CONTA_INEXISTENTE)
+        sessao.cliente, sessao.conta = cliente, conta
+        return {"ok": True, "cliente": cliente.nome, "conta": conta.numero if conta else None, "saldo": conta.saldo if conta else None}
+
+    async def cmd_cadastrar(self, sessao, comando):
+        """Cadastra um novo cliente (Bank.cadastrar_cliente)."""
+        cpf = str(comando.get("cpf", ""))
+        if not self.bank.validar_cpf(cpf):
+            return erro(ERRO_CPF_INVALIDO)
+        cliente = await self.em_thread(
+            self.bank.cadastrar_cliente, comando.get("nome", ""), cpf, comando.get("data_nascimento", ""), comando.get("endereco", "")
+        )
+        if cliente is None:
+            return erro(ERRO_CLIENTE_EXISTENTE)
+        return {"ok": True, "cliente": cliente.nome}
+
+    async def cmd_criar_conta(self, sessao, comando):
+        """Abre uma nova conta para o cliente logado e a seleciona (Bank.abrir_conta)."""
+        if sessao.cliente is None:
+            return erro(ERRO_NAO_AUTENTICADO)
+        sessao.conta = await self.em_thread(self.bank.abrir_conta, sessao.cliente)
+        return {"ok": True, "conta": sessao.conta.numero}
+
+    async def cmd_selecionar_conta(self, sessao, comando):
+        """Troca a conta selecionada por outra do mesmo cliente."""
+        if sessao.cliente is None:
+            return erro(ERRO_NAO_AUTENTICADO)
+        conta = self.bank.buscar_conta(str(comando.get("conta", "")))
+        if conta is None or conta.cliente is not sessao.cliente:
+            return erro(ERRO_CONTA_INEXISTENTE)
+        sessao.conta = conta
+        return {"ok": True, "conta": conta.numero, "saldo": conta.saldo}
+
+    async def _transacao(self, sessao, comando, tipo):
+        """Executa um saque ou depósito na conta da sessão (Bank.executar_transacao)."""
+        if sessao.conta is None:
+            return erro(ERRO_NAO_AUTENTICADO)
+        try:
+            valor = float(comando.get("valor"))
+        except (TypeError, ValueError):
+            return erro(banco.MOTIVO_VALOR_INVALIDO)
+        ok, motivo = await self.em_thread(self.bank.executar_transacao, sessao.conta, sessao.cliente.cpf, tipo, valor,
+                                          None, chave_do_comando(comando))
+        if not ok:
+            return erro(motivo)
+        return {"ok": True, "saldo": sessao.conta.saldo}
+
+    async def cmd_deposito(self, sessao, comando):
+        """Depósito na conta da sessão."""
+        return await self._transacao(sessao, comando, "Deposito")
+
+    async def cmd_saque(self, sessao, comando):
+        """Saque na conta da sessão."""
+        return await self._transacao(sessao, comando, "Saque")
+
+    async def cmd_transferencia(self, sessao, comando):
+        """Transferência da conta da sessão para a conta "destino" (Bank.transferir)."""
+        if sessao.conta is None:
+            return erro(ERRO_NAO_AUTENTICADO)
+        destino = self.bank.buscar_conta(str(comando.get("destino", "")))
+        if destino is None:
+            return erro(ERRO_CONTA_INEXISTENTE)
+        try:
+            valor = float(comando.get("valor"))
+        except (TypeError, ValueError):
+            return erro(banco.MOTIVO_VALOR_INVALIDO)
+        ok, motivo = await self.em_thread(self.bank.transferir, sessao.conta, destino, sessao.cliente.cpf, valor,
+                                          None, chave_do_comando(comando))
+        if not ok:
+            return erro(motivo)
+        return {"ok": True, "saldo": sessao.conta.saldo}
+
+    async def cmd_saldo(self, sessao, comando):
+        """Saldo da conta da sessão."""
+        if sessao.conta is None:
+            return erro(ERRO_NAO_AUTENTICADO)
+        return {"ok": True, "conta": sessao.conta.numero, "saldo": sessao.conta.saldo}
+
+    async def cmd_extrato(self, sessao, comando):
+        """Página do extrato da conta da sessão (Bank.consultar_extrato), com o saldo depois de cada transação.
+
+        Sem "limite", devolve todas as transações que passam pelos filtros. Roda fora do event
+        loop, pois a primeira consulta pode ler o histórico do disco.
+        """
+        if sessao.conta is None:
+            return erro(ERRO_NAO_AUTENTICADO)
+        filtros = {nome: comando[nome] for nome in FILTROS_EXTRATO if nome in comando}
+        filtros.setdefault("limite", None)
+        try:
+            pagina = await self.em_thread(partial(self.bank.consultar_extrato, sessao.conta.numero, **filtros))
+        except (TypeError, ValueError):
+            return erro(ERRO_FILTRO_INVALIDO)
+        return {"ok": True, "conta": sessao.conta.numero, "saldo": sessao.conta.saldo, **pagina}
+
+    async def cmd_metricas(self, sessao, comando):
+        """Métricas do processo (latências, transações, recusas e bytes gravados) em texto."""
+        if not banco.metricas_ativas():
+            return erro(ERRO_METRICAS_DESATIVADAS)
+        return {"ok": True, "metricas": banco.METRICAS.texto(), "sessoes_ativas": self.sessoes_ativas}
+
+    async def cmd_sair(self, sessao, comando):
+        """Encerra a sessão."""
+        return {"ok": True}
+
+
+# --------------------------- LINHA DE COMANDO ---------------------------
+
+async def servir(bank, host="127.0.0.1", porta=8765, unix=None, threads=32, replica=None):
+    """Inicia o servidor TCP (ou em socket Unix) e atende até ser interrompido."""
+    servidor = ServidorBancario(bank, threads, replica)
+    if unix:
+        tcp = await asyncio.start_unix_server(servidor.atender, path=unix)
+        print(f"> Servidor ouvindo em {unix}", file=sys.stderr)
+    else:
+        tcp = await asyncio.start_server(servidor.atender, host, porta, backlog=4096)
+        print(f"> Servidor ouvindo em {host}:{porta}", file=sys.stderr)
+    try:
+        async with tcp:
+            await tcp.serve_forever()
+    finally:
+        servidor.executor.shutdown(wait=True)
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando do servidor."""
+    parser = argparse.ArgumentParser(description="Servidor de rede (linhas JSON) do sistema bancário.")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta (padrão: 127.0.0.1).")
+    parser.add_argument("--porta", type=int, default=8765, help="Porta TCP (padrão: 8765).")
+    parser.add_argument("--unix", help="Caminho de um socket Unix (em vez de TCP).")
+    parser.add_argument("--threads", type=int, default=32, help="Threads para as operações que gravam em disco.")
+    parser.add_argument("--sqlite", help="Usa o arquivo SQLite informado em vez dos arquivos JSON.")
+    parser.add_argument("--durabilidade", choices=[banco.DURABILIDADE_SINCRONA, banco.DURABILIDADE_AGRUPADA, banco.DURABILIDADE_ASSINCRONA],
+                        default=banco.DURABILIDADE_AGRUPADA, help="Quando as transações são gravadas (padrão: agrupada).")
+    parser.add_argument("--janela-ms", type=float, default=5, help="Tempo máximo que um grupo de gravação cresce, em ms (padrão: 5).")
+    parser.add_argument("--operacoes-por-grupo", type=int, default=256, help="Grava na hora se o grupo chegar a este tamanho.")
+    parser.add_argument("--metricas", action="store_true", help="Coleta métricas e atende o comando 'metricas'.")
+    parser.add_argument("--replica", action="store_true", help="Só consultas, lidas de uma réplica dos arquivos JSON do servidor principal.")
+    parser.add_argument("--diretorio", help="Pasta dos arquivos de dados JSON (padrão: pasta do script).")
+    parser.add_argument("--atraso-maximo", type=float, default=5.0, help="Atraso (s) da réplica a partir do qual as consultas são recusadas.")
+    args = parser.parse_args(argv)
+    if args.replica and args.sqlite:
+        parser.error("--replica acompanha o journal dos arquivos JSON; não pode ser usado com --sqlite")
+
+    if args.metricas:
+        banco.ativar_metricas()
+
+    banco.EXIBIR_MENSAGENS = False  # Não há usuário olhando o terminal do servidor.
+    if args.replica:
+        from replica_leitura import ReplicaLeitura
+        replica = ReplicaLeitura(partial(banco.ArmazenamentoJSON, args.diretorio), atraso_maximo=args.atraso_maximo)
+        replica.iniciar()
+        try:
+            asyncio.run(servir(None, args.host, args.porta, args.unix, args.threads, replica))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            replica.fechar()
+        return 0
+
+    armazenamento = banco.ArmazenamentoJSON(args.diretorio) if args.diretorio else None
+    if args.sqlite:
+        from armazenamento_sqlite import ArmazenamentoSQLite
+        armazenamento = ArmazenamentoSQLite(args.sqlite)
+
+    bank = banco.Bank(armazenamento, args.durabilidade, args.janela_ms, args.operacoes_por_grupo)
+    try:
+        asyncio.run(servir(bank, args.host, args.porta, args.unix, args.threads))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bank.fechar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+# Configuração comum dos testes: o banco é importado da raiz do repositório e cada teste
+# usa uma pasta de dados temporária própria.
+
+import sys  # Para importar os módulos da raiz do repositório.
+from pathlib import Path  # Para o caminho da raiz do repositório.
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent  # Pasta dos módulos do banco.
+sys.path.insert(0, str(RAIZ))
+
+import desafio_1_sistema_bancario as banco  # noqa: E402
+
+CPF_TITULAR = "12345678901"  # CPF do cliente criado pelas fixtures.
+CPF_DESTINO = "10987654321"  # CPF do segundo cliente (transferências).
+
+
+@pytest.fixture(autouse=True)
+def sem_mensagens(monkeypatch):
+    """Os testes não imprimem as mensagens das operações."""
+    monkeypatch.setattr(banco, "EXIBIR_MENSAGENS", False)
+
+
+@pytest.fixture
+def abrir_bank(tmp_path):
+    """Função que abre um Bank sobre a pasta temporária do teste (fechado no final)."""
+    abertos = []
+
+    def abrir(armazenamento=None, **opcoes):
+        bank = banco.Bank(armazenamento or banco.ArmazenamentoJSON(tmp_path), **opcoes)
+        abertos.append(bank)
+        return bank
+
+    yield abrir
+    for bank in abertos:
+        bank.armazenamento.fechar()
+
+
+def cadastrar_com_conta(bank, cpf=CPF_TITULAR, nome="Maria Teste", saldo=0):
+    """Cadastra um cliente com uma conta (e um depósito inicial, se 'saldo' for informado). Retorna a conta."""
+    cliente = bank.cadastrar_cliente(nome, cpf, "01/01/1990", "Rua A, 1 - Centro - Vitória/ES")
+    conta = bank.abrir_conta(cliente)
+    if saldo:
+        assert bank.executar_transacao(conta, cpf, "Deposito", saldo) == (True, None)
+    return conta
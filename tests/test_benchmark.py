@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+# Benchmark: os dados sintéticos abrem no Bank com saldos iguais à soma das transações e
+# sem passar do limite diário de hoje, e a linha de comando grava um JSON com todas as
+# operações medidas.
+
+import json  # Para ler o resultado gravado.
+
+import pytest
+
+import benchmark
+import desafio_1_sistema_bancario as banco
+
+OPERACOES = [
+    "load_all_sem_indice", "save_all", "load_all", "login", "registrar_transacao", "save_all_incremental",
+    "historico_mostrar_primeira_vez", "historico_mostrar", "exportar_extrato_txt",
+]
+
+
+def test_dados_sinteticos_abrem_no_bank(abrir_bank, tmp_path):
+    assert benchmark.gerar_dados(tmp_path, 250, transacoes_por_conta=100) == (3, 3)
+    bank = abrir_bank()
+    assert [c.numero for c in bank.contas] == ["0001", "0002", "0003"]
+    for conta in bank.contas:
+        historico = conta.historico.to_list()
+        assert len(historico) == (50 if conta.numero == "0003" else 100)
+        assert conta.saldo == pytest.approx(sum(t["valor"] if t["tipo"] == "Deposito" else -t["valor"] for t in historico))
+        assert bank.primeira_conta_do_cliente(conta.cliente.cpf) is conta
+    conta = bank.contas[0]
+    assert bank.executar_transacao(conta, conta.cliente.cpf, "Deposito", 1) == (True, None)  # Nada em hoje.
+
+
+def test_linha_de_comando_grava_o_resultado(tmp_path, capsys):
+    saida = tmp_path / "resultado.json"
+    assert benchmark.main(["--escalas", "1k", "--repeticoes", "5", "--saida", str(saida), "--pasta", str(tmp_path / "dados")]) == 0
+    resultado = json.loads(saida.read_text(encoding="utf-8"))
+    [escala] = resultado["escalas"]
+    assert (escala["escala"], escala["transacoes"], escala["contas"]) == ("1k", 1000, 10)
+    assert [r["operacao"] for r in escala["resultados"]] == OPERACOES
+    for r in escala["resultados"]:
+        assert 0 <= r["mediana_s"] <= r["p95_s"] <= r["max_s"] and r["repeticoes"] >= 1
+    assert (tmp_path / "dados" / "1k" / banco.ARQ_EXTRATOS.name).exists()  # --pasta mantém os dados.
+    assert "registrar_transacao" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit):
+        benchmark.main(["--escalas", "2k"])
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+# Busca de clientes: prefixos sem acentos nem maiúsculas (NFKD), prefixos de CPF com ou sem
+# pontuação, o índice atualizado quando um cliente é reindexado com outro endereço e o
+# corte da busca em LIMITE_VARREDURA_BUSCA termos lidos.
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+
+
+def cliente(nome, cpf, endereco="Rua A, 1 - Centro - Vitória/ES"):
+    """Cliente avulso (sem Bank), só para o índice."""
+    return banco.PessoaFisica(nome, cpf, "01/01/1990", endereco)
+
+
+def nomes(resultado):
+    """Nomes dos clientes encontrados e se a busca foi completa."""
+    clientes, completa = resultado
+    return sorted(c.nome for c in clientes), completa
+
+
+@pytest.fixture
+def indice():
+    """Índice com alguns clientes de nomes e endereços acentuados."""
+    indice = banco.IndiceBuscaClientes()
+    indice.adicionar(cliente("José Conceição", "12345678901", "Av. São João, 10 - Oﬁcina - São Paulo/SP"))
+    indice.adicionar(cliente("JOAO SILVA", "12399988877"))
+    indice.adicionar(cliente("Maria da Glória", "98765432100", "Rua das Flores, 5 - Centro - Salvador/BA"))
+    return indice
+
+
+def test_prefixos_sem_acentos_nem_maiusculas(indice):
+    assert banco.normalizar_busca("São JOSÉ Oﬁcina") == "sao jose oficina"
+    assert nomes(indice.buscar("jose")) == (["José Conceição"], True)
+    assert nomes(indice.buscar("CONCEIC")) == (["José Conceição"], True)
+    assert nomes(indice.buscar("joão")) == (["JOAO SILVA", "José Conceição"], True)  # O nome de um, o endereço do outro.
+    assert nomes(indice.buscar("ofic")) == (["José Conceição"], True)  # A ligadura "ﬁ" vira "fi".
+    assert nomes(indice.buscar("glo mar")) == (["Maria da Glória"], True)  # Todas as palavras, em qualquer ordem.
+    assert nomes(indice.buscar("gloria sao")) == ([], True)
+    assert nomes(indice.buscar("joão", campos=("nome",))) == (["JOAO SILVA"], True)
+    assert indice.buscar("  ,- ") == ([], True)
+    with pytest.raises(ValueError, match="campo de busca inválido"):
+        indice.buscar("jose", campos=("telefone",))
+
+
+def test_prefixos_de_cpf(indice):
+    assert nomes(indice.buscar("123")) == (["JOAO SILVA", "José Conceição"], True)
+    assert nomes(indice.buscar("123.456")) == (["José Conceição"], True)
+    assert nomes(indice.buscar("123.456.789-01", campos=("cpf",))) == (["José Conceição"], True)
+    assert nomes(indice.buscar("987", campos=("nome", "endereco"))) == ([], True)
+
+
+def test_reindexar_depois_de_mudar_o_endereco(indice):
+    maria = indice.buscar("maria")[0][0]
+    maria.endereco = "Rua Nova, 7 - Itapuã - Vila Velha/ES"
+    assert nomes(indice.buscar("itapua")) == ([], True)  # O índice ainda tem o endereço antigo.
+    indice.adicionar(maria)
+    assert len(indice) == 3
+    assert nomes(indice.buscar("itapua")) == (["Maria da Glória"], True)
+    assert nomes(indice.buscar("salvador")) == ([], True)
+    assert nomes(indice.buscar("maria vila")) == (["Maria da Glória"], True)
+    indice.remover(maria.cpf)
+    assert len(indice) == 2 and nomes(indice.buscar("maria")) == ([], True)
+
+
+def test_busca_para_no_limite_de_termos_lidos(monkeypatch):
+    indice = banco.IndiceBuscaClientes()
+    for i in range(2, 10):
+        indice.adicionar(cliente(f"Silva {i}", f"{i:011d}", "Rua B"))
+    monkeypatch.setattr(banco, "LIMITE_VARREDURA_BUSCA", 5)
+    clientes, completa = indice.buscar("silva", limite=100)
+    assert len(clientes) == 5 and not completa  # Parou nos 5 termos lidos: pode haver mais.
+    assert nomes(indice.buscar("silva 7", limite=100)) == (["Silva 7"], True)  # Um texto mais específico encontra.
+    clientes, completa = indice.buscar("rua", limite=3)
+    assert len(clientes) == 3 and not completa  # Parou no limite de clientes.
+    monkeypatch.setattr(banco, "LIMITE_VARREDURA_BUSCA", 100)
+    assert len(indice.buscar("silva", limite=100)[0]) == 8
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+# Carga rápida: a abertura lê clientes, contas e saldos e o índice de extratos.json, e o
+# histórico de cada conta só é lido (pelo trecho do índice) quando o extrato é pedido. Sem
+# índice válido, o extrato volta a ser lido inteiro; importar o módulo não imprime nada.
+
+import subprocess  # Para importar o módulo em um processo novo.
+import sys  # Para o interpretador do processo novo.
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+from conftest import RAIZ, cadastrar_com_conta
+
+
+@pytest.fixture
+def pasta_com_dados(abrir_bank, tmp_path):
+    """Snapshot com três contas (e transações só no journal na última): devolve a pasta."""
+    bank = abrir_bank()
+    for i in range(1, 4):
+        conta = cadastrar_com_conta(bank, f"{i:011d}", f"Cliente {i}", saldo=10 * i)
+        assert bank.executar_transacao(conta, conta.cliente.cpf, "Saque", i) == (True, None)
+    bank.save_all()
+    assert bank.executar_transacao(conta, conta.cliente.cpf, "Deposito", 100) == (True, None)  # Fica no journal.
+    bank.fechar()
+    return tmp_path
+
+
+def lidas(monkeypatch):
+    """Lista que recebe o número de cada conta cujo trecho for lido de extratos.json."""
+    contas = []
+    original = banco.ArmazenamentoJSON.carregar_historico
+
+    def carregar_historico(self, numero_conta):
+        contas.append(numero_conta)
+        return original(self, numero_conta)
+
+    monkeypatch.setattr(banco.ArmazenamentoJSON, "carregar_historico", carregar_historico)
+    return contas
+
+
+def test_historico_lido_pelo_trecho_quando_pedido(abrir_bank, pasta_com_dados, monkeypatch, capsys):
+    contas_lidas = lidas(monkeypatch)
+    bank = abrir_bank()
+    assert contas_lidas == [] and not any(c.historico.carregado for c in bank.contas)
+    assert [c.saldo for c in bank.contas] == [9, 18, 127]
+    indice = bank.armazenamento.indice_extratos
+    assert sorted(indice) == ["0001", "0002", "0003"] and all(inicio < fim for inicio, fim, *_ in indice.values())
+
+    bank.usuario_logado, bank.conta_logada = bank.contas[1].cliente, bank.contas[1]
+    bank.mostrar_extrato()
+    assert contas_lidas == ["0002"] and [c.historico.carregado for c in bank.contas] == [False, True, False]
+    assert "Saldo atual: R$ 18.00" in capsys.readouterr().out
+
+    bank.usuario_logado, bank.conta_logada = bank.contas[2].cliente, bank.contas[2]
+    bank.exportar_extrato_txt(pasta_com_dados / "exportados")
+    assert contas_lidas == ["0002", "0003"]
+    texto = next((pasta_com_dados / "exportados").iterdir()).read_text(encoding="utf-8")
+    valores = [linha.rsplit("R$ ", 1)[1] for linha in texto.splitlines() if "R$" in linha]
+    assert valores == ["30.00", "3.00", "100.00", "127.00"]  # As do trecho antes das do journal, e o saldo.
+    assert not bank.contas[0].historico.carregado
+
+
+def test_sem_indice_valido_le_o_extrato_inteiro(abrir_bank, pasta_com_dados, monkeypatch):
+    (pasta_com_dados / "extratos_indice.json").unlink()
+    contas_lidas = lidas(monkeypatch)
+    bank = abrir_bank()
+    assert bank.armazenamento.indice_extratos is None and all(c.historico.carregado for c in bank.contas)
+    assert contas_lidas == []
+    assert [[t["valor"] for t in c.historico.to_list()] for c in bank.contas] == [[10, 1], [20, 2], [30, 3, 100]]
+
+
+def test_importar_o_modulo_nao_imprime_nada():
+    resultado = subprocess.run([sys.executable, "-c", "import desafio_1_sistema_bancario"], cwd=RAIZ,
+                               capture_output=True, text=True, check=True)
+    assert (resultado.stdout, resultado.stderr) == ("", "")
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+# Transferências e compensação: uma transferência segue as regras de saque e conta nas duas
+# pontas, cada transferência compensada aceita conta nos limites diários, os usos sobrevivem
+# a um reinício e o lote compensado dá os mesmos resultados da ordem do arquivo.
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+import processamento_lote
+from armazenamento_sqlite import ArmazenamentoSQLite
+from conftest import CPF_DESTINO, CPF_TITULAR, cadastrar_com_conta
+
+
+def test_transferencia_segue_as_regras_de_saque_e_conta_nas_duas_pontas(abrir_bank):
+    bank = abrir_bank()
+    origem = cadastrar_com_conta(bank, saldo=1000)
+    destino = cadastrar_com_conta(bank, CPF_DESTINO, "João Teste")
+    assert bank.transferir(origem, destino, CPF_TITULAR, 600) == (False, banco.MOTIVO_LIMITE_POR_SAQUE)
+    assert bank.transferir(origem, origem, CPF_TITULAR, 10) == (False, banco.MOTIVO_MESMA_CONTA)
+    for _ in range(3):
+        assert bank.transferir(origem, destino, CPF_TITULAR, 10) == (True, None)
+    assert bank.transferir(origem, destino, CPF_TITULAR, 10) == (False, banco.MOTIVO_LIMITE_SAQUES_DIARIOS)
+    assert (origem.saldo, destino.saldo) == (970, 30)
+    assert bank.transacoes_diarias_por_conta.quantidade(destino.numero) == 3
+
+
+def test_transferencia_recusada_pelo_limite_de_transacoes_do_destino(abrir_bank):
+    bank = abrir_bank()
+    origem = cadastrar_com_conta(bank, saldo=100)
+    destino = cadastrar_com_conta(bank, CPF_DESTINO, "João Teste")
+    for _ in range(banco.Bank.LIMITE_TRANSACOES_DIARIAS_POR_CONTA):
+        bank.executar_transacao(destino, CPF_DESTINO, "Deposito", 1)
+    assert bank.transferir(origem, destino, CPF_TITULAR, 10) == (False, banco.MOTIVO_LIMITE_TRANSACOES_DIARIAS)
+    assert origem.saldo == 100 and origem.saques_realizados.quantidade() == 0
+
+
+def test_debitos_do_mesmo_lote_contam_no_limite_de_saques(abrir_bank):
+    bank = abrir_bank()
+    origem = cadastrar_com_conta(bank, saldo=1000)
+    destino = cadastrar_com_conta(bank, CPF_DESTINO, "João Teste")
+    resultados = bank.liquidar_transferencias([(origem.numero, destino.numero, 10)] * 4)
+    assert resultados == [(True, None)] * 3 + [(False, banco.MOTIVO_LIMITE_SAQUES_DIARIOS)]
+    assert origem.saldo == 970 and destino.saldo == 30
+    assert origem.saques_realizados.quantidade() == 3
+    assert bank.transacoes_diarias_por_conta.quantidade(origem.numero) == 4  # O depósito inicial e as 3 transferências.
+    assert bank.transacoes_diarias_por_conta.quantidade(destino.numero) == 3
+
+
+def test_transferencias_do_mesmo_lote_contam_no_limite_de_transacoes(abrir_bank):
+    bank = abrir_bank()
+    contas = [cadastrar_com_conta(bank, f"{i:011d}", f"Cliente {i}", saldo=100) for i in range(1, 13)]
+    destino = contas[0]
+    resultados = bank.liquidar_transferencias([(conta.numero, destino.numero, 1) for conta in contas[1:]])
+    aceitas = 9  # O destino já tem o depósito inicial: sobram 9 das 10 transações diárias.
+    assert resultados == [(True, None)] * aceitas + [(False, banco.MOTIVO_LIMITE_TRANSACOES_DIARIAS)] * (11 - aceitas)
+    assert destino.saldo == 100 + aceitas
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_usos_da_compensacao_sobrevivem_ao_reinicio(abrir_bank, tmp_path, backend):
+    def armazenamento():
+        return ArmazenamentoSQLite(tmp_path / "banco.db") if backend == "sqlite" else banco.ArmazenamentoJSON(tmp_path)
+
+    bank = abrir_bank(armazenamento())
+    a = cadastrar_com_conta(bank, saldo=100)
+    b = cadastrar_com_conta(bank, CPF_DESTINO, "João Teste", saldo=100)
+    # Ida e volta com o mesmo valor: nenhum lançamento, mas dois usos em cada conta e um saque em cada.
+    assert bank.liquidar_transferencias([(a.numero, b.numero, 10), (b.numero, a.numero, 10)]) == [(True, None)] * 2
+    bank.armazenamento.fechar()
+
+    bank = abrir_bank(armazenamento())
+    a, b = bank.contas
+    assert (a.saldo, b.saldo) == (100, 100)
+    assert len(a.historico.to_list()) == 1
+    assert [bank.transacoes_diarias_por_conta.quantidade(c.numero) for c in (a, b)] == [3, 3]
+    assert [c.saques_realizados.quantidade() for c in (a, b)] == [1, 1]
+
+
+def test_lote_compensado_respeita_a_ordem_do_arquivo(abrir_bank, tmp_path):
+    def operacoes(a, b):
+        return [
+            {"cpf": CPF_TITULAR, "conta": a.numero, "tipo": "transferencia", "destino": b.numero, "valor": 80},
+            {"cpf": CPF_TITULAR, "conta": a.numero, "tipo": "saque", "valor": 50},  # Depois da transferência, falta saldo.
+            {"cpf": CPF_DESTINO, "conta": b.numero, "tipo": "saque", "valor": 60},  # Só passa com o crédito da transferência.
+        ]
+
+    resultados = []
+    for processar in (processamento_lote.processar_lote, processamento_lote.processar_compensado):
+        pasta = tmp_path / processar.__name__
+        pasta.mkdir()
+        bank = abrir_bank(banco.ArmazenamentoJSON(pasta))
+        a = cadastrar_com_conta(bank, saldo=100)
+        b = cadastrar_com_conta(bank, CPF_DESTINO, "João Teste")
+        resultados.append([(r["ok"], r["motivo"]) for r in processar(bank, operacoes(a, b))])
+        resultados[-1].append((a.saldo, b.saldo))
+    assert resultados[0] == resultados[1] == [(True, None), (False, banco.MOTIVO_SALDO_INSUFICIENTE), (True, None), (20, 20)]
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+# Conciliação: a segunda execução reaproveita o checkpoint para as contas que não mudaram
+# (no mesmo processo e em outro), sem snapshot todas as contas são verificadas, o
+# checkpoint é gravado como os arquivos do snapshot e um corrompido é ignorado com um aviso.
+
+import conciliacao
+import desafio_1_sistema_bancario as banco
+from conftest import CPF_DESTINO, CPF_TITULAR, cadastrar_com_conta
+
+
+def test_checkpoint_corrompido_e_ignorado_com_aviso(abrir_bank, tmp_path, capsys):
+    bank = abrir_bank()
+    cadastrar_com_conta(bank, saldo=100)
+    cadastrar_com_conta(bank, CPF_DESTINO, "João Teste", saldo=50)
+    bank.save_all()
+    checkpoint = tmp_path / "checkpoint.json"
+
+    relatorio = conciliacao.conciliar(bank, checkpoint=checkpoint)
+    assert (relatorio["verificadas"], relatorio["divergencias"]) == (2, [])
+    assert set(banco.ler_snapshot(checkpoint)["contas"]) == {c.numero for c in bank.contas}  # Com checksum.
+
+    checkpoint.write_bytes(checkpoint.read_bytes()[:-5])
+    relatorio = conciliacao.conciliar(bank, checkpoint=checkpoint)
+    assert (relatorio["verificadas"], relatorio["reaproveitadas"]) == (2, 0)
+    assert "Checkpoint ignorado" in capsys.readouterr().err
+    banco.ler_snapshot(checkpoint)  # Regravado inteiro.
+
+
+def test_segunda_execucao_reaproveita_o_checkpoint(abrir_bank, tmp_path):
+    bank = abrir_bank()
+    origem = cadastrar_com_conta(bank, saldo=100)
+    cadastrar_com_conta(bank, CPF_DESTINO, "João Teste", saldo=50)
+    cadastrar_com_conta(bank, "11122233344", "Ana Teste")
+    checkpoint = tmp_path / "checkpoint.json"
+
+    relatorio = conciliacao.conciliar(bank, checkpoint=checkpoint)
+    assert (relatorio["verificadas"], relatorio["reaproveitadas"], relatorio["sem_marca"]) == (3, 0, 3)  # Ainda sem snapshot.
+    relatorio = conciliacao.conciliar(bank, checkpoint=checkpoint)
+    assert (relatorio["verificadas"], relatorio["reaproveitadas"]) == (3, 0)
+
+    bank.save_all()
+    assert conciliacao.conciliar(bank, checkpoint=checkpoint)["verificadas"] == 3
+    relatorio = conciliacao.conciliar(bank, checkpoint=checkpoint)  # Os históricos agora estão em memória.
+    assert (relatorio["verificadas"], relatorio["reaproveitadas"], relatorio["sem_marca"]) == (0, 3, 0)
+    bank.fechar()
+
+    bank = abrir_bank()  # Outro processo: nenhum histórico buscado ainda.
+    relatorio = conciliacao.conciliar(bank, checkpoint=checkpoint)
+    assert (relatorio["verificadas"], relatorio["reaproveitadas"], relatorio["divergencias"]) == (0, 3, [])
+    assert not any(c.historico.carregado for c in bank.contas)
+
+    assert bank.executar_transacao(bank.buscar_conta(origem.numero), CPF_TITULAR, "Saque", 30) == (True, None)
+    relatorio = conciliacao.conciliar(bank, checkpoint=checkpoint)
+    assert (relatorio["verificadas"], relatorio["reaproveitadas"], relatorio["divergencias"]) == (1, 2, [])
+    bank.save_all()  # A transação vai para o trecho da conta: a marca muda de novo.
+    assert conciliacao.conciliar(bank, checkpoint=checkpoint)["verificadas"] == 1
+    assert conciliacao.conciliar(bank, checkpoint=checkpoint)["reaproveitadas"] == 3
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+# Concorrência: várias threads fazem transferências em sentidos opostos, saques e depósitos
+# nas mesmas contas. Nenhuma thread fica travada, o dinheiro se conserva, os limites de
+# saque valem e o estado gravado é igual ao da memória (versão reduzida de estresse_concorrencia.py).
+
+import random  # Para sortear as operações.
+import sys  # Para o intervalo de troca de threads.
+import threading  # Para as threads que disputam as contas.
+import time  # Para ceder o processador no meio das operações.
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+from estresse_concorrencia import BankSemLimiteDiario, criar_contas
+
+THREADS = 8
+TEMPO_MAXIMO = 60  # Segundos para cada thread terminar; depois disso, é um impasse (deadlock).
+
+
+@pytest.fixture(autouse=True)
+def disputa(monkeypatch):
+    """Troca de thread o mais cedo possível e cede o GIL no meio das operações, para provocar disputas."""
+    monkeypatch.setattr(banco, "exibir", lambda mensagem: time.sleep(0))
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(intervalo)
+
+
+def disparar(bank, operacoes_por_thread):
+    """Executa as listas de operações (origem, destino ou None, tipo, valor), uma por thread. Retorna [(operação, ok)]."""
+    resultados = []
+
+    def executar(operacoes):
+        for origem, destino, tipo, valor in operacoes:
+            if destino is not None:
+                ok, _motivo = bank.transferir(origem, destino, origem.cliente.cpf, valor)
+            else:
+                ok, _motivo = bank.executar_transacao(origem, origem.cliente.cpf, tipo, valor)
+            resultados.append(((origem, destino, tipo, valor), ok))
+
+    threads = [threading.Thread(target=executar, args=(operacoes,)) for operacoes in operacoes_por_thread]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(TEMPO_MAXIMO)
+        assert not t.is_alive(), "thread travada: possível deadlock entre as travas das contas"
+    return resultados
+
+
+def sortear(contas, quantidade):
+    """Operações ao acaso: transferências nos dois sentidos entre as contas, saques e depósitos."""
+    operacoes = []
+    for _ in range(quantidade):
+        origem, destino = random.sample(contas, 2)
+        tipo = random.choice(("Transferencia", "Saque", "Deposito"))
+        operacoes.append((origem, destino if tipo == "Transferencia" else None, tipo, random.randint(1, 50)))
+    return operacoes
+
+
+def test_volume_conserva_o_dinheiro_e_grava_o_mesmo_estado(tmp_path):
+    bank = BankSemLimiteDiario(banco.ArmazenamentoJSON(tmp_path, intervalo_snapshot=200))
+    criar_contas(bank, 3, 500, limite=10 ** 9, limite_saques=10 ** 9)
+    contas = list(bank.contas)
+    resultados = disparar(bank, [sortear(contas, 150) for _ in range(THREADS)])
+
+    esperado = {conta.numero: 500 for conta in contas}
+    for (origem, destino, tipo, valor), ok in resultados:
+        if ok:
+            esperado[origem.numero] += valor if tipo == "Deposito" else -valor
+            if destino is not None:
+                esperado[destino.numero] += valor
+    assert {conta.numero: conta.saldo for conta in contas} == esperado
+    assert all(conta.saldo >= 0 for conta in contas)
+    bank.fechar()
+
+    recarregado = BankSemLimiteDiario(banco.ArmazenamentoJSON(tmp_path))
+    assert {conta.numero: conta.saldo for conta in recarregado.contas} == esperado
+    for conta in contas:
+        copia = recarregado.buscar_conta(conta.numero)
+        assert len(copia.historico.to_list()) == len(conta.historico.to_list())
+    recarregado.fechar()
+
+
+def test_limites_valem_com_transferencias_em_sentidos_opostos(abrir_bank):
+    bank = abrir_bank()
+    criar_contas(bank, 2, 1000)
+    a, b = bank.contas
+    ida_e_volta = [(a, b, "Transferencia", 100), (b, a, "Transferencia", 100), (a, None, "Saque", 100), (b, None, "Saque", 100)]
+    resultados = disparar(bank, [ida_e_volta * 5 for _ in range(THREADS)])
+
+    sacado = sum(valor for (_o, destino, _t, valor), ok in resultados if ok and destino is None)
+    assert a.saldo + b.saldo == 2000 - sacado
+    for conta in (a, b):
+        debitos = [op for op, ok in resultados if ok and op[0] is conta]
+        creditos = [op for op, ok in resultados if ok and op[1] is conta]
+        assert len(debitos) == conta.saques_realizados.quantidade() <= conta.limite_saques
+        assert len(debitos) + len(creditos) <= bank.LIMITE_TRANSACOES_DIARIAS_POR_CONTA
+        assert bank.transacoes_diarias_por_conta.quantidade(conta.numero) == len(debitos) + len(creditos)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+# Snapshots incrementais e níveis de durabilidade: depois de um depósito, save_all só
+# regrava os arquivos que mudaram (e não converte o extrato das outras contas), e as
+# transações agrupadas, assíncronas e adiadas sobrevivem ao fechamento do Bank.
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+from conftest import CPF_DESTINO, CPF_TITULAR, cadastrar_com_conta
+
+
+def arquivos_do_ultimo_snapshot(pasta):
+    """Nomes dos arquivos gravados pelo último save_all (registrados em snapshot_meta.json)."""
+    return set(banco.ler_snapshot(pasta / "snapshot_meta.json")["arquivos"])
+
+
+def test_save_all_so_regrava_o_que_mudou(abrir_bank, tmp_path):
+    bank = abrir_bank()
+    conta = cadastrar_com_conta(bank, saldo=100)
+    cadastrar_com_conta(bank, CPF_DESTINO, "João Teste", saldo=50)
+    bank.save_all()
+    assert arquivos_do_ultimo_snapshot(tmp_path) >= {"clientes.json", "contas.json", "transacoes_diarias.json"}
+    bank.fechar()
+
+    bank = abrir_bank()
+    assert not bank.alterados
+    conta, outra = bank.buscar_conta(conta.numero), bank.contas[1]
+    assert bank.executar_transacao(conta, CPF_TITULAR, "Deposito", 10) == (True, None)
+    assert bank.alterados == {"contas", "transacoes_diarias"}
+    clientes = (tmp_path / "clientes.json").stat()
+    bank.save_all()
+
+    gravados = arquivos_do_ultimo_snapshot(tmp_path)
+    assert {"contas.json", "transacoes_diarias.json", "extratos.json"} <= gravados
+    assert "clientes.json" not in gravados and not bank.alterados
+    assert (tmp_path / "clientes.json").stat().st_ino == clientes.st_ino  # O arquivo nem foi trocado.
+    assert not outra.historico.carregado  # O trecho da outra conta foi copiado, sem carregar o histórico.
+    bank.fechar()
+
+    bank = abrir_bank()
+    assert [c.saldo for c in bank.contas] == [110, 50]
+    assert [t["valor"] for t in bank.contas[0].historico.to_list()] == [100, 10]
+    assert len(bank.contas[1].historico.to_list()) == 1
+
+
+@pytest.mark.parametrize("durabilidade", [banco.DURABILIDADE_AGRUPADA, banco.DURABILIDADE_ASSINCRONA, banco.DURABILIDADE_ADIADA])
+def test_transacoes_sobrevivem_ao_fechamento(abrir_bank, durabilidade):
+    bank = abrir_bank(durabilidade=durabilidade)
+    origem = cadastrar_com_conta(bank)
+    destino = cadastrar_com_conta(bank, CPF_DESTINO, "João Teste")
+    for _ in range(5):
+        assert bank.executar_transacao(origem, CPF_TITULAR, "Deposito", 20) == (True, None)
+    assert bank.transferir(origem, destino, CPF_TITULAR, 30) == (True, None)
+    assert bank.executar_transacao(origem, CPF_TITULAR, "Saque", 5) == (True, None)
+    if durabilidade == banco.DURABILIDADE_ADIADA:
+        assert bank.total_gravadas < bank.total_aceitas  # Nada gravado até persistir_pendentes.
+    bank.fechar()  # Para o gravador em grupo e grava o que ainda estiver na fila.
+    assert bank.total_gravadas == bank.total_aceitas and not bank.transacoes_pendentes
+
+    bank = abrir_bank()
+    assert [c.saldo for c in bank.contas] == [65, 30]
+    assert len(bank.contas[0].historico.to_list()) == 7
+
+
+def test_parar_o_gravador_grava_as_assincronas(abrir_bank, tmp_path):
+    bank = abrir_bank(durabilidade=banco.DURABILIDADE_ASSINCRONA, janela_gravacao_ms=1000)
+    conta = cadastrar_com_conta(bank)
+    for _ in range(10):
+        assert bank.executar_transacao(conta, CPF_TITULAR, "Deposito", 1) == (True, None)
+    bank.gravador.parar()  # Sem persistir_pendentes: quem grava é o próprio gravador, antes de sair.
+    assert bank.total_gravadas == bank.total_aceitas
+
+    copia = abrir_bank(banco.ArmazenamentoJSON(tmp_path))  # Outra abertura da pasta, pelo journal.
+    assert copia.contas[0].saldo == 10
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+# Exportação em massa de extratos: os arquivos TXT, CSV e JSONL de cada conta, iguais com
+# um processo e com o pool (que lê também as transações ainda pendentes), só das contas
+# pedidas e com as inexistentes informadas no resumo.
+
+import json  # Para ler os extratos em JSONL.
+from functools import partial  # Para a fábrica de armazenamento enviada aos processos.
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+import exportacao_extratos
+from conftest import cadastrar_com_conta
+
+
+@pytest.fixture
+def bank(abrir_bank):
+    """Bank com cinco contas, a última sem transações, e um saque na primeira ainda pendente (durabilidade adiada)."""
+    bank = abrir_bank(durabilidade=banco.DURABILIDADE_ADIADA)
+    for i in range(1, 6):
+        conta = cadastrar_com_conta(bank, f"{i:011d}", f"Cliente {i}")
+        for valor in range(1, 6 - i):
+            assert bank.executar_transacao(conta, conta.cliente.cpf, "Deposito", valor * 10) == (True, None)
+    assert bank.executar_transacao(bank.contas[0], bank.contas[0].cliente.cpf, "Saque", 5) == (True, None)
+    assert bank.transacoes_pendentes
+    return bank
+
+
+def arquivos(pasta):
+    """Conteúdo dos arquivos da pasta, por nome."""
+    return {arquivo.name: arquivo.read_text(encoding="utf-8") for arquivo in sorted(pasta.iterdir())}
+
+
+def test_um_processo_e_o_pool_gravam_os_mesmos_extratos(bank, tmp_path):
+    formatos = ["txt", "csv", "jsonl"]
+    serial = exportacao_extratos.exportar_extratos(bank, tmp_path / "serial", formatos, tamanho_grupo=2)
+    assert (serial["contas"], serial["arquivos"], serial["contas_inexistentes"]) == (5, 15, [])
+
+    fabrica = partial(banco.ArmazenamentoJSON, tmp_path)
+    paralelo = exportacao_extratos.exportar_extratos(bank, tmp_path / "pool", formatos, processos=2,
+                                                     fabrica_armazenamento=fabrica, tamanho_grupo=2)
+    assert (paralelo["contas"], paralelo["arquivos"]) == (5, 15)
+    assert not bank.transacoes_pendentes  # Gravadas antes de os processos abrirem os arquivos.
+
+    esperados, gravados = arquivos(tmp_path / "serial"), arquivos(tmp_path / "pool")
+    assert sorted(gravados) == sorted(f"extrato_conta_{i:04d}.{e}" for i in range(1, 6) for e in formatos)
+    for nome, texto in esperados.items():
+        if nome.endswith(".txt"):  # A data de impressão é a de cada exportação.
+            texto, gravados[nome] = texto.rsplit("Data e Hora", 1)[0], gravados[nome].rsplit("Data e Hora", 1)[0]
+        assert gravados[nome] == texto, nome
+
+    linhas = esperados["extrato_conta_0001.jsonl"].splitlines()
+    assert [(t["tipo"], t["valor"]) for t in map(json.loads, linhas)] == [("Deposito", v) for v in (10, 20, 30, 40)] + [("Saque", 5)]
+    assert esperados["extrato_conta_0001.csv"].splitlines()[0] == "data,tipo,valor,cpf,conta"
+    assert "Saldo atual: R$ 95.00" in esperados["extrato_conta_0001.txt"]
+    assert esperados["extrato_conta_0005.jsonl"] == ""
+
+
+def test_contas_escolhidas_e_inexistentes(bank, tmp_path):
+    resumo = exportacao_extratos.exportar_extratos(bank, tmp_path / "saida", ["CSV"], contas=["0002", "0404", "0004"])
+    assert (resumo["contas"], resumo["arquivos"], resumo["contas_inexistentes"]) == (2, 2, ["0404"])
+    assert sorted(arquivos(tmp_path / "saida")) == ["extrato_conta_0002.csv", "extrato_conta_0004.csv"]
+
+    with pytest.raises(ValueError, match="formato de extrato inválido: pdf"):
+        exportacao_extratos.exportar_extratos(bank, tmp_path / "saida", ["txt", "pdf"])
+    with pytest.raises(ValueError, match="fabrica_armazenamento"):
+        exportacao_extratos.exportar_extratos(bank, tmp_path / "saida", processos=2)
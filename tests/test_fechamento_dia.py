@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+# Fechamento do dia: o resumo gravado de cada conta (saldos de abertura e de fechamento,
+# depósitos e saques) confere com a soma das transações, é o mesmo com um processo e com
+# o pool, e os usos vencidos dos limites diários são descartados e gravados.
+
+from datetime import date, datetime, timedelta  # Para os dias fechados e o dia de cada transação.
+from functools import partial  # Para a fábrica de armazenamento enviada aos processos.
+
+import pytest
+
+import benchmark
+import desafio_1_sistema_bancario as banco
+import fechamento_dia
+
+
+@pytest.fixture
+def bank(abrir_bank, tmp_path):
+    """Bank com 6 contas e um mês de histórico (com contadores diários antigos), mais transferências de hoje."""
+    benchmark.gerar_dados(tmp_path, 300, transacoes_por_conta=50)
+    bank = abrir_bank()
+    for origem, destino in ((0, 3), (3, 5)):
+        origem, destino = bank.contas[origem], bank.contas[destino]
+        assert bank.transferir(origem, destino, origem.cliente.cpf, 12.5) == (True, None)
+    return bank
+
+
+def esperado(conta, dia):
+    """Resumo do dia calculado transação por transação (valores em reais)."""
+    abertura = fechamento = 0
+    resumo = {"depositos": 0, "valor_depositos": 0, "saques": 0, "valor_saques": 0}
+    for t in conta.historico:
+        dia_transacao = datetime.strptime(t["data"], banco.FORMATO_DATA).date()
+        variacao = banco.SINAL_TIPO[t["tipo"]] * banco.para_centavos(t["valor"])
+        if dia_transacao > dia:
+            continue
+        fechamento += variacao
+        if dia_transacao < dia:
+            abertura += variacao
+        elif variacao > 0:
+            resumo["depositos"] += 1
+            resumo["valor_depositos"] += variacao
+        else:
+            resumo["saques"] += 1
+            resumo["valor_saques"] -= variacao
+    return {"saldo_abertura": abertura / 100, "saldo_fechamento": fechamento / 100, **resumo,
+            "valor_depositos": resumo["valor_depositos"] / 100, "valor_saques": resumo["valor_saques"] / 100}
+
+
+def test_resumos_conferem_com_o_historico(bank, tmp_path):
+    pasta = tmp_path / "resumos"
+    dias = [date.today() - timedelta(days=3), date.today()]
+    for dia in dias:
+        resultado = fechamento_dia.fechar_dia(bank, dia, pasta)
+        assert (resultado["dia"], resultado["contas"]) == (dia.isoformat(), 6)
+        resumos = fechamento_dia.carregar_resumos_dia(pasta, dia)
+        for conta in bank.contas:
+            assert resumos[conta.numero] == pytest.approx(esperado(conta, dia)), (dia, conta.numero)
+    assert fechamento_dia.carregar_resumos_dia(pasta, date.today())["0004"]["depositos"] == 1  # A transferência recebida.
+    assert resultado["com_movimento"] == 3
+    assert fechamento_dia.dias_fechados(pasta) == dias
+    assert fechamento_dia.carregar_resumos_dia(pasta, date.today() - timedelta(days=1)) is None
+    assert [dia for dia, _ in fechamento_dia.resumos_da_conta(pasta, "0001", inicio=dias[1])] == [dias[1]]
+
+    volumes = fechamento_dia.volumes_dos_resumos(pasta)["linhas"]
+    assert [linha[0] for linha in volumes] == [dia.isoformat() for dia in dias]
+    assert volumes[1][1:4] == [2, 25.0, 2]
+
+
+def test_pool_grava_os_mesmos_resumos(bank, tmp_path):
+    dia = date.today() - timedelta(days=5)
+    fechamento_dia.fechar_dia(bank, dia, tmp_path / "serial", tamanho_grupo=4)
+    fabrica = partial(banco.ArmazenamentoJSON, tmp_path)
+    resultado = fechamento_dia.fechar_dia(bank, dia, tmp_path / "pool", processos=2, fabrica_armazenamento=fabrica, tamanho_grupo=4)
+    assert resultado["contas"] == 6
+    assert fechamento_dia.carregar_resumos_dia(tmp_path / "pool", dia) == fechamento_dia.carregar_resumos_dia(tmp_path / "serial", dia)
+    with pytest.raises(ValueError, match="fabrica_armazenamento"):
+        fechamento_dia.fechar_dia(bank, dia, tmp_path / "pool", processos=2)
+
+
+def test_usos_vencidos_saem_dos_contadores(bank, abrir_bank, tmp_path):
+    resultado = fechamento_dia.fechar_dia(bank, pasta=tmp_path / "resumos")
+    assert resultado["usos_descartados"] > 0  # Os contadores dos dias antigos, vindos do arquivo.
+    assert fechamento_dia.fechar_dia(bank, pasta=tmp_path / "resumos")["usos_descartados"] == 0
+    bank.fechar()
+
+    limites = abrir_bank().dados_limites()
+    assert sorted(limites["transacoes"]) == ["0001", "0004", "0006"]  # Só as duas pontas das transferências de hoje.
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+# Gravação em grupo: uma transação sozinha é confirmada sem esperar a janela inteira, e as
+# transações agrupadas e concorrentes ficam todas gravadas.
+
+import threading  # Para as transações concorrentes.
+import time  # Para medir a latência da confirmação.
+
+import desafio_1_sistema_bancario as banco
+from conftest import cadastrar_com_conta
+
+JANELA_MS = 200  # Bem maior que um fsync: se o gravador esperasse a janela, cada confirmação levaria isso.
+
+
+def test_transacao_sozinha_nao_espera_a_janela(abrir_bank):
+    bank = abrir_bank(durabilidade=banco.DURABILIDADE_AGRUPADA, janela_gravacao_ms=JANELA_MS)
+    conta = cadastrar_com_conta(bank)
+    latencias = []
+    for _ in range(5):
+        inicio = time.perf_counter()
+        assert bank.executar_transacao(conta, conta.cliente.cpf, "Deposito", 10) == (True, None)
+        latencias.append(time.perf_counter() - inicio)
+        assert bank.total_gravadas == bank.total_aceitas
+    assert sum(latencias) / len(latencias) < JANELA_MS / 1000 / 4, latencias
+    bank.fechar()
+
+
+def test_transacoes_concorrentes_ficam_gravadas(abrir_bank):
+    bank = abrir_bank(durabilidade=banco.DURABILIDADE_AGRUPADA, janela_gravacao_ms=JANELA_MS)
+    contas = [cadastrar_com_conta(bank, f"{i:011d}", f"Cliente {i}") for i in range(1, 9)]
+
+    def depositar(conta):
+        for _ in range(5):
+            assert bank.executar_transacao(conta, conta.cliente.cpf, "Deposito", 1) == (True, None)
+
+    threads = [threading.Thread(target=depositar, args=(conta,)) for conta in contas]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=30)
+        assert not t.is_alive()
+    assert bank.total_gravadas == bank.total_aceitas
+    bank.fechar()
+
+    bank = abrir_bank()
+    assert [c.saldo for c in bank.contas] == [5] * 8
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+# Consulta do extrato (Historico.consultar): período, tipos e valores, paginação por cursor
+# nos dois sentidos (inclusive com datas repetidas e fora de ordem) e o saldo depois de
+# cada transação.
+
+from datetime import date, datetime
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+
+# (tipo, valor, data): a quarta chega fora de ordem e três dividem o mesmo segundo.
+TRANSACOES = [
+    ("Deposito", 100, "01/10/2025 09:00:00"),
+    ("Saque", 20, "01/10/2025 12:00:00"),
+    ("Deposito", 50, "02/10/2025 08:00:00"),
+    ("Saque", 5, "01/10/2025 18:30:00"),
+    ("Deposito", 10, "03/10/2025 10:00:00"),
+    ("Saque", 15, "03/10/2025 10:00:00"),
+    ("TransferenciaRecebida", 30, "03/10/2025 10:00:00"),
+    ("Saque", 40, "04/10/2025 23:59:59"),
+]
+SALDO = 100 - 20 + 50 - 5 + 10 - 15 + 30 - 40  # 110
+
+
+@pytest.fixture
+def historico():
+    """Histórico com as TRANSACOES, na ordem em que chegaram."""
+    historico = banco.Historico()
+    for tipo, valor, data in TRANSACOES:
+        historico.adicionar_registro({"tipo": tipo, "valor": float(valor), "data": data, "cpf": "12345678901", "conta": "0001"})
+    return historico
+
+
+def valores(pagina):
+    """Valores das transações da página."""
+    return [t["valor"] for t in pagina["transacoes"]]
+
+
+def todas_as_paginas(historico, **filtros):
+    """Percorre as páginas pelo cursor e devolve os valores de todas, na ordem."""
+    resultado, cursor = [], None
+    while True:
+        pagina = historico.consultar(cursor=cursor, **filtros)
+        resultado += valores(pagina)
+        cursor = pagina["proximo_cursor"]
+        if cursor is None:
+            return resultado
+
+
+def test_ordem_de_data_e_periodo(historico):
+    assert valores(historico.consultar(limite=None)) == [100, 20, 5, 50, 10, 15, 30, 40]  # Empates na ordem de chegada.
+    assert valores(historico.consultar(inicio=date(2025, 10, 2), fim=date(2025, 10, 4), limite=None)) == [50, 10, 15, 30]
+    assert valores(historico.consultar(inicio="01/10/2025 12:00:00", fim="01/10/2025 18:30:00")) == [20]  # Fim exclusivo.
+    assert valores(historico.consultar(inicio=datetime(2025, 10, 3, 10))) == [10, 15, 30, 40]
+    assert valores(historico.consultar(inicio=date(2025, 10, 5))) == []
+
+
+def test_filtros_de_tipo_e_valor(historico):
+    assert valores(historico.consultar(tipos=["saque"])) == [20, 5, 15, 40]
+    assert valores(historico.consultar(tipos=["Depósito"], inicio=date(2025, 10, 2))) == [50, 10]
+    assert valores(historico.consultar(valor_minimo=15, valor_maximo="50")) == [20, 50, 15, 30, 40]
+    assert valores(historico.consultar(tipos=["saque", "deposito"], valor_maximo=10)) == [5, 10]
+    with pytest.raises(ValueError, match="tipo de transação inválido"):
+        historico.consultar(tipos=["emprestimo"])
+
+
+@pytest.mark.parametrize("decrescente", [False, True])
+@pytest.mark.parametrize("limite", [1, 2, 3])
+def test_cursor_percorre_tudo_sem_repetir_nem_pular(historico, decrescente, limite):
+    completa = valores(historico.consultar(limite=None, decrescente=decrescente))
+    assert completa == ([100, 20, 5, 50, 10, 15, 30, 40][::-1] if decrescente else [100, 20, 5, 50, 10, 15, 30, 40])
+    assert todas_as_paginas(historico, limite=limite, decrescente=decrescente) == completa
+    filtrada = valores(historico.consultar(limite=None, decrescente=decrescente, tipos=["saque"], inicio=date(2025, 10, 1), fim=date(2025, 10, 4)))
+    assert todas_as_paginas(historico, limite=limite, decrescente=decrescente, tipos=["saque"],
+                            inicio=date(2025, 10, 1), fim=date(2025, 10, 4)) == filtrada
+
+
+def test_ultima_pagina_sem_cursor_e_cursor_invalido(historico):
+    assert historico.consultar(limite=8)["proximo_cursor"] is None
+    assert historico.consultar(limite=7)["proximo_cursor"] is not None
+    with pytest.raises(ValueError, match="cursor inválido"):
+        historico.consultar(cursor="ontem")
+
+
+def test_saldo_depois_de_cada_transacao(historico):
+    pagina = historico.consultar(limite=None, saldo_final_centavos=SALDO * 100)
+    assert [t["saldo"] for t in pagina["transacoes"]] == [100, 80, 75, 125, 135, 120, 150, 110]
+    pagina = historico.consultar(limite=2, decrescente=True, saldo_final_centavos=SALDO * 100)
+    assert [(t["valor"], t["saldo"]) for t in pagina["transacoes"]] == [(40, 110), (30, 150)]
+
+
+def test_transacao_nova_entra_no_indice(historico):
+    historico.consultar()  # Monta o índice por data.
+    historico.adicionar_registro({"tipo": "Deposito", "valor": 1.0, "data": "02/10/2025 00:00:00", "cpf": "1", "conta": "0001"})
+    assert valores(historico.consultar(inicio=date(2025, 10, 2), fim=date(2025, 10, 3))) == [1, 50]
+
+
+def test_colunas_com_o_mesmo_tamanho_em_todas_as_plataformas(historico):
+    assert [getattr(historico, coluna).typecode for coluna in banco.Historico.COLUNAS] == ["B", "q", "i", "i", "q"]
+    assert sum(getattr(historico, coluna).itemsize for coluna in banco.Historico.COLUNAS) == 25  # Bytes por transação.
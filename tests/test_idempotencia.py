@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+# Chaves de idempotência: a repetição devolve o resultado original (aceito ou recusado),
+# inclusive depois de um reinício, e a mesma chave nunca é aplicada duas vezes.
+
+import threading  # Para os pedidos simultâneos com a mesma chave.
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+from armazenamento_sqlite import ArmazenamentoSQLite
+from conftest import CPF_DESTINO, CPF_TITULAR, cadastrar_com_conta
+
+
+def test_repeticao_de_transacao_aceita_nao_aplica_de_novo(abrir_bank):
+    bank = abrir_bank()
+    conta = cadastrar_com_conta(bank, saldo=100)
+    assert bank.executar_transacao(conta, CPF_TITULAR, "Saque", 30, chave_idempotencia="k1") == (True, None)
+    assert bank.executar_transacao(conta, CPF_TITULAR, "Saque", 30, chave_idempotencia="k1") == (True, None)
+    assert conta.saldo == 70
+    assert len(conta.historico.to_list()) == 2
+
+
+def test_repeticao_de_transacao_recusada_devolve_a_mesma_recusa(abrir_bank):
+    bank = abrir_bank()
+    conta = cadastrar_com_conta(bank, saldo=10)
+    recusa = (False, banco.MOTIVO_SALDO_INSUFICIENTE)
+    assert bank.executar_transacao(conta, CPF_TITULAR, "Saque", 50, chave_idempotencia="k1") == recusa
+    bank.executar_transacao(conta, CPF_TITULAR, "Deposito", 100)
+    assert bank.executar_transacao(conta, CPF_TITULAR, "Saque", 50, chave_idempotencia="k1") == recusa
+    assert conta.saldo == 110
+
+
+def test_mesma_chave_em_outra_transacao_e_recusada(abrir_bank):
+    bank = abrir_bank()
+    conta = cadastrar_com_conta(bank, saldo=100)
+    bank.executar_transacao(conta, CPF_TITULAR, "Saque", 10, chave_idempotencia="k1")
+    assert bank.executar_transacao(conta, CPF_TITULAR, "Saque", 20, chave_idempotencia="k1") == (False, banco.MOTIVO_CHAVE_IDEMPOTENCIA_REUTILIZADA)
+    assert conta.saldo == 90
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_chaves_aceitas_e_recusadas_sobrevivem_ao_reinicio(abrir_bank, tmp_path, backend):
+    def armazenamento():
+        return ArmazenamentoSQLite(tmp_path / "banco.db") if backend == "sqlite" else banco.ArmazenamentoJSON(tmp_path)
+
+    bank = abrir_bank(armazenamento())
+    origem = cadastrar_com_conta(bank, saldo=100)
+    destino = cadastrar_com_conta(bank, CPF_DESTINO, "João Teste")
+    assert bank.transferir(origem, destino, CPF_TITULAR, 40, chave_idempotencia="t1") == (True, None)
+    assert bank.transferir(origem, destino, CPF_TITULAR, 400, chave_idempotencia="t2") == (False, banco.MOTIVO_SALDO_INSUFICIENTE)
+    bank.armazenamento.fechar()
+
+    bank = abrir_bank(armazenamento())
+    origem, destino = bank.contas
+    bank.executar_transacao(origem, CPF_TITULAR, "Deposito", 500)
+    assert bank.transferir(origem, destino, CPF_TITULAR, 40, chave_idempotencia="t1") == (True, None)
+    assert bank.transferir(origem, destino, CPF_TITULAR, 400, chave_idempotencia="t2") == (False, banco.MOTIVO_SALDO_INSUFICIENTE)
+    assert (origem.saldo, destino.saldo) == (560, 40)
+
+    bank.save_all()  # As chaves também vão no snapshot dos contadores.
+    bank.armazenamento.fechar()
+    bank = abrir_bank(armazenamento())
+    origem, destino = bank.contas
+    assert bank.transferir(origem, destino, CPF_TITULAR, 400, chave_idempotencia="t2") == (False, banco.MOTIVO_SALDO_INSUFICIENTE)
+    assert (origem.saldo, destino.saldo) == (560, 40)
+
+
+def test_mesma_chave_simultanea_em_contas_diferentes_aplica_uma_vez(abrir_bank):
+    bank = abrir_bank(durabilidade=banco.DURABILIDADE_ADIADA)
+    contas = [cadastrar_com_conta(bank, f"{i:011d}", f"Cliente {i}") for i in range(1, 9)]
+    for rodada in range(8):  # Abaixo do limite de 10 transações diárias, mesmo que uma conta ganhe todas.
+        largada = threading.Barrier(len(contas))
+        resultados = []
+
+        def depositar(conta):
+            largada.wait()
+            resultados.append(bank.executar_transacao(conta, conta.cliente.cpf, "Deposito", 10, chave_idempotencia=f"r{rodada}"))
+
+        threads = [threading.Thread(target=depositar, args=(conta,)) for conta in contas]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert resultados.count((True, None)) == 1
+        assert sum(conta.saldo for conta in contas) == 10 * (rodada + 1)
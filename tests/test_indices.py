@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+# Índices do Bank (CPF -> cliente, número -> conta, CPF -> contas): mantidos ao cadastrar
+# e abrir contas, remontados pela carga (com as transações de cada conta no lugar certo),
+# usados no login e esvaziados por zerar_dados.
+
+from conftest import CPF_DESTINO, CPF_TITULAR, cadastrar_com_conta
+
+
+def respostas(monkeypatch, *textos):
+    """Faz input() devolver os textos informados, em ordem."""
+    fila = iter(textos)
+    monkeypatch.setattr("builtins.input", lambda _mensagem="": next(fila))
+
+
+def conferir_indices(bank):
+    """Os índices batem com as listas de clientes e contas do Bank."""
+    assert bank.clientes_por_cpf == {c.cpf: c for c in bank.clientes}
+    assert bank.contas_por_numero == {c.numero: c for c in bank.contas}
+    for cliente in bank.clientes:
+        assert bank.contas_por_cpf[cliente.cpf] == [c for c in bank.contas if c.cliente is cliente]
+
+
+def test_indices_acompanham_cadastro_e_carga(abrir_bank):
+    bank = abrir_bank()
+    primeira = cadastrar_com_conta(bank, saldo=100)
+    segunda = bank.abrir_conta(primeira.cliente)
+    outra = cadastrar_com_conta(bank, CPF_DESTINO, "João Teste", saldo=30)
+    assert bank.executar_transacao(segunda, CPF_TITULAR, "Deposito", 7) == (True, None)
+    assert bank.cadastrar_cliente("Repetido", CPF_TITULAR, "01/01/1990", "Rua B") is None
+    conferir_indices(bank)
+    assert bank.buscar_cliente(CPF_TITULAR) is primeira.cliente and bank.buscar_cliente("00000000000") is None
+    assert bank.buscar_conta(outra.numero) is outra and bank.buscar_conta("9999") is None
+    assert bank.primeira_conta_do_cliente(CPF_TITULAR) is primeira
+    bank.save_all()
+    assert bank.executar_transacao(outra, CPF_DESTINO, "Saque", 10) == (True, None)  # Fica só no journal.
+    bank.fechar()
+
+    bank = abrir_bank()
+    conferir_indices(bank)
+    saldos = {c.numero: (c.saldo, [t["valor"] for t in c.historico.to_list()]) for c in bank.contas}
+    assert saldos == {primeira.numero: (100, [100]), segunda.numero: (7, [7]), outra.numero: (20, [30, 10])}
+    assert bank.buscar_conta(segunda.numero).cliente is bank.buscar_cliente(CPF_TITULAR)
+
+
+def test_login_pelo_indice(abrir_bank, monkeypatch):
+    bank = abrir_bank()
+    cadastrar_com_conta(bank)
+    conta = cadastrar_com_conta(bank, CPF_DESTINO, "João Teste")
+    bank.abrir_conta(conta.cliente)
+    respostas(monkeypatch, CPF_DESTINO)
+    bank.identificar_usuario()
+    assert bank.usuario_logado is conta.cliente and bank.conta_logada is conta
+
+
+def test_zerar_dados_esvazia_os_indices(abrir_bank, monkeypatch):
+    bank = abrir_bank()
+    conta = cadastrar_com_conta(bank, saldo=50)
+    respostas(monkeypatch, "s")
+    bank.zerar_dados()
+    assert (bank.clientes_por_cpf, bank.contas_por_numero, bank.contas_por_cpf) == ({}, {}, {})
+    assert bank.buscar_conta(conta.numero) is None
+
+    nova = cadastrar_com_conta(bank)  # O mesmo CPF pode ser cadastrado de novo.
+    assert nova.numero == conta.numero and nova.saldo == 0
+    conferir_indices(bank)
+    bank.fechar()
+
+    bank = abrir_bank()
+    conferir_indices(bank)
+    assert [(c.numero, c.saldo) for c in bank.contas] == [(nova.numero, 0)]
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+# Journal: o que foi aceito antes de uma queda (sem snapshot e sem fechar o Bank) volta na
+# carga seguinte, com saldos, históricos, limites e chaves de idempotência.
+
+import os  # Para o ambiente do processo que é morto.
+import subprocess  # Para aplicar as transações em outro processo e matá-lo.
+import sys  # Para o interpretador do processo filho.
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+import razao_binario
+from conftest import CPF_DESTINO, CPF_TITULAR, RAIZ, cadastrar_com_conta
+
+# Aplica as transações no Bank da pasta e morre (os._exit) sem snapshot nem fechar nada.
+FILHO = """
+import os, sys
+from pathlib import Path
+import desafio_1_sistema_bancario as banco
+import razao_binario
+banco.EXIBIR_MENSAGENS = False
+pasta = Path(sys.argv[1])
+armazenamento = razao_binario.ArmazenamentoRazao(pasta) if sys.argv[2] == "razao" else banco.ArmazenamentoJSON(pasta)
+bank = banco.Bank(armazenamento)
+origem, destino = bank.contas
+cpf = origem.cliente.cpf
+print(bank.executar_transacao(origem, cpf, "Saque", 10, chave_idempotencia="s1"))
+print(bank.transferir(origem, destino, cpf, 25, chave_idempotencia="t1"))
+print(bank.executar_transacao(origem, cpf, "Saque", 900, chave_idempotencia="s2"))
+print(bank.liquidar_transferencias([(destino.numero, origem.numero, 5), (origem.numero, destino.numero, 5)]))
+os._exit(9)
+"""
+
+ARMAZENAMENTOS = {"json": banco.ArmazenamentoJSON, "razao": razao_binario.ArmazenamentoRazao}
+
+
+@pytest.mark.parametrize("tipo", ARMAZENAMENTOS)
+def test_journal_reaplicado_depois_de_uma_queda(tmp_path, tipo):
+    bank = banco.Bank(ARMAZENAMENTOS[tipo](tmp_path))
+    cadastrar_com_conta(bank, saldo=100)
+    cadastrar_com_conta(bank, CPF_DESTINO, "João Teste")
+    bank.save_all()
+    bank.fechar()
+
+    ambiente = dict(os.environ, PYTHONPATH=str(RAIZ))
+    filho = subprocess.run([sys.executable, "-c", FILHO, str(tmp_path), tipo], env=ambiente, capture_output=True, text=True, timeout=60)
+    assert filho.returncode == 9, filho.stderr
+    journal = tmp_path / banco.ARQ_JOURNAL.name
+    with open(journal, "a", encoding="utf-8") as f:
+        f.write('{"seq": 999, "conta": "00')  # Linha cortada pela queda: ignorada.
+
+    bank = banco.Bank(ARMAZENAMENTOS[tipo](tmp_path))
+    origem, destino = bank.contas
+    assert (origem.saldo, destino.saldo) == (65, 25)
+    assert [t["tipo"] for t in origem.historico.to_list()] == ["Deposito", "Saque", banco.TIPO_TRANSFERENCIA_ENVIADA]
+    assert origem.saques_realizados.quantidade() == 3  # Saque, transferência e o débito da compensação.
+    assert destino.saques_realizados.quantidade() == 1
+    assert bank.transacoes_diarias_por_conta.quantidade(origem.numero) == 5
+    assert bank.transacoes_diarias_por_conta.quantidade(destino.numero) == 3
+
+    # As repetições devolvem os resultados de antes da queda sem aplicar nada.
+    assert bank.executar_transacao(origem, CPF_TITULAR, "Saque", 10, chave_idempotencia="s1") == (True, None)
+    assert bank.transferir(origem, destino, CPF_TITULAR, 25, chave_idempotencia="t1") == (True, None)
+    assert bank.executar_transacao(origem, CPF_TITULAR, "Saque", 900, chave_idempotencia="s2") == (False, banco.MOTIVO_LIMITE_POR_SAQUE)
+    assert (origem.saldo, destino.saldo) == (65, 25)
+
+    bank.save_all()  # O snapshot seguinte leva tudo e esvazia o journal.
+    bank.fechar()
+    assert journal.stat().st_size == 0
+    bank = banco.Bank(ARMAZENAMENTOS[tipo](tmp_path))
+    assert [c.saldo for c in bank.contas] == [65, 25]
+    assert bank.contas[0].saques_realizados.quantidade() == 3
+    bank.fechar()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+# Limites diários: conversão dos formatos antigos e persistência dos contadores nos dois
+# armazenamentos.
+
+import json  # Para gravar transacoes_diarias.json no formato antigo.
+from datetime import date
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+from armazenamento_sqlite import ArmazenamentoSQLite
+from conftest import CPF_TITULAR, cadastrar_com_conta
+
+
+def _armazenamento(backend, pasta):
+    """Armazenamento do tipo pedido ("json" ou "sqlite") na pasta."""
+    return ArmazenamentoSQLite(pasta / "banco.db") if backend == "sqlite" else banco.ArmazenamentoJSON(pasta)
+
+
+def test_migrar_limites_dos_formatos_antigos():
+    hoje = date.today().isoformat()
+    agora = banco.epoca_agora()
+    fim_de_ontem = banco.momento_para_epoca(date.fromisoformat("2025-10-02")) + 86399
+    por_chave = banco.migrar_limites({f"0001_{hoje}": 2, "0002_2025-10-02": 1, "lixo": 3}, agora)
+    por_conta = banco.migrar_limites({"0001": {hoje: 2}, "0002": {"2025-10-02": 1, "dia-ruim": 4}}, agora)
+    esperado = {"formato": banco.FORMATO_LIMITES, "transacoes": {"0001": [agora, agora], "0002": [fim_de_ontem]}, "saques": {}}
+    assert por_chave == por_conta == esperado
+    assert banco.migrar_limites(esperado) is esperado  # Já no formato compacto.
+
+
+def test_contadores_antigos_do_json_sao_convertidos_na_carga(abrir_bank, tmp_path):
+    bank = abrir_bank()
+    conta = cadastrar_com_conta(bank)
+    bank.save_all()
+    bank.fechar()
+    arquivo = tmp_path / banco.ARQ_TRANSACOES_DIARIAS.name
+    arquivo.write_text(json.dumps({conta.numero: {date.today().isoformat(): 10}}), encoding="utf-8")
+
+    bank = abrir_bank()
+    conta = bank.contas[0]
+    assert bank.transacoes_diarias_por_conta.quantidade(conta.numero) == 10
+    assert bank.executar_transacao(conta, CPF_TITULAR, "Deposito", 5) == (False, banco.MOTIVO_LIMITE_TRANSACOES_DIARIAS)
+
+
+def test_contadores_antigos_do_sqlite_sao_convertidos_na_abertura(abrir_bank, tmp_path):
+    bank = abrir_bank(ArmazenamentoSQLite(tmp_path / "banco.db"))
+    conta = cadastrar_com_conta(bank)
+    bank.armazenamento.fechar()
+    antigo = ArmazenamentoSQLite(tmp_path / "banco.db")
+    with antigo.pool.transacao() as con:  # Como um banco de dados de antes da tabela usos_limites.
+        con.execute("DELETE FROM usos_limites")
+        con.execute("INSERT INTO transacoes_diarias (conta, dia, quantidade) VALUES (?, ?, ?)", (conta.numero, date.today().isoformat(), 10))
+    antigo.fechar()
+
+    bank = abrir_bank(ArmazenamentoSQLite(tmp_path / "banco.db"))
+    conta = bank.contas[0]
+    assert bank.transacoes_diarias_por_conta.quantidade(conta.numero) == 10
+    with bank.armazenamento.pool.conexao() as con:
+        assert con.execute("SELECT COUNT(*) FROM transacoes_diarias").fetchone()[0] == 0
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_contadores_de_saques_e_transacoes_sobrevivem_ao_reinicio(abrir_bank, tmp_path, backend):
+    bank = abrir_bank(_armazenamento(backend, tmp_path))
+    conta = cadastrar_com_conta(bank, saldo=500)
+    for _ in range(3):
+        assert bank.executar_transacao(conta, CPF_TITULAR, "Saque", 10) == (True, None)
+    bank.armazenamento.fechar()
+
+    def conferir():
+        bank = abrir_bank(_armazenamento(backend, tmp_path))
+        conta = bank.contas[0]
+        assert conta.saques_realizados.quantidade() == 3
+        assert bank.transacoes_diarias_por_conta.quantidade(conta.numero) == 4
+        assert bank.executar_transacao(conta, CPF_TITULAR, "Saque", 10) == (False, banco.MOTIVO_LIMITE_SAQUES_DIARIOS)
+        return bank
+
+    bank = conferir()  # Do journal (no SQLite, das linhas gravadas a cada transação).
+    bank.save_all()
+    bank.armazenamento.fechar()
+    conferir()  # Do snapshot.
+
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+# Listagem de contas: depois de as páginas estarem em cache, abrir contas e mudar saldos
+# (depósito, saque, transferência e compensação) aparece nas páginas seguintes, em cada
+# ordem e nos dois sentidos. Cada página é comparada com a ordenação feita do zero.
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+from conftest import cadastrar_com_conta
+
+TAMANHO = 2  # Contas por página: 7 contas dão 4 páginas.
+NOMES = ["Carla", "ana", "Bruno", "Élvis", "Diego", "bruna", "Fábio"]
+
+
+def esperado(bank, ordem, decrescente):
+    """Todas as páginas da ordem, montadas do zero a partir das contas do Bank."""
+    contas = sorted(bank.contas, key=lambda c: banco.ListagemContas.chave(ordem, c), reverse=decrescente)
+    itens = [{"numero": c.numero, "cliente": c.cliente.nome, "cpf": c.cliente.cpf, "saldo": c.saldo} for c in contas]
+    return [itens[i:i + TAMANHO] for i in range(0, len(itens), TAMANHO)]
+
+
+def conferir(bank, ordem):
+    """Confere todas as páginas (crescente e decrescente) com a ordenação feita do zero."""
+    for decrescente in (False, True):
+        paginas = esperado(bank, ordem, decrescente)
+        for numero, contas in enumerate(paginas, start=1):
+            pagina = bank.pagina_contas(ordem, numero, TAMANHO, decrescente)
+            assert pagina["contas"] == contas, (ordem, decrescente, numero)
+            assert (pagina["total"], pagina["total_paginas"]) == (len(bank.contas), len(paginas))
+        assert bank.pagina_contas(ordem, len(paginas) + 1, TAMANHO, decrescente)["contas"] == []
+
+
+@pytest.mark.parametrize("ordem", banco.ORDENS_LISTAGEM)
+def test_paginas_em_cache_acompanham_as_mudancas(abrir_bank, ordem):
+    bank = abrir_bank()
+    contas = [cadastrar_com_conta(bank, f"{i:011d}", nome, saldo=10 * (i % 4)) for i, nome in enumerate(NOMES[:6], start=1)]
+    conferir(bank, ordem)  # Monta os índices e põe as páginas em cache.
+
+    primeira = bank.pagina_contas(ordem, 1, TAMANHO)
+    assert bank.pagina_contas(ordem, 1, TAMANHO) is primeira  # Veio do cache.
+
+    bank.executar_transacao(contas[0], contas[0].cliente.cpf, "Deposito", 95)  # Vai para o fim da ordem por saldo.
+    conferir(bank, ordem)
+    bank.executar_transacao(contas[0], contas[0].cliente.cpf, "Saque", 100)  # E volta para o começo.
+    conferir(bank, ordem)
+    bank.transferir(contas[2], contas[3], contas[2].cliente.cpf, 30)
+    conferir(bank, ordem)
+    bank.liquidar_transferencias([(contas[3].numero, contas[4].numero, 25), (contas[5].numero, contas[1].numero, 5)])
+    conferir(bank, ordem)
+
+    nova = cadastrar_com_conta(bank, f"{7:011d}", NOMES[6])  # Conta nova: total e páginas mudam.
+    conferir(bank, ordem)
+    outra = bank.abrir_conta(contas[1].cliente)  # Segunda conta de um cliente, com o mesmo nome.
+    conferir(bank, ordem)
+    bank.executar_transacao(nova, nova.cliente.cpf, "Deposito", 7)
+    bank.executar_transacao(outra, outra.cliente.cpf, "Deposito", 1000 / 3)  # Saldo com centavos.
+    conferir(bank, ordem)
+
+
+def test_pagina_invalida():
+    listagem = banco.ListagemContas()
+    with pytest.raises(ValueError, match="ordem inválida"):
+        listagem.pagina("cpf")
+    with pytest.raises(ValueError):
+        listagem.pagina("numero", 0)
+    assert listagem.pagina("saldo") == {"contas": [], "pagina": 1, "total_paginas": 0, "total": 0}
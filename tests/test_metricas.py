@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+# Métricas: ativar_metricas conta as transações aceitas e recusadas por motivo (inclusive
+# as transferências e cada transferência de uma compensação), mede as latências e os
+# bytes gravados, e desativar_metricas devolve os métodos originais.
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+from conftest import CPF_DESTINO, CPF_TITULAR, cadastrar_com_conta
+
+
+@pytest.fixture
+def metricas():
+    """Métricas ativas e zeradas durante o teste."""
+    banco.METRICAS.zerar()
+    banco.ativar_metricas()
+    yield banco.METRICAS
+    banco.desativar_metricas()
+    banco.METRICAS.zerar()
+
+
+def test_contadores_por_tipo_e_motivo(abrir_bank, metricas):
+    bank = abrir_bank()
+    origem = cadastrar_com_conta(bank, saldo=100)
+    destino = cadastrar_com_conta(bank, CPF_DESTINO, "João Teste")
+    bank.executar_transacao(origem, CPF_TITULAR, "Saque", 1000)
+    bank.transferir(origem, destino, CPF_TITULAR, 10)
+    bank.transferir(origem, origem, CPF_TITULAR, 10)
+    bank.liquidar_transferencias([(origem.numero, destino.numero, 20), (destino.numero, origem.numero, 5), (origem.numero, "9999", 1)])
+
+    dados = metricas.instantaneo()
+    assert dados["operacoes"] == {
+        "Deposito": {"aceita": 1},
+        "Saque": {"recusada": 1},
+        "Transferencia": {"aceita": 3, "recusada": 2},
+    }
+    assert dados["recusas"] == {banco.MOTIVO_LIMITE_POR_SAQUE: 1, banco.MOTIVO_MESMA_CONTA: 1, banco.MOTIVO_CONTA_INEXISTENTE: 1}
+    for operacao in ("executar_transacao", "transferir", "liquidar_transferencias", "journal"):
+        assert dados["latencias"][operacao]["quantidade"] >= 1
+    assert dados["latencias"]["transferir"]["quantidade"] == 2
+    assert "salvar_json" not in dados["latencias"] and "carregar_json" not in dados["latencias"]
+    assert dados["bytes_gravados"][banco.ARQ_JOURNAL.name] > 0
+
+    banco.desativar_metricas()
+    assert not hasattr(banco.Bank.transferir, "__wrapped__") and not banco.metricas_ativas()
+    bank.transferir(origem, destino, CPF_TITULAR, 10)
+    assert metricas.instantaneo()["operacoes"]["Transferencia"] == {"aceita": 3, "recusada": 2}
+
+
+def test_texto_no_formato_do_prometheus(abrir_bank, metricas):
+    bank = abrir_bank()
+    conta = cadastrar_com_conta(bank, saldo=100)
+    bank.executar_transacao(conta, CPF_TITULAR, "Saque", 1000)
+    bank.save_all()
+
+    linhas = metricas.texto().splitlines()
+    assert 'banco_transacoes_total{tipo="Deposito",resultado="aceita"} 1' in linhas
+    assert 'banco_transacoes_total{tipo="Saque",resultado="recusada"} 1' in linhas
+    assert f'banco_recusas_total{{motivo="{banco.MOTIVO_LIMITE_POR_SAQUE}"}} 1' in linhas
+    assert 'banco_latencia_segundos_count{operacao="save_all"} 1' in linhas
+    assert 'banco_latencia_segundos_bucket{operacao="save_all",le="+Inf"} 1' in linhas
+    assert any(linha.startswith('banco_bytes_gravados_total{arquivo="contas.json"}') for linha in linhas)  # Sem o ".gN" da geração.
+    for tipo in ("histogram", "counter"):
+        assert any(linha.startswith("# TYPE") and linha.endswith(tipo) for linha in linhas)
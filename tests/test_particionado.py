@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+# Banco particionado: cada conta mora na partição int(numero) % N, as transferências entre
+# partições são recusadas pelo roteador, dividir_dados copia um banco comum para as
+# partições e particoes.json é gravado de forma atômica e conferido na abertura.
+
+from functools import partial  # Para a fábrica de armazenamento enviada aos processos.
+
+import pytest
+
+import banco_particionado as particionado
+import desafio_1_sistema_bancario as banco
+from conftest import cadastrar_com_conta
+
+
+def test_roteamento_pelo_numero_da_conta():
+    assert [banco.particao_da_conta(numero, 4) for numero in ("0001", "0004", "0006", "0011")] == [1, 0, 2, 3]
+    assert banco.particao_da_conta(7, 3) == banco.particao_da_conta("0007", 3) == 1
+    assert 0 <= banco.particao_da_conta("antiga-1", 4) < 4  # Números fora do padrão vão pelo CRC32.
+
+
+def test_roteador_recusa_transferencia_entre_particoes(tmp_path):
+    roteador = particionado.BancoParticionado(partial(particionado.armazenamento_da_particao, str(tmp_path)), 2)
+    try:
+        cpfs = ("12345678900", "12345678911")  # Um CPF par e um ímpar: clientes em partições diferentes.
+        numeros = []
+        for cpf in cpfs:
+            assert roteador.cadastrar_cliente("Cliente", cpf, "01/01/1990", "Rua A, 1")
+            numeros += [roteador.abrir_conta(cpf), roteador.abrir_conta(cpf)]
+        for cpf, (numero_a, numero_b) in zip(cpfs, (numeros[:2], numeros[2:])):
+            assert {int(numero_a) % 2, int(numero_b) % 2} == {int(cpf) % 2}  # Números só do resto da partição.
+        par, outra_par, impar, _ = numeros
+
+        def operacao(cpf, conta, tipo, valor, **campos):
+            return {"cpf": cpf, "conta": conta, "tipo": tipo, "valor": valor, **campos}
+
+        resultados = roteador.executar_lote([
+            operacao(cpfs[0], par, "deposito", 100),
+            operacao(cpfs[0], par, "transferencia", 10, destino=impar),
+            operacao(cpfs[0], par, "transferencia", 30, destino=outra_par),
+            operacao(cpfs[1], impar, "deposito", 5),
+        ])
+        assert resultados == [(True, None), (False, particionado.MOTIVO_TRANSFERENCIA_ENTRE_PARTICOES), (True, None), (True, None)]
+        assert [roteador.saldo(numero) for numero in (par, outra_par, impar)] == [70, 30, 5]
+        assert sorted(r["contas"] for r in roteador.resumo()) == [2, 2]
+    finally:
+        roteador.fechar()
+
+
+def test_dividir_dados_leva_cada_conta_para_a_sua_particao(abrir_bank, tmp_path):
+    bank = abrir_bank()
+    contas = [cadastrar_com_conta(bank, f"{i:011d}", f"Cliente {i}", saldo=10 * i) for i in range(1, 6)]
+    fabrica = partial(particionado.armazenamento_da_particao, tmp_path / "particoes")
+    resumo = particionado.dividir_dados(bank, fabrica, 3)
+    assert sum(r["contas"] for r in resumo) == 5
+
+    for indice in range(3):
+        particao = banco.Bank(fabrica(indice), particao=indice, total_particoes=3)
+        try:
+            esperadas = [c for c in contas if int(c.numero) % 3 == indice]
+            assert [(c.numero, c.saldo) for c in particao.contas] == [(c.numero, c.saldo) for c in esperadas]
+            for conta in particao.contas:
+                assert conta.cliente.cpf == bank.buscar_conta(conta.numero).cliente.cpf
+                assert len(conta.historico.to_list()) == 1
+        finally:
+            particao.fechar()
+    with pytest.raises(ValueError, match="já tem dados"):
+        particionado.dividir_dados(bank, fabrica, 3)
+
+
+def test_arquivo_de_particoes(tmp_path):
+    assert particionado.total_particoes_gravado(tmp_path) is None
+    particionado.conferir_total_particoes(tmp_path, 4)
+    arquivo = tmp_path / particionado.ARQ_PARTICOES
+    assert banco.ler_snapshot(arquivo) == {"total": 4}  # Com checksum, como os arquivos do snapshot.
+    assert not arquivo.with_name(arquivo.name + ".tmp").exists()
+    particionado.conferir_total_particoes(tmp_path, 4)
+    with pytest.raises(ValueError, match="4 partições"):
+        particionado.conferir_total_particoes(tmp_path, 2)
+
+    arquivo.write_text('{\n    "total": 3\n}', encoding="utf-8")  # Formato antigo (salvar_json).
+    assert particionado.total_particoes_gravado(tmp_path) == 3
+    for conteudo in ('{"total": 3', "[]", '{"total": 0}'):
+        arquivo.write_text(conteudo, encoding="utf-8")
+        with pytest.raises(banco.ArquivoCorrompido):
+            particionado.total_particoes_gravado(tmp_path)
+        with pytest.raises(banco.ArquivoCorrompido):
+            particionado.conferir_total_particoes(tmp_path, 3)
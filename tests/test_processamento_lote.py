@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+# Processamento em lote: leitura de JSONL e CSV, os motivos de recusa de cada registro e a
+# persistência a cada lote, antes de os resultados do lote serem entregues.
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+import processamento_lote
+from conftest import CPF_DESTINO, CPF_TITULAR, cadastrar_com_conta
+
+
+def test_ler_jsonl_troca_linhas_invalidas_por_registro_vazio(tmp_path):
+    arquivo = tmp_path / "operacoes.jsonl"
+    arquivo.write_text('{"cpf": "1", "valor": 10}\n\n{nada\n[1, 2]\n"x"\n3\nnull\n  {"tipo": "saque"}  \n', encoding="utf-8")
+    assert list(processamento_lote.ler_operacoes(arquivo)) == [{"cpf": "1", "valor": 10}, {}, {}, {}, {}, {}, {"tipo": "saque"}]
+
+
+def test_ler_csv_pelo_cabecalho(tmp_path):
+    arquivo = tmp_path / "operacoes.txt"
+    arquivo.write_text("cpf,conta,tipo,valor,destino\n123,0001,saque,\"10,50\",\n123,0001,transferencia,5,0002\n", encoding="utf-8")
+    operacoes = list(processamento_lote.ler_operacoes(arquivo, "CSV"))
+    assert operacoes == [
+        {"cpf": "123", "conta": "0001", "tipo": "saque", "valor": "10,50", "destino": ""},
+        {"cpf": "123", "conta": "0001", "tipo": "transferencia", "valor": "5", "destino": "0002"},
+    ]
+    assert processamento_lote.converter_valor(operacoes[0]["valor"]) == 10.5
+
+
+def test_motivos_de_recusa(abrir_bank, tmp_path):
+    bank = abrir_bank()
+    conta = cadastrar_com_conta(bank, saldo=100)
+    destino = cadastrar_com_conta(bank, CPF_DESTINO, "João Teste")
+    arquivo = tmp_path / "operacoes.jsonl"
+    arquivo.write_text("[1, 2]\n", encoding="utf-8")
+
+    def operacao(**campos):
+        return {"cpf": CPF_TITULAR, "conta": conta.numero, "tipo": "saque", "valor": 10, **campos}
+
+    operacoes = [
+        *processamento_lote.ler_operacoes(arquivo),
+        {"cpf": CPF_TITULAR, "conta": conta.numero, "tipo": "saque"},
+        operacao(tipo="transferencia"),
+        operacao(valor="dez"),
+        operacao(conta="9999"),
+        operacao(cpf=CPF_DESTINO),
+        operacao(tipo="transferencia", destino="9999"),
+        operacao(valor=1000),
+        operacao(tipo="emprestimo"),
+        operacao(valor="10,5"),
+        operacao(tipo="Transferência", destino=destino.numero, chave="t1"),
+    ]
+    resultados = list(processamento_lote.processar_lote(bank, operacoes))
+    assert [(r["registro"], r["motivo"]) for r in resultados] == [
+        (1, processamento_lote.MOTIVO_REGISTRO_INVALIDO),
+        (2, processamento_lote.MOTIVO_REGISTRO_INVALIDO),
+        (3, processamento_lote.MOTIVO_REGISTRO_INVALIDO),
+        (4, banco.MOTIVO_VALOR_INVALIDO),
+        (5, banco.MOTIVO_CONTA_INEXISTENTE),
+        (6, processamento_lote.MOTIVO_CPF_NAO_CONFERE),
+        (7, banco.MOTIVO_CONTA_INEXISTENTE),
+        (8, banco.MOTIVO_LIMITE_POR_SAQUE),
+        (9, banco.MOTIVO_TIPO_INVALIDO),
+        (10, None),
+        (11, None),
+    ]
+    assert resultados[10]["chave"] == "t1" and resultados[10]["destino"] == destino.numero
+    assert (conta.saldo, destino.saldo) == (79.5, 10)
+
+
+@pytest.mark.parametrize("processar", [processamento_lote.processar_lote, processamento_lote.processar_compensado])
+def test_persiste_a_cada_lote_antes_de_entregar_os_resultados(abrir_bank, processar):
+    bank = abrir_bank()
+    contas = [cadastrar_com_conta(bank, f"{i:011d}", f"Cliente {i}") for i in range(1, 6)]
+    persistencias = []
+    persistir = bank.persistir_pendentes
+
+    def contar():
+        persistencias.append(bank.total_aceitas)
+        persistir()
+
+    bank.persistir_pendentes = contar
+    operacoes = [{"cpf": c.cliente.cpf, "conta": c.numero, "tipo": "deposito", "valor": 1} for c in contas]
+    resultados = processar(bank, operacoes, tamanho_lote=2)
+    primeiros = [next(resultados), next(resultados)]
+    assert len(persistencias) == 1 and bank.total_gravadas == bank.total_aceitas
+    resto = list(resultados)
+    assert len(persistencias) == 3  # Dois lotes cheios e o final, com a operação que sobrou.
+    assert [r["registro"] for r in primeiros + resto] == [1, 2, 3, 4, 5]
+    assert all(r["ok"] for r in primeiros + resto)
+
+
+def test_processamento_concorrente_mantem_a_ordem(abrir_bank):
+    bank = abrir_bank()
+    contas = [cadastrar_com_conta(bank, f"{i:011d}", f"Cliente {i}", saldo=50) for i in range(1, 5)]
+    operacoes = [{"cpf": c.cliente.cpf, "conta": c.numero, "tipo": "saque", "valor": 20} for c in contas] * 3
+    resultados = list(processamento_lote.processar_concorrente(bank, operacoes, threads=4, tamanho_lote=5))
+    assert [r["registro"] for r in resultados] == list(range(1, 13))
+    assert sum(r["ok"] for r in resultados) == 8  # Duas de 20 por conta; a terceira passaria do saldo de 50.
+    assert [c.saldo for c in contas] == [10] * 4
+    assert bank.total_gravadas == bank.total_aceitas
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+# Relatórios com NumPy: cada total vetorizado (volumes por dia, agregados por conta,
+# maiores saldos, uso do limite de saques e distribuição dos saldos) é conferido com o
+# mesmo cálculo feito transação por transação em Python, sobre um mês de dados sintéticos.
+
+import statistics  # Para a mediana de referência.
+from collections import Counter, defaultdict  # Para os totais de referência.
+from datetime import datetime  # Para o dia de cada transação.
+
+import pytest
+
+import benchmark
+import desafio_1_sistema_bancario as banco
+
+pytest.importorskip("numpy")
+import relatorios  # noqa: E402
+
+
+@pytest.fixture
+def bank(abrir_bank, tmp_path):
+    """Bank com 12 contas e um mês de histórico, mais transferências de hoje."""
+    benchmark.gerar_dados(tmp_path, 700, transacoes_por_conta=60)
+    bank = abrir_bank()
+    for origem, destino in ((0, 5), (5, 11), (11, 0)):
+        origem, destino = bank.contas[origem], bank.contas[destino]
+        assert bank.transferir(origem, destino, origem.cliente.cpf, 7.35) == (True, None)
+    return bank
+
+
+def linhas(tabela):
+    """Linhas da tabela como dicionários."""
+    return [dict(zip(tabela["colunas"], linha)) for linha in tabela["linhas"]]
+
+
+def test_totais_iguais_aos_calculados_em_python(bank):
+    dias = defaultdict(lambda: [0, 0, 0, 0])  # Dia -> [depósitos, centavos, saques, centavos].
+    contas = []
+    for conta in bank.contas:
+        creditos = debitos = 0
+        saques_por_dia = Counter()
+        maior_saque = 0
+        for t in conta.historico:
+            dia = datetime.strptime(t["data"], banco.FORMATO_DATA).date().isoformat()
+            centavos = banco.para_centavos(t["valor"])
+            if banco.SINAL_TIPO[t["tipo"]] > 0:
+                dias[dia][0] += 1
+                dias[dia][1] += centavos
+                creditos += centavos
+            else:
+                dias[dia][2] += 1
+                dias[dia][3] += centavos
+                debitos += centavos
+                saques_por_dia[dia] += 1
+                maior_saque = max(maior_saque, centavos)
+        contas.append((conta, creditos, debitos, saques_por_dia, maior_saque))
+
+    tabelas = relatorios.gerar_relatorios(bank, top=5, faixas=4)
+    assert linhas(tabelas["volumes_diarios"]) == [
+        {"dia": dia, "depositos": d, "valor_depositos": vd / 100, "saques": s, "valor_saques": vs / 100, "liquido": (vd - vs) / 100}
+        for dia, (d, vd, s, vs) in sorted(dias.items())
+    ]
+
+    agregados = linhas(tabelas["agregados_por_conta"])
+    assert [(a["conta"], a["transacoes"], a["valor_depositos"], a["valor_saques"], a["saldo"]) for a in agregados] == [
+        (conta.numero, len(conta.historico), creditos / 100, debitos / 100, conta.saldo) for conta, creditos, debitos, _, _ in contas
+    ]
+    assert all(a["saldo_historico"] == pytest.approx(a["saldo"]) for a in agregados)  # Os dados sintéticos fecham.
+
+    por_saldo = sorted(bank.contas, key=lambda c: -c.saldo_centavos)
+    assert [(m["conta"], m["saldo"]) for m in linhas(tabelas["maiores_saldos"])] == [(c.numero, c.saldo) for c in por_saldo[:5]]
+
+    uso = {u["conta"]: u for u in linhas(tabelas["utilizacao_limite_saques"])}
+    assert sorted(uso) == [conta.numero for conta, *_, saques_por_dia, _ in contas if saques_por_dia]
+    for conta, _, _, saques_por_dia, maior_saque in contas:
+        if not saques_por_dia:
+            continue
+        assert uso[conta.numero]["dias_com_saque"] == len(saques_por_dia)
+        assert uso[conta.numero]["saques_por_dia"] == round(sum(saques_por_dia.values()) / len(saques_por_dia), 2)
+        assert uso[conta.numero]["utilizacao_maxima"] == round(max(saques_por_dia.values()) / conta.limite_saques, 4)
+        assert uso[conta.numero]["dias_no_limite"] == sum(n >= conta.limite_saques for n in saques_por_dia.values())
+        assert uso[conta.numero]["maior_saque"] == maior_saque / 100
+
+    saldos = [c.saldo for c in bank.contas]
+    faixas = linhas(tabelas["distribuicao_saldos"])
+    assert len(faixas) == 4 and sum(f["contas"] for f in faixas) == len(saldos)
+    assert (faixas[0]["de"], faixas[-1]["ate"]) == (round(min(saldos), 2), round(max(saldos), 2))
+    assert dict(tabelas["percentis_saldos"]["linhas"])[50] == pytest.approx(statistics.median(saldos), abs=0.005)
+
+
+def test_linha_de_comando_grava_as_tabelas(bank, tmp_path, capsys):
+    bank.fechar()
+    assert relatorios.main(["--pasta", str(tmp_path / "saida"), "--diretorio", str(tmp_path),
+                            "--relatorios", "maiores_saldos,percentis_saldos", "--top", "3"]) == 0
+    assert sorted(p.name for p in (tmp_path / "saida").iterdir()) == ["maiores_saldos.csv", "percentis_saldos.csv"]
+    assert (tmp_path / "saida" / "maiores_saldos.csv").read_text(encoding="utf-8").splitlines()[0] == "posicao,conta,cliente,saldo"
+    assert len((tmp_path / "saida" / "maiores_saldos.csv").read_text(encoding="utf-8").splitlines()) == 4
+    assert "maiores_saldos: 3 linhas" in capsys.readouterr().out
+    with pytest.raises(ValueError, match="relatório desconhecido: extrato"):
+        relatorios.gerar_relatorios(bank, ["extrato"])
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+# Réplica de leitura: históricos lidos sob demanda, da geração carregada, e descartados
+# quando o processo principal grava um snapshot de outro número de sequência.
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+import razao_binario
+from conftest import CPF_DESTINO, CPF_TITULAR, cadastrar_com_conta
+from replica_leitura import ReplicaLeitura
+
+ARMAZENAMENTOS = {"json": banco.ArmazenamentoJSON, "razao": razao_binario.ArmazenamentoRazao}
+
+
+@pytest.mark.parametrize("tipo", ARMAZENAMENTOS)
+def test_historicos_sob_demanda_e_descartados_no_snapshot_novo(abrir_bank, tmp_path, tipo):
+    def armazenamento():
+        return ARMAZENAMENTOS[tipo](tmp_path)
+
+    bank = abrir_bank(armazenamento())
+    a = cadastrar_com_conta(bank, saldo=100)
+    b = cadastrar_com_conta(bank, CPF_DESTINO, "João Teste", saldo=50)
+    bank.save_all()
+
+    replica = ReplicaLeitura(armazenamento, intervalo=0.01)
+    try:
+        conta_a, conta_b = replica.bank.contas
+        assert not conta_a.historico.carregado and not conta_b.historico.carregado
+        assert len(conta_a.historico.to_list()) == 1  # Lido agora, do snapshot.
+
+        # O processo principal instala outra geração: a réplica ainda lê a que carregou.
+        bank.executar_transacao(a, CPF_TITULAR, "Deposito", 10)
+        bank.executar_transacao(b, CPF_DESTINO, "Deposito", 20)
+        bank.save_all()
+        assert [t["valor"] for t in conta_b.historico.to_list()] == [50]
+
+        anterior = replica.bank
+        assert replica.atualizar() == 0  # Snapshot de outro seq: recarga, com os históricos de novo sob demanda.
+        assert replica.bank is not anterior and replica.recargas == 2
+        conta_a, conta_b = replica.bank.contas
+        assert not conta_a.historico.carregado and not conta_b.historico.carregado
+        assert [t["valor"] for t in conta_a.historico.to_list()] == [100, 10]
+        assert [t["valor"] for t in conta_b.historico.to_list()] == [50, 20]
+
+        bank.executar_transacao(a, CPF_TITULAR, "Saque", 30)  # Só no journal.
+        assert replica.atualizar() == 1
+        assert (conta_a.saldo, len(conta_a.historico.to_list())) == (80, 3)
+    finally:
+        replica.fechar()
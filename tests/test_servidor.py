@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+# Servidor: o protocolo de linhas JSON por uma conexão TCP de verdade (cadastro, login,
+# transações, extrato, repetição com chave de idempotência), as linhas inválidas ou grandes
+# demais e um erro inesperado em um comando, que vira uma resposta com o "id" do comando.
+
+import asyncio  # Para executar os comandos do servidor.
+import json  # Para o protocolo de linhas JSON.
+
+import desafio_1_sistema_bancario as banco
+import servidor
+from conftest import CPF_DESTINO, CPF_TITULAR, cadastrar_com_conta
+
+
+def conversar(bank, linhas):
+    """Abre um servidor em uma porta livre, envia as linhas por uma conexão e devolve as respostas até o fim da conexão."""
+    srv = servidor.ServidorBancario(bank, threads=2)
+
+    async def conversa():
+        tcp = await asyncio.start_server(srv.atender, "127.0.0.1", 0)
+        porta = tcp.sockets[0].getsockname()[1]
+        async with tcp:
+            reader, writer = await asyncio.open_connection("127.0.0.1", porta)
+            respostas = []
+            for linha in linhas:
+                writer.write(linha if isinstance(linha, bytes) else (json.dumps(linha) + "\n").encode("utf-8"))
+                await writer.drain()
+                resposta = await asyncio.wait_for(reader.readline(), 10)
+                if not resposta:
+                    break
+                respostas.append(json.loads(resposta))
+            fim = await asyncio.wait_for(reader.read(), 10)  # b"" quando o servidor encerra a conexão.
+            writer.close()
+            return respostas, fim
+
+    try:
+        return asyncio.run(conversa())
+    finally:
+        srv.executor.shutdown()
+
+
+def test_sessao_completa(abrir_bank):
+    bank = abrir_bank()
+    destino = cadastrar_com_conta(bank, CPF_DESTINO, "João Teste")
+    respostas, fim = conversar(bank, [
+        {"op": "saldo"},
+        {"op": "cadastrar", "cpf": CPF_TITULAR, "nome": "Maria Teste", "data_nascimento": "01/01/1990",
+         "endereco": "Rua A, 1 - Centro - Vitória/ES"},
+        {"op": "cadastrar", "cpf": CPF_TITULAR, "nome": "Outra"},
+        {"op": "login", "cpf": CPF_TITULAR},
+        {"op": "criar_conta", "id": "a"},
+        {"op": "deposito", "valor": 200, "id": "b"},
+        {"op": "saque", "valor": 600},
+        {"op": "saque", "valor": "muito"},
+        {"op": "transferencia", "destino": destino.numero, "valor": 50},
+        {"op": "transferencia", "destino": "9999", "valor": 50},
+        {"op": "extrato", "tipos": ["deposito"]},
+        {"op": "extrato", "tipos": ["emprestimo"]},
+        {"op": "voar"},
+        {"op": "sair"},
+    ])
+    assert fim == b""
+    assert respostas[0] == {"ok": False, "erro": servidor.ERRO_NAO_AUTENTICADO}
+    assert respostas[1] == {"ok": True, "cliente": "Maria Teste"}
+    assert respostas[2] == {"ok": False, "erro": servidor.ERRO_CLIENTE_EXISTENTE}
+    assert respostas[3]["ok"] and respostas[3]["conta"] is None
+    conta = respostas[4]["conta"]
+    assert respostas[4] == {"ok": True, "conta": conta, "id": "a"}
+    assert respostas[5] == {"ok": True, "saldo": 200, "id": "b"}
+    assert respostas[6] == {"ok": False, "erro": banco.MOTIVO_LIMITE_POR_SAQUE}
+    assert respostas[7] == {"ok": False, "erro": banco.MOTIVO_VALOR_INVALIDO}
+    assert respostas[8] == {"ok": True, "saldo": 150}
+    assert respostas[9] == {"ok": False, "erro": servidor.ERRO_CONTA_INEXISTENTE}
+    assert [(t["valor"], t["saldo"]) for t in respostas[10]["transacoes"]] == [(200, 200)]
+    assert respostas[11] == {"ok": False, "erro": servidor.ERRO_FILTRO_INVALIDO}
+    assert respostas[12] == {"ok": False, "erro": servidor.ERRO_COMANDO_INVALIDO}
+    assert respostas[13] == {"ok": True}
+    assert (bank.buscar_conta(conta).saldo, destino.saldo) == (150, 50)
+
+
+def test_repeticao_com_a_mesma_chave_nao_aplica_de_novo(abrir_bank):
+    bank = abrir_bank()
+    conta = cadastrar_com_conta(bank, saldo=100)
+    saque = {"op": "saque", "valor": 30, "chave": "caixa-1:42"}
+    respostas, _ = conversar(bank, [{"op": "login", "cpf": CPF_TITULAR}, saque, saque, {"op": "sair"}])
+    assert respostas[1] == respostas[2] == {"ok": True, "saldo": 70}
+    assert conta.saldo == 70 and len(conta.historico.to_list()) == 2
+
+
+def test_linha_que_nao_e_json_nao_encerra_a_sessao(abrir_bank):
+    bank = abrir_bank()
+    cadastrar_com_conta(bank, saldo=100)
+    respostas, fim = conversar(bank, [b"{nada\n", b"\xff\xfe\n", b"[1, 2]\n", {"op": "login", "cpf": CPF_TITULAR}, {"op": "sair"}])
+    assert respostas[:2] == [{"ok": False, "erro": servidor.ERRO_JSON_INVALIDO}] * 2
+    assert respostas[2] == {"ok": False, "erro": servidor.ERRO_COMANDO_INVALIDO}
+    assert respostas[3]["ok"] and respostas[3]["saldo"] == 100
+    assert fim == b""
+
+
+def test_linha_grande_demais_responde_json_invalido_e_encerra(abrir_bank):
+    bank = abrir_bank()
+    cadastrar_com_conta(bank, saldo=100)
+    enorme = b'{"op": "saldo", "x": "' + b"a" * (128 * 1024) + b'"}\n'
+    respostas, fim = conversar(bank, [{"op": "login", "cpf": CPF_TITULAR}, enorme, {"op": "saldo"}])
+    assert respostas[0]["ok"]
+    assert respostas[1:] == [{"ok": False, "erro": servidor.ERRO_JSON_INVALIDO}]
+    assert fim == b""
+
+
+def test_erro_inesperado_vira_resposta_com_id(abrir_bank, capsys):
+    bank = abrir_bank()
+    cadastrar_com_conta(bank, saldo=100)
+    srv = servidor.ServidorBancario(bank, threads=2)
+    sessao = servidor.Sessao()
+
+    def falhar(*args):
+        raise OSError("disco cheio")
+
+    async def conversa():
+        await srv.executar(sessao, {"op": "login", "cpf": CPF_TITULAR})
+        bank.executar_transacao = falhar
+        resposta = await srv.executar(sessao, {"op": "deposito", "valor": 10, "id": 7})
+        del bank.executar_transacao  # Volta ao método da classe.
+        return resposta, await srv.executar(sessao, {"op": "saldo", "id": 8})
+
+    try:
+        resposta, saldo = asyncio.run(conversa())
+    finally:
+        srv.executor.shutdown()
+    assert resposta == {"ok": False, "erro": servidor.ERRO_INTERNO, "id": 7}
+    assert saldo["ok"] and saldo["saldo"] == 100 and saldo["id"] == 8
+    assert "disco cheio" in capsys.readouterr().err
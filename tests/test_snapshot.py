@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+# Snapshots: checksum dos arquivos e confirmação do snapshot inteiro de uma só vez, mesmo
+# com o processo morto no meio da troca dos arquivos.
+
+import os  # Para o ambiente do processo que é morto.
+import subprocess  # Para gravar o snapshot em outro processo e matá-lo no meio.
+import sys  # Para o interpretador do processo filho.
+
+import pytest
+
+import desafio_1_sistema_bancario as banco
+import razao_binario
+from conftest import RAIZ, cadastrar_com_conta
+
+# Grava 3 depósitos no journal e um snapshot, matando o processo (os._exit) na N-ésima chamada
+# a os.replace. Imprime "completo" se o snapshot terminou antes disso.
+FILHO = """
+import os, sys
+from pathlib import Path
+import desafio_1_sistema_bancario as banco
+banco.EXIBIR_MENSAGENS = False
+pasta, parar_em = Path(sys.argv[1]), int(sys.argv[2])
+if sys.argv[3] == "razao":
+    import razao_binario
+    armazenamento = razao_binario.ArmazenamentoRazao(pasta)
+else:
+    armazenamento = banco.ArmazenamentoJSON(pasta)
+bank = banco.Bank(armazenamento)
+conta = bank.contas[0]
+for _ in range(3):
+    bank.executar_transacao(conta, conta.cliente.cpf, "Deposito", 10)
+trocar, chamadas = os.replace, [0]
+def replace(*args):
+    chamadas[0] += 1
+    if chamadas[0] == parar_em:
+        os._exit(9)
+    return trocar(*args)
+os.replace = replace
+bank.save_all()
+print("completo")
+"""
+
+
+def _armazenamento(tipo, pasta):
+    """Armazenamento do tipo pedido ("json" ou "razao") na pasta."""
+    if tipo == "razao":
+        return razao_binario.ArmazenamentoRazao(pasta)
+    return banco.ArmazenamentoJSON(pasta)
+
+
+@pytest.mark.parametrize("tipo", ["json", "razao"])
+def test_queda_entre_as_trocas_dos_arquivos_nao_reaplica_o_journal(tmp_path, tipo):
+    for parar_em in range(1, 20):
+        pasta = tmp_path / f"queda_{parar_em}"
+        pasta.mkdir()
+        bank = banco.Bank(_armazenamento(tipo, pasta))
+        cadastrar_com_conta(bank, saldo=100)
+        bank.save_all()
+        bank.fechar()
+
+        ambiente = dict(os.environ, PYTHONPATH=str(RAIZ))
+        filho = subprocess.run([sys.executable, "-c", FILHO, str(pasta), str(parar_em), tipo],
+                               env=ambiente, capture_output=True, text=True, timeout=60)
+        assert filho.returncode in (0, 9), filho.stderr
+
+        bank = banco.Bank(_armazenamento(tipo, pasta))
+        conta = bank.contas[0]
+        assert conta.saldo == 130, f"queda na troca {parar_em}"
+        assert len(conta.historico.to_list()) == 4, f"queda na troca {parar_em}"
+        bank.fechar()
+        if filho.returncode == 0:
+            assert "completo" in filho.stdout
+            break
+    else:
+        pytest.fail("o snapshot nunca terminou")
+
+
+def test_carga_somente_leitura_nao_conclui_snapshot_pela_metade(tmp_path, abrir_bank):
+    bank = abrir_bank()
+    cadastrar_com_conta(bank, saldo=50)
+    bank.save_all()
+    armazenamento = bank.armazenamento
+    # Simula a queda logo depois da confirmação: o meta aponta para uma geração ainda não instalada.
+    geracao = armazenamento.geracao + 1
+    banco.gravar_snapshot(armazenamento._arquivo_da_geracao(armazenamento.arq_contas, geracao), [c.to_dict() for c in bank.contas])
+    banco.gravar_snapshot(armazenamento.arq_snapshot_meta, {"seq": armazenamento.journal.seq, "geracao": geracao, "arquivos": ["contas.json"]})
+
+    leitor = banco.ArmazenamentoJSON(tmp_path)
+    leitor.somente_leitura = True
+    with pytest.raises(banco.SnapshotEmInstalacao):
+        leitor.carregar()
+    assert armazenamento._arquivo_da_geracao(armazenamento.arq_contas, geracao).exists()
+
+    banco.ArmazenamentoJSON(tmp_path).carregar()  # Uma carga normal conclui a instalação.
+    assert not armazenamento._arquivo_da_geracao(armazenamento.arq_contas, geracao).exists()
+
+
+def test_erro_ao_gravar_o_snapshot_nao_esvazia_o_journal(abrir_bank, monkeypatch):
+    bank = abrir_bank()
+    conta = cadastrar_com_conta(bank, saldo=20)
+    journal = bank.armazenamento.journal.arquivo
+    tamanho = journal.stat().st_size
+    assert tamanho > 0
+
+    def falhar(*args, **kwargs):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(banco, "gravar_snapshot", falhar)
+    with pytest.raises(OSError):
+        bank.save_all()
+    assert journal.stat().st_size == tamanho
+    monkeypatch.undo()
+    banco.EXIBIR_MENSAGENS = False
+
+    relido = banco.Bank(banco.ArmazenamentoJSON(bank.armazenamento.diretorio))
+    assert relido.buscar_conta(conta.numero).saldo == 20
+
+
+def test_livro_razao_grava_a_pasta_depois_da_troca(tmp_path, monkeypatch):
+    livro = razao_binario.LivroRazao(tmp_path / "extratos.razao")
+    registro = {"tipo": "Deposito", "valor": 10.0, "data": "01/02/2025 10:00:00", "cpf": "12345678901", "conta": "0001"}
+    sincronizadas = []
+    monkeypatch.setattr(banco, "_sincronizar_pasta", sincronizadas.append)
+    livro.gravar({"0001": (False, [registro])})
+    assert sincronizadas == [tmp_path]
+    livro.fechar()
+    assert razao_binario.exportar_para_json(tmp_path) == 1
+    assert sincronizadas == [tmp_path, tmp_path]
+
+
+@pytest.mark.parametrize("compressao", [None, "gzip", "lzma"])
+def test_snapshot_ida_e_volta(tmp_path, compressao):
+    dados = {"a": [1, 2, 3], "nome": "João"}
+    arquivo = tmp_path / "dados.json"
+    banco.gravar_snapshot(arquivo, dados, compressao)
+    assert banco.ler_snapshot(arquivo) == dados
+
+
+def test_snapshot_truncado_ou_alterado_e_detectado(tmp_path):
+    arquivo = tmp_path / "dados.json"
+    banco.gravar_snapshot(arquivo, list(range(100)))
+    conteudo = arquivo.read_bytes()
+
+    arquivo.write_bytes(conteudo[:-10])
+    with pytest.raises(banco.ArquivoCorrompido):
+        banco.ler_snapshot(arquivo)
+
+    arquivo.write_bytes(conteudo.replace(b"42", b"24"))
+    with pytest.raises(banco.ArquivoCorrompido):
+        banco.ler_snapshot(arquivo)
+
+    arquivo.write_bytes(b"")
+    with pytest.raises(banco.ArquivoCorrompido):
+        banco.ler_snapshot(arquivo)
+
+
+def test_carregar_json_nao_confunde_arquivo_ilegivel_com_vazio(tmp_path):
+    arquivo = tmp_path / "dados.json"
+    assert banco.carregar_json(arquivo) == []  # Não existe.
+    banco.salvar_json(arquivo, {"a": 1})
+    assert banco.carregar_json(arquivo) == {"a": 1}
+    arquivo.write_text('{"a": ', encoding="utf-8")
+    with pytest.raises(banco.ArquivoCorrompido):
+        banco.carregar_json(arquivo)
+
+
+def test_trecho_alterado_de_extratos_e_detectado(abrir_bank, tmp_path):
+    bank = abrir_bank()
+    conta = cadastrar_com_conta(bank, saldo=30)
+    bank.save_all()
+    extratos = tmp_path / banco.ARQ_EXTRATOS.name
+    estado = extratos.stat()
+    # Mesmo tamanho e mesma data de alteração: o índice continua valendo, só o CRC32 do trecho denuncia.
+    extratos.write_bytes(extratos.read_bytes().replace(b'"valor":30.0', b'"valor":31.0'))
+    os.utime(extratos, ns=(estado.st_atime_ns, estado.st_mtime_ns))
+
+    armazenamento = banco.ArmazenamentoJSON(tmp_path)
+    armazenamento.carregar()
+    assert armazenamento.indice_extratos is not None
+    with pytest.raises(banco.ArquivoCorrompido):
+        armazenamento.carregar_historico(conta.numero)
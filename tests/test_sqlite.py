@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+# Armazenamento SQLite: clientes, contas, transações e saldos voltam iguais depois de
+# fechar e reabrir (o histórico lido sob demanda pelo índice), o pool em modo WAL atende
+# várias threads e a migração copia os dados dos arquivos JSON.
+
+import threading  # Para as transações concorrentes pelo pool.
+
+import armazenamento_sqlite
+from armazenamento_sqlite import ArmazenamentoSQLite
+from conftest import CPF_DESTINO, CPF_TITULAR, cadastrar_com_conta
+
+
+def estado(bank):
+    """Clientes com suas contas e contas com saldo e valores do histórico."""
+    clientes = [(c.cpf, c.nome, [conta.numero for conta in c.contas]) for c in bank.clientes]
+    contas = [(c.numero, c.cliente.cpf, c.saldo, [(t["tipo"], t["valor"]) for t in c.historico.to_list()]) for c in bank.contas]
+    return clientes, contas
+
+
+def test_ida_e_volta(abrir_bank, tmp_path):
+    caminho = tmp_path / "banco.db"
+    bank = abrir_bank(ArmazenamentoSQLite(caminho))
+    origem = cadastrar_com_conta(bank, saldo=100)
+    destino = cadastrar_com_conta(bank, CPF_DESTINO, "João Teste")
+    segunda = bank.abrir_conta(destino.cliente)
+    assert bank.transferir(origem, segunda, CPF_TITULAR, 40) == (True, None)
+    assert bank.executar_transacao(origem, CPF_TITULAR, "Saque", 12.5) == (True, None)
+    assert bank.executar_transacao(origem, CPF_TITULAR, "Saque", 1000)[0] is False
+    esperado = estado(bank)
+    bank.fechar()
+
+    bank = abrir_bank(ArmazenamentoSQLite(caminho))
+    assert not any(c.historico.carregado for c in bank.contas)  # Cada histórico é lido quando for pedido.
+    assert estado(bank) == esperado
+    assert [c.saldo for c in bank.contas] == [47.5, 0, 40]
+    assert [t["valor"] for t in bank.armazenamento.consultar_extrato(bank, origem.numero)] == [100, 40, 12.5]
+
+    bank.save_all()  # O snapshot completo regrava as tabelas com o mesmo conteúdo.
+    bank.fechar()
+    assert estado(abrir_bank(ArmazenamentoSQLite(caminho))) == esperado
+
+
+def test_pool_em_wal_atende_varias_threads(abrir_bank, tmp_path):
+    armazenamento = ArmazenamentoSQLite(tmp_path / "banco.db", tamanho_pool=2)
+    with armazenamento.pool.conexao() as con:
+        assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    bank = abrir_bank(armazenamento)
+    contas = [cadastrar_com_conta(bank, f"{i:011d}", f"Cliente {i}") for i in range(1, 7)]
+
+    def depositar(conta):
+        for _ in range(5):
+            assert bank.executar_transacao(conta, conta.cliente.cpf, "Deposito", 2) == (True, None)
+
+    threads = [threading.Thread(target=depositar, args=(conta,)) for conta in contas]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=30)
+        assert not t.is_alive()
+    bank.fechar()
+
+    bank = abrir_bank(ArmazenamentoSQLite(tmp_path / "banco.db"))
+    assert [(c.saldo, len(c.historico.to_list())) for c in bank.contas] == [(10, 5)] * 6
+
+
+def test_migrar_dos_arquivos_json(abrir_bank, tmp_path, capsys):
+    bank = abrir_bank()
+    conta = cadastrar_com_conta(bank, saldo=80)
+    assert bank.executar_transacao(conta, CPF_TITULAR, "Saque", 30) == (True, None)  # Só no journal.
+    esperado = estado(bank)
+    bank.fechar()
+
+    assert armazenamento_sqlite.main(["migrar", str(tmp_path / "banco.db"), "--diretorio-json", str(tmp_path)]) == 0
+    assert "1 clientes e 1 contas migrados" in capsys.readouterr().out
+    bank = abrir_bank(ArmazenamentoSQLite(tmp_path / "banco.db"))
+    assert estado(bank) == esperado
+    assert len(bank.dados_limites()["transacoes"][conta.numero]) == 2  # Os usos dos limites diários também vêm.